@@ -60,6 +60,103 @@ class AssignmentRecord:
         }
 
 
+class EmployeeCalendar:
+    """
+    Precomputed per-employee state for one solve run.
+
+    Days are stored as offsets from ``base_ordinal`` (``date.toordinal()``)
+    so availability and worked days fit in integer bitsets. The run length
+    of consecutive worked days and the last worked day are maintained on
+    every assignment, which makes the consecutive-day and rest-day checks
+    O(1) for the chronological order in which the solver fills dates.
+    """
+
+    __slots__ = (
+        'base_ordinal', 'target_shifts', 'skills', 'required_skills',
+        'unavailable_mask', 'worked_mask', 'slots', 'shift_count',
+        'last_day', 'run_length', '_skill_scores'
+    )
+
+    def __init__(
+        self,
+        base_ordinal: int,
+        target_shifts: int = 0,
+        skills: Optional[Set[str]] = None,
+        required_skills: Optional[Dict[str, List[str]]] = None,
+        unavailable_mask: int = 0
+    ):
+        self.base_ordinal = base_ordinal
+        self.target_shifts = target_shifts
+        self.skills = frozenset(skills or ())
+        self.required_skills = required_skills or {}
+        self.unavailable_mask = unavailable_mask
+        self.worked_mask = 0
+        self.slots: Set[Tuple[int, str]] = set()
+        self.shift_count = 0
+        self.last_day: Optional[int] = None
+        self.run_length = 0
+        self._skill_scores: Dict[str, float] = {}
+
+    def day_of(self, work_date: date) -> int:
+        """Day offset of work_date relative to the calendar base"""
+        return work_date.toordinal() - self.base_ordinal
+
+    def is_unavailable(self, day: int) -> bool:
+        return day >= 0 and (self.unavailable_mask >> day) & 1 == 1
+
+    def is_assigned(self, day: int, shift: str) -> bool:
+        return (day, shift) in self.slots
+
+    def skill_match(self, shift: str) -> float:
+        """Fraction of required skills for shift that the employee has (cached)"""
+        match = self._skill_scores.get(shift)
+        if match is None:
+            required = frozenset(self.required_skills.get(shift, ()))
+            match = len(self.skills & required) / max(len(required), 1)
+            self._skill_scores[shift] = match
+        return match
+
+    def assign(self, day: int, shift: str) -> None:
+        """Record an assignment and update the run-length counters"""
+        self.slots.add((day, shift))
+        self.shift_count += 1
+        if day < 0:
+            return
+
+        already_worked = (self.worked_mask >> day) & 1 == 1
+        self.worked_mask |= 1 << day
+
+        if self.last_day is None or day > self.last_day:
+            if self.last_day is not None and day == self.last_day + 1:
+                self.run_length += 1
+            else:
+                self.run_length = 1
+            self.last_day = day
+        elif day < self.last_day and not already_worked:
+            # Out-of-order fill may close a gap before last_day
+            self.run_length = self._run_ending(self.last_day)
+
+    def consecutive_days_ending(self, day: int) -> int:
+        """Number of consecutive worked days ending on (and including) day"""
+        if self.last_day is None or day < 0 or day > self.last_day:
+            return 0
+        if day == self.last_day:
+            return self.run_length
+        return self._run_ending(day)
+
+    def days_since_last_work(self, day: int) -> Optional[int]:
+        """Days between the last worked day and day, or None if never worked"""
+        if self.last_day is None:
+            return None
+        return day - self.last_day
+
+    def _run_ending(self, day: int) -> int:
+        if (self.worked_mask >> day) & 1 == 0:
+            return 0
+        free_below = ~self.worked_mask & ((1 << (day + 1)) - 1)
+        return day + 1 - free_below.bit_length()
+
+
 class GreedySolverV2:
     """Advanced greedy scheduling solver with fairness and constraints"""
     
@@ -80,6 +177,10 @@ class GreedySolverV2:
         self.daily_coverage: Dict[date, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
         self.violations: List[Dict] = []
         self.quality_score = 0.0
+        
+        # Per-employee precomputed calendars (rebuilt on every solve)
+        self.calendars: Dict[str, EmployeeCalendar] = {}
+        self._base_ordinal: Optional[int] = None
     
     def _calculate_employee_priority(
         self,
@@ -106,22 +207,38 @@ class GreedySolverV2:
         if work_date in employee_unavailable:
             return -1000.0  # Not available
         
+        calendar = self._calendar(employee_id)
+        skill_match = len(employee_skills & required_skills) / max(len(required_skills), 1)
+        
+        return self._score_candidate(calendar, calendar.day_of(work_date), target_shifts, skill_match)
+    
+    def _score_candidate(
+        self,
+        calendar: EmployeeCalendar,
+        day: int,
+        target_shifts: int,
+        skill_match: float
+    ) -> float:
+        """
+        Score a candidate from its precomputed calendar.
+        Availability must already have been checked by the caller.
+        """
+        
         # Check consecutive days constraint
-        consecutive = self._count_consecutive_days_ending(employee_id, work_date)
+        consecutive = calendar.consecutive_days_ending(day)
         if consecutive >= self.max_consecutive_days:
             return -999.0  # Would exceed consecutive days
         
         # Check rest days constraint
-        if self._insufficient_rest_days(employee_id, work_date):
+        days_rest = calendar.days_since_last_work(day)
+        if days_rest is not None and days_rest < self.min_rest_days:
             return -998.0  # Insufficient rest
         
         # Calculate fairness score (primary objective)
-        current_shifts = len(self.employee_shifts.get(employee_id, []))
-        fairness_gap = target_shifts - current_shifts
+        fairness_gap = target_shifts - calendar.shift_count
         fairness_score = fairness_gap * self.fairness_weight
         
         # Calculate skill match score
-        skill_match = len(employee_skills & required_skills) / max(len(required_skills), 1)
         skill_score = skill_match * self.skill_weight
         
         # Calculate availability bonus (slightly prefer those with no constraints)
@@ -134,31 +251,74 @@ class GreedySolverV2:
     
     def _count_consecutive_days_ending(self, employee_id: str, work_date: date) -> int:
         """Count consecutive working days ending on work_date"""
-        shifts = self.employee_shifts.get(employee_id, [])
-        if not shifts:
-            return 0
-        
-        dates = sorted([s[0] for s in shifts])
-        consecutive = 0
-        current_date = work_date
-        
-        while current_date in dates:
-            consecutive += 1
-            current_date -= timedelta(days=1)
-        
-        return consecutive
+        calendar = self._calendar(employee_id)
+        return calendar.consecutive_days_ending(calendar.day_of(work_date))
     
     def _insufficient_rest_days(self, employee_id: str, work_date: date) -> bool:
         """Check if employee has had sufficient rest days before work_date"""
-        shifts = self.employee_shifts.get(employee_id, [])
-        if not shifts:
+        calendar = self._calendar(employee_id)
+        days_rest = calendar.days_since_last_work(calendar.day_of(work_date))
+        if days_rest is None:
             return False
         
-        last_work_date = max([s[0] for s in shifts])
-        days_rest = (work_date - last_work_date).days
-        
         return days_rest < self.min_rest_days
     
+    def _calendar(self, employee_id: str) -> EmployeeCalendar:
+        """
+        Get the calendar for an employee.
+        
+        Rebuilt from employee_shifts when the shift list was changed outside
+        of solve(), so both stay consistent.
+        """
+        shifts = self.employee_shifts.get(employee_id, [])
+        calendar = self.calendars.get(employee_id)
+        if calendar is not None and calendar.shift_count == len(shifts):
+            return calendar
+        
+        if calendar is not None:
+            rebuilt = EmployeeCalendar(
+                calendar.base_ordinal, calendar.target_shifts, calendar.skills,
+                calendar.required_skills, calendar.unavailable_mask
+            )
+        else:
+            base = self._base_ordinal
+            if base is None:
+                base = min((s[0].toordinal() for s in shifts), default=0)
+            rebuilt = EmployeeCalendar(base)
+        
+        for work_date, shift_type in shifts:
+            rebuilt.assign(rebuilt.day_of(work_date), shift_type)
+        
+        self.calendars[employee_id] = rebuilt
+        return rebuilt
+    
+    def _build_calendars(
+        self,
+        employees: Dict[str, Dict],
+        unavailable_dates: Dict,
+        period_start: date,
+        period_end: date
+    ) -> None:
+        """Precompute availability bitsets and skill data for all employees"""
+        self._base_ordinal = period_start.toordinal()
+        period_days = period_end.toordinal() - self._base_ordinal + 1
+        self.calendars = {}
+        
+        for emp_id, emp_data in employees.items():
+            unavailable_mask = 0
+            for raw_date in unavailable_dates.get(emp_id, []):
+                day = self._parse_date(raw_date).toordinal() - self._base_ordinal
+                if 0 <= day < period_days:
+                    unavailable_mask |= 1 << day
+            
+            self.calendars[emp_id] = EmployeeCalendar(
+                self._base_ordinal,
+                target_shifts=emp_data.get('target_shifts', 0),
+                skills=set(emp_data.get('skills', [])),
+                required_skills=emp_data.get('required_skills_for_shift', {}),
+                unavailable_mask=unavailable_mask
+            )
+    
     def solve(
         self,
         period_start: date,
@@ -199,11 +359,17 @@ class GreedySolverV2:
             dates_to_schedule.append(current_date)
             current_date += timedelta(days=1)
         
+        # Precompute per-employee calendars once instead of per slot
+        self._build_calendars(employees, unavailable_dates, period_start, period_end)
+        candidates = list(self.calendars.items())
+        
         # Main scheduling loop: iterate through dates and shifts
         for work_date in dates_to_schedule:
             if work_date not in required_coverage:
                 continue
             
+            day = work_date.toordinal() - self._base_ordinal
+            
             for shift_type, required_count in required_coverage[work_date].items():
                 # Find best candidates for this shift
                 current_coverage = self.daily_coverage[work_date].get(shift_type, 0)
@@ -213,24 +379,18 @@ class GreedySolverV2:
                     best_score = -float('inf')
                     
                     # Score all available employees
-                    for emp_id, emp_data in employees.items():
+                    for emp_id, calendar in candidates:
                         # Skip if already assigned to this shift on this date
-                        if self._already_assigned(emp_id, work_date, shift_type):
+                        if calendar.is_assigned(day, shift_type):
                             continue
                         
-                        target_shifts = emp_data.get('target_shifts', 0)
-                        employee_skills = set(emp_data.get('skills', []))
-                        required_skills = set(emp_data.get('required_skills_for_shift', {}).get(shift_type, []))
-                        unavailable = set(unavailable_dates.get(emp_id, []))
-                        
-                        # Convert string dates to date objects if needed
-                        if unavailable and isinstance(next(iter(unavailable), None), str):
-                            unavailable = {self._parse_date(d) for d in unavailable}
-                        
-                        score = self._calculate_employee_priority(
-                            emp_id, work_date, shift_type, target_shifts,
-                            employee_skills, required_skills, unavailable
-                        )
+                        if calendar.is_unavailable(day):
+                            score = -1000.0  # Not available
+                        else:
+                            score = self._score_candidate(
+                                calendar, day, calendar.target_shifts,
+                                calendar.skill_match(shift_type)
+                            )
                         
                         if score > best_score:
                             best_score = score
@@ -241,6 +401,7 @@ class GreedySolverV2:
                         record = AssignmentRecord(best_candidate, work_date, shift_type, best_score)
                         self.assignments.append(record)
                         self.employee_shifts[best_candidate].append((work_date, shift_type))
+                        self.calendars[best_candidate].assign(day, shift_type)
                         self.daily_coverage[work_date][shift_type] += 1
                     else:
                         # Record unfilled requirement
@@ -259,10 +420,8 @@ class GreedySolverV2:
     
     def _already_assigned(self, employee_id: str, work_date: date, shift_type: str) -> bool:
         """Check if employee already assigned to shift on this date"""
-        for shift in self.employee_shifts.get(employee_id, []):
-            if shift[0] == work_date and shift[1] == shift_type:
-                return True
-        return False
+        calendar = self._calendar(employee_id)
+        return calendar.is_assigned(calendar.day_of(work_date), shift_type)
     
     def _parse_date(self, date_str: str) -> date:
         """Parse ISO format date string"""
@@ -14,12 +14,13 @@ DRAAD214 FIX:
 - This fixes "have 0" issue where all employees were marked as having no capacity
 """
 
+import heapq
 import logging
-import os
 from datetime import date, timedelta
 from typing import Dict, List, Set, Tuple, Optional
 from dataclasses import dataclass
-from supabase import create_client
+from db_client import get_client
+from roster_repository import RosterRepository
 
 from pairing_logic import PairingLogic, PairingRule, BlockingCalendar
 
@@ -45,12 +46,17 @@ class CapacityLoaderDB:
     Uses correct source: roster_employee_services table.
     """
     
-    def __init__(self):
-        """Initialize database client"""
-        self.client = create_client(
-            os.getenv('SUPABASE_URL'),
-            os.getenv('SUPABASE_KEY')
-        )
+    def __init__(self, client=None, repository: Optional[RosterRepository] = None):
+        """Initialize database client
+        
+        Args:
+            client: Supabase client (default: shared pooled client)
+            repository: RosterRepository of the current run; its memoized
+                        capacity and assignment tables are reused if it
+                        belongs to the roster being loaded
+        """
+        self.client = client or get_client()
+        self.repository = repository
     
     def load_capacity(self, roster_id: str) -> Dict[Tuple[str, str], int]:
         """
@@ -73,21 +79,19 @@ class CapacityLoaderDB:
         logger.info(f"📊 DRAAD214 FIX: Loading capacity from roster_employee_services...")
         
         capacity = {}
+        repository = self.repository
+        if repository is None or repository.roster_id != roster_id:
+            repository = RosterRepository(self.client, roster_id)
         
         try:
             # STEP 1: Load BASE CAPACITY from roster_employee_services
             # This is the CORRECT source per GREEDYAlternatief.txt section 2.5
             logger.info(f"  STEP 1: Querying roster_employee_services...")
             
-            base_records = self.client.table('roster_employee_services') \
-                .select('employee_id, service_id, aantal') \
-                .eq('roster_id', roster_id) \
-                .eq('actief', True) \
-                .gt('aantal', 0) \
-                .execute()
+            base_records = repository.capacity()  # actief=TRUE AND aantal>0
             
             # Build initial capacity dict from base records
-            for record in base_records.data:
+            for record in base_records:
                 emp_id = record.get('employee_id')
                 service_id = record.get('service_id')
                 aantal = record.get('aantal', 0)
@@ -97,21 +101,17 @@ class CapacityLoaderDB:
                     capacity[key] = aantal
                     logger.debug(f"    Loaded: {emp_id} + {service_id[:8]}... = {aantal}")
             
-            logger.info(f"  ✅ BASE CAPACITY: {len(base_records.data)} records loaded")
+            logger.info(f"  ✅ BASE CAPACITY: {len(base_records)} records loaded")
             logger.info(f"     Unique (emp, service) combinations: {len(capacity)}")
             
             # STEP 2: Subtract pre-planned assignments (status=1)
             # Per GREEDYAlternatief.txt section 2.5.1
             logger.info(f"  STEP 2: Subtracting pre-planned assignments...")
             
-            preplanned_records = self.client.table('roster_assignments') \
-                .select('employee_id, service_id') \
-                .eq('roster_id', roster_id) \
-                .eq('status', 1) \
-                .execute()
+            preplanned_records = repository.assignments(statuses=(1,))
             
             subtract_count = 0
-            for record in preplanned_records.data:
+            for record in preplanned_records:
                 emp_id = record.get('employee_id')
                 service_id = record.get('service_id')
                 
@@ -146,6 +146,64 @@ class CapacityLoaderDB:
             return {}
 
 
+class CandidateBuckets:
+    """
+    Per-(team, service_id) candidate lists built once from CapacityLoaderDB output.
+    
+    Each bucket keeps employees in employees_data order and only holds
+    employees with remaining capacity for the service. Employees are dropped
+    from every bucket of a service as soon as their capacity reaches zero,
+    so a task only visits candidates that can actually take it.
+    """
+    
+    def __init__(self, employees_data: Dict, capacity: Dict[Tuple[str, str], int]):
+        self.employees_data = employees_data
+        self.capacity = capacity
+        
+        services_by_employee: Dict[str, List[str]] = {}
+        for (emp_id, service_id), remaining in capacity.items():
+            if remaining > 0:
+                services_by_employee.setdefault(emp_id, []).append(service_id)
+        
+        # service_id -> ordered {emp_id: None} of employees with capacity > 0
+        self._holders: Dict[str, Dict[str, None]] = {}
+        for emp_id in employees_data:
+            for service_id in services_by_employee.get(emp_id, ()):
+                self._holders.setdefault(service_id, {})[emp_id] = None
+        
+        # service_id -> {team: ordered {emp_id: None}}, filled on first use
+        self._buckets: Dict[str, Dict[Optional[str], Dict[str, None]]] = {}
+    
+    def holders_count(self, service_id: str) -> int:
+        """Number of employees with remaining capacity for service_id"""
+        return len(self._holders.get(service_id, ()))
+    
+    def candidates(self, service_id: str, team: Optional[str]) -> List[str]:
+        """Employees with capacity for service_id whose team matches (or is unset)"""
+        team_buckets = self._buckets.setdefault(service_id, {})
+        bucket = team_buckets.get(team)
+        if bucket is None:
+            bucket = {}
+            for emp_id in self._holders.get(service_id, ()):
+                emp_team = self.employees_data[emp_id].get('team')
+                if emp_team and team and emp_team != team:
+                    continue  # Team mismatch
+                bucket[emp_id] = None
+            team_buckets[team] = bucket
+        return list(bucket)
+    
+    def consume(self, emp_id: str, service_id: str) -> None:
+        """Use one unit of capacity and drop the employee when it runs out"""
+        capacity_key = (emp_id, service_id)
+        if capacity_key not in self.capacity:
+            return
+        self.capacity[capacity_key] -= 1
+        if self.capacity[capacity_key] <= 0:
+            self._holders.get(service_id, {}).pop(emp_id, None)
+            for bucket in self._buckets.get(service_id, {}).values():
+                bucket.pop(emp_id, None)
+
+
 class PairingIntegratedSolver:
     """
     GreedySolverV2 with integrated pairing logic.
@@ -243,7 +301,7 @@ class PairingIntegratedSolver:
         }
         
         logger.info(f"✅ Pairing-integrated solve completed")
-        logger.info(f"   Blocked slots: {len(self.pairing_logic.blocking_calendar.blocked_slots)}")
+        logger.info(f"   Blocked slots: {self.pairing_logic.blocking_calendar.blocked_count}")
         logger.info(f"   Pairing violations: {len(solution['pairing_data']['pairing_report'].get('pairing_violations', []))}")
         
         return solution
@@ -284,6 +342,9 @@ class PairingIntegratedSolver:
         # Build service_id -> service_data map
         service_map = {s.get('id'): s for s in service_types.values()}
         
+        # Candidate buckets per (team, service_id), built once for all tasks
+        buckets = CandidateBuckets(employees_data, capacity)
+        
         assignments_made = []
         blocked_by_pairing = 0
         soft_penalties_applied = 0
@@ -306,25 +367,11 @@ class PairingIntegratedSolver:
                 # Already filled
                 continue
             
-            # Find candidate employees
-            candidates = []
-            for emp_id, emp_data in employees_data.items():
-                # DRAAD214 FIX: Check capacity using CORRECT loaded dict
-                capacity_key = (emp_id, service_id)
-                remaining = capacity.get(capacity_key, 0)
-                
-                if remaining <= 0:
-                    no_capacity += 1
-                    continue  # No capacity left
-                
-                # Check team match
-                emp_team = emp_data.get('team')
-                if emp_team and team and emp_team != team:
-                    continue  # Team mismatch
-                
-                candidates.append(emp_id)
+            # Find candidate employees (capacity > 0 and team match)
+            candidates = buckets.candidates(service_id, team)
+            no_capacity += len(employees_data) - buckets.holders_count(service_id)
             
-            # Sort candidates with pairing awareness
+            # Score candidates with pairing awareness
             scored_candidates = []
             for emp_id in candidates:
                 base_score = 0.0  # Could be from other factors
@@ -350,13 +397,11 @@ class PairingIntegratedSolver:
                 final_score = base_score + penalty
                 scored_candidates.append((emp_id, final_score))
             
-            # Sort by score (descending)
-            scored_candidates.sort(key=lambda x: x[1], reverse=True)
+            # Select the best `aantal` candidates by score (descending, stable)
+            best_candidates = heapq.nlargest(aantal, scored_candidates, key=lambda x: x[1])
             
             # Assign to best candidates
-            for idx in range(min(aantal, len(scored_candidates))):
-                best_emp_id, score = scored_candidates[idx]
-                
+            for best_emp_id, score in best_candidates:
                 # Record assignment
                 assignment = {
                     'task_id': task_id,
@@ -377,16 +422,14 @@ class PairingIntegratedSolver:
                 )
                 
                 # Update capacity (DRAAD214: Update our correct dict)
-                capacity_key = (best_emp_id, service_id)
-                if capacity_key in capacity:
-                    capacity[capacity_key] -= 1
+                buckets.consume(best_emp_id, service_id)
         
         logger.info(f"\n📊 DRAAD214 PROCESSING STATISTICS:")
         logger.info(f"   Total assignments made: {len(assignments_made)}")
         logger.info(f"   Skipped (no capacity): {no_capacity}")
         logger.info(f"   Blocked by pairing: {blocked_by_pairing}")
         logger.info(f"   Soft penalties applied: {soft_penalties_applied}")
-        logger.info(f"   Total blocked slots created: {len(self.pairing_logic.blocking_calendar.blocked_slots)}")
+        logger.info(f"   Total blocked slots created: {self.pairing_logic.blocking_calendar.blocked_count}")
         
         return {
             'status': 'solved_with_pairing',
@@ -396,7 +439,7 @@ class PairingIntegratedSolver:
                 'skipped_no_capacity': no_capacity,
                 'blocked_by_pairing': blocked_by_pairing,
                 'soft_penalties_applied': soft_penalties_applied,
-                'blocked_slots_created': len(self.pairing_logic.blocking_calendar.blocked_slots)
+                'blocked_slots_created': self.pairing_logic.blocking_calendar.blocked_count
             },
             'draad214_note': 'Capacity loaded from roster_employee_services with pre-planned subtractions'
         }
@@ -61,21 +61,58 @@ class PairingRule:
         return f"PairingRule({self.service_code_first} → {self.service_code_second}, {self.block_type})"
 
 
+# Dagdeel -> index used in BlockingCalendar slot keys
+DAGDEEL_INDEX: Dict[str, int] = {"O": 0, "M": 1, "A": 2}
+
+
+def _date_ordinal(work_date) -> int:
+    """Convert a date or ISO date string to its proleptic ordinal"""
+    if isinstance(work_date, str):
+        return date.fromisoformat(work_date).toordinal()
+    return work_date.toordinal()
+
+
 class BlockingCalendar:
     """Manage blocked slots (status=2 assignments)"""
     
     def __init__(self):
         """Initialize blocking calendar"""
-        self.blocked_slots: Set[Tuple[str, str, str]] = set()
-        # blocked_slots: {(date_str, dagdeel, employee_id), ...}
-        
-        self.blocking_reasons: Dict[Tuple[str, str, str], Dict] = {}
-        # blocking_reasons[(date_str, dagdeel, employee_id)] = {
+        self._blocks: Dict[str, Dict[Tuple[int, int], Dict]] = {}
+        # _blocks[employee_id][(date_ordinal, dagdeel_index)] = {
         #   "reason": "DIO/DDO pairing",
         #   "previous_date": "2025-12-25",
         #   "previous_dagdeel": "O",
         #   "previous_service_code": "DIO"
         # }
+        
+        # Dagdelen outside O/M/A get an index on first use
+        self._dagdeel_index: Dict[str, int] = dict(DAGDEEL_INDEX)
+        self._dagdelen: List[str] = sorted(DAGDEEL_INDEX, key=DAGDEEL_INDEX.get)
+        self.blocked_count = 0
+    
+    def _slot_key(self, work_date, dagdeel: str) -> Tuple[int, int]:
+        index = self._dagdeel_index.get(dagdeel)
+        if index is None:
+            index = len(self._dagdelen)
+            self._dagdeel_index[dagdeel] = index
+            self._dagdelen.append(dagdeel)
+        return (_date_ordinal(work_date), index)
+    
+    def iter_blocks(self):
+        """Yield (date_str, dagdeel, employee_id, reason) for every blocked slot"""
+        for employee_id, slots in self._blocks.items():
+            for (ordinal, index), reason in slots.items():
+                yield date.fromordinal(ordinal).isoformat(), self._dagdelen[index], employee_id, reason
+    
+    @property
+    def blocked_slots(self) -> Set[Tuple[str, str, str]]:
+        """Snapshot of blocked slots as {(date_str, dagdeel, employee_id), ...}"""
+        return {(d, dagdeel, emp) for d, dagdeel, emp, _ in self.iter_blocks()}
+    
+    @property
+    def blocked_employees(self) -> Set[str]:
+        """Employees with at least one blocked slot"""
+        return set(self._blocks)
     
     def block_slot(
         self,
@@ -99,10 +136,12 @@ class BlockingCalendar:
             previous_dagdeel: Shift part of previous assignment
             previous_service_code: Service code of previous assignment
         """
-        key = (str(work_date), dagdeel, employee_id)
-        self.blocked_slots.add(key)
+        slots = self._blocks.setdefault(employee_id, {})
+        key = self._slot_key(work_date, dagdeel)
+        if key not in slots:
+            self.blocked_count += 1
         
-        self.blocking_reasons[key] = {
+        slots[key] = {
             "reason": reason,
             "previous_date": str(previous_date) if previous_date else None,
             "previous_dagdeel": previous_dagdeel,
@@ -114,28 +153,29 @@ class BlockingCalendar:
     
     def is_blocked(self, work_date: date, dagdeel: str, employee_id: str) -> bool:
         """Check if slot is blocked"""
-        key = (str(work_date), dagdeel, employee_id)
-        return key in self.blocked_slots
+        slots = self._blocks.get(employee_id)
+        return bool(slots) and self._slot_key(work_date, dagdeel) in slots
     
     def get_blocking_reason(self, work_date: date, dagdeel: str, employee_id: str) -> Optional[Dict]:
         """Get reason for blocking"""
-        key = (str(work_date), dagdeel, employee_id)
-        return self.blocking_reasons.get(key)
+        slots = self._blocks.get(employee_id)
+        if not slots:
+            return None
+        return slots.get(self._slot_key(work_date, dagdeel))
     
     def clear_employee_blocks(self, employee_id: str) -> None:
         """Clear all blocks for an employee (e.g., when rescheduling)"""
-        keys_to_remove = [k for k in self.blocked_slots if k[2] == employee_id]
-        for key in keys_to_remove:
-            self.blocked_slots.discard(key)
-            self.blocking_reasons.pop(key, None)
+        removed = len(self._blocks.pop(employee_id, {}))
+        self.blocked_count -= removed
         
-        logger.debug(f"Cleared {len(keys_to_remove)} blocks for {employee_id}")
+        logger.debug(f"Cleared {removed} blocks for {employee_id}")
     
     def export_blocked_slots(self) -> List[Dict]:
         """Export blocked slots for database storage"""
         result = []
-        for date_str, dagdeel, employee_id in sorted(self.blocked_slots):
-            reason = self.blocking_reasons.get((date_str, dagdeel, employee_id), {})
+        for date_str, dagdeel, employee_id, reason in sorted(
+            self.iter_blocks(), key=lambda slot: slot[:3]
+        ):
             result.append({
                 "employee_id": employee_id,
                 "date": date_str,
@@ -155,6 +195,11 @@ class PairingLogic:
         self.pairing_rules: List[PairingRule] = []
         self.blocking_calendar = BlockingCalendar()
         
+        # Rules compiled for O(1) lookup, see _compiled_rules()
+        self._rules_by_pair: Dict[Tuple[str, str], List[PairingRule]] = {}
+        self._rules_by_first: Dict[str, List[PairingRule]] = {}
+        self._compiled_rule_count = 0
+        
         # Track employee history during processing
         self.employee_last_assignment: Dict[str, Tuple[date, str, str]] = {}
         # employee_last_assignment[employee_id] = (date, dagdeel, service_code)
@@ -167,6 +212,29 @@ class PairingLogic:
         self.pairing_rules.append(rule)
         logger.info(f"Registered pairing rule: {rule}")
     
+    def _compiled_rules(self) -> Dict[Tuple[str, str], List[PairingRule]]:
+        """
+        Rules indexed by (first_code, second_code).
+        
+        Recompiled when pairing_rules changed since the last call, so rules
+        appended directly to the list are picked up as well.
+        """
+        if self._compiled_rule_count != len(self.pairing_rules):
+            self._rules_by_pair = defaultdict(list)
+            self._rules_by_first = defaultdict(list)
+            for rule in self.pairing_rules:
+                self._rules_by_pair[(rule.service_code_first, rule.service_code_second)].append(rule)
+                self._rules_by_first[rule.service_code_first].append(rule)
+            self._rules_by_pair = dict(self._rules_by_pair)
+            self._rules_by_first = dict(self._rules_by_first)
+            self._compiled_rule_count = len(self.pairing_rules)
+        return self._rules_by_pair
+    
+    def _rules_starting_with(self, service_code: str) -> List[PairingRule]:
+        """Rules where service_code is the FIRST service of the pair"""
+        self._compiled_rules()
+        return self._rules_by_first.get(service_code, [])
+    
     def register_standard_pairing_rules(self, service_types: Dict[str, Dict]) -> None:
         """
         Register standard DIO/DDO pairing rules based on service_types table.
@@ -234,34 +302,33 @@ class PairingLogic:
         Apply blocking for next day if this assignment matches a pairing rule.
         """
         # Check all pairing rules where this service is the FIRST in the pair
-        for rule in self.pairing_rules:
-            if rule.service_code_first == service_code:
-                # This service triggers blocking
-                next_date = work_date + timedelta(days=1)
-                
-                if rule.block_type == "hard":
-                    # Hard block: prevent assignment of second service next day
-                    self.blocking_calendar.block_slot(
-                        work_date=next_date,
-                        dagdeel=dagdeel,
-                        employee_id=employee_id,
-                        reason=f"{service_code} → cannot have {rule.service_code_second} next {dagdeel}",
-                        previous_date=work_date,
-                        previous_dagdeel=dagdeel,
-                        previous_service_code=service_code
-                    )
-                    
-                    logger.info(
-                        f"Hard blocking: {employee_id} cannot do {rule.service_code_second} "
-                        f"on {next_date} {dagdeel} due to {service_code} on {work_date}"
-                    )
+        for rule in self._rules_starting_with(service_code):
+            # This service triggers blocking
+            next_date = work_date + timedelta(days=1)
+            
+            if rule.block_type == "hard":
+                # Hard block: prevent assignment of second service next day
+                self.blocking_calendar.block_slot(
+                    work_date=next_date,
+                    dagdeel=dagdeel,
+                    employee_id=employee_id,
+                    reason=f"{service_code} → cannot have {rule.service_code_second} next {dagdeel}",
+                    previous_date=work_date,
+                    previous_dagdeel=dagdeel,
+                    previous_service_code=service_code
+                )
                 
-                elif rule.block_type == "soft":
-                    # Soft block: discourage but allow (handled in scoring)
-                    logger.debug(
-                        f"Soft discourage: {employee_id} {rule.service_code_second} "
-                        f"on {next_date} {dagdeel} after {service_code}"
-                    )
+                logger.info(
+                    f"Hard blocking: {employee_id} cannot do {rule.service_code_second} "
+                    f"on {next_date} {dagdeel} due to {service_code} on {work_date}"
+                )
+            
+            elif rule.block_type == "soft":
+                # Soft block: discourage but allow (handled in scoring)
+                logger.debug(
+                    f"Soft discourage: {employee_id} {rule.service_code_second} "
+                    f"on {next_date} {dagdeel} after {service_code}"
+                )
     
     def is_eligible_for_assignment(
         self,
@@ -277,9 +344,9 @@ class PairingLogic:
             (is_eligible, blocking_reason)
         """
         # Check hard blocks
-        if self.blocking_calendar.is_blocked(work_date, dagdeel, employee_id):
-            reason = self.blocking_calendar.get_blocking_reason(work_date, dagdeel, employee_id)
-            return False, reason.get("reason") if reason else "Blocked (reason unknown)"
+        reason = self.blocking_calendar.get_blocking_reason(work_date, dagdeel, employee_id)
+        if reason is not None:
+            return False, reason.get("reason") or "Blocked (reason unknown)"
         
         # Check soft constraints (discouraged but allowed)
         # This would be handled in scoring, not blocking
@@ -309,25 +376,30 @@ class PairingLogic:
         penalty = 0.0
         
         # Check if this service was recently assigned
-        if employee_id in self.employee_last_assignment:
-            last_date, last_dagdeel, last_service_code = self.employee_last_assignment[employee_id]
-            
-            # Check if pairing rule exists for (last_service_code → service_code)
-            for rule in self.pairing_rules:
-                if (rule.service_code_first == last_service_code and
-                    rule.service_code_second == service_code):
-                    
-                    # Check if it's a soft constraint
-                    if rule.block_type == "soft":
-                        days_since_last = (work_date - last_date).days
-                        if days_since_last == 1 and dagdeel == last_dagdeel:
-                            # Same day part, day after: apply soft penalty
-                            penalty = -0.2  # 20% penalty
-                            logger.debug(
-                                f"Soft penalty for {employee_id}: "
-                                f"{rule.service_code_first} → {service_code} "
-                                f"(penalty: {penalty})"
-                            )
+        last = self.employee_last_assignment.get(employee_id)
+        if last is None:
+            return penalty
+        last_date, last_dagdeel, last_service_code = last
+        
+        # Check if pairing rule exists for (last_service_code → service_code)
+        rules = self._compiled_rules().get((last_service_code, service_code))
+        if not rules or dagdeel != last_dagdeel:
+            return penalty
+        
+        days_since_last = _date_ordinal(work_date) - _date_ordinal(last_date)
+        if days_since_last != 1:
+            return penalty
+        
+        for rule in rules:
+            # Check if it's a soft constraint
+            if rule.block_type == "soft":
+                # Same day part, day after: apply soft penalty
+                penalty = -0.2  # 20% penalty
+                logger.debug(
+                    f"Soft penalty for {employee_id}: "
+                    f"{rule.service_code_first} → {service_code} "
+                    f"(penalty: {penalty})"
+                )
         
         return penalty
     
@@ -351,8 +423,8 @@ class PairingLogic:
                 }
                 for rule in self.pairing_rules
             ],
-            "blocked_slots_count": len(self.blocking_calendar.blocked_slots),
-            "employees_affected": len(set(k[2] for k in self.blocking_calendar.blocked_slots)),
+            "blocked_slots_count": self.blocking_calendar.blocked_count,
+            "employees_affected": len(self.blocking_calendar.blocked_employees),
             "blocking_statistics": self._calculate_blocking_statistics(),
             "pairing_violations": self._detect_pairing_violations()
         }
@@ -366,10 +438,7 @@ class PairingLogic:
             "by_date": defaultdict(int)
         }
         
-        for (date_str, dagdeel, employee_id) in self.blocking_calendar.blocked_slots:
-            reason = self.blocking_calendar.get_blocking_reason(
-                date.fromisoformat(date_str), dagdeel, employee_id
-            )
+        for date_str, dagdeel, employee_id, reason in self.blocking_calendar.iter_blocks():
             if reason:
                 stats["by_reason"][reason.get("reason", "unknown")] += 1
             stats["by_employee"][employee_id] += 1
@@ -384,6 +453,7 @@ class PairingLogic:
     def _detect_pairing_violations(self) -> List[Dict]:
         """Detect instances where pairing rules were violated"""
         violations = []
+        rules_by_pair = self._compiled_rules()
         
         for employee_id, history in self.assignments_history.items():
             for i in range(len(history) - 1):
@@ -393,10 +463,8 @@ class PairingLogic:
                 # Check if consecutive days with same dagdeel
                 if next_date == current_date + timedelta(days=1) and next_dagdeel == current_dagdeel:
                     # Check if this violates a pairing rule
-                    for rule in self.pairing_rules:
-                        if (rule.service_code_first == current_service and
-                            rule.service_code_second == next_service and
-                            rule.block_type == "hard"):
+                    for rule in rules_by_pair.get((current_service, next_service), ()):
+                        if rule.block_type == "hard":
                             violations.append({
                                 "employee_id": employee_id,
                                 "first_date": str(current_date),
@@ -10,6 +10,8 @@ from typing import List, Tuple
 from models import WorkspaceState, Assignment
 from writer import BatchWriter
 from trigger_verify import TriggerVerifier
+from db_client import db_phase, get_request_counts
+from roster_repository import RosterRepository, get_snapshot_cache
 
 logger = logging.getLogger(__name__)
 
@@ -23,15 +25,21 @@ class GreedyProcessorWithDB:
     - Database consistency checks
     """
     
-    def __init__(self, workspace: WorkspaceState, base_processor):
+    def __init__(self, workspace: WorkspaceState, base_processor, client=None,
+                 repository: RosterRepository = None):
         """Initialize processor with DB integration.
         
         Args:
             workspace: WorkspaceState from FASE 2
             base_processor: FASE 2 GreedyProcessor instance
+            client: Supabase client shared by writer and verifier
+                    (default: shared pooled client)
+            repository: RosterRepository of this run (created if None)
         """
         self.workspace = workspace
         self.base_processor = base_processor
+        self.client = client
+        self.repository = repository
         self.writer = None
         self.verifier = None
     
@@ -41,7 +49,7 @@ class GreedyProcessorWithDB:
         Flow:
         1. FASE 1-3: Load, Process, Pairing (from base processor)
         2. FASE 4A: Batch write assignments
-        3. FASE 4B: Batch write blocking records
+        3. FASE 4B: Batch write blocking records (same pipeline as 4A)
         4. FASE 4C: Verify trigger execution
         5. Return comprehensive results
         
@@ -59,11 +67,11 @@ class GreedyProcessorWithDB:
         }
         
         try:
-            # FASE 4A: Batch write assignments
-            logger.info("FASE 4A: BATCH WRITE ASSIGNMENTS")
+            # FASE 4A+4B: Batch write assignments and blocking records
+            logger.info("FASE 4A/4B: BATCH WRITE ASSIGNMENTS + BLOCKING RECORDS")
             logger.info("-" * 40)
             
-            self.writer = BatchWriter(self.workspace)
+            self.writer = BatchWriter(self.workspace, client=self.client)
             
             # Show statistics before write
             stats = self.writer.get_write_statistics()
@@ -72,21 +80,28 @@ class GreedyProcessorWithDB:
             logger.info(f"  Blocking assignments: {stats['blocking_assignments']}")
             logger.info(f"  Open slots: {stats['open_slots']}")
             
-            # Execute write
-            write_result = self.writer.write_assignments()
+            # Execute write (one chunked, concurrent pipeline for both types)
+            with db_phase('write'):
+                pipeline_result = self.writer.write_all()
+            result['phases']['write_pipeline'] = pipeline_result
+            
+            write_result = {
+                **pipeline_result['by_status'][1],
+                'duration_ms': pipeline_result['duration_ms'],
+                'error': pipeline_result['error']
+            }
+            blocking_result = {
+                **pipeline_result['by_status'][2],
+                'duration_ms': pipeline_result['duration_ms'],
+                'error': pipeline_result['error']
+            }
             result['phases']['write_assignments'] = write_result
+            result['phases']['write_blocking'] = blocking_result
             
             if write_result['failed'] > 0:
                 logger.error(f"❌ Assignment write failed: {write_result['error']}")
                 return result
             
-            # FASE 4B: Batch write blocking records
-            logger.info("\nFASE 4B: BATCH WRITE BLOCKING RECORDS")
-            logger.info("-" * 40)
-            
-            blocking_result = self.writer.write_blocking_records()
-            result['phases']['write_blocking'] = blocking_result
-            
             if blocking_result['failed'] > 0:
                 logger.error(f"❌ Blocking write failed: {blocking_result['error']}")
                 # Don't return - blocking failures are not critical
@@ -95,9 +110,21 @@ class GreedyProcessorWithDB:
             logger.info("\nFASE 4C: VERIFY TRIGGER EXECUTION")
             logger.info("-" * 40)
             
-            self.verifier = TriggerVerifier(self.workspace)
-            verify_result = self.verifier.verify_all_triggers()
+            if self.repository is None:
+                self.repository = RosterRepository(
+                    self.writer.client, self.workspace.rosterid,
+                    snapshot_cache=get_snapshot_cache()
+                )
+            self.verifier = TriggerVerifier(
+                self.workspace,
+                client=self.writer.client,
+                repository=self.repository
+            )
+            with db_phase('verify'):
+                verify_result = self.verifier.verify_all_triggers()
             result['phases']['trigger_verification'] = verify_result
+            result['db_requests'] = get_request_counts()
+            result['db_reads'] = self.repository.stats()
             
             # Summary
             logger.info("\n" + "="*60)
@@ -138,6 +165,10 @@ class GreedyProcessorWithDB:
         logger.info(f"  Blocking failed: {blocking_phase.get('failed', 0)}")
         logger.info(f"  Write duration: {blocking_phase.get('duration_ms', 0)}ms")
         
+        pipeline_phase = result['phases'].get('write_pipeline', {})
+        logger.info(f"  Chunks: {len(pipeline_phase.get('chunks', []))}")
+        logger.info(f"  Throughput: {pipeline_phase.get('rows_per_s', 0)} rows/s")
+        
         logger.info(f"\n✅ TRIGGER VERIFICATION:")
         if verify_phase.get('all_passed'):
             logger.info(f"  Status: ✅ ALL CHECKS PASSED")
@@ -151,6 +182,12 @@ class GreedyProcessorWithDB:
             status = "✅" if check_result.get('passed', False) else "⚠️"
             message = check_result.get('message', 'No message')
             logger.info(f"    {status} {check_name}: {message}")
+        
+        db_requests = result.get('db_requests', {})
+        if db_requests:
+            logger.info(f"\n✅ DATABASE REQUESTS (shared client):")
+            for phase, count in db_requests.items():
+                logger.info(f"  {phase}: {count}")
 
 
 class DatabaseOperationOrchestrator:
@@ -161,13 +198,15 @@ class DatabaseOperationOrchestrator:
     2. FASE 4: Database integration (via enhanced processor)
     """
     
-    def __init__(self, rooster_id: str):
+    def __init__(self, rooster_id: str, client=None):
         """Initialize orchestrator.
         
         Args:
             rooster_id: UUID of rooster to process
+            client: Supabase client for all phases (default: shared pooled client)
         """
         self.rooster_id = rooster_id
+        self.client = client
         self.workspace = None
         self.base_processor = None
         self.db_processor = None
@@ -211,7 +250,8 @@ class DatabaseOperationOrchestrator:
             
             self.db_processor = GreedyProcessorWithDB(
                 self.workspace,
-                self.base_processor
+                self.base_processor,
+                client=self.client
             )
             
             db_result = self.db_processor.execute_with_database()
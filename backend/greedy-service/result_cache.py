@@ -0,0 +1,162 @@
+"""Content-addressed cache of solve results.
+
+Results are keyed by a sha256 over the canonical JSON of the effective
+solver inputs, so any changed input row yields a different key and stale
+results are never returned; there is no explicit invalidation.
+
+Two tiers: an in-process LRU and an optional SQLite file that survives
+restarts (hits there are promoted to memory). Values are pickled, so the
+SQLite file must only be written by this service.
+
+This module is kept byte-identical in solver/result_cache.py (CP-SAT
+service) and backend/greedy-service/result_cache.py (greedy service): the
+two services are deployed separately and share no package. Change both;
+tests/test_greedy_api_single_flight.py fails when they differ.
+
+Configuration (environment):
+    SOLVE_RESULT_CACHE_SIZE          in-memory entries (default 64, 0 = off)
+    SOLVE_RESULT_CACHE_PATH          SQLite file for the disk tier (default: none)
+    SOLVE_RESULT_CACHE_DISK_ENTRIES  max rows in the disk tier (default 1000)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MEMORY_ENTRIES = int(os.getenv('SOLVE_RESULT_CACHE_SIZE', '64'))
+DISK_PATH = os.getenv('SOLVE_RESULT_CACHE_PATH') or None
+DISK_ENTRIES = int(os.getenv('SOLVE_RESULT_CACHE_DISK_ENTRIES', '1000'))
+
+
+def content_key(namespace: str, payload: Any) -> str:
+    """sha256 of namespace + canonical JSON of payload (dates etc. via str)."""
+    raw = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(f"{namespace}\n{raw}".encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU with an optional SQLite tier and hit/miss counters"""
+
+    def __init__(self, max_entries: int = MEMORY_ENTRIES, db_path: Optional[str] = DISK_PATH,
+                 disk_entries: int = DISK_ENTRIES):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.disk_entries = disk_entries
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, used_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        """Return a fresh copy of the cached result, or None"""
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+            elif self._db is not None:
+                row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    blob = row[0]
+                    self._db.execute("UPDATE results SET used_at = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    self._remember(key, blob)
+                    self.disk_hits += 1
+            if blob is None:
+                self.misses += 1
+                return None
+        return pickle.loads(blob)
+
+    def put(self, key: str, value: Any) -> None:
+        """Store value in both tiers, evicting least recently used entries"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._remember(key, blob)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, used_at) VALUES (?, ?, ?)",
+                    (key, blob, time.time())
+                )
+                self._db.execute(
+                    "DELETE FROM results WHERE key NOT IN "
+                    "(SELECT key FROM results ORDER BY used_at DESC LIMIT ?)",
+                    (self.disk_entries,)
+                )
+                self._db.commit()
+
+    def clear(self) -> None:
+        """Drop all entries in both tiers (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the service's health/metrics output"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            disk_rows = (
+                self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+                if self._db is not None else None
+            )
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'disk_entries': disk_rows,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+    def _remember(self, key: str, blob: bytes) -> None:
+        self._entries[key] = blob
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+_shared_cache: Optional[ResultCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Process-wide result cache (None if SOLVE_RESULT_CACHE_SIZE=0)"""
+    global _shared_cache
+    if MEMORY_ENTRIES <= 0:
+        return None
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = ResultCache()
+                logger.info(
+                    f"ResultCache initialized (max_entries={_shared_cache.max_entries}, "
+                    f"disk={_shared_cache.db_path or 'off'})"
+                )
+    return _shared_cache
@@ -0,0 +1,460 @@
+"""Roster repository: memoized, column-projected reads per solve.
+
+One RosterRepository is created per pipeline run (solve context) and
+shared by the engine, capacity loader and trigger verifier. Each table is
+read at most once (paginated on its primary key); accessors derive the
+filtered views every caller needs in memory. Call invalidate() after
+writing so later readers see the new state.
+
+Repeat solves of the same roster can pass a RosterSnapshotCache: the
+roster-scoped tables in DELTA_TABLES are then kept between runs and only
+rows with updated_at at or after the last watermark are fetched. This
+relies on BEFORE UPDATE triggers that set updated_at on every write
+(supabase/migrations/20251231_roster_updated_at_triggers.sql); inserts get
+it from the column default and deletes show up in the row count. Any
+doubt about the merged snapshot (row count mismatch, missing timestamps,
+snapshot too old, query error) falls back to a full reload.
+
+Configuration (environment):
+    ROSTER_DELTA_SYNC            set to 0 to disable delta syncs in the pipelines
+    ROSTER_SNAPSHOT_MAX_ROSTERS  rosters kept in the snapshot cache (default 32)
+    ROSTER_SNAPSHOT_MAX_AGE_S    seconds before a full reload is forced (default 900)
+    ROSTER_SNAPSHOT_SKEW_S       seconds subtracted from the watermark (default 120)
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, TypedDict
+
+logger = logging.getLogger(__name__)
+
+# Column projections: union of what the engines read from each table
+ROSTER_COLUMNS = "id, start_date, end_date, status"
+DEMAND_COLUMNS = "id, roster_id, service_id, date, dagdeel, team, aantal, service_types(code, is_systeem)"
+ASSIGNMENT_COLUMNS = (
+    "id, roster_id, employee_id, date, dagdeel, status, service_id, "
+    "blocked_by_date, blocked_by_dagdeel, blocked_by_service_id, source, is_protected"
+)
+CAPACITY_COLUMNS = "id, roster_id, employee_id, service_id, aantal, actief"
+EMPLOYEE_COLUMNS = "id, voornaam, achternaam, team, dienstverband, actief"
+SERVICE_TYPE_COLUMNS = "id, code, is_systeem"
+
+# PostgREST returns at most this many rows per request by default
+PAGE_SIZE = 1000
+
+# Roster-scoped tables whose updated_at is maintained by a BEFORE UPDATE trigger
+DELTA_TABLES = ('roster_assignments', 'roster_employee_services', 'roster_period_staffing_dagdelen')
+
+DELTA_SYNC_ENABLED = os.getenv('ROSTER_DELTA_SYNC', '1') != '0'
+SNAPSHOT_MAX_ROSTERS = int(os.getenv('ROSTER_SNAPSHOT_MAX_ROSTERS', '32'))
+SNAPSHOT_MAX_AGE_S = float(os.getenv('ROSTER_SNAPSHOT_MAX_AGE_S', '900'))
+# updated_at is NOW() at transaction start: a row committed by a long transaction
+# can carry a stamp before the watermark, so look back a little
+SNAPSHOT_SKEW_S = float(os.getenv('ROSTER_SNAPSHOT_SKEW_S', '120'))
+
+
+class RosterRow(TypedDict):
+    id: str
+    start_date: str
+    end_date: str
+    status: str
+
+
+class DemandRow(TypedDict):
+    id: str
+    roster_id: str
+    service_id: str
+    date: str
+    dagdeel: str
+    team: str
+    aantal: int
+    service_types: Dict
+
+
+class AssignmentRow(TypedDict, total=False):
+    id: str
+    roster_id: str
+    employee_id: str
+    date: str
+    dagdeel: str
+    status: int
+    service_id: Optional[str]
+    blocked_by_date: Optional[str]
+    blocked_by_dagdeel: Optional[str]
+    blocked_by_service_id: Optional[str]
+    source: str
+    is_protected: bool
+
+
+class CapacityRow(TypedDict):
+    id: str
+    roster_id: str
+    employee_id: str
+    service_id: str
+    aantal: int
+    actief: bool
+
+
+class EmployeeRow(TypedDict, total=False):
+    id: str
+    voornaam: str
+    achternaam: str
+    team: str
+    dienstverband: str
+    actief: bool
+
+
+class ServiceTypeRow(TypedDict):
+    id: str
+    code: str
+    is_systeem: bool
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+class TableSnapshot:
+    """Rows of one roster table as of the last sync, with its updated_at watermark."""
+
+    def __init__(self, rows_by_id: Dict, watermark: Optional[datetime], loaded_at: float):
+        self.rows_by_id = rows_by_id
+        self.watermark = watermark
+        # Time of the last full load (deltas do not reset the age)
+        self.loaded_at = loaded_at
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict], loaded_at: float) -> Optional['TableSnapshot']:
+        """Snapshot of a full load (None if any row lacks a usable updated_at)."""
+        stamps = [_parse_timestamp(row.get('updated_at')) for row in rows]
+        if any(stamp is None for stamp in stamps):
+            return None
+        return cls({row['id']: row for row in rows}, max(stamps, default=None), loaded_at)
+
+    def rows(self) -> List[Dict]:
+        return sorted(self.rows_by_id.values(), key=lambda row: row['id'])
+
+
+class RosterSnapshotCache:
+    """Process-wide LRU of per-roster table snapshots used for delta syncs."""
+
+    def __init__(self, max_rosters: int = SNAPSHOT_MAX_ROSTERS,
+                 max_age_s: float = SNAPSHOT_MAX_AGE_S,
+                 skew_s: float = SNAPSHOT_SKEW_S,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_rosters <= 0:
+            raise ValueError("max_rosters must be positive")
+        self.max_rosters = max_rosters
+        self.max_age_s = max_age_s
+        self.skew_s = skew_s
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._rosters: "OrderedDict[str, Dict[str, TableSnapshot]]" = OrderedDict()
+
+        self.full_loads = 0
+        self.delta_loads = 0
+        self.delta_rows = 0
+        self.fallbacks = 0
+
+    def get(self, roster_id: str, table: str) -> Optional[TableSnapshot]:
+        """Snapshot of a table, or None if absent or older than max_age_s."""
+        with self._lock:
+            tables = self._rosters.get(roster_id)
+            snapshot = tables.get(table) if tables else None
+            if snapshot is None:
+                return None
+            if self.clock() - snapshot.loaded_at > self.max_age_s:
+                del tables[table]
+                return None
+            self._rosters.move_to_end(roster_id)
+            return snapshot
+
+    def put(self, roster_id: str, table: str, snapshot: TableSnapshot) -> None:
+        with self._lock:
+            self._rosters.setdefault(roster_id, {})[table] = snapshot
+            self._rosters.move_to_end(roster_id)
+            while len(self._rosters) > self.max_rosters:
+                self._rosters.popitem(last=False)
+
+    def record(self, full_loads: int = 0, delta_loads: int = 0,
+               delta_rows: int = 0, fallbacks: int = 0) -> None:
+        """Add to the sync counters (repositories run in parallel threads)."""
+        with self._lock:
+            self.full_loads += full_loads
+            self.delta_loads += delta_loads
+            self.delta_rows += delta_rows
+            self.fallbacks += fallbacks
+
+    def drop(self, roster_id: str, *tables: str) -> None:
+        """Forget snapshots of a roster (all tables if none given)."""
+        with self._lock:
+            if not tables:
+                self._rosters.pop(roster_id, None)
+                return
+            snapshots = self._rosters.get(roster_id)
+            if snapshots:
+                for table in tables:
+                    snapshots.pop(table, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rosters.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'rosters': len(self._rosters),
+                'max_rosters': self.max_rosters,
+                'full_loads': self.full_loads,
+                'delta_loads': self.delta_loads,
+                'delta_rows': self.delta_rows,
+                'fallbacks': self.fallbacks,
+            }
+
+
+_snapshot_cache: Optional[RosterSnapshotCache] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot_cache() -> Optional[RosterSnapshotCache]:
+    """Snapshot cache shared by all repositories in this process (None if disabled)."""
+    if not DELTA_SYNC_ENABLED:
+        return None
+    global _snapshot_cache
+    if _snapshot_cache is None:
+        with _snapshot_lock:
+            if _snapshot_cache is None:
+                _snapshot_cache = RosterSnapshotCache()
+    return _snapshot_cache
+
+
+class RosterRepository:
+    """Read each roster table once per solve and serve typed views from memory."""
+
+    def __init__(self, client, roster_id: str, page_size: int = PAGE_SIZE,
+                 snapshot_cache: Optional[RosterSnapshotCache] = None):
+        """Initialize repository.
+
+        Args:
+            client: Supabase client
+            roster_id: Roster UUID this solve context belongs to
+            page_size: Rows per paginated request
+            snapshot_cache: Warm cache for delta syncs of DELTA_TABLES
+                (None: always read tables in full)
+        """
+        self.client = client
+        self.roster_id = roster_id
+        self.page_size = page_size
+        self.snapshot_cache = snapshot_cache
+        self._tables: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        # Round trips per table (for metrics / tests)
+        self.reads: Dict[str, int] = {}
+        # 'full' or 'delta' per synced table
+        self.sync_modes: Dict[str, str] = {}
+
+    # ------------------------------------------------------------------
+    # Accessors
+    # ------------------------------------------------------------------
+
+    def roster(self) -> Optional[RosterRow]:
+        """Roster metadata from roosters (None if not found)."""
+        def load():
+            result = self._execute(
+                'roosters',
+                self.client.table('roosters').select(ROSTER_COLUMNS).eq('id', self.roster_id)
+            )
+            return result.data[0] if result.data else None
+        return self._memo('roosters', load)
+
+    def demand(self, positive_only: bool = True) -> List[DemandRow]:
+        """Staffing demand from roster_period_staffing_dagdelen (with service_types)."""
+        rows = self._memo('roster_period_staffing_dagdelen', lambda: self._load_roster_table(
+            'roster_period_staffing_dagdelen', DEMAND_COLUMNS
+        ))
+        if positive_only:
+            return [r for r in rows if (r.get('aantal') or 0) > 0]
+        return list(rows)
+
+    def assignments(self, statuses: Optional[Iterable[int]] = None) -> List[AssignmentRow]:
+        """Assignment slots from roster_assignments, optionally filtered by status."""
+        rows = self._memo('roster_assignments', lambda: self._load_roster_table(
+            'roster_assignments', ASSIGNMENT_COLUMNS
+        ))
+        if statuses is None:
+            return list(rows)
+        wanted = set(statuses)
+        return [r for r in rows if r.get('status') in wanted]
+
+    def capacity(self, active_only: bool = True) -> List[CapacityRow]:
+        """Employee capacity from roster_employee_services (actief and aantal > 0 by default)."""
+        rows = self._memo('roster_employee_services', lambda: self._load_roster_table(
+            'roster_employee_services', CAPACITY_COLUMNS
+        ))
+        if active_only:
+            return [r for r in rows if r.get('actief') and (r.get('aantal') or 0) > 0]
+        return list(rows)
+
+    def employees(self) -> List[EmployeeRow]:
+        """Active employees."""
+        return list(self._memo('employees', lambda: self._fetch_all(
+            'employees',
+            lambda: self.client.table('employees').select(EMPLOYEE_COLUMNS).eq('actief', True)
+        )))
+
+    def service_types(self) -> Dict[str, ServiceTypeRow]:
+        """All service types by id."""
+        return self._memo('service_types', lambda: {
+            row['id']: row for row in self._fetch_all(
+                'service_types',
+                lambda: self.client.table('service_types').select(SERVICE_TYPE_COLUMNS)
+            )
+        })
+
+    def unavailability(self, statuses: Iterable[int] = (3,)) -> Set[Tuple[str, str, str]]:
+        """(employee_id, date, dagdeel) slots with the given statuses (default: unavailable)."""
+        return {
+            (r['employee_id'], r['date'], r['dagdeel'])
+            for r in self.assignments(statuses=statuses)
+        }
+
+    # ------------------------------------------------------------------
+    # Cache control
+    # ------------------------------------------------------------------
+
+    def invalidate(self, *tables: str) -> None:
+        """Forget memoized tables (all if none given), e.g. after a write.
+
+        Snapshots of the same tables are dropped too, so the read right
+        after our own write is a full one and does not lean on the skew.
+        """
+        with self._lock:
+            if tables:
+                for table in tables:
+                    self._tables.pop(table, None)
+            else:
+                self._tables.clear()
+        if self.snapshot_cache is not None:
+            self.snapshot_cache.drop(self.roster_id, *[t for t in tables if t in DELTA_TABLES])
+
+    def stats(self) -> Dict:
+        """Round trips per table and which tables are currently memoized."""
+        return {
+            'roster_id': self.roster_id,
+            'reads': dict(self.reads),
+            'total_reads': sum(self.reads.values()),
+            'memoized': sorted(self._tables),
+            'sync_modes': dict(self.sync_modes)
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _memo(self, table: str, load: Callable):
+        with self._lock:
+            if table not in self._tables:
+                self._tables[table] = load()
+            return self._tables[table]
+
+    def _load_roster_table(self, table: str, columns: str) -> List[Dict]:
+        """Rows of a roster-scoped table: delta-synced when a snapshot is usable."""
+        if self.snapshot_cache is None:
+            return self._fetch_all(table, lambda: self.client.table(table)
+                                   .select(columns).eq('roster_id', self.roster_id))
+
+        columns = f"{columns}, updated_at"
+        cache = self.snapshot_cache
+        snapshot = cache.get(self.roster_id, table)
+        if snapshot is not None:
+            try:
+                rows = self._delta_sync(table, columns, snapshot)
+            except Exception as e:
+                logger.warning(f"[RosterRepository] {table}: delta sync failed ({e}), full reload")
+                rows = None
+            if rows is not None:
+                return rows
+            cache.record(fallbacks=1)
+
+        rows = self._fetch_all(table, lambda: self.client.table(table)
+                               .select(columns).eq('roster_id', self.roster_id))
+        new_snapshot = TableSnapshot.from_rows(rows, cache.clock())
+        if new_snapshot is not None:
+            cache.put(self.roster_id, table, new_snapshot)
+        else:
+            cache.drop(self.roster_id, table)
+        cache.record(full_loads=1)
+        self.sync_modes[table] = 'full'
+        return rows
+
+    def _delta_sync(self, table: str, columns: str,
+                    snapshot: TableSnapshot) -> Optional[List[Dict]]:
+        """Merge rows changed since the watermark into the snapshot (None: reload)."""
+        cache = self.snapshot_cache
+        since = None
+        if snapshot.watermark is not None:
+            since = (snapshot.watermark - timedelta(seconds=cache.skew_s)).isoformat()
+
+        if since is None:
+            changed = []  # empty table at last sync; only the count can tell
+        else:
+            changed = self._fetch_all(table, lambda: self.client.table(table)
+                                      .select(columns).eq('roster_id', self.roster_id)
+                                      .gte('updated_at', since))
+        stamps = [_parse_timestamp(row.get('updated_at')) for row in changed]
+        if any(stamp is None for stamp in stamps):
+            return None
+
+        rows_by_id = dict(snapshot.rows_by_id)
+        for row in changed:
+            rows_by_id[row['id']] = row
+
+        # Deletes (and inserts without a fresh updated_at) show up as a count mismatch
+        count = self._execute(
+            table,
+            self.client.table(table).select('id', count='exact')
+                .eq('roster_id', self.roster_id).limit(1)
+        ).count
+        if count != len(rows_by_id):
+            logger.info(
+                f"[RosterRepository] {table}: {len(rows_by_id)} rows after delta, "
+                f"{count} in database; full reload"
+            )
+            return None
+
+        watermark = max([s for s in (snapshot.watermark, *stamps) if s is not None], default=None)
+        merged = TableSnapshot(rows_by_id, watermark, snapshot.loaded_at)
+        cache.put(self.roster_id, table, merged)
+        cache.record(delta_loads=1, delta_rows=len(changed))
+        self.sync_modes[table] = 'delta'
+        return merged.rows()
+
+    def _fetch_all(self, table: str, build_query: Callable) -> List[Dict]:
+        """Fetch every row of a query, paging on the primary key."""
+        rows: List[Dict] = []
+        offset = 0
+        while True:
+            result = self._execute(
+                table,
+                build_query().order('id').range(offset, offset + self.page_size - 1)
+            )
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < self.page_size:
+                return rows
+            offset += self.page_size
+
+    def _execute(self, table: str, query):
+        self.reads[table] = self.reads.get(table, 0) + 1
+        result = query.execute()
+        logger.debug(f"[RosterRepository] {table}: {len(result.data or [])} rows")
+        return result
@@ -14,6 +14,9 @@ import uuid
 
 from greedy_solver_v2 import GreedySolverV2
 from constraint_validator import ConstraintValidator
+from db_client import get_client
+from result_cache import get_result_cache
+from src.solver.greedy_engine import GreedyRosteringEngine
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -50,6 +53,14 @@ class HealthResponse(BaseModel):
     timestamp: str
 
 
+def _json_report(report: Dict) -> Dict:
+    """Engine report with bezetting_detail as rows (its keys are tuples)"""
+    return dict(report, bezetting_detail=[
+        dict(stats, date=date_str, dagdeel=dagdeel, team=team, service_code=service_code)
+        for (date_str, dagdeel, team, service_code), stats in report["bezetting_detail"].items()
+    ])
+
+
 class SolverAPI:
     """Main API class"""
     
@@ -62,6 +73,8 @@ class SolverAPI:
         )
         self.solver = GreedySolverV2()
         self.validator = ConstraintValidator()
+        # Shared by all roster solves of this process (None if disabled)
+        self.result_cache = get_result_cache()
         
         # Register routes
         self._register_routes()
@@ -150,6 +163,23 @@ class SolverAPI:
                 logger.error(f"Solve error: {str(e)}")
                 raise HTTPException(status_code=500, detail=str(e))
         
+        @self.app.post("/solve-roster/{roster_id}")
+        def solve_roster(roster_id: str):
+            """Greedy solve of a stored roster (reads and writes Supabase)"""
+            logger.info(f"Roster solve request received: {roster_id}")
+            engine = GreedyRosteringEngine(get_client(), result_cache=self.result_cache)
+            try:
+                report = engine.solve_roster(roster_id)
+            except ValueError as e:
+                logger.error(f"Roster solve error: {str(e)}")
+                raise HTTPException(status_code=404, detail=str(e))
+            except Exception as e:
+                logger.error(f"Roster solve error: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+            
+            logger.info(f"Roster solve completed: {roster_id} (result cache: {report.get('result_cache')})")
+            return _json_report(report)
+        
         @self.app.post("/validate")
         async def validate(request: SolveRequest = Body(...)):
             """Validation-only endpoint"""
@@ -19,18 +19,34 @@ Database Tables Used:
 - service_types: Service definitions (code, is_systeem)
 - employees: Employee metadata (team, dienstverband)
 
+All reads go through a RosterRepository (one memoized read per table per
+solve), which can be shared with the other pipeline phases. Repeat solves
+of a roster only fetch rows changed since the previous solve (delta sync).
+
+solve_incremental() re-runs assignment only for the days around planner
+edits and reports a diff of the cells it changed.
+
+With a ResultCache, solve_roster() keys its result by a hash of the solve
+inputs: the loaded working sets with this engine's own earlier writes
+(source=greedy) read back as open slots, so a re-solve after a greedy run
+sees the same key as that run. An unchanged input snapshot replays the
+cached writes and report instead of re-running the greedy loop.
+
 Author: GREEDY Engine v0.5 - DRAAD TEAM FIX
 Date: 2025-12-23
 """
 
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple, Optional, Set
-from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from dataclasses import asdict, dataclass, field
 from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
+# Bump when the algorithm changes, so cached results of older code are not reused
+RESULT_CACHE_NAMESPACE = "greedy_engine/v0.5"
+
 
 def _safe_int(value, default=0):
     """
@@ -125,14 +141,21 @@ class GreedyRosteringEngine:
     GRO MAG NIET in ORA capaciteit kijken en vice versa!
     """
     
-    def __init__(self, db_client):
+    def __init__(self, db_client, repository=None, result_cache=None):
         """
         Initialize GREEDY engine with database client
         
         Args:
             db_client: Supabase client for database operations
+            repository: RosterRepository shared with other phases of this run
+                        (created per solve_roster call if None)
+            result_cache: ResultCache for repeat solves of an unchanged
+                          snapshot (no caching if None)
         """
         self.db = db_client
+        self.repository = repository
+        self._owns_repository = repository is None
+        self.result_cache = result_cache
         self.roster_id = None
         self.start_date = None
         self.end_date = None
@@ -168,15 +191,15 @@ class GreedyRosteringEngine:
         logger.info(f"[DRAAD-TEAM-FIX] Starting GREEDY solve for roster {roster_id}")
         
         try:
-            # STAP 1: Load roster metadata
-            self.roster_id = roster_id
-            self._load_roster_metadata()
+            # STAP 1 + 2: Load roster metadata and working datasets
+            self._load_working_sets(roster_id)
             
-            # STAP 2: Load and prepare working datasets
-            self._load_opdracht()  # Demand from roster_period_staffing_dagdelen
-            self._load_planning()  # Current assignments from roster_assignments
-            self._load_capaciteit()  # Employee capacity from roster_employee_services
-            self._load_employees()  # Employee metadata
+            # Unchanged snapshot: replay the cached result
+            cache_key = self._snapshot_key() if self.result_cache is not None else None
+            if cache_key is not None:
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    return self._replay_cached(cached)
             
             # STAP 3: BASELINE VERIFICATION - Check blocked slots
             logger.info("[DRAAD-TEAM-FIX] Verifying blocked slots before assignment...")
@@ -194,6 +217,16 @@ class GreedyRosteringEngine:
             # STAP 7: Generate final report (WITH PER-SERVICE STATS)
             report = self._generate_report()
             
+            if cache_key is not None:
+                report["result_cache"] = "miss"
+                self.result_cache.put(cache_key, {
+                    "report": report,
+                    "written": [
+                        a for a in self.werkbestand_planning.values()
+                        if a.source == "greedy" and a.status == 1
+                    ]
+                })
+            
             logger.info(f"[DRAAD-TEAM-FIX] GREEDY solve complete: {self.stats['greedy_assigned']} shifts assigned")
             return report
             
@@ -201,16 +234,173 @@ class GreedyRosteringEngine:
             logger.error(f"[DRAAD-TEAM-FIX-ERROR] GREEDY solve failed: {str(e)}", exc_info=True)
             raise
     
+    def solve_incremental(self, roster_id: str,
+                          changed_cells: Iterable[Tuple[str, str, str]]) -> Dict:
+        """
+        Re-solve only the days affected by planner edits
+        
+        Everything outside the affected window stays pinned; inside it only
+        open demand is (re)assigned. Only changed rows are written back.
+        
+        Args:
+            roster_id: UUID of roster to solve
+            changed_cells: (employee_id, date, dagdeel) cells edited by the planner
+            
+        Returns:
+            Report as for solve_roster, plus "mode", "window" (affected dates)
+            and "diff" (assignments changed by this run)
+        """
+        changed_cells = [tuple(cell) for cell in changed_cells]
+        logger.info(f"[INCREMENTAL] Re-solving roster {roster_id} for {len(changed_cells)} changed cells")
+        
+        try:
+            self._load_working_sets(roster_id)
+            self._verify_baseline_blocked_slots()
+            self._process_pre_planning()
+            
+            window, ripple_services = self._affected_window(changed_cells)
+            demands = [
+                d for d in self.werkbestand_opdracht
+                if d.invulling == 0 and (d.date in window or d.service_id in ripple_services)
+            ]
+            logger.info(
+                f"[INCREMENTAL] Window {sorted(window)}: {len(demands)} open demand slots "
+                f"(ripple services: {len(ripple_services)})"
+            )
+            
+            before = {
+                key: (a.status, a.service_id) for key, a in self.werkbestand_planning.items()
+            }
+            self._assign_all_shifts(demands)
+            diff = [
+                {
+                    "employee_id": key[0],
+                    "date": key[1],
+                    "dagdeel": key[2],
+                    "before": {"status": before[key][0], "service_id": before[key][1]},
+                    "after": {"status": a.status, "service_id": a.service_id}
+                }
+                for key, a in self.werkbestand_planning.items()
+                if before[key] != (a.status, a.service_id)
+            ]
+            
+            self._update_database(keys=[
+                (d["employee_id"], d["date"], d["dagdeel"]) for d in diff
+            ])
+            
+            report = self._generate_report()
+            report["mode"] = "incremental"
+            report["window"] = sorted(window)
+            report["diff"] = diff
+            logger.info(f"[INCREMENTAL] Done: {len(diff)} cells changed")
+            return report
+            
+        except Exception as e:
+            logger.error(f"[INCREMENTAL-ERROR] Incremental solve failed: {str(e)}", exc_info=True)
+            raise
+    
+    def _snapshot_key(self) -> str:
+        """
+        Content hash of the solve inputs (any changed input row changes it)
+        
+        Slots written by an earlier greedy run (source=greedy, status=1)
+        count as open, and source itself is not an input, so the rows this
+        engine writes do not change the key of the next solve.
+        """
+        from result_cache import content_key
+        return content_key(RESULT_CACHE_NAMESPACE, {
+            "roster_id": self.roster_id,
+            "period": [self.start_date, self.end_date],
+            "opdracht": [asdict(d) for d in self.werkbestand_opdracht],
+            "planning": [self._input_row(a) for _, a in sorted(self.werkbestand_planning.items())],
+            "capaciteit": [asdict(c) for _, c in sorted(self.werkbestand_capaciteit.items())],
+            "employees": [asdict(e) for _, e in sorted(self.employees.items())],
+        })
+    
+    @staticmethod
+    def _input_row(assignment: Assignment) -> Dict:
+        """Slot as the greedy loop sees it before its own writes"""
+        row = asdict(assignment)
+        del row["source"]
+        if assignment.source == "greedy" and assignment.status == 1:
+            row.update(status=0, service_id=None)
+        return row
+    
+    def _replay_cached(self, cached: Dict) -> Dict:
+        """Write a cached result for this snapshot without running the greedy loop"""
+        keys = []
+        for assignment in cached["written"]:
+            key = (assignment.employee_id, assignment.date, assignment.dagdeel)
+            self.werkbestand_planning[key] = assignment
+            keys.append(key)
+        self._update_database(keys=keys)
+        
+        report = cached["report"]
+        self.stats = report["statistics"]
+        report["result_cache"] = "hit"
+        logger.info(f"[DRAAD-TEAM-FIX] Result cache hit: replayed {len(keys)} assignments")
+        return report
+    
+    def _affected_window(self, changed_cells: List[Tuple[str, str, str]]) -> Tuple[Set[str], Set[str]]:
+        """
+        Dates and services whose open demand may change after the given edits
+        
+        Window: each changed date plus the day before (a DIO/DDO there blocks
+        this day) and the day after (DIO/DDO blocking of O+M next day).
+        Ripple: services the edited employees are qualified for, since their
+        remaining capacity may have changed.
+        """
+        first = self.start_date.strftime("%Y-%m-%d")
+        last = self.end_date.strftime("%Y-%m-%d")
+        window: Set[str] = set()
+        employees: Set[str] = set()
+        for employee_id, date_str, _dagdeel in changed_cells:
+            employees.add(employee_id)
+            day = datetime.strptime(date_str, "%Y-%m-%d")
+            for offset in (-1, 0, 1):
+                d = (day + timedelta(days=offset)).strftime("%Y-%m-%d")
+                if first <= d <= last:
+                    window.add(d)
+        
+        ripple_services = {
+            service_id for (emp_id, service_id) in self.werkbestand_capaciteit
+            if emp_id in employees
+        }
+        return window, ripple_services
+    
+    def _load_working_sets(self, roster_id: str):
+        """Reset working datasets and (re)load them for roster_id"""
+        self.roster_id = roster_id
+        if self._owns_repository or self.repository.roster_id != roster_id:
+            # Fresh per solve; repeat solves delta-sync from the warm snapshots
+            from roster_repository import RosterRepository, get_snapshot_cache
+            self.repository = RosterRepository(
+                self.db, roster_id, snapshot_cache=get_snapshot_cache()
+            )
+            self._owns_repository = True
+        
+        self.werkbestand_opdracht = []
+        self.werkbestand_planning = {}
+        self.werkbestand_capaciteit = {}
+        self.employees = {}
+        self.stats.update(total_demand=0, pre_planned=0, greedy_assigned=0,
+                          open_slots=0, blocked_slots=0, per_service={})
+        
+        self._load_roster_metadata()
+        self._load_opdracht()  # Demand from roster_period_staffing_dagdelen
+        self._load_planning()  # Current assignments from roster_assignments
+        self._load_capaciteit()  # Employee capacity from roster_employee_services
+        self._load_employees()  # Employee metadata
+    
     def _load_roster_metadata(self):
         """Load roster start/end dates from roosters table"""
         logger.info(f"[DRAAD-TEAM-FIX] Loading roster metadata for {self.roster_id}")
         
-        result = self.db.table("roosters").select("start_date, end_date, status").eq("id", self.roster_id).execute()
+        roster = self.repository.roster()
         
-        if not result.data:
+        if not roster:
             raise ValueError(f"Roster {self.roster_id} not found")
         
-        roster = result.data[0]
         self.start_date = datetime.strptime(roster["start_date"], "%Y-%m-%d").date()
         self.end_date = datetime.strptime(roster["end_date"], "%Y-%m-%d").date()
         
@@ -223,13 +413,8 @@ class GreedyRosteringEngine:
         """
         logger.info("[DRAAD-TEAM-FIX] Loading demand (opdracht) with TEAM field...")
         
-        # Query with join to service_types
-        result = self.db.table("roster_period_staffing_dagdelen").select(
-            "roster_id, service_id, date, dagdeel, team, aantal, "
-            "service_types(code, is_systeem)"
-        ).eq("roster_id", self.roster_id).gt("aantal", 0).execute()
-        
-        for row in result.data:
+        # Demand rows with aantal > 0, joined with service_types
+        for row in self.repository.demand():
             service = row["service_types"]
             demand = Demand(
                 roster_id=row["roster_id"],
@@ -278,13 +463,7 @@ class GreedyRosteringEngine:
         """
         logger.info("[DRAAD-TEAM-FIX] Loading current planning state...")
         
-        result = self.db.table("roster_assignments").select(
-            "roster_id, employee_id, date, dagdeel, status, service_id, "
-            "blocked_by_date, blocked_by_dagdeel, blocked_by_service_id, "
-            "source, is_protected"
-        ).eq("roster_id", self.roster_id).execute()
-        
-        for row in result.data:
+        for row in self.repository.assignments():
             # DRAAD-FINAL-FIX: Convert status to integer safely
             status_value = _safe_int(row.get("status"), default=3)
             
@@ -349,11 +528,8 @@ class GreedyRosteringEngine:
         """Load employee capacity from roster_employee_services"""
         logger.info("[DRAAD-TEAM-FIX] Loading employee capacity...")
         
-        result = self.db.table("roster_employee_services").select(
-            "roster_id, employee_id, service_id, aantal, actief"
-        ).eq("roster_id", self.roster_id).eq("actief", True).gt("aantal", 0).execute()
-        
-        for row in result.data:
+        # Active capacity rows with aantal > 0
+        for row in self.repository.capacity():
             key = (row["employee_id"], row["service_id"])
             capacity = Capacity(
                 roster_id=row["roster_id"],
@@ -370,11 +546,7 @@ class GreedyRosteringEngine:
         """Load employee metadata"""
         logger.info("[DRAAD-TEAM-FIX] Loading employee data...")
         
-        result = self.db.table("employees").select(
-            "id, voornaam, achternaam, team, dienstverband, actief"
-        ).eq("actief", True).execute()
-        
-        for row in result.data:
+        for row in self.repository.employees():
             employee = Employee(
                 id=row["id"],
                 voornaam=row["voornaam"],
@@ -402,14 +574,16 @@ class GreedyRosteringEngine:
         
         pre_planned_count = 0
         
+        # Demand per slot, in sorted order
+        demand_by_slot = defaultdict(list)
+        for demand in self.werkbestand_opdracht:
+            demand_by_slot[(demand.date, demand.dagdeel, demand.service_id)].append(demand)
+        
         for assignment in self.werkbestand_planning.values():
             if assignment.status == 1 and assignment.service_id:
                 # Find matching demand
-                for demand in self.werkbestand_opdracht:
-                    if (demand.date == assignment.date and 
-                        demand.dagdeel == assignment.dagdeel and
-                        demand.service_id == assignment.service_id and
-                        demand.invulling == 0):
+                for demand in demand_by_slot.get((assignment.date, assignment.dagdeel, assignment.service_id), ()):
+                    if demand.invulling == 0:
                         demand.invulling = 2  # Mark as pre-planned
                         pre_planned_count += 1
                         break
@@ -422,13 +596,16 @@ class GreedyRosteringEngine:
         
         logger.info(f"[DRAAD-TEAM-FIX] Processed {pre_planned_count} pre-planned assignments")
     
-    def _assign_all_shifts(self):
+    def _assign_all_shifts(self, demands: Optional[List[Demand]] = None):
         """
         Main GREEDY loop: Assign shifts according to sorted demand
+        
+        Args:
+            demands: Subset of werkbestand_opdracht to assign (default: all)
         """
         logger.info("[DRAAD-TEAM-FIX] Starting main assignment loop with STRICT team filtering...")
         
-        for demand in self.werkbestand_opdracht:
+        for demand in (self.werkbestand_opdracht if demands is None else demands):
             if demand.invulling > 0:
                 continue  # Skip already fulfilled demand
             
@@ -806,20 +983,28 @@ class GreedyRosteringEngine:
     
     def _get_service_id_by_code(self, code: str) -> Optional[str]:
         """Helper: Get service_id by service code"""
-        result = self.db.table("service_types").select("id").eq("code", code).execute()
-        if result.data:
-            return result.data[0]["id"]
+        for service in self.repository.service_types().values():
+            if service["code"] == code:
+                return service["id"]
         return None
     
-    def _update_database(self):
+    def _update_database(self, keys: Optional[Iterable[Tuple[str, str, str]]] = None):
         """
         Write results back to roster_assignments table
         Only update records where invulling=1 (assigned by GREEDY)
+        
+        Args:
+            keys: Only consider these (employee_id, date, dagdeel) slots (default: all)
         """
         logger.info("[DRAAD-TEAM-FIX] Updating database with GREEDY assignments...")
         
+        if keys is None:
+            assignments = list(self.werkbestand_planning.values())
+        else:
+            assignments = [self.werkbestand_planning[key] for key in keys]
+        
         updates = []
-        for assignment in self.werkbestand_planning.values():
+        for assignment in assignments:
             if assignment.source == "greedy" and assignment.status == 1:
                 update_data = {
                     "status": assignment.status,
@@ -847,6 +1032,9 @@ class GreedyRosteringEngine:
         # Update roster status to "in_progress"
         self.db.table("roosters").update({"status": "in_progress"}).eq("id", self.roster_id).execute()
         logger.info("[DRAAD-TEAM-FIX] Roster status updated to in_progress")
+        
+        # Later readers of this solve context must see the written state
+        self.repository.invalidate("roster_assignments", "roosters")
     
     def _generate_report(self) -> Dict:
         """
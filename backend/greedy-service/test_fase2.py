@@ -6,7 +6,7 @@ Comprehensive testing of solver algorithm and validation logic
 import pytest
 from datetime import date, timedelta
 from typing import Dict, List
-from greedy_solver_v2 import GreedySolverV2, AssignmentRecord
+from greedy_solver_v2 import GreedySolverV2, AssignmentRecord, EmployeeCalendar
 from constraint_validator import ConstraintValidator
 
 
@@ -136,6 +136,54 @@ class TestGreedySolverV2:
         assert record_dict['work_date'] == '2025-01-01'
         assert record_dict['shift'] == 'ochtend'
 
+    
+    def test_calendar_rebuilt_from_employee_shifts(self, solver):
+        """Test helpers stay consistent when employee_shifts is edited directly"""
+        base = date(2025, 1, 1)
+        for i in range(3):
+            solver.employee_shifts['EMP001'].append((base + timedelta(days=i), 'ochtend'))
+        
+        assert solver._count_consecutive_days_ending('EMP001', base + timedelta(days=2)) == 3
+        assert solver._count_consecutive_days_ending('EMP001', base + timedelta(days=3)) == 0
+        assert solver._already_assigned('EMP001', base + timedelta(days=1), 'ochtend')
+        assert not solver._already_assigned('EMP001', base + timedelta(days=1), 'middag')
+        assert solver._insufficient_rest_days('EMP001', base + timedelta(days=3))
+        assert not solver._insufficient_rest_days('EMP001', base + timedelta(days=4))
+
+
+class TestEmployeeCalendar:
+    """Tests for EmployeeCalendar run-length bookkeeping"""
+    
+    def test_run_length_maintained_on_assignment(self):
+        """Test consecutive-day counters for chronological and gap-filling assignments"""
+        calendar = EmployeeCalendar(date(2025, 1, 1).toordinal())
+        for day in (0, 1, 2, 4, 5):
+            calendar.assign(day, 'ochtend')
+        
+        assert calendar.consecutive_days_ending(5) == 2
+        assert calendar.consecutive_days_ending(2) == 3
+        assert calendar.consecutive_days_ending(3) == 0
+        assert calendar.days_since_last_work(7) == 2
+        
+        calendar.assign(3, 'middag')
+        assert calendar.consecutive_days_ending(5) == 6
+        assert calendar.shift_count == 6
+    
+    def test_unavailable_and_skill_match(self):
+        """Test availability bitset and cached skill match"""
+        calendar = EmployeeCalendar(
+            date(2025, 1, 1).toordinal(),
+            skills={'verloskundige'},
+            required_skills={'ochtend': ['verloskundige', 'experienced']},
+            unavailable_mask=0b100
+        )
+        
+        assert calendar.is_unavailable(2)
+        assert not calendar.is_unavailable(1)
+        assert not calendar.is_unavailable(-1)
+        assert calendar.skill_match('ochtend') == 0.5
+        assert calendar.skill_match('middag') == 0.0
+
 
 class TestConstraintValidator:
     """Tests for ConstraintValidator"""
@@ -22,7 +22,8 @@ from pairing_logic import (
 from pairing_integration import (
     PairingIntegratedSolver,
     PairingConfig,
-    PairingReportGenerator
+    PairingReportGenerator,
+    CandidateBuckets
 )
 
 
@@ -89,6 +90,28 @@ class TestBlockingCalendar:
         
         assert len(calendar.blocked_slots) == 0
     
+    def test_clear_employee_blocks_keeps_other_employees(self):
+        """Test clearing one employee does not touch other employees"""
+        calendar = BlockingCalendar()
+        
+        calendar.block_slot(date(2025, 12, 25), "O", "EMP001", "Test")
+        calendar.block_slot(date(2025, 12, 25), "O", "EMP002", "Test")
+        calendar.block_slot(date(2025, 12, 26), "A", "EMP002", "Test")
+        
+        calendar.clear_employee_blocks("EMP002")
+        
+        assert calendar.blocked_count == 1
+        assert calendar.blocked_slots == {("2025-12-25", "O", "EMP001")}
+        assert not calendar.is_blocked(date(2025, 12, 26), "A", "EMP002")
+    
+    def test_is_blocked_accepts_iso_strings(self):
+        """Test lookups by ISO date string hit the same slot as date objects"""
+        calendar = BlockingCalendar()
+        calendar.block_slot(date(2025, 12, 25), "M", "EMP001", "Test")
+        
+        assert calendar.is_blocked("2025-12-25", "M", "EMP001")
+        assert not calendar.is_blocked("2025-12-25", "A", "EMP001")
+    
     def test_export_blocked_slots(self):
         """Test exporting blocked slots for database"""
         calendar = BlockingCalendar()
@@ -224,6 +247,43 @@ class TestPairingLogic:
         
         assert penalty < 0  # Should be penalized
     
+    def test_rules_appended_directly_are_compiled(self):
+        """Test rule index picks up rules added to pairing_rules directly"""
+        logic = PairingLogic()
+        logic.pairing_rules.append(PairingRule(
+            service_id_first="srv-dio",
+            service_code_first="DIO",
+            service_id_second="srv-ddo",
+            service_code_second="DDO",
+            block_type="hard",
+            description="DIO cannot be followed by DDO"
+        ))
+        
+        logic.on_assignment_made("EMP001", date(2025, 12, 24), "O", "DIO", "srv-dio")
+        logic.on_assignment_made("EMP001", date(2025, 12, 25), "O", "DDO", "srv-ddo")
+        
+        assert logic.blocking_calendar.is_blocked(date(2025, 12, 25), "O", "EMP001")
+        violations = logic.generate_pairing_report()["pairing_violations"]
+        assert len(violations) == 1
+        assert violations[0]["first_service"] == "DIO"
+    
+    def test_pairing_penalty_requires_same_dagdeel_next_day(self):
+        """Test soft penalty only applies to the same dagdeel on the next day"""
+        logic = PairingLogic()
+        logic.register_pairing_rule(PairingRule(
+            service_id_first="srv-dio",
+            service_code_first="DIO",
+            service_id_second="srv-vlo",
+            service_code_second="VLO",
+            block_type="soft"
+        ))
+        logic.on_assignment_made("EMP001", date(2025, 12, 24), "O", "DIO", "srv-dio")
+        
+        assert logic.get_pairing_penalty_score("EMP001", date(2025, 12, 25), "M", "VLO") == 0.0
+        assert logic.get_pairing_penalty_score("EMP001", date(2025, 12, 26), "O", "VLO") == 0.0
+        assert logic.get_pairing_penalty_score("EMP001", date(2025, 12, 25), "O", "DDO") == 0.0
+        assert logic.get_pairing_penalty_score("EMP002", date(2025, 12, 25), "O", "VLO") == 0.0
+    
     def test_export_blocking_calendar(self):
         """Test exporting blocking calendar"""
         logic = PairingLogic()
@@ -345,6 +405,50 @@ class TestPairingIntegratedSolver:
         assert exported['summary']['total_blocked_slots'] == 1
 
 
+class TestCandidateBuckets:
+    """Test CandidateBuckets capacity and team filtering"""
+    
+    @pytest.fixture
+    def employees_data(self):
+        return {
+            'EMP001': {'team': 'GRO'},
+            'EMP002': {'team': 'ORA'},
+            'EMP003': {'team': None},
+        }
+    
+    def test_candidates_filtered_by_team_and_capacity(self, employees_data):
+        """Test buckets keep employees_data order and respect team filter"""
+        capacity = {
+            ('EMP001', 'srv-dio'): 2,
+            ('EMP002', 'srv-dio'): 1,
+            ('EMP003', 'srv-dio'): 1,
+            ('EMP002', 'srv-ddo'): 0,
+        }
+        buckets = CandidateBuckets(employees_data, capacity)
+        
+        assert buckets.candidates('srv-dio', 'GRO') == ['EMP001', 'EMP003']
+        assert buckets.candidates('srv-dio', None) == ['EMP001', 'EMP002', 'EMP003']
+        assert buckets.candidates('srv-ddo', None) == []
+        assert buckets.holders_count('srv-dio') == 3
+    
+    def test_consume_drops_exhausted_employees(self, employees_data):
+        """Test employees leave every bucket of a service when capacity hits zero"""
+        capacity = {('EMP001', 'srv-dio'): 2, ('EMP003', 'srv-dio'): 1}
+        buckets = CandidateBuckets(employees_data, capacity)
+        buckets.candidates('srv-dio', 'GRO')
+        
+        buckets.consume('EMP003', 'srv-dio')
+        buckets.consume('EMP001', 'srv-dio')
+        
+        assert capacity[('EMP001', 'srv-dio')] == 1
+        assert buckets.candidates('srv-dio', 'GRO') == ['EMP001']
+        assert buckets.candidates('srv-dio', None) == ['EMP001']
+        
+        buckets.consume('EMP001', 'srv-dio')
+        assert buckets.candidates('srv-dio', 'GRO') == []
+        assert buckets.holders_count('srv-dio') == 0
+
+
 class TestPairingReportGenerator:
     """Test PairingReportGenerator"""
     
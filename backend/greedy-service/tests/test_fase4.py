@@ -5,15 +5,21 @@ Tests for:
 - Trigger verification
 - Database consistency
 - Error handling
+- Solve result cache
 """
 
 import pytest
 import os
 from datetime import date, timedelta, datetime
 from unittest.mock import Mock, MagicMock, patch
+from postgrest.exceptions import APIError
 from models import Assignment, WorkspaceState
 from writer import BatchWriter
 from trigger_verify import TriggerVerifier
+import db_client
+from roster_repository import RosterRepository, RosterSnapshotCache
+from result_cache import ResultCache
+from src.solver.greedy_engine import GreedyRosteringEngine
 
 
 class TestBatchWriter:
@@ -23,9 +29,9 @@ class TestBatchWriter:
     def workspace(self):
         """Create test workspace."""
         return WorkspaceState(
-            roster_id='test-roster-123',
-            start_date=date(2025, 11, 24),
-            end_date=date(2025, 12, 28)
+            rosterid='test-roster-123',
+            startdate=date(2025, 11, 24),
+            enddate=date(2025, 12, 28)
         )
     
     @pytest.fixture
@@ -34,31 +40,31 @@ class TestBatchWriter:
         assignments = [
             Assignment(
                 id='test-1',
-                roster_id='test-roster-123',
-                employee_id='emp-001',
+                rosterid='test-roster-123',
+                employeeid='emp-001',
                 date=date(2025, 11, 24),
                 dagdeel='O',
-                service_id='service-dio',
+                serviceid='service-dio',
                 status=1,
                 source='greedy'
             ),
             Assignment(
                 id='test-2',
-                roster_id='test-roster-123',
-                employee_id='emp-001',
+                rosterid='test-roster-123',
+                employeeid='emp-001',
                 date=date(2025, 11, 24),
                 dagdeel='M',
-                service_id='service-block',
+                serviceid='service-block',
                 status=2,
                 source='greedy-blocking'
             ),
             Assignment(
                 id='test-3',
-                roster_id='test-roster-123',
-                employee_id='emp-002',
+                rosterid='test-roster-123',
+                employeeid='emp-002',
                 date=date(2025, 11, 25),
                 dagdeel='O',
-                service_id='service-ddo',
+                serviceid='service-ddo',
                 status=0,
                 source='manual'
             ),
@@ -67,14 +73,14 @@ class TestBatchWriter:
     
     def test_batch_writer_initialization(self, workspace):
         """Test BatchWriter initialization."""
-        writer = BatchWriter(workspace)
+        writer = BatchWriter(workspace, client=MagicMock())
         assert writer.workspace == workspace
         assert writer.client is not None
     
     def test_write_statistics(self, workspace, assignments):
         """Test get_write_statistics method."""
         workspace.assignments = assignments
-        writer = BatchWriter(workspace)
+        writer = BatchWriter(workspace, client=MagicMock())
         
         stats = writer.get_write_statistics()
         
@@ -87,7 +93,7 @@ class TestBatchWriter:
     def test_prepare_records(self, workspace, assignments):
         """Test _prepare_records conversion."""
         active_assignments = [a for a in assignments if a.status == 1]
-        writer = BatchWriter(workspace)
+        writer = BatchWriter(workspace, client=MagicMock())
         
         records = writer._prepare_records(active_assignments)
         
@@ -97,12 +103,16 @@ class TestBatchWriter:
         assert records[0]['dagdeel'] == 'O'
         assert records[0]['status'] == 1
         assert records[0]['source'] == 'greedy'
-        assert 'created_at' in records[0]
+        # Clears the note of an earlier blocking record on this slot
+        assert records[0]['notes'] is None
+        # Left to the column default / trigger (database clock)
+        assert 'created_at' not in records[0]
+        assert 'updated_at' not in records[0]
     
     def test_prepare_blocking_records(self, workspace, assignments):
         """Test _prepare_blocking_records conversion."""
         blocking_assignments = [a for a in assignments if a.status == 2]
-        writer = BatchWriter(workspace)
+        writer = BatchWriter(workspace, client=MagicMock())
         
         records = writer._prepare_blocking_records(blocking_assignments)
         
@@ -112,12 +122,12 @@ class TestBatchWriter:
         assert 'notes' in records[0]
         assert 'DIO/DDO' in records[0]['notes']
     
-    @patch('writer.create_client')
-    def test_write_assignments_success(self, mock_create_client, workspace, assignments):
+    @patch('writer.get_client')
+    def test_write_assignments_success(self, mock_get_client, workspace, assignments):
         """Test successful assignment write."""
         # Mock Supabase client
         mock_client = MagicMock()
-        mock_create_client.return_value = mock_client
+        mock_get_client.return_value = mock_client
         
         workspace.assignments = assignments
         writer = BatchWriter(workspace)
@@ -126,7 +136,7 @@ class TestBatchWriter:
         # Mock insert response
         mock_table = MagicMock()
         mock_client.table.return_value = mock_table
-        mock_table.insert.return_value.execute.return_value = MagicMock(data=[{}])
+        mock_table.upsert.return_value.execute.return_value = MagicMock(data=[{}])
         
         result = writer.write_assignments()
         
@@ -135,11 +145,11 @@ class TestBatchWriter:
         assert result['error'] is None
         assert result['duration_ms'] >= 0
     
-    @patch('writer.create_client')
-    def test_write_assignments_empty(self, mock_create_client, workspace):
+    @patch('writer.get_client')
+    def test_write_assignments_empty(self, mock_get_client, workspace):
         """Test writing with no assignments."""
         mock_client = MagicMock()
-        mock_create_client.return_value = mock_client
+        mock_get_client.return_value = mock_client
         
         workspace.assignments = []
         writer = BatchWriter(workspace)
@@ -151,11 +161,11 @@ class TestBatchWriter:
         assert result['failed'] == 0
         assert result['error'] is None
     
-    @patch('writer.create_client')
-    def test_write_assignments_failure(self, mock_create_client, workspace, assignments):
+    @patch('writer.get_client')
+    def test_write_assignments_failure(self, mock_get_client, workspace, assignments):
         """Test handling of write failure."""
         mock_client = MagicMock()
-        mock_create_client.return_value = mock_client
+        mock_get_client.return_value = mock_client
         
         workspace.assignments = assignments
         writer = BatchWriter(workspace)
@@ -164,7 +174,7 @@ class TestBatchWriter:
         # Mock failure
         mock_table = MagicMock()
         mock_client.table.return_value = mock_table
-        mock_table.insert.return_value.execute.side_effect = Exception("Database error")
+        mock_table.upsert.return_value.execute.side_effect = Exception("Database error")
         
         result = writer.write_assignments()
         
@@ -172,11 +182,11 @@ class TestBatchWriter:
         assert result['failed'] == 1
         assert 'Database error' in result['error']
     
-    @patch('writer.create_client')
-    def test_write_blocking_records(self, mock_create_client, workspace, assignments):
+    @patch('writer.get_client')
+    def test_write_blocking_records(self, mock_get_client, workspace, assignments):
         """Test writing blocking records."""
         mock_client = MagicMock()
-        mock_create_client.return_value = mock_client
+        mock_get_client.return_value = mock_client
         
         workspace.assignments = assignments
         writer = BatchWriter(workspace)
@@ -185,18 +195,177 @@ class TestBatchWriter:
         # Mock insert response
         mock_table = MagicMock()
         mock_client.table.return_value = mock_table
-        mock_table.insert.return_value.execute.return_value = MagicMock(data=[{}])
+        mock_table.upsert.return_value.execute.return_value = MagicMock(data=[{}])
         
         result = writer.write_blocking_records()
         
         assert result['written'] == 1  # Only status=2
         assert result['failed'] == 0
     
-    @patch('writer.create_client')
-    def test_verify_write(self, mock_create_client, workspace):
+    @patch('writer.get_client')
+    def test_write_assignments_upserts_on_natural_key(self, mock_get_client, workspace, assignments):
+        """Test writes are idempotent upserts on (roster_id, employee_id, date, dagdeel)."""
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        
+        workspace.assignments = assignments
+        writer = BatchWriter(workspace)
+        writer.client = mock_client
+        
+        mock_table = MagicMock()
+        mock_client.table.return_value = mock_table
+        
+        writer.write_assignments()
+        
+        _, kwargs = mock_table.upsert.call_args
+        assert kwargs['on_conflict'] == 'roster_id,employee_id,date,dagdeel'
+        mock_table.insert.assert_not_called()
+    
+    @patch('writer.get_client')
+    def test_write_is_chunked_with_throughput(self, mock_get_client, workspace):
+        """Test records are split into bounded chunks with per-chunk rows/s."""
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        
+        workspace.assignments = [
+            Assignment(
+                id=f'test-{i}',
+                rosterid='test-roster-123',
+                employeeid=f'emp-{i:03d}',
+                date=date(2025, 11, 24),
+                dagdeel='O',
+                serviceid='service-dio',
+                status=1,
+                source='greedy'
+            )
+            for i in range(7)
+        ]
+        writer = BatchWriter(workspace, chunk_rows=3, max_workers=2)
+        writer.client = mock_client
+        
+        result = writer.write_assignments()
+        
+        sent = [c.args[0] for c in mock_client.table.return_value.upsert.call_args_list]
+        assert sorted(len(chunk) for chunk in sent) == [1, 3, 3]
+        assert result['written'] == 7
+        assert len(result['chunks']) == 3
+        assert all('rows_per_s' in c for c in result['chunks'])
+        assert not any('updated_at' in r for chunk in sent for r in chunk)
+    
+    @patch('writer.get_client')
+    def test_failed_chunk_isolates_bad_rows(self, mock_get_client, workspace):
+        """Test a bad row only fails itself, not the whole write."""
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        
+        workspace.assignments = [
+            Assignment(
+                id=f'test-{i}',
+                rosterid='test-roster-123',
+                employeeid=f'emp-{i:03d}',
+                date=date(2025, 11, 24),
+                dagdeel='O',
+                serviceid='service-dio',
+                status=1,
+                source='greedy'
+            )
+            for i in range(4)
+        ]
+        writer = BatchWriter(workspace, chunk_rows=10)
+        writer.client = mock_client
+        
+        def upsert(chunk, on_conflict):
+            query = MagicMock()
+            if any(r['employee_id'] == 'emp-002' for r in chunk):
+                query.execute.side_effect = APIError({'code': '23503', 'message': 'bad row'})
+            return query
+        
+        mock_client.table.return_value.upsert.side_effect = upsert
+        
+        result = writer.write_assignments()
+        
+        assert result['written'] == 3
+        assert result['failed'] == 1
+        assert 'bad row' in result['error']
+    
+    @patch('writer.get_client')
+    def test_transport_error_fails_chunk_without_bisecting(self, mock_get_client, workspace):
+        """Test network/server errors are not retried row by row."""
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        
+        workspace.assignments = [
+            Assignment(
+                id=f'test-{i}',
+                rosterid='test-roster-123',
+                employeeid=f'emp-{i:03d}',
+                date=date(2025, 11, 24),
+                dagdeel='O',
+                serviceid='service-dio',
+                status=1,
+                source='greedy'
+            )
+            for i in range(4)
+        ]
+        writer = BatchWriter(workspace, chunk_rows=10)
+        writer.client = mock_client
+        upsert = mock_client.table.return_value.upsert
+        upsert.return_value.execute.side_effect = ConnectionError("connection reset")
+        
+        result = writer.write_assignments()
+        
+        assert upsert.call_count == 1
+        assert result['written'] == 0
+        assert result['failed'] == 4
+        assert 'connection reset' in result['error']
+    
+    @patch('writer.get_client')
+    def test_write_all_merges_active_and_blocking(self, mock_get_client, workspace, assignments):
+        """Test active and blocking records share one pipeline."""
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        
+        workspace.assignments = assignments
+        writer = BatchWriter(workspace)
+        writer.client = mock_client
+        
+        result = writer.write_all()
+        
+        sent = mock_client.table.return_value.upsert.call_args_list
+        assert len(sent) == 1
+        assert sorted(r['status'] for r in sent[0].args[0]) == [1, 2]
+        assert result['by_status'][1] == {'written': 1, 'failed': 0}
+        assert result['by_status'][2] == {'written': 1, 'failed': 0}
+    
+    @patch('writer.get_client')
+    def test_mixed_chunk_sends_same_columns(self, mock_get_client, workspace, assignments):
+        """Test a chunk with active and blocking rows has one column set.
+        
+        postgrest-py sends the union of the row keys as columns; a key only
+        blocking rows carry would be NULL for the active rows (and the
+        other way round).
+        """
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        
+        workspace.assignments = assignments
+        writer = BatchWriter(workspace)
+        writer.client = mock_client
+        
+        writer.write_all()
+        
+        chunk = mock_client.table.return_value.upsert.call_args_list[0].args[0]
+        assert sorted(r['status'] for r in chunk) == [1, 2]
+        assert len({frozenset(r) for r in chunk}) == 1
+        notes = {r['status']: r['notes'] for r in chunk}
+        assert notes[1] is None
+        assert 'DIO/DDO' in notes[2]
+    
+    @patch('writer.get_client')
+    def test_verify_write(self, mock_get_client, workspace):
         """Test write verification."""
         mock_client = MagicMock()
-        mock_create_client.return_value = mock_client
+        mock_get_client.return_value = mock_client
         
         writer = BatchWriter(workspace)
         writer.client = mock_client
@@ -223,22 +392,22 @@ class TestTriggerVerifier:
     def workspace(self):
         """Create test workspace."""
         return WorkspaceState(
-            roster_id='test-roster-123',
-            start_date=date(2025, 11, 24),
-            end_date=date(2025, 12, 28)
+            rosterid='test-roster-123',
+            startdate=date(2025, 11, 24),
+            enddate=date(2025, 12, 28)
         )
     
     def test_trigger_verifier_initialization(self, workspace):
         """Test TriggerVerifier initialization."""
-        verifier = TriggerVerifier(workspace)
+        verifier = TriggerVerifier(workspace, client=MagicMock())
         assert verifier.workspace == workspace
         assert verifier.client is not None
     
-    @patch('trigger_verify.create_client')
-    def test_verify_blocking_records_exist(self, mock_create_client, workspace):
+    @patch('trigger_verify.get_client')
+    def test_verify_blocking_records_exist(self, mock_get_client, workspace):
         """Test verification of blocking records existence."""
         mock_client = MagicMock()
-        mock_create_client.return_value = mock_client
+        mock_get_client.return_value = mock_client
         
         verifier = TriggerVerifier(workspace)
         verifier.client = mock_client
@@ -249,6 +418,8 @@ class TestTriggerVerifier:
         mock_query = MagicMock()
         mock_table.select.return_value = mock_query
         mock_query.eq.return_value = mock_query
+        mock_query.order.return_value = mock_query
+        mock_query.range.return_value = mock_query
         mock_query.execute.return_value = MagicMock(data=[
             {'id': '1', 'date': '2025-11-24', 'dagdeel': 'M', 'employee_id': 'emp-001', 'status': 2},
             {'id': '2', 'date': '2025-11-25', 'dagdeel': 'O', 'employee_id': 'emp-001', 'status': 2},
@@ -259,11 +430,11 @@ class TestTriggerVerifier:
         assert result['passed'] is True
         assert result['blocking_records_count'] == 2
     
-    @patch('trigger_verify.create_client')
-    def test_verify_blocking_records_none(self, mock_create_client, workspace):
+    @patch('trigger_verify.get_client')
+    def test_verify_blocking_records_none(self, mock_get_client, workspace):
         """Test verification when no blocking records exist."""
         mock_client = MagicMock()
-        mock_create_client.return_value = mock_client
+        mock_get_client.return_value = mock_client
         
         verifier = TriggerVerifier(workspace)
         verifier.client = mock_client
@@ -274,6 +445,8 @@ class TestTriggerVerifier:
         mock_query = MagicMock()
         mock_table.select.return_value = mock_query
         mock_query.eq.return_value = mock_query
+        mock_query.order.return_value = mock_query
+        mock_query.range.return_value = mock_query
         mock_query.execute.return_value = MagicMock(data=[])
         
         result = verifier.verify_blocking_records_exist()
@@ -281,11 +454,11 @@ class TestTriggerVerifier:
         assert result['passed'] is False
         assert result['blocking_records_count'] == 0
     
-    @patch('trigger_verify.create_client')
-    def test_verify_trigger_consistency(self, mock_create_client, workspace):
+    @patch('trigger_verify.get_client')
+    def test_verify_trigger_consistency(self, mock_get_client, workspace):
         """Test trigger consistency verification."""
         mock_client = MagicMock()
-        mock_create_client.return_value = mock_client
+        mock_get_client.return_value = mock_client
         
         verifier = TriggerVerifier(workspace)
         verifier.client = mock_client
@@ -296,6 +469,8 @@ class TestTriggerVerifier:
         mock_query = MagicMock()
         mock_table.select.return_value = mock_query
         mock_query.eq.return_value = mock_query
+        mock_query.order.return_value = mock_query
+        mock_query.range.return_value = mock_query
         mock_query.execute.return_value = MagicMock(data=[
             {'status': 1, 'date': '2025-11-24', 'dagdeel': 'O'},
             {'status': 2, 'date': '2025-11-24', 'dagdeel': 'M'},
@@ -311,7 +486,7 @@ class TestTriggerVerifier:
     
     def test_find_duplicates(self, workspace):
         """Test duplicate detection."""
-        verifier = TriggerVerifier(workspace)
+        verifier = TriggerVerifier(workspace, client=MagicMock())
         
         records = [
             {'date': '2025-11-24', 'dagdeel': 'O', 'employee_id': 'emp-001', 'service_id': 'svc-001'},
@@ -324,11 +499,11 @@ class TestTriggerVerifier:
         assert len(duplicates) == 1
         assert ('2025-11-24', 'O', 'emp-001', 'svc-001') in duplicates
     
-    @patch('trigger_verify.create_client')
-    def test_verify_all_triggers_passed(self, mock_create_client, workspace):
+    @patch('trigger_verify.get_client')
+    def test_verify_all_triggers_passed(self, mock_get_client, workspace):
         """Test successful verification of all triggers."""
         mock_client = MagicMock()
-        mock_create_client.return_value = mock_client
+        mock_get_client.return_value = mock_client
         
         verifier = TriggerVerifier(workspace)
         verifier.client = mock_client
@@ -339,6 +514,8 @@ class TestTriggerVerifier:
         mock_query = MagicMock()
         mock_table.select.return_value = mock_query
         mock_query.eq.return_value = mock_query
+        mock_query.order.return_value = mock_query
+        mock_query.range.return_value = mock_query
         mock_query.in_.return_value = mock_query
         mock_query.execute.return_value = MagicMock(data=[
             {'status': 1},
@@ -361,9 +538,9 @@ class TestDatabaseIntegrationScenarios:
     def test_workspace(self):
         """Create realistic test workspace."""
         workspace = WorkspaceState(
-            roster_id='roster-2025-week48-52',
-            start_date=date(2025, 11, 24),
-            end_date=date(2025, 12, 28)
+            rosterid='roster-2025-week48-52',
+            startdate=date(2025, 11, 24),
+            enddate=date(2025, 12, 28)
         )
         
         # Add realistic assignments
@@ -372,11 +549,11 @@ class TestDatabaseIntegrationScenarios:
                 for emp_num in range(1, 4):
                     workspace.assignments.append(Assignment(
                         id=f"assign-{day_offset}-{dagdeel}-{emp_num}",
-                        roster_id=workspace.roster_id,
-                        employee_id=f"emp-{emp_num:03d}",
+                        rosterid=workspace.rosterid,
+                        employeeid=f"emp-{emp_num:03d}",
                         date=date(2025, 11, 24) + timedelta(days=day_offset),
                         dagdeel=dagdeel,
-                        service_id=f"service-{dagdeel}",
+                        serviceid=f"service-{dagdeel}",
                         status=1,
                         source='greedy'
                     ))
@@ -385,7 +562,7 @@ class TestDatabaseIntegrationScenarios:
     
     def test_batch_writer_large_dataset(self, test_workspace):
         """Test BatchWriter with realistic dataset size."""
-        writer = BatchWriter(test_workspace)
+        writer = BatchWriter(test_workspace, client=MagicMock())
         stats = writer.get_write_statistics()
         
         # Should have 5 days * 3 dagdelen * 3 employees = 45 assignments
@@ -397,16 +574,16 @@ class TestDatabaseIntegrationScenarios:
         # Add some blocking assignments
         test_workspace.assignments.append(Assignment(
             id="blocking-1",
-            roster_id=test_workspace.roster_id,
-            employee_id="emp-001",
+            rosterid=test_workspace.rosterid,
+            employeeid="emp-001",
             date=date(2025, 11, 24),
             dagdeel="M",
-            service_id="service-blocking",
+            serviceid="service-blocking",
             status=2,
             source='greedy-blocking'
         ))
         
-        writer = BatchWriter(test_workspace)
+        writer = BatchWriter(test_workspace, client=MagicMock())
         stats = writer.get_write_statistics()
         
         assert stats['active_assignments'] == 45
@@ -414,5 +591,439 @@ class TestDatabaseIntegrationScenarios:
         assert stats['total'] == 46
 
 
+
+class TestDbClient:
+    """Tests for the shared Supabase client factory."""
+    
+    def test_client_is_shared_and_injected(self, monkeypatch):
+        """Writer and verifier default to the same pooled client."""
+        # Fresh process-wide client from dummy settings (no request is made)
+        monkeypatch.setenv('SUPABASE_URL', 'http://localhost:54321')
+        monkeypatch.setenv('SUPABASE_KEY', 'test-key')
+        monkeypatch.setattr(db_client, '_client', None)
+        monkeypatch.setattr(db_client, '_http_client', None)
+        workspace = WorkspaceState(
+            rosterid='test-roster-123',
+            startdate=date(2025, 11, 24),
+            enddate=date(2025, 11, 30)
+        )
+        assert db_client.get_client() is db_client.get_client()
+        assert BatchWriter(workspace).client is TriggerVerifier(workspace).client
+        
+        injected = MagicMock()
+        assert BatchWriter(workspace, client=injected).client is injected
+    
+    def test_requests_counted_per_phase(self):
+        """HTTP requests are attributed to the active db_phase."""
+        db_client.reset_request_counts()
+        with db_client.db_phase('write'):
+            db_client._count_request(None)
+            db_client._count_request(None)
+        db_client._count_request(None)
+        
+        assert db_client.get_request_counts() == {'write': 2, 'default': 1}
+    
+    def test_chunk_workers_inherit_phase(self):
+        """Concurrent chunk upserts are counted under the caller's phase."""
+        workspace = WorkspaceState(
+            rosterid='test-roster-123',
+            startdate=date(2025, 11, 24),
+            enddate=date(2025, 11, 30)
+        )
+        client = MagicMock()
+        client.table.return_value.upsert.return_value.execute.side_effect = \
+            lambda: db_client._count_request(None)
+        writer = BatchWriter(workspace, chunk_rows=1, max_workers=3, client=client)
+        records = [
+            {'roster_id': 'r', 'employee_id': f'emp-{i}', 'date': '2025-11-24', 'dagdeel': 'O'}
+            for i in range(3)
+        ]
+        
+        db_client.reset_request_counts()
+        with db_client.db_phase('write'):
+            writer._write_records(records)
+        
+        assert db_client.get_request_counts() == {'write': 3}
+
+
+class TestRosterRepository:
+    """Tests for the per-run roster repository."""
+    
+    @pytest.fixture
+    def tables(self):
+        """Rows per table."""
+        return {
+            'roster_assignments': [
+                {'id': 1, 'employee_id': 'emp-001', 'date': '2025-11-24', 'dagdeel': 'O', 'status': 1, 'service_id': 'svc-dio'},
+                {'id': 2, 'employee_id': 'emp-001', 'date': '2025-11-24', 'dagdeel': 'M', 'status': 2, 'service_id': None},
+                {'id': 3, 'employee_id': 'emp-001', 'date': '2025-11-25', 'dagdeel': 'O', 'status': 2, 'service_id': None},
+                {'id': 4, 'employee_id': 'emp-001', 'date': '2025-11-25', 'dagdeel': 'M', 'status': 2, 'service_id': None},
+                {'id': 5, 'employee_id': 'emp-002', 'date': '2025-11-25', 'dagdeel': 'A', 'status': 3, 'service_id': None},
+            ],
+            'roster_employee_services': [
+                {'id': 1, 'employee_id': 'emp-001', 'service_id': 'svc-dio', 'aantal': 3, 'actief': True},
+                {'id': 2, 'employee_id': 'emp-002', 'service_id': 'svc-dio', 'aantal': 0, 'actief': True},
+                {'id': 3, 'employee_id': 'emp-002', 'service_id': 'svc-ech', 'aantal': 2, 'actief': False},
+            ],
+            'service_types': [
+                {'id': 'svc-dio', 'code': 'DIO', 'is_systeem': True},
+                {'id': 'svc-ech', 'code': 'ECH', 'is_systeem': False},
+            ],
+        }
+    
+    @pytest.fixture
+    def client(self, tables):
+        """Client whose paginated queries page through `tables`."""
+        client = MagicMock()
+        
+        def table(name):
+            query = MagicMock()
+            query.select.return_value = query
+            query.eq.return_value = query
+            query.order.return_value = query
+            query.range.side_effect = lambda start, end: MagicMock(
+                execute=MagicMock(return_value=MagicMock(data=tables[name][start:end + 1]))
+            )
+            return query
+        
+        client.table.side_effect = table
+        return client
+    
+    def test_each_table_read_once_and_paginated(self, client):
+        """Repeated accessors hit memory; pages are fetched until short."""
+        repo = RosterRepository(client, 'test-roster-123', page_size=2)
+        
+        assert len(repo.assignments()) == 5
+        assert len(repo.assignments(statuses=(2,))) == 3
+        assert repo.unavailability() == {('emp-002', '2025-11-25', 'A')}
+        assert [c['id'] for c in repo.capacity()] == [1]
+        assert len(repo.capacity(active_only=False)) == 3
+        
+        # 5 rows / page size 2 -> 3 round trips, 3 rows -> 2 round trips
+        assert repo.stats()['reads'] == {'roster_assignments': 3, 'roster_employee_services': 2}
+    
+    def test_invalidate_forces_fresh_read(self, client):
+        """invalidate() drops memoized tables."""
+        repo = RosterRepository(client, 'test-roster-123')
+        repo.assignments()
+        repo.invalidate('roster_assignments')
+        repo.assignments()
+        
+        assert repo.reads['roster_assignments'] == 2
+    
+    def test_trigger_verifier_uses_one_read(self, client):
+        """DIO/DDO blocking is verified in memory, not per assignment."""
+        workspace = WorkspaceState(
+            rosterid='test-roster-123',
+            startdate=date(2025, 11, 24),
+            enddate=date(2025, 11, 30)
+        )
+        repo = RosterRepository(client, 'test-roster-123')
+        verifier = TriggerVerifier(workspace, client=client, repository=repo)
+        
+        result = verifier.verify_all_triggers()
+        
+        assert result['checks']['dio_ddo_blocking']['verified_count'] == 1
+        assert result['checks']['blocking_records']['blocking_records_count'] == 3
+        assert repo.stats()['reads'] == {'roster_assignments': 1, 'service_types': 1}
+
+
+class TestRosterDeltaSync:
+    """Tests for watermark-based delta syncs between repositories."""
+    
+    @pytest.fixture
+    def rows(self):
+        """roster_employee_services rows with updated_at."""
+        return [
+            {'id': 1, 'employee_id': 'emp-001', 'service_id': 'svc-dio', 'aantal': 3, 'actief': True,
+             'updated_at': '2025-11-19T10:00:00+00:00'},
+            {'id': 2, 'employee_id': 'emp-002', 'service_id': 'svc-dio', 'aantal': 1, 'actief': True,
+             'updated_at': '2025-11-20T10:00:00+00:00'},
+        ]
+    
+    @pytest.fixture
+    def client(self, rows):
+        """Client that applies gte() filters and answers exact counts."""
+        client = MagicMock()
+        
+        def table(name):
+            query = MagicMock()
+            filters = []
+            query.select.side_effect = lambda columns, count=None: query
+            query.eq.return_value = query
+            query.order.return_value = query
+            query.limit.return_value = MagicMock(
+                execute=lambda: MagicMock(count=len(rows), data=rows[:1])
+            )
+            query.gte.side_effect = lambda column, value: filters.append((column, value)) or query
+            
+            def page(start, end):
+                matching = [
+                    r for r in rows
+                    if all(datetime.fromisoformat(r[c]) >= datetime.fromisoformat(v) for c, v in filters)
+                ]
+                return MagicMock(execute=MagicMock(return_value=MagicMock(data=matching[start:end + 1])))
+            
+            query.range.side_effect = page
+            return query
+        
+        client.table.side_effect = table
+        return client
+    
+    def test_second_run_fetches_only_changed_rows(self, client, rows):
+        """A warm snapshot is updated with rows changed since the watermark."""
+        cache = RosterSnapshotCache(skew_s=60)
+        RosterRepository(client, 'test-roster-123', snapshot_cache=cache).capacity()
+        
+        rows[1] = dict(rows[1], aantal=4, updated_at='2025-11-21T09:00:00+00:00')
+        repo = RosterRepository(client, 'test-roster-123', snapshot_cache=cache)
+        capacity = repo.capacity()
+        
+        assert [c['aantal'] for c in capacity] == [3, 4]
+        assert repo.sync_modes == {'roster_employee_services': 'delta'}
+        # one page of changed rows + one count
+        assert repo.reads == {'roster_employee_services': 2}
+        assert cache.stats()['delta_rows'] == 1
+    
+    def test_deleted_row_forces_full_reload(self, client, rows):
+        """A row count mismatch after merging falls back to a full read."""
+        cache = RosterSnapshotCache()
+        RosterRepository(client, 'test-roster-123', snapshot_cache=cache).capacity()
+        
+        del rows[0]
+        repo = RosterRepository(client, 'test-roster-123', snapshot_cache=cache)
+        
+        assert [c['id'] for c in repo.capacity()] == [2]
+        assert repo.sync_modes == {'roster_employee_services': 'full'}
+        assert cache.stats()['fallbacks'] == 1
+    
+    def test_invalidate_and_age_drop_snapshot(self, client):
+        """Own writes and old snapshots lead to a full read."""
+        now = [0.0]
+        cache = RosterSnapshotCache(max_age_s=100, clock=lambda: now[0])
+        repo = RosterRepository(client, 'test-roster-123', snapshot_cache=cache)
+        repo.capacity()
+        repo.invalidate('roster_employee_services')
+        assert cache.get('test-roster-123', 'roster_employee_services') is None
+        
+        repo.capacity()
+        now[0] = 101.0
+        assert cache.get('test-roster-123', 'roster_employee_services') is None
+
+
+def week_repository():
+    """Repository with a one-week roster, two GRO employees and three demand rows."""
+    def demand(service_id, code, day, dagdeel):
+        return {'roster_id': 'r1', 'service_id': service_id, 'date': day, 'dagdeel': dagdeel,
+                'team': 'GRO', 'aantal': 1, 'service_types': {'code': code, 'is_systeem': False}}
+    
+    days = [f'2025-11-{d}' for d in range(24, 31)]
+    assignments = [
+        {'roster_id': 'r1', 'employee_id': emp, 'date': day, 'dagdeel': dd, 'status': 0}
+        for emp in ('emp-a', 'emp-b') for day in days for dd in 'OMA'
+    ]
+    # Pinned assignment of emp-a outside the window
+    assignments[0].update(status=1, service_id='svc-ech', source='manual')
+    
+    repo = MagicMock()
+    repo.roster_id = 'r1'
+    repo.roster.return_value = {'id': 'r1', 'start_date': '2025-11-24', 'end_date': '2025-11-30'}
+    repo.demand.return_value = [
+        demand('svc-ech', 'ECH', '2025-11-24', 'O'),
+        demand('svc-ech', 'ECH', '2025-11-25', 'O'),
+        demand('svc-ech', 'ECH', '2025-11-28', 'M'),
+        demand('svc-spe', 'SPE', '2025-11-29', 'O'),
+    ]
+    repo.assignments.return_value = assignments
+    repo.capacity.return_value = [
+        {'roster_id': 'r1', 'employee_id': 'emp-a', 'service_id': 'svc-ech', 'aantal': 1, 'actief': True},
+        {'roster_id': 'r1', 'employee_id': 'emp-a', 'service_id': 'svc-spe', 'aantal': 1, 'actief': True},
+        {'roster_id': 'r1', 'employee_id': 'emp-b', 'service_id': 'svc-ech', 'aantal': 2, 'actief': True},
+    ]
+    repo.employees.return_value = [
+        {'id': emp, 'voornaam': emp, 'achternaam': 'X', 'team': 'GRO', 'actief': True}
+        for emp in ('emp-a', 'emp-b')
+    ]
+    repo.service_types.return_value = {}
+    return repo
+
+
+class RecordingDb:
+    """Supabase stand-in that records update(...).eq(...).execute() chains."""
+    
+    def __init__(self):
+        self.updates = []
+    
+    def table(self, name):
+        return RecordingQuery(self, name)
+
+
+class RecordingQuery:
+    def __init__(self, db, name):
+        self.db, self.name, self.data, self.filters = db, name, None, {}
+    
+    def update(self, data):
+        self.data = data
+        return self
+    
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+    
+    def execute(self):
+        self.db.updates.append((self.name, self.data, dict(self.filters)))
+        return MagicMock(data=[])
+
+
+def apply_writes(repository, db):
+    """Make the repository read back the roster_assignments updates recorded by db."""
+    rows = repository.assignments.return_value
+    for table, data, filters in db.updates:
+        if table != 'roster_assignments':
+            continue
+        for row in rows:
+            if all(row[column] == value for column, value in filters.items()):
+                row.update(data)
+
+
+class TestIncrementalSolve:
+    """Tests for GreedyRosteringEngine.solve_incremental."""
+    
+    @pytest.fixture
+    def repository(self):
+        return week_repository()
+    
+    def test_only_window_and_ripple_are_assigned(self, repository):
+        """Open demand outside the window and ripple services stays open."""
+        db = MagicMock()
+        engine = GreedyRosteringEngine(db, repository=repository)
+        
+        report = engine.solve_incremental('r1', [('emp-b', '2025-11-25', 'M')])
+        
+        assert report['mode'] == 'incremental'
+        assert report['window'] == ['2025-11-24', '2025-11-25', '2025-11-26']
+        # 25 O (window) and 28 M (emp-b's ECH capacity ripple); SPE on 29 stays open
+        assert {(d['employee_id'], d['date'], d['dagdeel']) for d in report['diff']} == {
+            ('emp-b', '2025-11-25', 'O'), ('emp-b', '2025-11-28', 'M')
+        }
+        assert [s['service_code'] for s in report['open_slots']] == ['SPE']
+        # Only the diff is written (plus the roster status)
+        assert db.table.return_value.update.call_count == 3
+
+
+class TestSolveResultCache:
+    """Tests for the content-addressed solve result cache."""
+    
+    def test_unchanged_snapshot_replays_cached_result(self):
+        """A repeat solve writes the same rows without re-running the greedy loop."""
+        cache = ResultCache(max_entries=4, db_path=None)
+        first_db, second_db = MagicMock(), MagicMock()
+        first = GreedyRosteringEngine(first_db, repository=week_repository(), result_cache=cache)
+        report = first.solve_roster('r1')
+        
+        second = GreedyRosteringEngine(second_db, repository=week_repository(), result_cache=cache)
+        with patch.object(second, '_assign_all_shifts') as assign:
+            replay = second.solve_roster('r1')
+        
+        assign.assert_not_called()
+        assert (report['result_cache'], replay['result_cache']) == ('miss', 'hit')
+        assert replay['statistics'] == report['statistics']
+        assert replay['open_slots'] == report['open_slots']
+        assert second_db.table.return_value.update.call_args_list == \
+            first_db.table.return_value.update.call_args_list
+    
+    def test_resolve_after_greedy_write_hits(self):
+        """The rows a greedy run writes are not inputs of the next solve."""
+        cache = ResultCache(max_entries=4, db_path=None)
+        repository, db = week_repository(), RecordingDb()
+        report = GreedyRosteringEngine(db, repository=repository, result_cache=cache).solve_roster('r1')
+        apply_writes(repository, db)
+        assert any(row.get('source') == 'greedy' for row in repository.assignments.return_value)
+        
+        replay_db = RecordingDb()
+        replay = GreedyRosteringEngine(replay_db, repository=repository, result_cache=cache).solve_roster('r1')
+        
+        assert (report['result_cache'], replay['result_cache']) == ('miss', 'hit')
+        assert replay['statistics'] == report['statistics']
+        assert replay_db.updates == db.updates
+    
+    def test_planner_edit_after_greedy_write_misses(self):
+        """A pinned planner edit on top of the greedy result is a new input."""
+        cache = ResultCache(max_entries=4, db_path=None)
+        repository, db = week_repository(), RecordingDb()
+        GreedyRosteringEngine(db, repository=repository, result_cache=cache).solve_roster('r1')
+        apply_writes(repository, db)
+        edited = next(row for row in repository.assignments.return_value if row.get('source') == 'greedy')
+        edited['source'] = 'manual'
+        
+        report = GreedyRosteringEngine(RecordingDb(), repository=repository, result_cache=cache).solve_roster('r1')
+        
+        assert report['result_cache'] == 'miss'
+    
+    def test_changed_input_row_misses(self):
+        """Any changed row gives a different key."""
+        cache = ResultCache(max_entries=4, db_path=None)
+        GreedyRosteringEngine(MagicMock(), repository=week_repository(), result_cache=cache).solve_roster('r1')
+        
+        repository = week_repository()
+        repository.capacity.return_value[2]['aantal'] = 1
+        report = GreedyRosteringEngine(MagicMock(), repository=repository, result_cache=cache).solve_roster('r1')
+        
+        assert report['result_cache'] == 'miss'
+        assert cache.stats()['misses'] == 2
+    
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """A new process (new cache object) finds results in the SQLite tier."""
+        path = str(tmp_path / 'results.sqlite')
+        ResultCache(max_entries=1, db_path=path).put('k', {'value': 1})
+        
+        cache = ResultCache(max_entries=1, db_path=path)
+        assert cache.get('k') == {'value': 1}
+        assert cache.get('k') == {'value': 1}
+        assert cache.stats()['disk_hits'] == 1
+        assert cache.stats()['memory_hits'] == 1
+    
+    def test_bounded_tiers(self, tmp_path):
+        """Both tiers drop the least recently used entries."""
+        cache = ResultCache(max_entries=1, db_path=str(tmp_path / 'results.sqlite'), disk_entries=2)
+        for key in ('a', 'b', 'c'):
+            cache.put(key, key)
+        
+        assert cache.stats()['entries'] == 1
+        assert cache.stats()['evictions'] == 2
+        assert cache.stats()['disk_entries'] == 2
+        assert cache.get('a') is None
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v', '--tb=short'])
+
+
+class TestSolveRosterEndpoint:
+    """Tests for POST /solve-roster/{roster_id} in solver_api."""
+    
+    def test_solve_write_solve_hits_result_cache(self):
+        """The service's shared result cache serves a re-solve after the greedy write."""
+        from fastapi.testclient import TestClient
+        import solver_api
+        
+        api = solver_api.SolverAPI()
+        api.result_cache = ResultCache(max_entries=4, db_path=None)
+        client = TestClient(api.app)
+        repository, db = week_repository(), RecordingDb()
+        
+        with patch('solver_api.get_client', return_value=db), \
+                patch('roster_repository.RosterRepository', return_value=repository):
+            first = client.post('/solve-roster/r1')
+            apply_writes(repository, db)
+            second = client.post('/solve-roster/r1')
+        
+        assert (first.status_code, second.status_code) == (200, 200)
+        assert (first.json()['result_cache'], second.json()['result_cache']) == ('miss', 'hit')
+        assert api.result_cache.stats()['memory_hits'] == 1
+    
+    def test_uses_process_result_cache(self):
+        import solver_api
+        from result_cache import get_result_cache
+        
+        assert solver_api.SolverAPI().result_cache is get_result_cache()
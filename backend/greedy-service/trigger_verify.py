@@ -3,15 +3,19 @@
 After batch-insert of assignments, Supabase triggers should execute
 to set status=2 (BLOCKED) for related slots per DIO/DDO rules.
 
-This module verifies that triggers executed correctly.
+This module verifies that triggers executed correctly. All checks run
+in memory against one fresh read of roster_assignments (via the
+RosterRepository of the run) instead of querying per check and per
+DIO/DDO assignment.
 """
 
-import os
 import logging
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime, date, timedelta
 from models import WorkspaceState
-from supabase import create_client, Client
+from supabase import Client
+from db_client import get_client
+from roster_repository import RosterRepository
 
 logger = logging.getLogger(__name__)
 
@@ -19,17 +23,30 @@ logger = logging.getLogger(__name__)
 class TriggerVerifier:
     """Verify that Supabase triggers executed correctly."""
     
-    def __init__(self, workspace: WorkspaceState):
+    def __init__(
+        self,
+        workspace: WorkspaceState,
+        client: Optional[Client] = None,
+        repository: Optional[RosterRepository] = None
+    ):
         """Initialize trigger verifier.
         
         Args:
             workspace: WorkspaceState with completed processing
+            client: Supabase client (default: shared pooled client)
+            repository: RosterRepository of the current run (created on
+                        first use if None)
         """
         self.workspace = workspace
-        self.client: Client = create_client(
-            os.getenv('SUPABASE_URL'),
-            os.getenv('SUPABASE_KEY')
-        )
+        self.client: Client = client or get_client()
+        self._repository = repository
+    
+    @property
+    def repository(self) -> RosterRepository:
+        """Roster repository used for all verification reads."""
+        if self._repository is None:
+            self._repository = RosterRepository(self.client, self.workspace.rosterid)
+        return self._repository
     
     def verify_all_triggers(self) -> Dict:
         """Execute all trigger verification checks.
@@ -53,6 +70,8 @@ class TriggerVerifier:
         start_time = datetime.now()
         
         try:
+            # Triggers ran after the write: re-read assignments once for all checks
+            self.repository.invalidate('roster_assignments')
             checks = {
                 'blocking_records': self.verify_blocking_records_exist(),
                 'dio_ddo_blocking': self.verify_dio_ddo_blocking(),
@@ -99,14 +118,7 @@ class TriggerVerifier:
         logger.info("  Check 1: Blocking records exist...")
         
         try:
-            # Query for blocking records
-            blocking_records = self.client.table('roster_assignments') \
-                .select('id, date, dagdeel, employee_id, status') \
-                .eq('roster_id', self.workspace.roster_id) \
-                .eq('status', 2) \
-                .execute()
-            
-            blocking_count = len(blocking_records.data)
+            blocking_count = len(self.repository.assignments(statuses=(2,)))
             
             if blocking_count > 0:
                 logger.info(f"    ✅ Found {blocking_count} blocking records (status=2)")
@@ -159,9 +171,10 @@ class TriggerVerifier:
             logger.info(f"    Found {len(dio_ddo_assignments)} DIO/DDO assignments")
             
             # Verify blocking for each DIO/DDO assignment
+            blocked_slots = self.repository.unavailability(statuses=(2,))
             verified_count = 0
             for assignment in dio_ddo_assignments:
-                if self._verify_single_dio_ddo_blocking(assignment):
+                if self._verify_single_dio_ddo_blocking(assignment, blocked_slots):
                     verified_count += 1
             
             passed = verified_count == len(dio_ddo_assignments)
@@ -201,10 +214,7 @@ class TriggerVerifier:
         
         try:
             # Load all assignments for this roster
-            all_assignments = self.client.table('roster_assignments') \
-                .select('*') \
-                .eq('roster_id', self.workspace.roster_id) \
-                .execute()
+            all_assignments = self.repository.assignments()
             
             # Check status distribution
             status_counts = {
@@ -213,14 +223,14 @@ class TriggerVerifier:
                 2: 0,  # BLOCKED
             }
             
-            for record in all_assignments.data:
+            for record in all_assignments:
                 status = record.get('status', 0)
                 if status in status_counts:
                     status_counts[status] += 1
             
-            total = len(all_assignments.data)
+            total = len(all_assignments)
             
-            logger.info(f"    Status distribution: {status_counts['1']} ACTIVE, {status_counts['2']} BLOCKED, {status_counts['0']} OPEN")
+            logger.info(f"    Status distribution: {status_counts[1]} ACTIVE, {status_counts[2]} BLOCKED, {status_counts[0]} OPEN")
             
             # Consistency check: ACTIVE > 0 and BLOCKED > 0 (if DIO/DDO exists)
             if status_counts[1] > 0:  # Some active assignments
@@ -276,28 +286,21 @@ class TriggerVerifier:
         try:
             # Edge case 1: Roster end date
             logger.info("    Checking roster end date edge case...")
-            end_date = self.workspace.end_date
+            end_date = self.workspace.enddate
             
             # Check for assignments on end_date
-            end_date_assignments = self.client.table('roster_assignments') \
-                .select('*') \
-                .eq('roster_id', self.workspace.roster_id) \
-                .eq('date', end_date.isoformat()) \
-                .execute()
+            all_records = self.repository.assignments()
+            end_date_str = end_date.isoformat()
+            end_date_assignments = [r for r in all_records if r.get('date') == end_date_str]
             
-            if end_date_assignments.data:
-                logger.info(f"    ✓ {len(end_date_assignments.data)} assignments on end date (no next-day blocking needed)")
+            if end_date_assignments:
+                logger.info(f"    ✓ {len(end_date_assignments)} assignments on end date (no next-day blocking needed)")
             
             # Edge case 2: Duplicate detection (should not exist)
             logger.info("    Checking for duplicate assignments...")
             
             # Group by (date, dagdeel, employee_id, service_id)
-            all_records = self.client.table('roster_assignments') \
-                .select('date, dagdeel, employee_id, service_id, status') \
-                .eq('roster_id', self.workspace.roster_id) \
-                .execute()
-            
-            duplicates = self._find_duplicates(all_records.data)
+            duplicates = self._find_duplicates(all_records)
             
             if duplicates:
                 logger.warning(f"    ⚠️  Found {len(duplicates)} potential duplicates")
@@ -330,31 +333,30 @@ class TriggerVerifier:
         """
         
         # Get service IDs for DIO/DDO
-        services = self.client.table('service_types') \
-            .select('id, code') \
-            .in_('code', ['DIO', 'DDO']) \
-            .execute()
-        
-        dio_ddo_service_ids = [s['id'] for s in services.data]
+        dio_ddo_service_ids = {
+            service_id for service_id, service in self.repository.service_types().items()
+            if service.get('code') in ('DIO', 'DDO')
+        }
         
         if not dio_ddo_service_ids:
             return []
         
         # Find all DIO/DDO assignments
-        dio_ddo_assignments = self.client.table('roster_assignments') \
-            .select('*') \
-            .eq('roster_id', self.workspace.roster_id) \
-            .in_('service_id', dio_ddo_service_ids) \
-            .eq('status', 1) \
-            .execute()
-        
-        return dio_ddo_assignments.data
+        return [
+            a for a in self.repository.assignments(statuses=(1,))
+            if a.get('service_id') in dio_ddo_service_ids
+        ]
     
-    def _verify_single_dio_ddo_blocking(self, assignment: Dict) -> bool:
+    def _verify_single_dio_ddo_blocking(
+        self,
+        assignment: Dict,
+        blocked_slots: Set[Tuple[str, str, str]]
+    ) -> bool:
         """Verify blocking pattern for single DIO/DDO assignment.
         
         Args:
             assignment: DIO/DDO assignment record
+            blocked_slots: (employee_id, date, dagdeel) with status=2
         
         Returns:
             True if blocking is correct, False otherwise
@@ -372,40 +374,12 @@ class TriggerVerifier:
         current_date = date.fromisoformat(date_str)
         next_date = current_date + timedelta(days=1)
         
-        # Check: Same-day M blocking
-        same_day_m = self.client.table('roster_assignments') \
-            .select('id') \
-            .eq('roster_id', self.workspace.roster_id) \
-            .eq('employee_id', emp_id) \
-            .eq('date', date_str) \
-            .eq('dagdeel', 'M') \
-            .eq('status', 2) \
-            .execute()
-        
-        # Check: Next-day O/M blocking
-        next_day_o = self.client.table('roster_assignments') \
-            .select('id') \
-            .eq('roster_id', self.workspace.roster_id) \
-            .eq('employee_id', emp_id) \
-            .eq('date', next_date.isoformat()) \
-            .eq('dagdeel', 'O') \
-            .eq('status', 2) \
-            .execute()
-        
-        next_day_m = self.client.table('roster_assignments') \
-            .select('id') \
-            .eq('roster_id', self.workspace.roster_id) \
-            .eq('employee_id', emp_id) \
-            .eq('date', next_date.isoformat()) \
-            .eq('dagdeel', 'M') \
-            .eq('status', 2) \
-            .execute()
-        
-        # All three blocking slots must exist
+        # Same-day M and next-day O/M blocking must all exist
+        next_date_str = next_date.isoformat()
         blocking_found = (
-            len(same_day_m.data) > 0 and
-            len(next_day_o.data) > 0 and
-            len(next_day_m.data) > 0
+            (emp_id, date_str, 'M') in blocked_slots and
+            (emp_id, next_date_str, 'O') in blocked_slots and
+            (emp_id, next_date_str, 'M') in blocked_slots
         )
         
         return blocking_found
@@ -1,33 +1,101 @@
 """Database batch writer for GREEDY assignments.
 
-Handles efficient batch-insert of processed assignments to Supabase
+Handles efficient batch-upsert of processed assignments to Supabase
 after GREEDY processing is complete.
+
+Records are split into size-bounded chunks and sent concurrently by a
+bounded worker pool. Every chunk is an upsert on the natural key
+(roster_id, employee_id, date, dagdeel), so retries are idempotent and a
+chunk rejected for bad data can be bisected to isolate the bad rows.
+Transport and server errors fail the whole chunk without retrying.
 """
 
 import os
+import json
+import time
 import logging
-from typing import List, Dict, Tuple
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import List, Dict, Tuple, Optional
 from models import Assignment, WorkspaceState
-from supabase import create_client, Client
+from postgrest.exceptions import APIError
+from supabase import Client
+from db_client import get_client
 
 logger = logging.getLogger(__name__)
 
+# Natural key of roster_assignments (roster_assignments_unique_key)
+NATURAL_KEY = ('roster_id', 'employee_id', 'date', 'dagdeel')
+ON_CONFLICT = ','.join(NATURAL_KEY)
+
+# SQLSTATE classes that point at the rows themselves (22 data exception,
+# 23 integrity constraint violation); only these are worth bisecting
+ROW_ERROR_CLASSES = ('22', '23')
+
+# Chunking defaults, overridable via environment
+DEFAULT_CHUNK_ROWS = int(os.getenv('GREEDY_WRITE_CHUNK_ROWS', '500'))
+DEFAULT_CHUNK_BYTES = int(os.getenv('GREEDY_WRITE_CHUNK_BYTES', str(256 * 1024)))
+DEFAULT_WRITE_WORKERS = int(os.getenv('GREEDY_WRITE_WORKERS', '4'))
+
 
 class BatchWriter:
     """Write workspace back to database in batch."""
     
-    def __init__(self, workspace: WorkspaceState):
+    def __init__(
+        self,
+        workspace: WorkspaceState,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+        max_workers: int = DEFAULT_WRITE_WORKERS,
+        client: Optional[Client] = None
+    ):
         """Initialize batch writer.
         
         Args:
             workspace: Completed WorkspaceState with all assignments
+            chunk_rows: Maximum number of records per request
+            chunk_bytes: Maximum JSON payload size per request
+            max_workers: Maximum number of concurrent requests
+            client: Supabase client (default: shared pooled client)
         """
         self.workspace = workspace
-        self.client: Client = create_client(
-            os.getenv('SUPABASE_URL'),
-            os.getenv('SUPABASE_KEY')
+        self.chunk_rows = max(1, chunk_rows)
+        self.chunk_bytes = max(1, chunk_bytes)
+        self.max_workers = max(1, max_workers)
+        self.client: Client = client or get_client()
+    
+    def write_all(self) -> Dict:
+        """Write ACTIVE (status=1) and BLOCKED (status=2) records in one pipeline.
+        
+        Both record types share the same chunking and worker pool and send
+        the same columns, so a chunk mixing them does not null out a column
+        only one type carries. If an active and a blocking record target the
+        same slot, the active one wins.
+        
+        Returns:
+            Dictionary with statistics (see _write_records) plus per-type
+            counts under 'by_status': {1: {...}, 2: {...}}
+        """
+        
+        logger.info("💾 Writing assignments and blocking records to database...")
+        
+        active = [a for a in self.workspace.assignments if a.status == 1]
+        blocking = [a for a in self.workspace.assignments if a.status == 2]
+        
+        records = self._dedupe_by_natural_key(
+            self._prepare_records(active) +
+            self._prepare_blocking_records(blocking)
         )
+        result = self._write_records(records)
+        
+        by_status = {1: {'written': 0, 'failed': 0}, 2: {'written': 0, 'failed': 0}}
+        failed_keys = {self._natural_key(r) for r in result.pop('failed_records')}
+        for record in records:
+            outcome = 'failed' if self._natural_key(record) in failed_keys else 'written'
+            by_status[record['status']][outcome] += 1
+        result['by_status'] = by_status
+        
+        return result
     
     def write_assignments(self) -> Dict:
         """Write all GREEDY assignments to database.
@@ -38,17 +106,17 @@ class BatchWriter:
         Returns:
             Dictionary with statistics:
             {
-                'written': int,     # Number of records successfully inserted
+                'written': int,     # Number of records successfully upserted
                 'failed': int,       # Number of records that failed
                 'duration_ms': int,  # Time taken in milliseconds
                 'error': str or None # Error message if any
+                'chunks': [...]      # Per-chunk rows, duration and rows/s
             }
         """
         
         logger.info("💾 Writing assignments to database...")
-        start_time = datetime.now()
         
-        # Prepare data for insert
+        # Prepare data for upsert
         assignments_to_write = [
             a for a in self.workspace.assignments
             if a.status == 1  # ACTIVE assignments only
@@ -56,50 +124,17 @@ class BatchWriter:
         
         if not assignments_to_write:
             logger.warning("⚠️  No assignments to write (status=1)")
-            duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
-            return {
-                'written': 0,
-                'failed': 0,
-                'duration_ms': duration_ms,
-                'error': None
-            }
-        
-        # Convert to database format
-        db_records = self._prepare_records(assignments_to_write)
         
-        # Batch insert
-        try:
-            logger.info(f"  Inserting {len(db_records)} records...")
-            result = self.client.table('roster_assignments').insert(db_records).execute()
-            
-            duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
-            logger.info(f"✅ Wrote {len(db_records)} assignments in {duration_ms}ms")
-            
-            return {
-                'written': len(db_records),
-                'failed': 0,
-                'duration_ms': duration_ms,
-                'error': None
-            }
-        
-        except Exception as e:
-            duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
-            logger.error(f"❌ Write failed: {e}")
-            logger.error(f"  Attempted to write {len(db_records)} records")
-            
-            return {
-                'written': 0,
-                'failed': len(db_records),
-                'duration_ms': duration_ms,
-                'error': str(e)
-            }
+        result = self._write_records(self._prepare_records(assignments_to_write))
+        result.pop('failed_records')
+        return result
     
     def write_blocking_records(self) -> Dict:
         """Write blocking assignments (status=2) to database.
         
         In GREEDYAlternatief architecture:
         - Blocking is set IN MEMORY by pairing logic
-        - Status=2 records are inserted here to persist blocking
+        - Status=2 records are upserted here to persist blocking
         - Supabase triggers then update related records
         
         Returns:
@@ -107,7 +142,6 @@ class BatchWriter:
         """
         
         logger.info("🔒 Writing blocking assignments...")
-        start_time = datetime.now()
         
         # Prepare blocking records
         blocking_to_write = [
@@ -117,65 +151,196 @@ class BatchWriter:
         
         if not blocking_to_write:
             logger.info("✓ No blocking assignments needed")
-            duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
-            return {
-                'written': 0,
-                'failed': 0,
-                'duration_ms': duration_ms,
-                'error': None
-            }
         
-        # Convert to database format
-        db_records = self._prepare_blocking_records(blocking_to_write)
+        result = self._write_records(self._prepare_blocking_records(blocking_to_write))
+        result.pop('failed_records')
+        return result
+    
+    def _write_records(self, db_records: List[Dict]) -> Dict:
+        """Upsert records in size-bounded chunks with a bounded worker pool.
         
-        # Batch insert
-        try:
-            logger.info(f"  Inserting {len(db_records)} blocking records...")
-            result = self.client.table('roster_assignments').insert(db_records).execute()
-            
-            duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
-            logger.info(f"✅ Wrote {len(db_records)} blocking records in {duration_ms}ms")
-            
-            return {
-                'written': len(db_records),
-                'failed': 0,
-                'duration_ms': duration_ms,
-                'error': None
+        Args:
+            db_records: Records in roster_assignments format
+        
+        Returns:
+            {
+                'written': int,
+                'failed': int,
+                'duration_ms': int,
+                'error': str or None,    # First error message, if any
+                'chunks': [{'rows', 'duration_ms', 'rows_per_s', 'error'}, ...],
+                'rows_per_s': float,     # Overall throughput
+                'failed_records': [...]  # Records that could not be written
             }
+        """
+        
+        start_time = time.perf_counter()
+        chunks = self._chunk_records(db_records)
+        
+        if chunks:
+            logger.info(
+                f"  Upserting {len(db_records)} records in {len(chunks)} chunks "
+                f"({min(self.max_workers, len(chunks))} workers)..."
+            )
+        
+        chunk_stats: List[Dict] = []
+        failed_records: List[Dict] = []
+        if chunks:
+            # Run each chunk in a copy of the caller's context so db_phase
+            # request counting also covers the worker threads
+            contexts = [copy_context() for _ in chunks]
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+                for stats, failed in pool.map(
+                    lambda ctx, chunk: ctx.run(self._write_chunk, chunk), contexts, chunks
+                ):
+                    chunk_stats.extend(stats)
+                    failed_records.extend(failed)
+        
+        duration_s = time.perf_counter() - start_time
+        written = len(db_records) - len(failed_records)
+        errors = [c['error'] for c in chunk_stats if c['error']]
+        
+        if failed_records:
+            logger.error(f"❌ Write failed for {len(failed_records)} of {len(db_records)} records")
+            logger.error(f"  First error: {errors[0] if errors else 'unknown'}")
+        elif db_records:
+            logger.info(
+                f"✅ Wrote {written} records in {int(duration_s * 1000)}ms "
+                f"({written / duration_s if duration_s > 0 else 0:.0f} rows/s)"
+            )
         
+        return {
+            'written': written,
+            'failed': len(failed_records),
+            'duration_ms': int(duration_s * 1000),
+            'error': errors[0] if errors else None,
+            'chunks': chunk_stats,
+            'rows_per_s': round(written / duration_s, 1) if duration_s > 0 else 0.0,
+            'failed_records': failed_records
+        }
+    
+    def _write_chunk(self, chunk: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Upsert one chunk; on a row/data error bisect it to isolate the bad rows.
+        
+        Upserts are idempotent on the natural key, so re-sending the good
+        half of a failed chunk is safe. Other errors (network, timeouts,
+        5xx, auth) fail the whole chunk: splitting it would only send more
+        requests to a database that is already failing.
+        
+        Returns:
+            (per-request statistics, records that failed)
+        """
+        
+        started = time.perf_counter()
+        error: Optional[str] = None
+        row_error = False
+        try:
+            self.client.table('roster_assignments') \
+                .upsert(chunk, on_conflict=ON_CONFLICT) \
+                .execute()
+        except APIError as e:
+            error = str(e)
+            row_error = (e.code or '')[:2] in ROW_ERROR_CLASSES
         except Exception as e:
-            duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
-            logger.error(f"❌ Blocking write failed: {e}")
-            
-            return {
-                'written': 0,
-                'failed': len(db_records),
-                'duration_ms': duration_ms,
-                'error': str(e)
-            }
+            error = str(e)
+        
+        elapsed = time.perf_counter() - started
+        stats = {
+            'rows': len(chunk),
+            'duration_ms': int(elapsed * 1000),
+            'rows_per_s': round(len(chunk) / elapsed, 1) if elapsed > 0 and not error else 0.0,
+            'error': error
+        }
+        
+        if error is None:
+            logger.debug(f"  Chunk of {len(chunk)} rows: {stats['rows_per_s']} rows/s")
+            return [stats], []
+        
+        if not row_error:
+            logger.error(f"  Chunk of {len(chunk)} rows failed, not retried: {error}")
+            return [stats], chunk
+        
+        if len(chunk) == 1:
+            logger.warning(f"  Row rejected {self._natural_key(chunk[0])}: {error}")
+            return [stats], chunk
+        
+        middle = len(chunk) // 2
+        left_stats, left_failed = self._write_chunk(chunk[:middle])
+        right_stats, right_failed = self._write_chunk(chunk[middle:])
+        return [stats] + left_stats + right_stats, left_failed + right_failed
+    
+    def _chunk_records(self, db_records: List[Dict]) -> List[List[Dict]]:
+        """Split records into chunks bounded by row count and JSON payload size."""
+        
+        chunks: List[List[Dict]] = []
+        current: List[Dict] = []
+        current_bytes = 2  # enclosing brackets
+        
+        for record in db_records:
+            record_bytes = len(json.dumps(record, separators=(',', ':'))) + 1
+            if current and (
+                len(current) >= self.chunk_rows or
+                current_bytes + record_bytes > self.chunk_bytes
+            ):
+                chunks.append(current)
+                current, current_bytes = [], 2
+            current.append(record)
+            current_bytes += record_bytes
+        
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    @staticmethod
+    def _natural_key(record: Dict) -> Tuple:
+        return tuple(record[k] for k in NATURAL_KEY)
+    
+    def _dedupe_by_natural_key(self, db_records: List[Dict]) -> List[Dict]:
+        """Keep one record per natural key; ACTIVE records win over BLOCKED.
+        
+        A single upsert statement cannot touch the same row twice.
+        """
+        
+        by_key: Dict[Tuple, Dict] = {}
+        for record in db_records:
+            key = self._natural_key(record)
+            existing = by_key.get(key)
+            if existing is None or (existing['status'] == 2 and record['status'] == 1):
+                by_key[key] = record
+        
+        dropped = len(db_records) - len(by_key)
+        if dropped:
+            logger.warning(f"⚠️  Dropped {dropped} records with a duplicate natural key")
+        return list(by_key.values())
     
     def _prepare_records(self, assignments: List[Assignment]) -> List[Dict]:
-        """Convert Assignment objects to database insert format.
+        """Convert Assignment objects to database upsert format.
+        
+        created_at and updated_at are not sent: the column defaults and the
+        updated_at trigger set them from the database clock, which the
+        delta sync (RosterRepository) uses as its watermark. notes is sent
+        explicitly (NULL) so an active slot does not keep the note of an
+        earlier blocking record, and every record has the same columns.
         
         Args:
             assignments: List of Assignment objects
         
         Returns:
-            List of dictionaries ready for database insert
+            List of dictionaries ready for database upsert
         """
         
         db_records = []
         
         for assignment in assignments:
             record = {
-                'roster_id': assignment.roster_id,
-                'employee_id': assignment.employee_id,
+                'roster_id': assignment.rosterid,
+                'employee_id': assignment.employeeid,
                 'date': assignment.date.isoformat(),
                 'dagdeel': assignment.dagdeel,
-                'service_id': assignment.service_id,
+                'service_id': assignment.serviceid,
                 'status': assignment.status,
                 'source': assignment.source,
-                'created_at': datetime.now().isoformat(),
+                'notes': None,
             }
             db_records.append(record)
         
@@ -191,22 +356,22 @@ class BatchWriter:
             assignments: List of Assignment objects with status=2
         
         Returns:
-            List of dictionaries for database insert
+            List of dictionaries for database upsert (same columns as
+            _prepare_records)
         """
         
         db_records = []
         
         for assignment in assignments:
             record = {
-                'roster_id': assignment.roster_id,
-                'employee_id': assignment.employee_id,
+                'roster_id': assignment.rosterid,
+                'employee_id': assignment.employeeid,
                 'date': assignment.date.isoformat(),
                 'dagdeel': assignment.dagdeel,
-                'service_id': assignment.service_id,
+                'service_id': assignment.serviceid,
                 'status': 2,  # BLOCKED
                 'source': 'greedy-blocking',
                 'notes': 'Auto-blocked by DIO/DDO pairing logic',
-                'created_at': datetime.now().isoformat(),
             }
             db_records.append(record)
         
@@ -236,7 +401,7 @@ class BatchWriter:
             # Query records for this roster
             records = self.client.table('roster_assignments') \
                 .select('id') \
-                .eq('roster_id', self.workspace.roster_id) \
+                .eq('roster_id', self.workspace.rosterid) \
                 .eq('source', 'greedy') \
                 .execute()
             
@@ -284,5 +449,5 @@ class BatchWriter:
             'blocking_assignments': blocking_count,
             'open_slots': open_count,
             'total': len(self.workspace.assignments),
-            'roster_id': self.workspace.roster_id
+            'roster_id': self.workspace.rosterid
         }
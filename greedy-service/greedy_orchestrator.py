@@ -22,6 +22,8 @@ from loader import DataLoader
 from processor import GreedyProcessor
 from writer import BatchWriter
 from trigger_verify import TriggerVerifier
+from db_client import db_phase, get_client, get_request_counts
+from roster_repository import RosterRepository, get_snapshot_cache
 from reporter import Reporter
 
 # Configure logging
@@ -54,12 +56,14 @@ class GreedyOrchestrator:
         result: Final execution result
     """
     
-    def __init__(self, rooster_id: str):
+    def __init__(self, rooster_id: str, client=None):
         """
         Initialize orchestrator.
         
         Args:
             rooster_id: UUID of rooster to process
+            client: Supabase client shared by all phases
+                    (default: process-wide pooled client)
         
         Raises:
             ValueError: If rooster_id is empty
@@ -68,6 +72,8 @@ class GreedyOrchestrator:
             raise ValueError("rooster_id cannot be empty")
         
         self.rooster_id = rooster_id
+        self.client = client
+        self.repository = None
         self.workspace = None
         self.start_time = None
         self.result = None
@@ -96,6 +102,11 @@ class GreedyOrchestrator:
         """
         
         self.start_time = datetime.now()
+        self.client = self.client or get_client()
+        self.repository = RosterRepository(
+            self.client, self.rooster_id, snapshot_cache=get_snapshot_cache()
+        )
+        requests_before = get_request_counts()
         
         # Print header
         self._print_header()
@@ -158,6 +169,11 @@ class GreedyOrchestrator:
                 'write_result': write_result,
                 'verify_result': verify_result,
             }
+            self.result['metrics']['db_requests'] = {
+                phase: count - requests_before.get(phase, 0)
+                for phase, count in get_request_counts().items()
+                if count > requests_before.get(phase, 0)
+            }
             
             # Print summary
             self._print_execution_summary()
@@ -178,8 +194,9 @@ class GreedyOrchestrator:
         
         try:
             logger.info(f"Loading rooster {self.rooster_id}...")
-            loader = DataLoader(self.rooster_id)
-            workspace = loader.load_workspace()
+            loader = DataLoader(self.rooster_id, client=self.client)
+            with db_phase('load'):
+                workspace = loader.load_workspace()
             
             logger.info(f"✅ Phase 1 complete. Workspace initialized.")
             return workspace
@@ -218,8 +235,9 @@ class GreedyOrchestrator:
         
         try:
             logger.info(f"Writing {self.workspace.total_assigned} assignments to database...")
-            writer = BatchWriter(self.workspace)
-            result = writer.write_assignments()
+            writer = BatchWriter(self.workspace, client=self.client)
+            with db_phase('write'):
+                result = writer.write_assignments()
             
             if result['success']:
                 logger.info(f"✅ Phase 3 complete. {result['written']} records written.")
@@ -242,8 +260,13 @@ class GreedyOrchestrator:
         
         try:
             logger.info("Verifying database triggers and constraints...")
-            verifier = TriggerVerifier(self.workspace)
-            result = verifier.verify_all_triggers()
+            verifier = TriggerVerifier(
+                self.workspace,
+                client=self.client,
+                repository=self.repository
+            )
+            with db_phase('verify'):
+                result = verifier.verify_all_triggers()
             
             if result['success']:
                 logger.info(f"✅ Phase 4 complete. All constraints verified.")
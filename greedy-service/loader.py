@@ -3,10 +3,11 @@ FASE 1: Data Loader
 Load all data from Supabase into workspace state
 """
 
-import os
+import json
 import sys
+import time
 from datetime import date, timedelta
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 
 try:
     from supabase import create_client, Client
@@ -17,31 +18,46 @@ except ImportError:
 from models import ServiceTask, Assignment, WorkspaceState
 
 
+# Column projections per table (only what the workspace needs)
+ROOSTER_COLUMNS = "startdate,enddate"
+STAFFING_COLUMNS = "id,rosterid,date,dagdeel,team,serviceid,aantal"
+CAPACITY_COLUMNS = "employeeid,serviceid,aantal"
+ASSIGNMENT_COLUMNS = "id,rosterid,employeeid,date,dagdeel,serviceid,status,source"
+SERVICE_COLUMNS = "id,code,naam,issystem"
+
+# PostgREST returns at most this many rows per request by default
+PAGE_SIZE = 1000
+
+
 class DataLoader:
     """Load all data from Supabase into workspace."""
 
-    def __init__(self, rooster_id: str):
+    def __init__(self, rooster_id: str, client: Optional[Client] = None):
         self.rooster_id = rooster_id
-        self.client = Client(
-            os.getenv("SUPABASE_URL"),
-            os.getenv("SUPABASE_KEY")
-        )
+        if client is None:
+            # Shared pooled client (db_client lives with the writer/verifier modules)
+            from db_client import get_client
+            client = get_client()
+        self.client = client
+        # Per-query instrumentation: [{"query", "rows", "bytes", "ms"}, ...]
+        self.query_stats: List[Dict] = []
 
     def load_workspace(self) -> WorkspaceState:
         """Load all data into workspace state."""
 
         print("Loading workspace...")
 
+        self.query_stats = []
+
         # 1. Load rooster info
         print("  1. Loading rooster info...")
-        rooster_data = (
+        rooster = self._execute(
+            "roosters",
             self.client.table("roosters")
-            .select("*")
+            .select(ROOSTER_COLUMNS)
             .eq("id", self.rooster_id)
             .single()
-            .execute()
         )
-        rooster = rooster_data.data
         startdate = date.fromisoformat(rooster["startdate"])
         enddate = date.fromisoformat(rooster["enddate"])
 
@@ -54,18 +70,21 @@ class DataLoader:
 
         # 2. Load staffing requirements
         print("  2. Loading staffing requirements...")
-        staffing_data = (
-            self.client.table("rosterperiodstaffingdagdelen")
-            .select("*")
+        staffing_rows = self._fetch_all(
+            "rosterperiodstaffingdagdelen",
+            lambda: self.client.table("rosterperiodstaffingdagdelen")
+            .select(STAFFING_COLUMNS)
             .eq("rosterid", self.rooster_id)
-            .execute()
+            .order("id")
         )
 
-        # Load service mapping
-        services_map = self._load_services_map()
+        # Load service mapping (only services referenced by the demand)
+        services_map = self._load_services_map(
+            {row["serviceid"] for row in staffing_rows}
+        )
 
         tasks = []
-        for row in staffing_data.data:
+        for row in staffing_rows:
             service_info = services_map.get(row["serviceid"], {})
             task = ServiceTask(
                 id=row["id"],
@@ -89,80 +108,130 @@ class DataLoader:
 
         # 3. Load capacity (employee services)
         print("  3. Loading employee capacity...")
-        emp_services_data = (
-            self.client.table("rosteremployeeservices")
-            .select("*")
+        emp_services_rows = self._fetch_all(
+            "rosteremployeeservices",
+            lambda: self.client.table("rosteremployeeservices")
+            .select(CAPACITY_COLUMNS)
             .eq("rosterid", self.rooster_id)
             .eq("actief", True)
-            .execute()
+            .order("id")
         )
         capacity = {}
-        for row in emp_services_data.data:
+        for row in emp_services_rows:
             key = (row["employeeid"], row["serviceid"])
             capacity[key] = row["aantal"]
         workspace.capacity = capacity
         print(f"    -> Loaded {len(capacity)} employee-service combinations")
 
-        # 4. Load assignments (pre-planning)
-        print("  4. Loading existing assignments...")
-        assignments_data = (
-            self.client.table("rosterassignments")
-            .select("*")
+        # 4. Load assignments in one pass: OPEN/ACTIVE rows and BLOCKED slots
+        print("  4. Loading existing assignments and blocked slots...")
+        assignment_rows = self._fetch_all(
+            "rosterassignments",
+            lambda: self.client.table("rosterassignments")
+            .select(ASSIGNMENT_COLUMNS)
             .eq("rosterid", self.rooster_id)
-            .execute()
+            .order("id")
         )
+        assignments, blocked_slots, active_count = self._partition_assignments(assignment_rows)
+        workspace.assignments = assignments
+        workspace.totalassigned += active_count
+        workspace.blockedslots = blocked_slots
+        print(f"    -> Loaded {len(assignments)} assignments (active={workspace.totalassigned})")
+        print(f"    -> Loaded {len(blocked_slots)} blocked slots")
+
+        self._print_query_stats()
+        print("\nWorkspace loaded successfully!")
+        return workspace
+
+    def _partition_assignments(
+        self, rows: List[Dict]
+    ) -> Tuple[List[Assignment], set, int]:
+        """Split assignment rows into OPEN/ACTIVE assignments and BLOCKED slots.
+
+        Returns:
+            (assignments with status 0/1, blocked slot keys, active count)
+        """
         assignments = []
-        for row in assignments_data.data:
-            # Only load status 0 (OPEN) and 1 (ACTIVE)
-            if row["status"] in [0, 1]:
-                assignment = Assignment(
+        blocked_slots = set()
+        active_count = 0
+        for row in rows:
+            status = row["status"]
+            if status in (0, 1):
+                assignments.append(Assignment(
                     id=row["id"],
                     rosterid=row["rosterid"],
                     employeeid=row["employeeid"],
                     date=date.fromisoformat(row["date"]),
                     dagdeel=row["dagdeel"],
                     serviceid=row["serviceid"],
-                    status=row["status"],
+                    status=status,
                     source=row.get("source", "manual")
-                )
-                assignments.append(assignment)
-                if row["status"] == 1:
-                    workspace.totalassigned += 1
-        workspace.assignments = assignments
-        print(f"    -> Loaded {len(assignments)} assignments (active={workspace.totalassigned})")
+                ))
+                if status == 1:
+                    active_count += 1
+            elif status == 2:  # BLOCKED
+                blocked_slots.add((row["date"], row["dagdeel"], row["employeeid"]))
+        return assignments, blocked_slots, active_count
 
-        # 5. Load blocked slots (status=2)
-        print("  5. Loading blocked slots...")
-        blocked_data = (
-            self.client.table("rosterassignments")
-            .select("*")
-            .eq("rosterid", self.rooster_id)
-            .filter("status", "gt", 0)  # status > 0 means BLOCKED or higher
-            .execute()
+    def _load_services_map(self, service_ids: set) -> Dict[str, Dict]:
+        """Load the referenced service types into a map."""
+        if not service_ids:
+            return {}
+        services = self._execute(
+            "servicetypes",
+            self.client.table("servicetypes")
+            .select(SERVICE_COLUMNS)
+            .in_("id", sorted(service_ids))
         )
-        blocked_slots = set()
-        for row in blocked_data.data:
-            if row["status"] == 2:  # BLOCKED
-                key = (row["date"], row["dagdeel"], row["employeeid"])
-                blocked_slots.add(key)
-        workspace.blockedslots = blocked_slots
-        print(f"    -> Loaded {len(blocked_slots)} blocked slots")
-
-        print("\nWorkspace loaded successfully!")
-        return workspace
-
-    def _load_services_map(self) -> Dict[str, Dict]:
-        """Load service types into a map."""
-        services_data = self.client.table("servicetypes").select("*").execute()
         return {
             s["id"]: {
                 "code": s.get("code", ""),
                 "naam": s.get("naam", ""),
                 "issystem": s.get("issystem", False)
             }
-            for s in services_data.data
+            for s in services
         }
 
+    def _fetch_all(self, name: str, build_query: Callable) -> List[Dict]:
+        """Fetch every row of a query page by page.
+
+        build_query must return a fresh, ordered query builder so pages are
+        stable; it is called once per page.
+        """
+        rows: List[Dict] = []
+        offset = 0
+        while True:
+            page = self._execute(
+                name, build_query().range(offset, offset + PAGE_SIZE - 1)
+            )
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
+            offset += PAGE_SIZE
+
+    def _execute(self, name: str, query):
+        """Execute a query and record its timing and payload size."""
+        started = time.perf_counter()
+        data = query.execute().data
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        rows = data if isinstance(data, list) else [data]
+        self.query_stats.append({
+            "query": name,
+            "rows": len(rows) if data is not None else 0,
+            # Approximate: size of the decoded payload re-encoded as compact JSON
+            "bytes": len(json.dumps(data, separators=(",", ":"), default=str)),
+            "ms": round(elapsed_ms, 1),
+        })
+        return data
+
+    def _print_query_stats(self) -> None:
+        """Print per-query timings and payload sizes."""
+        total_ms = sum(q["ms"] for q in self.query_stats)
+        total_bytes = sum(q["bytes"] for q in self.query_stats)
+        print(f"  Queries: {len(self.query_stats)}, {total_bytes} bytes, {total_ms:.1f} ms")
+        for q in self.query_stats:
+            print(f"    - {q['query']}: {q['rows']} rows, {q['bytes']} bytes, {q['ms']} ms")
+
     def _sort_tasks(self, tasks: List[ServiceTask]) -> List[ServiceTask]:
         """Sort werkbestandopdracht per spec.
         
@@ -0,0 +1,142 @@
+"""
+DataLoader tests with an in-memory Supabase stand-in.
+Verify projected, paginated, single-pass workspace loading.
+"""
+
+import os
+import sys
+import unittest
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import loader
+from loader import DataLoader
+
+
+class FakeQuery:
+    """Minimal query builder recording select/filter/range calls."""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.columns = None
+        self.filters = []
+        self.offset = None
+        self.limit = None
+        self.is_single = False
+
+    def select(self, columns):
+        self.columns = columns
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, "eq", value))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append((column, "in", list(values)))
+        return self
+
+    def order(self, column):
+        return self
+
+    def single(self):
+        self.is_single = True
+        return self
+
+    def range(self, start, end):
+        self.offset, self.limit = start, end - start + 1
+        return self
+
+    def execute(self):
+        self.client.executed.append(self)
+        rows = list(self.client.tables[self.table])
+        for column, op, value in self.filters:
+            if op == "eq":
+                rows = [r for r in rows if r.get(column) == value]
+            else:
+                rows = [r for r in rows if r.get(column) in value]
+        if self.offset is not None:
+            rows = rows[self.offset:self.offset + self.limit]
+        data = rows[0] if self.is_single else rows
+        return type("Response", (), {"data": data})()
+
+
+class FakeClient:
+    def __init__(self, tables):
+        self.tables = tables
+        self.executed = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def make_tables(assignment_count=5):
+    statuses = [0, 1, 2, 3]
+    return {
+        "roosters": [{"id": "R1", "startdate": "2025-11-24", "enddate": "2025-12-28"}],
+        "rosterperiodstaffingdagdelen": [
+            {"id": "T1", "rosterid": "R1", "date": "2025-11-24", "dagdeel": "O",
+             "team": "TOT", "serviceid": "S1", "aantal": 2},
+        ],
+        "rosteremployeeservices": [
+            {"rosterid": "R1", "employeeid": "E1", "serviceid": "S1", "aantal": 3, "actief": True},
+            {"rosterid": "R1", "employeeid": "E2", "serviceid": "S1", "aantal": 1, "actief": False},
+        ],
+        "rosterassignments": [
+            {"id": f"A{i:04d}", "rosterid": "R1", "employeeid": f"E{i}", "date": "2025-11-25",
+             "dagdeel": "M", "serviceid": "S1", "status": statuses[i % 4], "source": "manual"}
+            for i in range(assignment_count)
+        ],
+        "servicetypes": [
+            {"id": "S1", "code": "DIO", "naam": "Dienst", "issystem": True},
+            {"id": "S2", "code": "ECH", "naam": "Echo", "issystem": False},
+        ],
+    }
+
+
+class TestDataLoader(unittest.TestCase):
+
+    def test_single_pass_partitions_assignments(self):
+        client = FakeClient(make_tables())
+        workspace = DataLoader("R1", client=client).load_workspace()
+
+        self.assertEqual([a.status for a in workspace.assignments], [0, 1, 0])
+        self.assertEqual(workspace.totalassigned, 1)
+        self.assertEqual(workspace.blockedslots, {("2025-11-25", "M", "E2")})
+        self.assertEqual(workspace.capacity, {("E1", "S1"): 3})
+        self.assertEqual(workspace.tasks[0].servicecode, "DIO")
+        self.assertEqual(workspace.startdate, date(2025, 11, 24))
+
+        assignment_queries = [q for q in client.executed if q.table == "rosterassignments"]
+        self.assertEqual(len(assignment_queries), 1)
+
+    def test_queries_are_projected_and_services_filtered(self):
+        client = FakeClient(make_tables())
+        DataLoader("R1", client=client).load_workspace()
+
+        self.assertTrue(all(q.columns != "*" for q in client.executed))
+        services_query = next(q for q in client.executed if q.table == "servicetypes")
+        self.assertIn(("id", "in", ["S1"]), services_query.filters)
+
+    def test_assignments_are_paginated(self):
+        original = loader.PAGE_SIZE
+        loader.PAGE_SIZE = 2
+        try:
+            client = FakeClient(make_tables(assignment_count=5))
+            data_loader = DataLoader("R1", client=client)
+            workspace = data_loader.load_workspace()
+        finally:
+            loader.PAGE_SIZE = original
+
+        pages = [q for q in client.executed if q.table == "rosterassignments"]
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(len(workspace.assignments), 3)
+        stats = [s for s in data_loader.query_stats if s["query"] == "rosterassignments"]
+        self.assertEqual(sum(s["rows"] for s in stats), 5)
+        self.assertTrue(all(s["bytes"] > 0 for s in stats))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -261,15 +261,21 @@ class RosterSolverV2:
                     )
                     
                     # Map employee index to actual employee ID
+                    assign_vars = []
                     for idx, emp_id in enumerate(eligible_employees):
                         day_offset = (date - datetime.now()).days if hasattr(date, 'days') else 0
                         if 0 <= day_offset < self.planning_horizon_days:
-                            assign_var = self.model.NewBoolVar(
+                            assign_vars.append(self.model.NewBoolVar(
                                 f"assign_staff_{staffing_id}_{slot}_{emp_id}"
-                            )
-                            # Link assignment to employee selection
-                            self.model.Add(emp_var == idx).OnlyEnforceIf(assign_var)
-                            self.model.Add(emp_var != idx).OnlyEnforceIf(assign_var.Not())
+                            ))
+                    
+                    if assign_vars:
+                        # Link assignment to employee selection:
+                        # precies één assign_var, emp_var = index van die var
+                        self.model.AddExactlyOne(assign_vars)
+                        self.model.Add(emp_var == cp_model.LinearExpr.WeightedSum(
+                            assign_vars, list(range(len(assign_vars)))
+                        ))
                 
                 logger.info(f"[FASE1] Staffing {staffing_id}: Added {aantal} assignment(s)")
                 
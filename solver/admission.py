@@ -0,0 +1,174 @@
+"""Admission control and priority queue in front of the solve thread pool.
+
+Solves are started by SolveScheduler instead of being submitted straight
+into SOLVER_EXECUTOR. At most `workers` run at once; the rest wait in a
+bounded queue ordered by priority class (interactive > full > batch), then
+arrival. Each request gets a cost estimate in seconds from
+employees x days x services (a per-cell rate learned from finished solves,
+capped by the request timeout). A request whose estimated wait exceeds the
+SLA of its class, or that finds the queue full, is rejected up front with
+AdmissionRejected(retry_after) - the endpoint turns that into 429.
+
+Configuration (environment):
+    SOLVER_QUEUE_SIZE            max queued (not running) solves (default 16)
+    SOLVER_SLA_INTERACTIVE       max estimated wait in seconds (default 15)
+    SOLVER_SLA_FULL              idem for full solves (default 120)
+    SOLVER_SLA_BATCH             idem for batch solves (default 900)
+    SOLVER_COST_PER_CELL         initial seconds per employee x day x service (default 0.005)
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ('interactive', 'full', 'batch')
+
+QUEUE_SIZE = int(os.getenv('SOLVER_QUEUE_SIZE', '16'))
+SLA_SECONDS = {
+    'interactive': float(os.getenv('SOLVER_SLA_INTERACTIVE', '15')),
+    'full': float(os.getenv('SOLVER_SLA_FULL', '120')),
+    'batch': float(os.getenv('SOLVER_SLA_BATCH', '900')),
+}
+COST_PER_CELL = float(os.getenv('SOLVER_COST_PER_CELL', '0.005'))
+
+# Weight of the newest observation in the learned seconds-per-cell rate
+RATE_SMOOTHING = 0.2
+
+
+class AdmissionRejected(Exception):
+    """The solve would wait longer than its SLA (or the queue is full)"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Job:
+    def __init__(self, priority: str, cells: int, timeout_seconds: float, estimate: float,
+                 fn: Callable, args: Tuple, future: asyncio.Future):
+        self.priority = priority
+        self.cells = cells
+        self.timeout_seconds = timeout_seconds
+        self.estimate = estimate
+        self.fn = fn
+        self.args = args
+        self.future = future
+        self.queued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+
+
+class SolveScheduler:
+    """Bounded priority queue feeding a thread pool, on one event loop"""
+
+    def __init__(self, executor: Executor, workers: int, queue_size: int = QUEUE_SIZE,
+                 sla_seconds: Optional[Dict[str, float]] = None,
+                 cost_per_cell: float = COST_PER_CELL):
+        if workers <= 0:
+            raise ValueError("workers must be positive")
+        self.executor = executor
+        self.workers = workers
+        self.queue_size = queue_size
+        self.sla_seconds = dict(SLA_SECONDS, **(sla_seconds or {}))
+        self.cost_per_cell = cost_per_cell
+        self._queue: List[Tuple[int, int, _Job]] = []
+        self._running: List[_Job] = []
+        self._seq = itertools.count()
+        self._waits: Deque[float] = deque(maxlen=200)
+
+        self.admitted = 0
+        self.completed = 0
+        self.rejected = {priority: 0 for priority in PRIORITIES}
+
+    def estimate_seconds(self, cells: int, timeout_seconds: float) -> float:
+        """Expected run time: learned rate x cells, never above the solve timeout"""
+        return min(float(timeout_seconds), self.cost_per_cell * cells)
+
+    def estimated_wait(self, priority: str) -> float:
+        """Seconds until a new job of this class would start"""
+        now = time.monotonic()
+        remaining = sorted(max(0.0, job.estimate - (now - job.started_at)) for job in self._running)
+        rank = PRIORITIES.index(priority)
+        ahead = sum(job.estimate for p, _, job in self._queue if p <= rank)
+        if len(remaining) < self.workers:
+            free_at = 0.0
+        else:
+            free_at = remaining[len(remaining) - self.workers]
+        return free_at + ahead / self.workers
+
+    async def submit(self, priority: str, cells: int, timeout_seconds: float,
+                     fn: Callable, *args: Any) -> Any:
+        """Queue fn(*args) for the thread pool; raises AdmissionRejected"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {PRIORITIES}")
+        wait = self.estimated_wait(priority)
+        if len(self._queue) >= self.queue_size or wait > self.sla_seconds[priority]:
+            self.rejected[priority] += 1
+            retry_after = max(1, math.ceil(wait))
+            reason = "queue full" if len(self._queue) >= self.queue_size else f"estimated wait {wait:.0f}s"
+            logger.warning(f"[Admission] Rejected {priority} solve ({reason}), retry after {retry_after}s")
+            raise AdmissionRejected(f"Solver busy ({reason})", retry_after)
+
+        loop = asyncio.get_running_loop()
+        job = _Job(priority, cells, timeout_seconds, self.estimate_seconds(cells, timeout_seconds),
+                   fn, args, loop.create_future())
+        heapq.heappush(self._queue, (PRIORITIES.index(priority), next(self._seq), job))
+        self.admitted += 1
+        self._dispatch(loop)
+        return await job.future
+
+    def _dispatch(self, loop: asyncio.AbstractEventLoop) -> None:
+        while self._queue and len(self._running) < self.workers:
+            _, _, job = heapq.heappop(self._queue)
+            if job.future.cancelled():
+                continue
+            job.started_at = time.monotonic()
+            self._waits.append(job.started_at - job.queued_at)
+            self._running.append(job)
+            done = loop.run_in_executor(self.executor, job.fn, *job.args)
+            done.add_done_callback(lambda result, job=job: self._finish(loop, job, result))
+
+    def _finish(self, loop: asyncio.AbstractEventLoop, job: _Job, result: asyncio.Future) -> None:
+        self._running.remove(job)
+        self.completed += 1
+        elapsed = time.monotonic() - job.started_at
+        # Runs that hit their own timeout say nothing about the real rate
+        if job.cells > 0 and elapsed < 0.95 * job.timeout_seconds and result.exception() is None:
+            self.cost_per_cell += RATE_SMOOTHING * (elapsed / job.cells - self.cost_per_cell)
+        if not job.future.cancelled():
+            if result.exception() is not None:
+                job.future.set_exception(result.exception())
+            else:
+                job.future.set_result(result.result())
+        self._dispatch(loop)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, running solves and wait times for the health output"""
+        waits = sorted(self._waits)
+        return {
+            'workers': self.workers,
+            'running': len(self._running),
+            'queue_depth': len(self._queue),
+            'queue_size': self.queue_size,
+            'queued_per_priority': {
+                priority: sum(1 for p, _, _ in self._queue if p == rank)
+                for rank, priority in enumerate(PRIORITIES)
+            },
+            'estimated_wait_seconds': {
+                priority: round(self.estimated_wait(priority), 1) for priority in PRIORITIES
+            },
+            'wait_seconds_avg': round(sum(waits) / len(waits), 3) if waits else 0.0,
+            'wait_seconds_p95': round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else 0.0,
+            'cost_per_cell': round(self.cost_per_cell, 6),
+            'admitted': self.admitted,
+            'completed': self.completed,
+            'rejected': dict(self.rejected),
+        }
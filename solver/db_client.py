@@ -0,0 +1,125 @@
+"""Process-wide Supabase client with a pooled keep-alive HTTP transport.
+
+All Supabase users in this service share one client, so connection
+setup is paid once per process instead of once per phase.
+Outgoing requests are counted per phase (see db_phase).
+
+This module is kept byte-identical in solver/db_client.py (CP-SAT
+service), solver2/src/solvers/db_client.py (solver2) and
+backend/greedy-service/db_client.py (greedy service): the services are
+deployed separately and share no package. Change all three;
+tests/test_greedy_api_single_flight.py fails when they differ.
+
+Configuration (environment):
+    SUPABASE_POOL_SIZE        max connections (default 10)
+    SUPABASE_KEEPALIVE        max idle keep-alive connections (default = pool size)
+    SUPABASE_CONNECT_TIMEOUT  seconds (default 5)
+    SUPABASE_READ_TIMEOUT     seconds (default 60)
+"""
+
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv('SUPABASE_POOL_SIZE', '10'))
+KEEPALIVE = int(os.getenv('SUPABASE_KEEPALIVE', str(POOL_SIZE)))
+CONNECT_TIMEOUT = float(os.getenv('SUPABASE_CONNECT_TIMEOUT', '5'))
+READ_TIMEOUT = float(os.getenv('SUPABASE_READ_TIMEOUT', '60'))
+
+_phase: ContextVar[str] = ContextVar('supabase_phase', default='default')
+_counts: Dict[str, int] = {}
+_lock = threading.Lock()
+_client = None
+_http_client = None
+
+
+@contextmanager
+def db_phase(name: str) -> Iterator[None]:
+    """Attribute requests made inside this block to phase `name`."""
+    token = _phase.set(name)
+    try:
+        yield
+    finally:
+        _phase.reset(token)
+
+
+def _count_request(request) -> None:
+    phase = _phase.get()
+    with _lock:
+        _counts[phase] = _counts.get(phase, 0) + 1
+
+
+def get_request_counts() -> Dict[str, int]:
+    """Number of HTTP requests per phase since start (or last reset)."""
+    with _lock:
+        return dict(_counts)
+
+
+def reset_request_counts() -> None:
+    with _lock:
+        _counts.clear()
+
+
+def _build_http_client():
+    import httpx
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=POOL_SIZE,
+            max_keepalive_connections=KEEPALIVE
+        ),
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        event_hooks={'request': [_count_request]}
+    )
+
+
+def get_client():
+    """Return the shared Supabase client, creating it on first use.
+
+    The client is built from SUPABASE_URL and SUPABASE_KEY. There is one
+    per process, so it takes no per-call URL/key; callers that need a
+    different database inject their own client.
+
+    Returns:
+        supabase Client
+    """
+    global _client, _http_client
+    if _client is not None:
+        return _client
+
+    with _lock:
+        if _client is None:
+            from supabase import create_client, ClientOptions
+
+            url = os.getenv('SUPABASE_URL')
+            key = os.getenv('SUPABASE_KEY')
+            http_client = _build_http_client()
+            try:
+                options = ClientOptions(httpx_client=http_client)
+            except TypeError:
+                # supabase-py without httpx_client support: shared client, default transport
+                http_client.close()
+                http_client = None
+                options = ClientOptions(postgrest_client_timeout=READ_TIMEOUT)
+
+            _client = create_client(url, key, options=options)
+            _http_client = http_client
+            logger.info(
+                f"Supabase client created (pool={POOL_SIZE}, keepalive={KEEPALIVE}, "
+                f"pooled_transport={http_client is not None})"
+            )
+    return _client
+
+
+def close_client() -> None:
+    """Close the pooled transport and drop the shared client."""
+    global _client, _http_client
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+        _client = None
+        _http_client = None
@@ -0,0 +1,401 @@
+"""Min-cost-flow roosterengine: snelle middenlaag tussen greedy en CP-SAT.
+
+De periode wordt per blok (één dag of een week) als min-cost-flow opgelost
+met OR-Tools SimpleMinCostFlow:
+
+    bron -> (medewerker, datum, dagdeel) -> bezettingsregel -> put
+
+- Capaciteit 1 per (medewerker, datum, dagdeel): max 1 dienst per dagdeel
+- Na een DIO/DDO in de ochtend zijn O en M van de volgende dag bezet
+  (zelfde harde regel als constraint 9 van RosterSolver); binnen één blok
+  worden conflicterende pijlen overgeslagen en opnieuw verdeeld
+- Alleen pijlen voor bevoegde medewerkers binnen het team van de regel;
+  geblokkeerde slots krijgen geen pijl
+- Capaciteit per regel = exact_aantal minus fixed assignments
+- Kosten: onder streefgetal goedkoop, boven streefgetal oplopend duurder
+  (eerlijke verdeling), reserve (aantal 0) en ZZP duurder
+
+DIO/DIA en DDO/DDA worden eerst als samengestelde pijl ingepland: één
+eenheid flow (medewerker, datum) -> paar-knoop dekt zowel de ochtend- als
+de avondregel. Daarna volgen de losse regels. Tussen blokken worden de
+kosten bijgewerkt met de tot dan toe ingeplande aantallen.
+
+Alleen exact_staffing wordt gedekt; de engine is een heuristiek (status
+FEASIBLE). Niet te dekken bezetting wordt per regel als staffing_shortage
+gerapporteerd, in dezelfde vorm als elastic_staffing van RosterSolver.
+"""
+
+import logging
+import time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from ortools.graph.python import min_cost_flow
+
+from models import (
+    Employee, Service, RosterEmployeeService,
+    FixedAssignment, BlockedSlot, SuggestedAssignment,
+    ExactStaffing, PreAssignment,
+    Assignment, ConstraintViolation,
+    SolveResponse, SolveStatus, Dagdeel, TeamType
+)
+from solver_engine import RosterSolver, TEAM_FILTER
+from rolling_horizon import NEXT_DAY_BLOCKING_CODES
+
+logger = logging.getLogger(__name__)
+
+# Kosten per toewijzing (lager = liever), afgeleid van de CP-SAT objective
+UNDER_TARGET_COST = -5
+RESERVE_COST = 2        # streefgetal 0
+ZZP_COST = 3
+FAIRNESS_STEP = 2       # extra kosten per toewijzing boven streefgetal
+PAIR_BONUS = -10        # DIO+DIA / DDO+DDA door dezelfde medewerker
+
+PAIRS = (('DIO', 'DIA'), ('DDO', 'DDA'))
+
+# (datum, dagdeel, service_id, team)
+RowKey = Tuple[date, str, str, str]
+
+
+class FlowSolver:
+    """Los bezetting per dag- of weekblok op als min-cost-flow."""
+
+    def __init__(
+        self,
+        roster_id: str,
+        employees: List[Employee],
+        services: List[Service],
+        roster_employee_services: List[RosterEmployeeService],
+        start_date: date,
+        end_date: date,
+        fixed_assignments: List[FixedAssignment],
+        blocked_slots: List[BlockedSlot],
+        suggested_assignments: List[SuggestedAssignment] = None,
+        exact_staffing: List[ExactStaffing] = None,
+        pre_assignments: List[PreAssignment] = None,
+        block_days: int = 1
+    ):
+        if block_days < 1:
+            raise ValueError("block_days >= 1 vereist")
+
+        self.roster_id = roster_id
+        self.block_days = block_days
+        # Referentie voor gedeelde logica: datums, bevoegdheden, objective, rapportage
+        self.reference = RosterSolver(
+            roster_id=roster_id,
+            employees=employees,
+            services=services,
+            roster_employee_services=roster_employee_services,
+            start_date=start_date,
+            end_date=end_date,
+            fixed_assignments=list(fixed_assignments or []),
+            blocked_slots=list(blocked_slots or []),
+            suggested_assignments=suggested_assignments,
+            exact_staffing=exact_staffing,
+            pre_assignments=pre_assignments
+        )
+        self.targets: Dict[Tuple[str, str], int] = {
+            (res.employee_id, res.service_id): res.aantal
+            for res in roster_employee_services if res.actief
+        }
+
+        self.remaining: Dict[RowKey, int] = {}
+        self.own_team_rows: Set[Tuple[date, str, str, str]] = set()
+        # Bezette slots: geblokkeerd, ingepland of geblokkeerd na DIO/DDO
+        self.used: Set[Tuple[str, date, str]] = set()
+        # Alleen ingeplande slots
+        self.assigned: Set[Tuple[str, date, str]] = set()
+        self.blocking_ids: Set[str] = {
+            svc.id for svc in self.reference.services.values() if svc.code in NEXT_DAY_BLOCKING_CODES
+        }
+        self.counts: Counter = Counter()
+        self.assignments: List[Assignment] = []
+        self.pairs_assigned = 0
+
+    def solve(self) -> SolveResponse:
+        """Fixed assignments, dan per blok paren en losse regels."""
+        start_time = time.time()
+        ref = self.reference
+
+        for (dt, dagdeel), rows in ref._slot_demands().items():
+            for svc_id, team, amount in rows:
+                self.remaining[(dt, dagdeel, svc_id, team)] = amount
+                if team != 'TOT':
+                    self.own_team_rows.add((dt, dagdeel, svc_id, team))
+        self.used = {
+            (bs.employee_id, bs.date, bs.dagdeel.value) for bs in ref.blocked_slots
+        }
+
+        for fa in ref.fixed_assignments:
+            if ref.start_date <= fa.date <= ref.end_date and fa.service_id in ref.services:
+                self._commit(fa.employee_id, fa.date, fa.dagdeel.value, fa.service_id)
+
+        blocks = [ref.dates[i:i + self.block_days] for i in range(0, len(ref.dates), self.block_days)]
+        for block in blocks:
+            self._assign_pairs(block)
+            self._assign_singles(block)
+
+        response = self._build_response(time.time() - start_time, len(blocks))
+        logger.info(
+            f"[FlowSolver] {len(self.assignments)} assignments ({self.pairs_assigned} paren), "
+            f"tekort {response.solver_metadata['staffing_slack']['total_shortage']}, "
+            f"{response.solve_time_seconds}s"
+        )
+        return response
+
+    # ------------------------------------------------------------------
+    # Netwerken
+    # ------------------------------------------------------------------
+
+    def _team_of(self, emp: Employee) -> Optional[str]:
+        for team, team_type in TEAM_FILTER.items():
+            if team_type is not None and emp.team == team_type:
+                return team
+        return None
+
+    def _eligible(self, emp: Employee, row: RowKey) -> bool:
+        """Team + bevoegdheid; het TOT restant alleen voor teams zonder eigen regel."""
+        dt, dagdeel, svc_id, team = row
+        if not self.reference._is_eligible(emp, svc_id, team):
+            return False
+        own = self._team_of(emp)
+        return team != 'TOT' or own is None or (dt, dagdeel, svc_id, own) not in self.own_team_rows
+
+    def _cost(self, emp: Employee, svc_id: str) -> int:
+        target = self.targets.get((emp.id, svc_id), 0)
+        done = self.counts[(emp.id, svc_id)]
+        if target == 0:
+            cost = RESERVE_COST
+        elif done < target:
+            # Verst onder streefgetal eerst
+            cost = UNDER_TARGET_COST - min(target - done, 5)
+        else:
+            cost = UNDER_TARGET_COST + FAIRNESS_STEP * (done - target + 1)
+        if emp.team == TeamType.OVERIG:
+            cost += ZZP_COST
+        return cost
+
+    def _assign_pairs(self, block: List[date]):
+        """Samengestelde pijlen: (medewerker, datum) dekt O-regel én A-regel."""
+        ref = self.reference
+        flow = min_cost_flow.SimpleMinCostFlow()
+        source, sink = 0, 1
+        nodes: Dict[Tuple, int] = {}
+        node = lambda key: nodes.setdefault(key, 2 + len(nodes))
+        arcs = []
+        demand = 0
+
+        for dt in block:
+            for first, second in PAIRS:
+                first_id, second_id = ref.get_service_id_by_code(first), ref.get_service_id_by_code(second)
+                if not (first_id and second_id):
+                    continue
+                for team in TEAM_FILTER:
+                    morning, evening = (dt, 'O', first_id, team), (dt, 'A', second_id, team)
+                    units = min(self.remaining.get(morning, 0), self.remaining.get(evening, 0))
+                    if units == 0:
+                        continue
+                    pair = node(('pair', morning, evening))
+                    flow.add_arc_with_capacity_and_unit_cost(pair, sink, units, 0)
+                    demand += units
+                    for emp in ref.employees.values():
+                        if ((emp.id, dt, 'O') in self.used or (emp.id, dt, 'A') in self.used
+                                or not self._next_day_free(emp.id, dt, 'O', first_id)
+                                or not self._eligible(emp, morning) or not self._eligible(emp, evening)):
+                            continue
+                        emp_day = ('emp', emp.id, dt)
+                        if emp_day not in nodes:
+                            flow.add_arc_with_capacity_and_unit_cost(source, node(emp_day), 1, 0)
+                        cost = self._cost(emp, first_id) + self._cost(emp, second_id) + PAIR_BONUS
+                        arcs.append((flow.add_arc_with_capacity_and_unit_cost(nodes[emp_day], pair, 1, cost),
+                                     emp.id, morning, evening))
+
+        if not arcs or not self._solve(flow, source, sink, demand):
+            return
+        for arc, emp_id, morning, evening in arcs:
+            if (flow.flow(arc) > 0 and self._is_free(emp_id, morning) and self._is_free(emp_id, evening)
+                    and self._next_day_free(emp_id, morning[0], 'O', morning[2])):
+                self._commit(emp_id, morning[0], 'O', morning[2])
+                self._commit(emp_id, evening[0], 'A', evening[2])
+                self.pairs_assigned += 1
+
+    def _assign_singles(self, block: List[date]):
+        """Losse regels, opnieuw zolang pijlen wegvielen op de volgende-dag regel."""
+        while self._assign_singles_once(block):
+            pass
+
+    def _assign_singles_once(self, block: List[date]) -> bool:
+        """Losse regels: (medewerker, datum, dagdeel) -> bezettingsregel.
+        
+        Returns:
+            True als er toewijzingen zijn vastgelegd én pijlen vervielen omdat
+            een DIO/DDO in hetzelfde blok de volgende ochtend/middag bezette
+        """
+        ref = self.reference
+        flow = min_cost_flow.SimpleMinCostFlow()
+        source, sink = 0, 1
+        nodes: Dict[Tuple, int] = {}
+        node = lambda key: nodes.setdefault(key, 2 + len(nodes))
+        arcs = []
+        demand = 0
+
+        block_dates = set(block)
+        for row, amount in self.remaining.items():
+            if row[0] not in block_dates or amount == 0:
+                continue
+            row_node = node(('row',) + row)
+            flow.add_arc_with_capacity_and_unit_cost(row_node, sink, amount, 0)
+            demand += amount
+            dt, dagdeel, svc_id, _ = row
+            for emp in ref.employees.values():
+                if ((emp.id, dt, dagdeel) in self.used or not self._next_day_free(emp.id, dt, dagdeel, svc_id)
+                        or not self._eligible(emp, row)):
+                    continue
+                slot = ('slot', emp.id, dt, dagdeel)
+                if slot not in nodes:
+                    flow.add_arc_with_capacity_and_unit_cost(source, node(slot), 1, 0)
+                arcs.append((flow.add_arc_with_capacity_and_unit_cost(nodes[slot], row_node, 1,
+                                                                      self._cost(emp, svc_id)),
+                             emp.id, row))
+
+        if not arcs or not self._solve(flow, source, sink, demand):
+            return False
+        committed = skipped = 0
+        for arc, emp_id, row in arcs:
+            if flow.flow(arc) > 0:
+                if self._is_free(emp_id, row) and self._next_day_free(emp_id, row[0], row[1], row[2]):
+                    self._commit(emp_id, row[0], row[1], row[2], row)
+                    committed += 1
+                else:
+                    skipped += 1
+        return committed > 0 and skipped > 0
+
+    def _solve(self, flow: min_cost_flow.SimpleMinCostFlow, source: int, sink: int, demand: int) -> bool:
+        flow.set_node_supply(source, demand)
+        flow.set_node_supply(sink, -demand)
+        status = flow.solve_max_flow_with_min_cost()
+        if status != flow.OPTIMAL:
+            logger.warning(f"[FlowSolver] Min-cost-flow status {status}")
+            return False
+        return True
+
+    def _is_free(self, emp_id: str, row: RowKey) -> bool:
+        return (emp_id, row[0], row[1]) not in self.used and self.remaining.get(row, 0) > 0
+
+    def _next_day_free(self, emp_id: str, dt: date, dagdeel: str, svc_id: str) -> bool:
+        """Een DIO/DDO in de ochtend mag niet vóór een al ingeplande O/M van de volgende dag."""
+        if svc_id not in self.blocking_ids or dagdeel != 'O':
+            return True
+        next_day = dt + timedelta(days=1)
+        return (emp_id, next_day, 'O') not in self.assigned and (emp_id, next_day, 'M') not in self.assigned
+
+    def _commit(self, emp_id: str, dt: date, dagdeel: str, svc_id: str, row: Optional[RowKey] = None):
+        """Leg een toewijzing vast en verlaag de bijbehorende bezettingsregel."""
+        ref = self.reference
+        emp = ref.employees.get(emp_id)
+        if emp is None:
+            return
+        if row is None:
+            own = self._team_of(emp)
+            candidates = [(dt, dagdeel, svc_id, own)] if own else []
+            row = next((r for r in candidates + [(dt, dagdeel, svc_id, 'TOT')] if self.remaining.get(r, 0) > 0), None)
+        if row is not None:
+            self.remaining[row] -= 1
+
+        self.used.add((emp_id, dt, dagdeel))
+        self.assigned.add((emp_id, dt, dagdeel))
+        if svc_id in self.blocking_ids and dagdeel == 'O':
+            next_day = dt + timedelta(days=1)
+            self.used.update({(emp_id, next_day, 'O'), (emp_id, next_day, 'M')})
+        self.counts[(emp_id, svc_id)] += 1
+        self.assignments.append(Assignment(
+            employee_id=emp_id,
+            employee_name=emp.name,
+            date=dt,
+            dagdeel=Dagdeel(dagdeel),
+            service_id=svc_id,
+            service_code=ref.services[svc_id].code
+        ))
+
+    # ------------------------------------------------------------------
+    # Rapportage
+    # ------------------------------------------------------------------
+
+    def _staffing_report(self) -> Tuple[Dict, List[ConstraintViolation]]:
+        """Tekort per originele exact_staffing regel (zelfde vorm als elastic_staffing)."""
+        ref = self.reference
+        placed = Counter((a.employee_id, a.date, a.dagdeel.value, a.service_id) for a in self.assignments)
+        rows, violations = [], []
+        for staffing in ref.exact_staffing:
+            if staffing.team not in TEAM_FILTER:
+                continue
+            assigned = sum(
+                placed[(emp.id, staffing.date, staffing.dagdeel.value, staffing.service_id)]
+                for emp in ref.employees.values()
+                if TEAM_FILTER[staffing.team] is None or emp.team == TEAM_FILTER[staffing.team]
+            )
+            if assigned == staffing.exact_aantal:
+                continue
+            svc = ref.services.get(staffing.service_id)
+            code = svc.code if svc else staffing.service_id
+            shortage = max(0, staffing.exact_aantal - assigned)
+            rows.append({
+                "date": staffing.date.isoformat(),
+                "dagdeel": staffing.dagdeel.value,
+                "service_id": staffing.service_id,
+                "service_code": code,
+                "team": staffing.team,
+                "required": staffing.exact_aantal,
+                "assigned": assigned,
+                "shortage": shortage,
+                "surplus": max(0, assigned - staffing.exact_aantal),
+            })
+            violations.append(ConstraintViolation(
+                constraint_type="staffing_shortage" if shortage else "staffing_surplus",
+                dagdeel=staffing.dagdeel,
+                service_id=staffing.service_id,
+                message=f"{code} {staffing.date} {staffing.dagdeel.value} team={staffing.team}: "
+                        f"{assigned}/{staffing.exact_aantal} ingepland",
+                severity="warning"
+            ))
+        report = {
+            "total_shortage": sum(r["shortage"] for r in rows),
+            "total_surplus": sum(r["surplus"] for r in rows),
+            "rows": rows,
+        }
+        return report, violations
+
+    def _build_response(self, elapsed: float, block_count: int) -> SolveResponse:
+        ref = self.reference
+        ref.target_counts = dict(self.targets)
+        ref._generate_violations_report(self.assignments)
+        report, staffing_violations = self._staffing_report()
+
+        total_slots = len(ref.dates) * len(list(Dagdeel)) * len(ref.employees)
+        fill_pct = (len(self.assignments) / total_slots * 100) if total_slots > 0 else 0.0
+
+        return SolveResponse(
+            status=SolveStatus.FEASIBLE,
+            roster_id=self.roster_id,
+            assignments=self.assignments,
+            solve_time_seconds=round(elapsed, 2),
+            total_assignments=len(self.assignments),
+            total_slots=total_slots,
+            fill_percentage=round(fill_pct, 1),
+            violations=staffing_violations + ref.violations,
+            solver_metadata={
+                "dates_count": len(ref.dates),
+                "employees_count": len(ref.employees),
+                "services_count": len(ref.services),
+                "fixed_assignments_count": len(ref.fixed_assignments),
+                "blocked_slots_count": len(ref.blocked_slots),
+                "exact_staffing_count": len(ref.exact_staffing),
+                "objective_value": ref.evaluate_objective(self.assignments),
+                "block_days": self.block_days,
+                "blocks": block_count,
+                "pairs_assigned": self.pairs_assigned,
+                "staffing_slack": report,
+            },
+            solver_result="min_cost_flow"
+        )
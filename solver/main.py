@@ -1,7 +1,9 @@
 """OR-Tools CP-SAT Solver Service (DRAAD224-SIMPLIFIED)
 
-FastAPI service voor rooster optimalisatie met RosterSolverV2:
-- RosterSolverV2: Google OR-Tools CP-SAT (optimization)
+FastAPI service voor rooster optimalisatie met RosterSolver:
+- RosterSolver (solver_engine.py): Google OR-Tools CP-SAT (optimization),
+  ook gebruikt voor rolling horizon en re-optimalisatie
+- FlowSolver (flow_engine.py): min-cost-flow middenlaag (engine=min_cost_flow)
 
 DRAARD224-SIMPLIFICATION:
 - Removed SequentialSolverV2 (priority queue greedy solver)
@@ -38,7 +40,7 @@ logger.info("[Main] ROOSTER SOLVER SERVICE - DRAAD224-SIMPLIFIED")
 logger.info(f"[Main] Python version: {sys.version}")
 logger.info(f"[Main] Start time: {datetime.now().isoformat()}")
 logger.info("[Main] Version: 2.0.0-DRAAD224-SIMPLIFIED")
-logger.info("[Main] Solver: RosterSolverV2 (CP-SAT) - DIRECT")
+logger.info("[Main] Solver: RosterSolver (CP-SAT) - DIRECT")
 logger.info("[Main] DRAAD224: All Solver2 code removed for simplicity")
 
 # ============================================================================
@@ -96,7 +98,7 @@ def validate_database_connection_nonblocking():
         
         # Try to import and test Supabase client
         try:
-            from supabase import create_client
+            from db_client import get_client
             logger.info("[Boot] ✓ Supabase library imported")
         except ImportError as e:
             DB_STATUS.validation_error = f"Supabase import failed: {e}"
@@ -105,8 +107,8 @@ def validate_database_connection_nonblocking():
         
         # Try to create client
         try:
-            client = create_client(supabase_url, supabase_key)
-            logger.info("[Boot] ✓ Supabase client created")
+            client = get_client()
+            logger.info("[Boot] ✓ Supabase client created (shared, pooled)")
         except Exception as e:
             DB_STATUS.validation_error = f"Supabase client creation failed: {str(e)[:100]}"
             logger.warning(f"[Boot] ⚠ Failed to create Supabase client: {e}")
@@ -152,6 +154,7 @@ if DB_STATUS.validation_error:
 try:
     logger.info("[Main] Step 1: Importing FastAPI...")
     from fastapi import FastAPI, HTTPException
+    from fastapi.responses import JSONResponse
     logger.info("[Main] FastAPI imported successfully")
     
     logger.info("[Main] Step 2: Importing CORS middleware...")
@@ -160,15 +163,22 @@ try:
     
     logger.info("[Main] Step 3: Importing models...")
     from models import (
-        SolveRequest, SolveResponse,
+        SolveRequest, SolveResponse, ReoptimizeRequest, ColumnarSolveRequest,
         HealthResponse, VersionResponse,
         SolveStatus, ConstraintViolation
     )
     logger.info("[Main] Models imported successfully")
     
-    logger.info("[Main] Step 4: Importing RosterSolverV2 (OR-Tools)...")
-    from RosterSolverV2 import RosterSolverV2
-    logger.info("[Main] RosterSolverV2 imported successfully")
+    logger.info("[Main] Step 4: Importing RosterSolver (OR-Tools CP-SAT)...")
+    from solver_engine import RosterSolver
+    from rolling_horizon import RollingHorizonSolver, benchmark_rolling_horizon
+    from flow_engine import FlowSolver
+    from skeleton_cache import get_skeleton_cache
+    from result_cache import content_key, get_result_cache
+    from single_flight import SingleFlight
+    from admission import AdmissionRejected, SolveScheduler
+    from model_budget import memory_budget_mb, plan_model_budget
+    logger.info("[Main] RosterSolver imported successfully")
     
     logger.info("[Main] DRAAD224: Solver2-specific imports removed")
     logger.info("[Main] All imports complete - CP-SAT solver ready")
@@ -183,19 +193,37 @@ logger.info("[Main] ALL IMPORTS SUCCESSFUL - Creating FastAPI app")
 # FastAPI app
 app = FastAPI(
     title="Rooster Solver Service",
-    description="V2: RosterSolverV2 (OR-Tools CP-SAT) - DRAAD224-SIMPLIFIED",
+    description="V2: RosterSolver (OR-Tools CP-SAT) - DRAAD224-SIMPLIFIED",
     version="2.0.0-DRAAD224-SIMPLIFIED"
 )
 
 logger.info("[Main] FastAPI application created")
 
 # ThreadPoolExecutor for non-blocking solver execution
+SOLVER_WORKERS = 2
 SOLVER_EXECUTOR = ThreadPoolExecutor(
-    max_workers=2,
+    max_workers=SOLVER_WORKERS,
     thread_name_prefix="solver-worker"
 )
 
-logger.info("[Main] ThreadPoolExecutor created with max_workers=2")
+logger.info(f"[Main] ThreadPoolExecutor created with max_workers={SOLVER_WORKERS}")
+
+# Bounded priority queue in front of the executor (interactive > full > batch), 429 when over SLA
+SOLVE_SCHEDULER = SolveScheduler(SOLVER_EXECUTOR, workers=SOLVER_WORKERS)
+
+# BUDGET: peak RSS per solve; larger models are decomposed or handed to FlowSolver
+MEMORY_BUDGET_MB = memory_budget_mb(SOLVER_WORKERS)
+logger.info(f"[Main] Model memory budget: {MEMORY_BUDGET_MB:.0f} MB per solve")
+
+# SKELETON: structureel CP-SAT model gedeeld tussen solves (None = uitgeschakeld)
+SKELETON_CACHE = get_skeleton_cache()
+
+# Identical solves (double clicks, retries after proxy timeouts) come from here
+RESULT_CACHE = get_result_cache()
+CACHEABLE_STATUSES = {SolveStatus.OPTIMAL, SolveStatus.FEASIBLE, SolveStatus.INFEASIBLE}
+
+# Concurrent solves of one roster: identical inputs share one computation
+SOLVE_FLIGHTS = SingleFlight()
 
 # ============================================================================
 # CORS Middleware Configuration
@@ -263,7 +291,7 @@ async def startup_event():
     """Called when FastAPI starts."""
     logger.info("[Main] STARTUP COMPLETE - Server ready")
     logger.info(f"[Main] Service: Rooster Solver V2 (DRAAD224-SIMPLIFIED)")
-    logger.info(f"[Main] Solver: RosterSolverV2 (OR-Tools CP-SAT)")
+    logger.info(f"[Main] Solver: RosterSolver (OR-Tools CP-SAT)")
     logger.info(f"[Main] Database: {'✓ CONNECTED' if DB_STATUS.is_available else '⚠ OFFLINE (graceful mode)'}")
     if DB_STATUS.validation_error:
         logger.warning(f"[Main] Database error: {DB_STATUS.validation_error}")
@@ -280,11 +308,16 @@ async def root():
         "service": "Rooster Solver V2",
         "status": "online",
         "version": "2.0.0-DRAAD224-SIMPLIFIED",
-        "solver": "RosterSolverV2 (OR-Tools CP-SAT)",
+        "solver": "RosterSolver (OR-Tools CP-SAT)",
         "database_status": "CONNECTED" if DB_STATUS.is_available else "OFFLINE",
+        "skeleton_cache": SKELETON_CACHE.stats() if SKELETON_CACHE is not None else None,
+        "result_cache": RESULT_CACHE.stats() if RESULT_CACHE is not None else None,
+        "single_flight": SOLVE_FLIGHTS.stats(),
+        "solve_queue": SOLVE_SCHEDULER.stats(),
         "features": [
             "OR-Tools CP-SAT optimization",
-            "4 hard constraints (bevoegdheden, one-per-slot, fixed, blocked)",
+            "Hard constraints: bevoegdheden, fixed, blocked, one-per-slot, "
+            "exacte bezetting, systeemdienst exclusiviteit, blokkering volgende dag na DIO/DDO",
             "Database integration (Supabase)",
             "Async/await with ThreadPoolExecutor",
             "CORS security",
@@ -337,13 +370,17 @@ async def version():
 # SOLVER LOGIC - DRAAD224: Direct CP-SAT solving
 # ============================================================================
 
-def _do_solve(request: SolveRequest) -> SolveResponse:
-    """Execute solve in thread pool - Direct RosterSolverV2 (CP-SAT).
+def _do_solve(request: SolveRequest, cancel_token=None) -> SolveResponse:
+    """Execute solve in thread pool - RosterSolver (CP-SAT).
     
     DRAAD224: Simplified - no solver selection or fallback logic
+    Monolithic CP-SAT solves run on RosterSolver, the same model as rolling
+    horizon and re-optimisation, so elastic_staffing, diagnose_infeasibility,
+    the feasibility pre-check and symmetry breaking apply on every path.
     
     Args:
-        request: SolveRequest
+        request: SolveRequest (or ColumnarSolveRequest, converted here)
+        cancel_token: CancelToken that stops the CP-SAT search (latest-wins)
     
     Returns:
         SolveResponse
@@ -356,9 +393,44 @@ def _do_solve(request: SolveRequest) -> SolveResponse:
         logger.info(f"[Solver] Period: {request.start_date} to {request.end_date}")
         logger.info(f"[Solver] Database available: {DB_STATUS.is_available}")
         
-        # Direct CP-SAT solving
-        logger.info("[Solver] Calling RosterSolverV2.solve()...")
-        response = RosterSolverV2.solve(request)
+        if isinstance(request, ColumnarSolveRequest):
+            # COLUMNAR: rij-objecten pas hier bouwen (solver thread, niet de event loop)
+            request = request.to_solve_request()
+        
+        # BUDGET: model size schatten vóór de bouw; te groot = decompositie of alleen flow
+        budget = plan_model_budget(request, MEMORY_BUDGET_MB)
+        request = budget.apply(request)
+        
+        if request.engine == "min_cost_flow":
+            # Snelle middenlaag: min-cost-flow per dag/week blok
+            logger.info(f"[Solver] Min-cost-flow engine: block_days={request.flow_block_days}")
+            response = FlowSolver(
+                roster_id=request.roster_id,
+                employees=request.employees,
+                services=request.services,
+                roster_employee_services=request.roster_employee_services,
+                start_date=request.start_date,
+                end_date=request.end_date,
+                fixed_assignments=request.fixed_assignments,
+                blocked_slots=request.blocked_slots,
+                suggested_assignments=request.suggested_assignments,
+                exact_staffing=request.exact_staffing,
+                pre_assignments=request.pre_assignments,
+                block_days=request.flow_block_days
+            ).solve()
+        elif request.rolling_horizon is not None:
+            # Lange periodes: overlappende vensters i.p.v. één model
+            rh = request.rolling_horizon
+            logger.info(f"[Solver] Rolling horizon: window={rh.window_days}d, overlap={rh.overlap_days}d")
+            response = _rolling_horizon_solver(request, cancel_token).solve()
+        else:
+            # Direct CP-SAT solving
+            logger.info("[Solver] Calling RosterSolver.solve()...")
+            response = _roster_solver(request, cancel_token).solve()
+            response.solver_result = "cpsat"
+        
+        response.solver_metadata["model_budget"] = budget.as_dict()
+        response.violations.extend(budget.violations())
         
         solve_time = (datetime.now() - start_time).total_seconds()
         logger.info(f"[Solver] Solve completed: status={response.status.value}, "
@@ -388,21 +460,208 @@ def _do_solve(request: SolveRequest) -> SolveResponse:
             )]
         )
 
+def _roster_solver(request: SolveRequest, cancel_token=None) -> RosterSolver:
+    """Monolithic RosterSolver for a request (engine=cpsat, no rolling_horizon)."""
+    return RosterSolver(
+        roster_id=request.roster_id,
+        employees=request.employees,
+        services=request.services,
+        roster_employee_services=request.roster_employee_services,
+        start_date=request.start_date,
+        end_date=request.end_date,
+        fixed_assignments=request.fixed_assignments,
+        blocked_slots=request.blocked_slots,
+        suggested_assignments=request.suggested_assignments,
+        exact_staffing=request.exact_staffing,
+        pre_assignments=request.pre_assignments,
+        timeout_seconds=request.timeout_seconds,
+        elastic_staffing=request.elastic_staffing,
+        diagnose_infeasibility=request.diagnose_infeasibility,
+        diagnosis_timeout_seconds=request.diagnosis_timeout_seconds,
+        skeleton_cache=SKELETON_CACHE,
+        cancel_token=cancel_token
+    )
+
+def _rolling_horizon_solver(request: SolveRequest, cancel_token=None) -> RollingHorizonSolver:
+    """RollingHorizonSolver for a request with rolling_horizon set."""
+    rh = request.rolling_horizon
+    return RollingHorizonSolver(
+        roster_id=request.roster_id,
+        employees=request.employees,
+        services=request.services,
+        roster_employee_services=request.roster_employee_services,
+        start_date=request.start_date,
+        end_date=request.end_date,
+        fixed_assignments=request.fixed_assignments,
+        blocked_slots=request.blocked_slots,
+        suggested_assignments=request.suggested_assignments,
+        exact_staffing=request.exact_staffing,
+        pre_assignments=request.pre_assignments,
+        timeout_seconds=request.timeout_seconds,
+        window_days=rh.window_days,
+        overlap_days=rh.overlap_days,
+        elastic_staffing=request.elastic_staffing,
+        diagnose_infeasibility=request.diagnose_infeasibility,
+        diagnosis_timeout_seconds=request.diagnosis_timeout_seconds,
+        skeleton_cache=SKELETON_CACHE,
+        cancel_token=cancel_token
+    )
+
+def _do_benchmark(request: SolveRequest) -> dict:
+    """Rolling horizon vs. monolithic solve on one request (thread pool)."""
+    logger.info(f"[Benchmark] Roster {request.roster_id}: rolling horizon vs monolithic, "
+                f"{request.timeout_seconds}s each")
+    return benchmark_rolling_horizon(_rolling_horizon_solver(request))
+
+def _do_reoptimize(request: ReoptimizeRequest, cancel_token=None) -> SolveResponse:
+    """Re-optimise only the neighbourhood of a prior solution (thread pool).
+    
+    Everything outside request.neighbourhood is fixed to prior_assignments
+    and never enters the CP-SAT model.
+    
+    Args:
+        request: ReoptimizeRequest
+        cancel_token: CancelToken that stops the CP-SAT search (latest-wins)
+    
+    Returns:
+        SolveResponse with the complete roster (fixed + re-optimised part)
+    """
+    start_time = datetime.now()
+    nb = request.neighbourhood
+    
+    try:
+        logger.info(f"[Reopt] Roster {request.roster_id}: neighbourhood {nb.start_date} to {nb.end_date}, "
+                    f"employees={len(nb.employee_ids) if nb.employee_ids is not None else 'all'}, "
+                    f"services={len(nb.service_ids) if nb.service_ids is not None else 'all'}")
+        
+        solver = RosterSolver(
+            roster_id=request.roster_id,
+            employees=request.employees,
+            services=request.services,
+            roster_employee_services=request.roster_employee_services,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            fixed_assignments=request.fixed_assignments,
+            blocked_slots=request.blocked_slots,
+            suggested_assignments=request.suggested_assignments,
+            exact_staffing=request.exact_staffing,
+            pre_assignments=request.pre_assignments,
+            timeout_seconds=request.timeout_seconds,
+            neighbourhood=nb,
+            prior_assignments=request.prior_assignments,
+            elastic_staffing=request.elastic_staffing,
+            diagnose_infeasibility=request.diagnose_infeasibility,
+            diagnosis_timeout_seconds=request.diagnosis_timeout_seconds,
+            cancel_token=cancel_token
+        )
+        response = solver.solve()
+        response.solver_result = "cpsat"
+        
+        solve_time = (datetime.now() - start_time).total_seconds()
+        logger.info(f"[Reopt] Done: status={response.status.value}, "
+                    f"free_variables={response.solver_metadata.get('free_variables')}, time={solve_time:.2f}s")
+        return response
+    
+    except Exception as e:
+        logger.error(f"[Reopt] ERROR: {str(e)}", exc_info=True)
+        solve_time = (datetime.now() - start_time).total_seconds()
+        return SolveResponse(
+            status=SolveStatus.ERROR,
+            roster_id=request.roster_id,
+            assignments=[],
+            solve_time_seconds=round(solve_time, 2),
+            violations=[ConstraintViolation(
+                constraint_type="solver_error",
+                message=f"{type(e).__name__}: {str(e)[:150]}",
+                severity="critical"
+            )]
+        )
+
+def _solve_priority(request) -> str:
+    """Queue class: explicit request.priority, else by entry point / mode"""
+    if request.priority is not None:
+        return request.priority
+    if isinstance(request, ReoptimizeRequest):
+        return "interactive"
+    return "batch" if request.rolling_horizon is not None else "full"
+
+def _solve_cells(request) -> int:
+    """Cost measure for admission: employees x days x services (neighbourhood for re-optimise)"""
+    scope = getattr(request, "neighbourhood", None) or request
+    days = (scope.end_date - scope.start_date).days + 1
+    employees = len(getattr(scope, "employee_ids", None) or request.employees)
+    services = len(getattr(scope, "service_ids", None) or request.services)
+    return employees * days * services
+
+async def _run_solve(solve_fn, request) -> SolveResponse:
+    """Run solve_fn(request) in the thread pool, answering repeats from RESULT_CACHE.
+    
+    The key covers the complete request (all input rows, options and
+    timeout, not the queue priority) plus service version and entry point,
+    so a changed row is a different key. ERROR/TIMEOUT responses are not
+    cached.
+    
+    Concurrent requests for the same roster go through SOLVE_FLIGHTS: the
+    same key attaches to the running solve, other inputs wait for it (or
+    stop it first under the latest_wins policy).
+    
+    The solve itself is queued in SOLVE_SCHEDULER; AdmissionRejected is
+    raised when its estimated wait exceeds the SLA of its priority class.
+    """
+    key = content_key(
+        f"{solve_fn.__name__}/{app.version}", request.model_dump(mode="json", exclude={"priority"})
+    )
+    if RESULT_CACHE is not None:
+        cached = RESULT_CACHE.get(key)
+        if cached is not None:
+            logger.info(f"[Cache] Result cache hit for roster {request.roster_id} ({key[:12]})")
+            cached.solver_metadata["result_cache"] = "hit"
+            return cached
+    
+    async def start(token) -> SolveResponse:
+        response = await SOLVE_SCHEDULER.submit(
+            _solve_priority(request), _solve_cells(request), request.timeout_seconds,
+            solve_fn, request, token
+        )
+        if token.cancelled:
+            response.solver_metadata["superseded"] = True
+        elif RESULT_CACHE is not None and response.status in CACHEABLE_STATUSES:
+            response.solver_metadata["result_cache"] = "miss"
+            RESULT_CACHE.put(key, response)
+        return response
+    
+    response, shared = await SOLVE_FLIGHTS.run(request.roster_id, key, start)
+    if shared:
+        response = response.model_copy(
+            update={"solver_metadata": {**response.solver_metadata, "coalesced": True}}
+        )
+    return response
+
+def _busy_response(rejection: AdmissionRejected) -> JSONResponse:
+    """429 with Retry-After for a solve refused by SOLVE_SCHEDULER."""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(rejection), "retry_after_seconds": rejection.retry_after},
+        headers={"Retry-After": str(rejection.retry_after)},
+    )
+
 # ============================================================================
 # SOLVER ENDPOINT (DRAAD224-SIMPLIFIED)
 # ============================================================================
 
 @app.post("/api/v1/solve-schedule", response_model=SolveResponse)
 async def solve_schedule(request: SolveRequest):
-    """Solve rooster using RosterSolverV2 (OR-Tools CP-SAT).
+    """Solve rooster using RosterSolver (OR-Tools CP-SAT).
     
     DRAAD224-SIMPLIFIED:
     - Direct CP-SAT optimization
-    - 4 hard constraints:
+    - Hard constraints (RosterSolver):
       1. Bevoegdheden (authorized services only)
-      2. One-per-slot (max 1 service/dagdeel)
-      3. Fixed assignments (status 1)
-      4. Blocked slots (status 2,3)
+      3. Fixed assignments (status 1) en blocked slots (status 2,3)
+      4. One-per-slot (max 1 service/dagdeel)
+      7. Exacte bezetting per dienst/dagdeel/team
+      8. Systeemdienst exclusiviteit (DIO XOR DDO, DIA XOR DDA per dag)
+      9. Geen O/M de dag na DIO/DDO
     - No Solver2 priority queue fallback
     - Graceful database degradation
     - Enhanced HTTP error responses
@@ -416,13 +675,9 @@ async def solve_schedule(request: SolveRequest):
         logger.info(f"[Async] Scheduling in ThreadPoolExecutor (non-blocking)...")
         logger.info(f"[Async] Database available: {DB_STATUS.is_available}")
         
-        # Run solve in thread pool (non-blocking for async event loop)
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            SOLVER_EXECUTOR,
-            _do_solve,
-            request
-        )
+        # Run solve in thread pool (non-blocking for async event loop), repeats from cache,
+        # concurrent requests for this roster coalesced
+        response = await _run_solve(_do_solve, request)
         
         total_time = (datetime.now() - start_time).total_seconds()
         logger.info(f"[Async] Total time (including overhead): {total_time:.2f}s")
@@ -433,6 +688,9 @@ async def solve_schedule(request: SolveRequest):
         
         return response
     
+    except AdmissionRejected as e:
+        return _busy_response(e)
+    
     except Exception as e:
         logger.error(f"[Async] ERROR: {str(e)}", exc_info=True)
         total_time = (datetime.now() - start_time).total_seconds()
@@ -455,6 +713,60 @@ async def solve_schedule(request: SolveRequest):
             )]
         )
 
+@app.post("/api/v1/solve-schedule-columnar", response_model=SolveResponse)
+async def solve_schedule_columnar(request: ColumnarSolveRequest):
+    """Solve with the large tables sent as columns (see ColumnarSolveRequest).
+    
+    Only lists of ints/bools are validated on the event loop; the row
+    objects for the engines are built in the solver thread. Caching,
+    coalescing and admission work as for /api/v1/solve-schedule, keyed on
+    the columnar body.
+    
+    Only event-loop time improves: to_solve_request() still builds one dict
+    and one pydantic object per row, so total CPU time and peak memory per
+    solve are about the same as for /api/v1/solve-schedule. The gain is that
+    other requests (health, status, queued solves) are not held up while a
+    large body is parsed.
+    """
+    return await solve_schedule(request)
+
+@app.post("/api/v1/reoptimize-schedule", response_model=SolveResponse)
+async def reoptimize_schedule(request: ReoptimizeRequest):
+    """Re-optimise a neighbourhood (date range, employees, services) of a prior solution.
+    
+    All slots outside the neighbourhood keep their value from
+    prior_assignments and are not part of the model, so the remaining
+    model is small enough to be solved to optimality quickly.
+    """
+    try:
+        return await _run_solve(_do_reoptimize, request)
+    except AdmissionRejected as e:
+        return _busy_response(e)
+
+@app.post("/api/v1/benchmark-rolling-horizon", response_model=dict)
+async def benchmark_rolling_horizon_endpoint(request: SolveRequest):
+    """Quality gap of rolling horizon against one monolithic solve of the same request.
+    
+    Both are scored with RosterSolver.evaluate_objective; gap_percentage
+    is the relative loss of rolling horizon. Runs both solves (each with
+    request.timeout_seconds) as a batch job; nothing is cached.
+    """
+    if request.rolling_horizon is None:
+        raise HTTPException(status_code=422, detail="rolling_horizon is required for a benchmark")
+    if request.engine != "cpsat":
+        raise HTTPException(status_code=422, detail="benchmark compares CP-SAT solves (engine=cpsat)")
+    try:
+        return await SOLVE_SCHEDULER.submit(
+            "batch", 2 * _solve_cells(request), 2 * request.timeout_seconds, _do_benchmark, request
+        )
+    except AdmissionRejected as e:
+        return _busy_response(e)
+
+@app.get("/api/v1/solve-queue", response_model=dict)
+async def solve_queue():
+    """Queue depth, running solves, estimated and observed wait times per priority class."""
+    return SOLVE_SCHEDULER.stats()
+
 if __name__ == "__main__":
     import uvicorn
     logger.info("[Main] Starting uvicorn...")
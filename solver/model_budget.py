@@ -0,0 +1,211 @@
+"""Memory budget for CP-SAT models, checked before the model is built.
+
+RosterSolver creates one BoolVar per qualified (employee, date, dagdeel,
+service) combination; unqualified combinations are constant 0 and only
+cost a dict entry. Symmetry breaking and the 24h pair literals add up to
+about as many auxiliary variables again. Every CP-SAT solve in main
+(monolithic, rolling horizon windows) builds this RosterSolver model. estimate_model_size() predicts
+variable count, constraint count and peak RSS from the request alone, and
+plan_model_budget() degrades a request that does not fit the budget:
+
+    cpsat            the monolithic model fits
+    rolling_horizon  largest window (in days) whose model fits
+    min_cost_flow    not even a one-day window fits: FlowSolver only (a
+                     heuristic; the response gets a model_budget warning
+                     naming the guarantees that are lost)
+
+Calibration (RosterSolver model as built by main._do_solve, incl. the
+next-day blocking after DIO/DDO; benchmark instances with all employees
+interchangeable so the symmetry-breaking overhead is maximal, services
+DIO/DIA/DDO/DDA first; peak RSS above the idle service after a 10s solve):
+
+    employees x days x services   variables   constraints   peak RSS
+    20 x 28 x 4                      14 206        38 300      105 MB
+    40 x 56 x 6                      84 074       221 972      254 MB
+    40 x 91 x 8                     179 778       467 868      531 MB
+    80 x 91 x 8                     361 738       944 468     1064 MB
+
+Configuration (environment):
+    SOLVER_MEMORY_BUDGET_MB  peak RSS allowed per solve (default: share of
+                             the container memory limit, else 2048)
+"""
+
+import logging
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+from models import ConstraintViolation, RollingHorizonConfig, SolveRequest
+
+logger = logging.getLogger(__name__)
+
+# Calibrated ratios per qualified assignment variable (upper bounds, see table above)
+AUX_VARIABLES_PER_ASSIGNMENT = 1.15
+CONSTRAINTS_PER_ASSIGNMENT = 5.8
+BYTES_PER_MODEL_ELEMENT = 850  # variable or constraint, incl. CP-SAT presolve/search copies
+BYTES_PER_CONSTANT = 200  # dict entry for an unqualified combination
+MODEL_BASE_MB = 65.0  # CP-SAT solver state independent of model size
+
+# Memory of the service itself (FastAPI, OR-Tools, caches) when splitting a container limit
+SERVICE_BASE_MB = 300.0
+DEFAULT_BUDGET_MB = 2048.0
+
+CGROUP_LIMIT_FILES = (
+    '/sys/fs/cgroup/memory.max',  # cgroup v2
+    '/sys/fs/cgroup/memory/memory.limit_in_bytes',  # cgroup v1
+)
+
+
+class ModelSizeEstimate:
+    """Predicted size of one RosterSolver model"""
+
+    def __init__(self, days: int, assignment_variables: int, constants: int):
+        self.days = days
+        self.assignment_variables = assignment_variables
+        self.constants = constants
+        self.variables = int(assignment_variables * (1 + AUX_VARIABLES_PER_ASSIGNMENT))
+        self.constraints = int(assignment_variables * CONSTRAINTS_PER_ASSIGNMENT)
+        self.rss_mb = (
+            MODEL_BASE_MB
+            + (self.variables + self.constraints) * BYTES_PER_MODEL_ELEMENT / 2**20
+            + constants * BYTES_PER_CONSTANT / 2**20
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'days': self.days,
+            'variables': self.variables,
+            'constraints': self.constraints,
+            'rss_mb': round(self.rss_mb, 1),
+        }
+
+
+def estimate_model_size(request: SolveRequest, days: Optional[int] = None) -> ModelSizeEstimate:
+    """Estimate for the request's period, or for a window of `days` days"""
+    period = (request.end_date - request.start_date).days + 1
+    days = min(days or period, period)
+    employee_ids = {emp.id for emp in request.employees}
+    service_ids = {svc.id for svc in request.services}
+    qualified = {
+        (res.employee_id, res.service_id) for res in request.roster_employee_services
+        if res.actief and res.employee_id in employee_ids and res.service_id in service_ids
+    }
+    slots = days * 3
+    return ModelSizeEstimate(
+        days=days,
+        assignment_variables=len(qualified) * slots,
+        constants=(len(employee_ids) * len(service_ids) - len(qualified)) * slots,
+    )
+
+
+def container_memory_limit_mb() -> Optional[float]:
+    """Memory limit of the container (cgroup), None if unlimited or unknown"""
+    for path in CGROUP_LIMIT_FILES:
+        try:
+            with open(path) as f:
+                raw = f.read().strip()
+        except OSError:
+            continue
+        if raw.isdigit() and int(raw) < 2**60:
+            return int(raw) / 2**20
+    return None
+
+
+def memory_budget_mb(workers: int) -> float:
+    """Per-solve budget: SOLVER_MEMORY_BUDGET_MB, else the container limit split over workers"""
+    configured = os.getenv('SOLVER_MEMORY_BUDGET_MB')
+    if configured:
+        return float(configured)
+    limit = container_memory_limit_mb()
+    if limit is None:
+        return DEFAULT_BUDGET_MB
+    return max(MODEL_BASE_MB, (limit - SERVICE_BASE_MB) / workers)
+
+
+class BudgetDecision:
+    """How a request will be solved within the memory budget"""
+
+    def __init__(self, mode: str, budget_mb: float, estimate: ModelSizeEstimate,
+                 planned: Optional[ModelSizeEstimate] = None, window_days: Optional[int] = None,
+                 overlap_days: Optional[int] = None, reason: str = ""):
+        self.mode = mode
+        self.budget_mb = budget_mb
+        self.estimate = estimate
+        self.planned = planned
+        self.window_days = window_days
+        self.overlap_days = overlap_days
+        self.reason = reason
+
+    def apply(self, request: SolveRequest) -> SolveRequest:
+        """The request to actually solve (a degraded copy if needed)"""
+        if self.mode == 'min_cost_flow' and request.engine != 'min_cost_flow':
+            return request.model_copy(update={'engine': 'min_cost_flow', 'rolling_horizon': None})
+        if self.mode == 'rolling_horizon':
+            rh = request.rolling_horizon
+            if rh is None or rh.window_days != self.window_days:
+                config = RollingHorizonConfig(window_days=self.window_days, overlap_days=self.overlap_days)
+                return request.model_copy(update={'rolling_horizon': config})
+        return request
+
+    def violations(self) -> List[ConstraintViolation]:
+        """Warnings for the response when the degradation drops guarantees"""
+        if self.mode != 'min_cost_flow' or self.reason == 'requested':
+            return []
+        return [ConstraintViolation(
+            constraint_type="model_budget",
+            message=(
+                f"Model ~{self.estimate.rss_mb:.0f} MB exceeds memory budget {self.budget_mb:.0f} MB: "
+                f"solved with the min-cost-flow heuristic instead of CP-SAT. No optimality guarantee; "
+                f"elastic_staffing and diagnose_infeasibility are not applied"
+            ),
+            severity="warning"
+        )]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'budget_mb': round(self.budget_mb, 1),
+            'estimate': self.estimate.as_dict(),
+            'planned': self.planned.as_dict() if self.planned is not None else None,
+            'window_days': self.window_days,
+            'overlap_days': self.overlap_days,
+            'reason': self.reason,
+        }
+
+
+def plan_model_budget(request: SolveRequest, budget_mb: float) -> BudgetDecision:
+    """Pick the cheapest degradation of request that fits budget_mb"""
+    full = estimate_model_size(request)
+    rh = request.rolling_horizon
+    if request.engine == 'min_cost_flow':
+        return BudgetDecision('min_cost_flow', budget_mb, full, reason="requested")
+
+    if rh is None and full.rss_mb <= budget_mb:
+        return BudgetDecision('cpsat', budget_mb, full, planned=full, reason="fits")
+    if rh is not None:
+        window = estimate_model_size(request, rh.window_days)
+        if window.rss_mb <= budget_mb:
+            return BudgetDecision('rolling_horizon', budget_mb, full, planned=window,
+                                  window_days=rh.window_days, overlap_days=rh.overlap_days,
+                                  reason="requested")
+
+    # Model size is linear in the number of days: largest window that fits
+    per_day = estimate_model_size(request, 1).rss_mb - MODEL_BASE_MB
+    max_days = min(full.days - 1, 62) if rh is None else rh.window_days - 1
+    if per_day > 0:
+        max_days = min(max_days, math.floor((budget_mb - MODEL_BASE_MB) / per_day))
+    if max_days >= 1:
+        overlap = min(rh.overlap_days if rh is not None else 2, max_days - 1)
+        window = estimate_model_size(request, max_days)
+        logger.warning(
+            f"[Budget] Model ~{full.rss_mb:.0f} MB over budget {budget_mb:.0f} MB: "
+            f"rolling horizon with {max_days}-day windows (~{window.rss_mb:.0f} MB)"
+        )
+        return BudgetDecision('rolling_horizon', budget_mb, full, planned=window,
+                              window_days=max_days, overlap_days=overlap,
+                              reason="over budget: decomposed")
+
+    logger.warning(
+        f"[Budget] Even a one-day model exceeds budget {budget_mb:.0f} MB: min-cost-flow only"
+    )
+    return BudgetDecision('min_cost_flow', budget_mb, full, reason="over budget: no CP-SAT model fits")
@@ -33,9 +33,9 @@ DRAD214-FIX: Add missing solver_result field
 - SOLUTION: Add optional solver_result: str field to SolveResponse
 """
 
-from pydantic import BaseModel, Field, validator, ConfigDict
+from pydantic import BaseModel, Field, TypeAdapter, validator, model_validator, ConfigDict
 from typing import List, Optional, Dict, Any, Literal
-from datetime import date
+from datetime import date, timedelta
 from enum import Enum
 
 
@@ -295,6 +295,23 @@ class BottleneckSuggestion(BaseModel):
     )
 
 
+class InfeasibilityCoreItem(BaseModel):
+    """Eén constraint-groep uit een (verkleinde) infeasibility core.
+    
+    De groepen in de core kunnen samen niet worden gerealiseerd; elke
+    groep laten vallen (of aanpassen) maakt de rest wél haalbaar als
+    core_minimal true is.
+    """
+    group: Literal["staffing", "fixed_assignment", "exclusivity", "next_day_blocking"]
+    description: str = Field(
+        description="Leesbare regel, bijv 'Bezetting ECH 2025-01-06 O team=TOT: exact 3'"
+    )
+    date: Optional[str] = None  # ISO datum
+    dagdeel: Optional[Dagdeel] = None
+    service_id: Optional[str] = None
+    employee_id: Optional[str] = None
+
+
 class BottleneckReport(BaseModel):
     """DRAAD118A: Complete analysis when solver returns INFEASIBLE.
     
@@ -324,12 +341,38 @@ class BottleneckReport(BaseModel):
     suggestions: List[BottleneckSuggestion] = Field(
         description="Actionable recommendations for planner"
     )
+    infeasibility_core: Optional[List[InfeasibilityCoreItem]] = Field(
+        default=None,
+        description="Constraint-groepen die samen INFEASIBLE zijn (alleen met diagnose_infeasibility)"
+    )
+    core_minimal: Optional[bool] = Field(
+        default=None,
+        description="True als de core binnen het tijdsbudget tot minimaal is verkleind"
+    )
 
 
 # ============================================================================
 # SOLVE REQUEST & RESPONSE
 # ============================================================================
 
+class RollingHorizonConfig(BaseModel):
+    """Rolling horizon decompositie: periode oplossen in overlappende vensters.
+    
+    Elk venster van window_days dagen wordt apart opgelost; de eerste
+    window_days - overlap_days dagen worden vastgelegd, de overlap wordt in
+    het volgende venster opnieuw opgelost.
+    """
+    window_days: int = Field(default=7, ge=1, le=62)
+    overlap_days: int = Field(default=2, ge=0)
+    
+    @validator('overlap_days')
+    def validate_overlap(cls, v, values):
+        """Overlap moet kleiner zijn dan het venster (anders geen voortgang)."""
+        if 'window_days' in values and v >= values['window_days']:
+            raise ValueError('overlap_days moet kleiner zijn dan window_days')
+        return v
+
+
 class SolveRequest(BaseModel):
     """Request body voor solve endpoint.
     
@@ -375,6 +418,38 @@ class SolveRequest(BaseModel):
     
     timeout_seconds: int = Field(default=30, ge=5, le=300)
     
+    # Optioneel: lange periodes in overlappende vensters oplossen
+    rolling_horizon: Optional[RollingHorizonConfig] = Field(
+        default=None,
+        description="Rolling horizon decompositie (None = monolithisch model)"
+    )
+    
+    # Optioneel: snelle min-cost-flow engine i.p.v. CP-SAT (heuristiek, dekt alleen exact_staffing)
+    engine: Literal["cpsat", "min_cost_flow"] = Field(
+        default="cpsat",
+        description="cpsat = exact model, min_cost_flow = FlowSolver per dag/week blok"
+    )
+    flow_block_days: int = Field(default=1, ge=1, le=7)
+    
+    # Optioneel: bij INFEASIBLE een infeasibility core bepalen (eigen tijdsbudget)
+    diagnose_infeasibility: bool = Field(
+        default=False,
+        description="Assumption-based core extractie voor BottleneckReport.infeasibility_core"
+    )
+    diagnosis_timeout_seconds: int = Field(default=10, ge=1, le=120)
+    
+    # Optioneel: tekorten minimaliseren i.p.v. INFEASIBLE bij te weinig capaciteit
+    elastic_staffing: bool = Field(
+        default=False,
+        description="Exacte bezetting als zachte eis: gewogen tekort/overschot minimaliseren"
+    )
+    
+    # Optioneel: prioriteitsklasse in de solve-wachtrij (hoort niet bij de inputs van de solve)
+    priority: Optional[Literal["interactive", "full", "batch"]] = Field(
+        default=None,
+        description="None = interactive voor re-optimalisatie, batch bij rolling horizon, anders full"
+    )
+    
     @validator('end_date')
     def validate_date_range(cls, v, values):
         """Valideer dat end_date na start_date ligt."""
@@ -510,6 +585,236 @@ class SolveResponse(BaseModel):
     )
 
 
+# ============================================================================
+# RE-OPTIMALISATIE: BUURT VRIJGEVEN, REST VAST OP VORIGE OPLOSSING
+# ============================================================================
+
+class Neighbourhood(BaseModel):
+    """Deel van het rooster dat opnieuw geoptimaliseerd mag worden.
+    
+    Een (medewerker, datum, dagdeel, dienst) variabele is vrij als de datum
+    binnen [start_date, end_date] valt en - indien opgegeven - de medewerker
+    in employee_ids en de dienst in service_ids zit. Alles daarbuiten wordt
+    gefixeerd op de vorige oplossing.
+    """
+    start_date: date
+    end_date: date
+    employee_ids: Optional[List[str]] = Field(
+        default=None,
+        description="Alleen deze medewerkers vrijgeven (None = alle)"
+    )
+    service_ids: Optional[List[str]] = Field(
+        default=None,
+        description="Alleen deze diensten vrijgeven (None = alle)"
+    )
+    
+    @validator('end_date')
+    def validate_date_range(cls, v, values):
+        """Valideer dat end_date na start_date ligt."""
+        if 'start_date' in values and v < values['start_date']:
+            raise ValueError('end_date moet na start_date liggen')
+        return v
+
+
+class ReoptimizeRequest(SolveRequest):
+    """Request body voor re-optimalisatie endpoint.
+    
+    Zelfde invoer als SolveRequest, plus de vorige oplossing (assignments
+    uit een eerdere SolveResponse) en de buurt die vrij mag veranderen.
+    """
+    prior_assignments: List[Assignment] = Field(
+        default_factory=list,
+        description="Vorige oplossing; buiten de buurt exact overgenomen"
+    )
+    neighbourhood: Neighbourhood
+
+
+# ============================================================================
+# COLUMNAR: grote tabellen als parallelle kolommen i.p.v. lijsten van objecten
+# ============================================================================
+
+DAGDEEL_CODES = "OMA"  # dagdeel-kolom: één teken per rij, bijv. "OOMA"
+STAFFING_TEAMS = ("TOT", "GRO", "ORA")  # team-kolom van exact_staffing: index hierin
+
+
+def _check_lengths(table: str, columns: Dict[str, Any]) -> int:
+    """Alle kolommen van een tabel even lang; geeft het aantal rijen."""
+    lengths = {name: len(values) for name, values in columns.items() if values is not None}
+    if len(set(lengths.values())) > 1:
+        raise ValueError(f"{table}: kolommen niet even lang {lengths}")
+    return next(iter(lengths.values()), 0)
+
+
+def _check_range(table: str, column: str, values: List[int], low: int, high: int):
+    """Bulk bereikcheck low <= v < high (min/max i.p.v. per rij)."""
+    if values and (min(values) < low or max(values) >= high):
+        raise ValueError(f"{table}.{column}: waarde buiten bereik {low}..{high - 1}")
+
+
+def _check_dagdelen(table: str, dagdeel: str):
+    if not set(dagdeel) <= set(DAGDEEL_CODES):
+        raise ValueError(f"{table}.dagdeel: alleen de tekens {DAGDEEL_CODES!r} toegestaan")
+
+
+class ColumnarRosterEmployeeServices(BaseModel):
+    """roster_employee_services als kolommen; employee/service zijn indexen in employees/services."""
+    employee: List[int] = Field(default_factory=list)
+    service: List[int] = Field(default_factory=list)
+    aantal: List[int] = Field(default_factory=list)
+    actief: Optional[List[bool]] = Field(default=None, description="None = alle rijen actief")
+
+
+class ColumnarFixedAssignments(BaseModel):
+    """fixed_assignments als kolommen; day = dagen sinds start_date."""
+    employee: List[int] = Field(default_factory=list)
+    day: List[int] = Field(default_factory=list)
+    dagdeel: str = ""
+    service: List[int] = Field(default_factory=list)
+
+
+class ColumnarBlockedSlots(BaseModel):
+    """blocked_slots als kolommen; blocked_by_service -1 = geen dienst."""
+    employee: List[int] = Field(default_factory=list)
+    day: List[int] = Field(default_factory=list)
+    dagdeel: str = ""
+    status: List[int] = Field(default_factory=list)
+    blocked_by_service: Optional[List[int]] = Field(default=None, description="None = overal -1")
+
+
+class ColumnarExactStaffing(BaseModel):
+    """exact_staffing als kolommen; team is een index in STAFFING_TEAMS."""
+    day: List[int] = Field(default_factory=list)
+    dagdeel: str = ""
+    service: List[int] = Field(default_factory=list)
+    team: List[int] = Field(default_factory=list)
+    aantal: List[int] = Field(default_factory=list)
+    is_system_service: Optional[List[bool]] = Field(default=None, description="None = overal False")
+
+
+class ColumnarSolveRequest(SolveRequest):
+    """SolveRequest met de vier grote tabellen als parallelle kolommen.
+    
+    employees en services blijven objecten en zijn tegelijk de dictionary:
+    medewerkers en diensten worden in de tabellen met hun index aangeduid,
+    datums als dagen sinds start_date, dagdelen als één teken per rij.
+    Pydantic valideert alleen lijsten van ints/bools (geen object per rij);
+    bereik en lengtes worden per kolom in bulk gecontroleerd.
+    to_solve_request() bouwt de rij-objecten voor de engines; main doet
+    dat in de solver thread, niet op de event loop. Alleen de event loop
+    wint: de engines krijgen dezelfde rij-objecten als bij een gewone
+    SolveRequest, dus CPU-tijd en geheugen per solve blijven gelijk.
+    """
+    roster_employee_services: ColumnarRosterEmployeeServices
+    fixed_assignments: ColumnarFixedAssignments = Field(default_factory=ColumnarFixedAssignments)
+    blocked_slots: ColumnarBlockedSlots = Field(default_factory=ColumnarBlockedSlots)
+    exact_staffing: ColumnarExactStaffing = Field(default_factory=ColumnarExactStaffing)
+    
+    @model_validator(mode='after')
+    def validate_columns(self):
+        """Kolomlengtes en indexbereiken in bulk controleren."""
+        n_emp, n_svc = len(self.employees), len(self.services)
+        n_days = (self.end_date - self.start_date).days + 1
+        
+        res = self.roster_employee_services
+        _check_lengths('roster_employee_services', {
+            'employee': res.employee, 'service': res.service, 'aantal': res.aantal, 'actief': res.actief
+        })
+        _check_range('roster_employee_services', 'employee', res.employee, 0, n_emp)
+        _check_range('roster_employee_services', 'service', res.service, 0, n_svc)
+        _check_range('roster_employee_services', 'aantal', res.aantal, 0, 2**31)
+        
+        fa = self.fixed_assignments
+        _check_lengths('fixed_assignments', {
+            'employee': fa.employee, 'day': fa.day, 'dagdeel': fa.dagdeel, 'service': fa.service
+        })
+        _check_range('fixed_assignments', 'employee', fa.employee, 0, n_emp)
+        _check_range('fixed_assignments', 'day', fa.day, 0, n_days)
+        _check_range('fixed_assignments', 'service', fa.service, 0, n_svc)
+        _check_dagdelen('fixed_assignments', fa.dagdeel)
+        
+        bs = self.blocked_slots
+        _check_lengths('blocked_slots', {
+            'employee': bs.employee, 'day': bs.day, 'dagdeel': bs.dagdeel,
+            'status': bs.status, 'blocked_by_service': bs.blocked_by_service
+        })
+        _check_range('blocked_slots', 'employee', bs.employee, 0, n_emp)
+        _check_range('blocked_slots', 'day', bs.day, 0, n_days)
+        _check_range('blocked_slots', 'status', bs.status, 1, 4)
+        _check_range('blocked_slots', 'blocked_by_service', bs.blocked_by_service, -1, n_svc)
+        _check_dagdelen('blocked_slots', bs.dagdeel)
+        
+        es = self.exact_staffing
+        _check_lengths('exact_staffing', {
+            'day': es.day, 'dagdeel': es.dagdeel, 'service': es.service, 'team': es.team,
+            'aantal': es.aantal, 'is_system_service': es.is_system_service
+        })
+        _check_range('exact_staffing', 'day', es.day, 0, n_days)
+        _check_range('exact_staffing', 'service', es.service, 0, n_svc)
+        _check_range('exact_staffing', 'team', es.team, 0, len(STAFFING_TEAMS))
+        _check_range('exact_staffing', 'aantal', es.aantal, 0, 10)
+        _check_dagdelen('exact_staffing', es.dagdeel)
+        return self
+    
+    def to_solve_request(self) -> SolveRequest:
+        """Rij-vorm voor de engines: per tabel één bulk-validatie (pydantic-core) i.p.v. per object.
+        
+        Bouwt nog steeds één dict en één pydantic object per rij; dat kost
+        ongeveer evenveel als het parsen van een gewone SolveRequest, maar
+        gebeurt in de solver thread.
+        """
+        emp_ids = [emp.id for emp in self.employees]
+        svc_ids = [svc.id for svc in self.services]
+        dates = [self.start_date + timedelta(days=d) for d in range((self.end_date - self.start_date).days + 1)]
+        
+        res = self.roster_employee_services
+        actief = res.actief if res.actief is not None else [True] * len(res.employee)
+        roster_employee_services = _ROWS_RES.validate_python([
+            {'roster_id': self.roster_id, 'employee_id': emp_ids[e], 'service_id': svc_ids[s],
+             'aantal': a, 'actief': act}
+            for e, s, a, act in zip(res.employee, res.service, res.aantal, actief)
+        ])
+        
+        fa = self.fixed_assignments
+        fixed_assignments = _ROWS_FIXED.validate_python([
+            {'employee_id': emp_ids[e], 'date': dates[d], 'dagdeel': dd, 'service_id': svc_ids[s]}
+            for e, d, dd, s in zip(fa.employee, fa.day, fa.dagdeel, fa.service)
+        ])
+        
+        bs = self.blocked_slots
+        blocked_by = bs.blocked_by_service if bs.blocked_by_service is not None else [-1] * len(bs.employee)
+        blocked_slots = _ROWS_BLOCKED.validate_python([
+            {'employee_id': emp_ids[e], 'date': dates[d], 'dagdeel': dd, 'status': st,
+             'blocked_by_service_id': svc_ids[b] if b >= 0 else None}
+            for e, d, dd, st, b in zip(bs.employee, bs.day, bs.dagdeel, bs.status, blocked_by)
+        ])
+        
+        es = self.exact_staffing
+        system = es.is_system_service if es.is_system_service is not None else [False] * len(es.day)
+        exact_staffing = _ROWS_STAFFING.validate_python([
+            {'date': dates[d], 'dagdeel': dd, 'service_id': svc_ids[s], 'team': STAFFING_TEAMS[t],
+             'aantal': a, 'is_system_service': sys_svc}
+            for d, dd, s, t, a, sys_svc in zip(es.day, es.dagdeel, es.service, es.team, es.aantal, system)
+        ])
+        
+        options = {
+            name: getattr(self, name) for name in SolveRequest.model_fields
+            if name not in ('roster_employee_services', 'fixed_assignments', 'blocked_slots', 'exact_staffing')
+        }
+        return SolveRequest.model_construct(
+            **options,
+            roster_employee_services=roster_employee_services,
+            fixed_assignments=fixed_assignments,
+            blocked_slots=blocked_slots,
+            exact_staffing=exact_staffing,
+        )
+
+
+_ROWS_RES = TypeAdapter(List[RosterEmployeeService])
+_ROWS_FIXED = TypeAdapter(List[FixedAssignment])
+_ROWS_BLOCKED = TypeAdapter(List[BlockedSlot])
+_ROWS_STAFFING = TypeAdapter(List[ExactStaffing])
+
+
 class HealthResponse(BaseModel):
     """Health check response."""
     status: str
@@ -0,0 +1,135 @@
+"""Single-flight coalescing of concurrent solves per roster.
+
+Only one solve per roster runs at a time. A request with the same input
+fingerprint as the running solve attaches to it and receives the same
+result. A request with different inputs waits until the running solve is
+done, so two solves never race on writes for one roster. With the
+"latest_wins" policy it first cancels the older solve through its
+CancelToken (CP-SAT StopSearch); the older callers then get whatever that
+solve returns after being stopped.
+
+This module is kept byte-identical in solver/single_flight.py (CP-SAT
+service) and src/services/single_flight.py (greedy API): the two services
+are deployed separately and share no package. Change both;
+tests/test_greedy_api_single_flight.py fails when they differ.
+
+Configuration (environment):
+    SOLVE_COALESCE_POLICY  "wait" (default) or "latest_wins"
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+POLICY = os.getenv('SOLVE_COALESCE_POLICY', 'wait')
+POLICIES = ('wait', 'latest_wins')
+
+
+class CancelToken:
+    """Thread-safe cancellation flag with callbacks (e.g. CpSolver.StopSearch)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Call callback on cancel (immediately if already cancelled)"""
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Cancel callback failed: {e}")
+
+
+class _Flight:
+    def __init__(self, fingerprint: str, task: asyncio.Future, token: CancelToken):
+        self.fingerprint = fingerprint
+        self.task = task
+        self.token = token
+
+
+class SingleFlight:
+    """Per-key in-flight registry for one event loop"""
+
+    def __init__(self, policy: str = POLICY):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        self.policy = policy
+        self._inflight: Dict[str, _Flight] = {}
+
+        self.started = 0
+        self.coalesced = 0
+        self.waited = 0
+        self.superseded = 0
+
+    async def run(self, key: str, fingerprint: str,
+                  start: Callable[[CancelToken], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run start(token) for key, or attach to an identical running call.
+
+        Returns:
+            (result, shared) - shared is True if the result came from a
+            call started by another request
+        """
+        while True:
+            flight = self._inflight.get(key)
+            if flight is None:
+                break
+            if flight.fingerprint == fingerprint and not flight.token.cancelled:
+                self.coalesced += 1
+                logger.info(f"[SingleFlight] {key}: attached to running solve")
+                return await asyncio.shield(flight.task), True
+            if self.policy == 'latest_wins' and not flight.token.cancelled:
+                self.superseded += 1
+                logger.info(f"[SingleFlight] {key}: newer inputs, stopping running solve")
+                flight.token.cancel()
+            self.waited += 1
+            try:
+                await asyncio.shield(flight.task)
+            except Exception:
+                pass
+            # Another waiter may have started its solve in the meantime: look again
+
+        token = CancelToken()
+        task = asyncio.ensure_future(start(token))
+        flight = _Flight(fingerprint, task, token)
+        self._inflight[key] = flight
+        self.started += 1
+
+        def release(_task) -> None:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+
+        task.add_done_callback(release)
+        return await asyncio.shield(task), False
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the service's health/metrics output"""
+        return {
+            'policy': self.policy,
+            'in_flight': len(self._inflight),
+            'started': self.started,
+            'coalesced': self.coalesced,
+            'waited': self.waited,
+            'superseded': self.superseded,
+        }
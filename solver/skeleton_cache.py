@@ -0,0 +1,186 @@
+"""
+SKELETON: cache van het structurele CP-SAT model per rooster-structuur
+
+Het structurele deel van het RosterSolver model (variabelen, bevoegdheden,
+één dienst per dagdeel, systeemdienst-exclusiviteit en objective) hangt
+alleen af van medewerkers, diensten, roster_employee_services en de
+periode. Dat deel wordt per fingerprint één keer gebouwd; elke volgende
+solve werkt op een Clone() waarop alleen de request-delta (fixed, blocked,
+bezetting, symmetry breaking) wordt toegevoegd.
+
+Gebruikt door monolithische CP-SAT solves (main._roster_solver) en door de
+vensters van RollingHorizonSolver. Een hit vraagt dezelfde structuur en
+periode: herhaalde solves van een rooster (andere fixed/blocked/bezetting)
+en herhaalde rolling horizon runs. Binnen één rolling horizon run heeft
+elk venster een eigen periode en dus een eigen fingerprint.
+
+Configuratie (environment):
+    SOLVER_SKELETON_CACHE_SIZE  max aantal skeletons (default 8, 0 = uit)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from ortools.sat.python import cp_model
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = int(os.getenv('SOLVER_SKELETON_CACHE_SIZE', '8'))
+
+
+def structure_fingerprint(employees: List, services: List, roster_employee_services: List,
+                          start_date: date, end_date: date) -> str:
+    """sha256 over de structurele inputs (volgorde-onafhankelijk)."""
+    payload = {
+        'employees': sorted(
+            (e.model_dump(mode='json') for e in employees), key=lambda d: d['id']
+        ),
+        'services': sorted(
+            (s.model_dump(mode='json') for s in services), key=lambda d: d['id']
+        ),
+        'roster_employee_services': sorted(
+            (r.model_dump(mode='json') for r in roster_employee_services),
+            key=lambda d: json.dumps(d, sort_keys=True)
+        ),
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ModelSkeleton:
+    """Gebouwd structureel model plus de solver-state die ernaar verwijst.
+
+    Variabelen worden als proto-index bewaard en bij restore() opnieuw aan
+    de clone gebonden; constanten (onbevoegd = 0) blijven ints.
+    """
+
+    def __init__(self, model: cp_model.CpModel,
+                 assignments: List[Tuple[Tuple, Optional[int], int]],
+                 objective: Tuple[List[int], List[int], int],
+                 target_counts: Dict[Tuple[str, str], int],
+                 free_vars_count: int, unqualified_count: int,
+                 build_seconds: float):
+        self.model = model
+        self.assignments = assignments
+        self.objective = objective
+        self.target_counts = target_counts
+        self.free_vars_count = free_vars_count
+        self.unqualified_count = unqualified_count
+        self.build_seconds = build_seconds
+
+    @classmethod
+    def capture(cls, solver, objective_terms: Tuple[List, List[int], int],
+                build_seconds: float) -> 'ModelSkeleton':
+        """Leg het model van solver vast vóórdat de request-delta wordt toegevoegd."""
+        assignments = [
+            (key, None, var) if isinstance(var, int) else (key, var.Index(), 0)
+            for key, var in solver.assignments_vars.items()
+        ]
+        variables, weights, offset = objective_terms
+        return cls(
+            model=solver.model.Clone(),
+            assignments=assignments,
+            objective=([var.Index() for var in variables], list(weights), offset),
+            target_counts=dict(solver.target_counts),
+            free_vars_count=solver.free_vars_count,
+            unqualified_count=solver.unqualified_count,
+            build_seconds=build_seconds,
+        )
+
+    def restore(self, solver) -> None:
+        """Zet een Clone() van het skeleton en de bijbehorende state op solver."""
+        model = self.model.Clone()
+        bind = model.GetBoolVarFromProtoIndex
+        solver.model = model
+        solver.assignments_vars = {
+            key: (constant if index is None else bind(index))
+            for key, index, constant in self.assignments
+        }
+        indices, weights, offset = self.objective
+        solver.objective_expr = cp_model.LinearExpr.WeightedSum(
+            [bind(index) for index in indices], weights
+        ) + offset
+        solver.target_counts = dict(self.target_counts)
+        solver.free_vars_count = self.free_vars_count
+        solver.unqualified_count = self.unqualified_count
+
+
+class ModelSkeletonCache:
+    """Thread-safe LRU van ModelSkeletons met hit/miss tellers"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, ModelSkeleton]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.build_seconds_saved = 0.0
+
+    def get(self, key: str) -> Optional[ModelSkeleton]:
+        """Return skeleton of None (telt hit/miss en bespaarde bouwtijd)"""
+        with self._lock:
+            skeleton = self._entries.get(key)
+            if skeleton is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.build_seconds_saved += skeleton.build_seconds
+            return skeleton
+
+    def put(self, key: str, skeleton: ModelSkeleton) -> None:
+        """Bewaar skeleton, oudste entries vallen af boven de bound"""
+        with self._lock:
+            self._entries[key] = skeleton
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Tellers voor de health/metrics output"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'build_seconds_saved': round(self.build_seconds_saved, 3),
+            }
+
+
+_shared_cache: Optional[ModelSkeletonCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_skeleton_cache() -> Optional[ModelSkeletonCache]:
+    """Process-wide skeleton cache (None als SOLVER_SKELETON_CACHE_SIZE=0)"""
+    global _shared_cache
+    if DEFAULT_MAX_ENTRIES <= 0:
+        return None
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = ModelSkeletonCache()
+                logger.info(f"ModelSkeletonCache initialized (max_entries={_shared_cache.max_entries})")
+    return _shared_cache
@@ -15,11 +15,30 @@ DRAD170: FASE 1-3 CRITICAL FIXES
   - FASE 1: Constraint 7 validation + error handling for zero eligible employees
   - FASE 2: DIO+DIA reification using AddMaxEquality (not AddBoolAnd/OnlyEnforceIf)
   - FASE 3: Solver status handling (UNKNOWN, timeout, etc.)
+ELASTISCH: Met elastic_staffing krijgt elke bezettingsregel begrensde shortage/
+  surplus slack; eerst wordt gewogen slack geminimaliseerd, daarna de gewone
+  objective. Resultaat: beste rooster + exacte tekorten per slot i.p.v. INFEASIBLE.
+DIAGNOSE: Met diagnose_infeasibility wordt bij INFEASIBLE een verkleinde
+  assumption core (bezettingsregels, fixed assignments, exclusiviteitsdagen)
+  aan het BottleneckReport toegevoegd.
+PRECHECK: Vóór de modelbouw controleert een max-flow per (datum, dagdeel) en
+  een transportprobleem over de hele periode of de bezetting haalbaar is;
+  zo niet, dan direct INFEASIBLE met tekorten per slot.
+NATIVE: Constraints als globale CP-SAT constraints (AddAtMostOne,
+  AddExactlyOne, AddBoolAnd) en de objective als één WeightedSum met
+  samengevoegde coëfficiënten; koppelingen als AND-reificatie.
+SYMMETRIE: Uitwisselbare medewerkers (zelfde team, bevoegdheden, streefgetallen,
+  fixed/blocked patroon) krijgen lexicografische symmetry-breaking constraints.
+RE-OPTIMALISATIE: Met een neighbourhood + prior_assignments worden alleen
+  variabelen binnen de buurt aangemaakt; alle andere slots zijn Python
+  constanten (0/1) uit de vorige oplossing en komen niet in het model.
 """
 
 from ortools.sat.python import cp_model
-from typing import List, Dict, Set, Tuple, Optional
+from ortools.graph.python import max_flow
+from typing import Callable, List, Dict, Set, Tuple, Optional
 from datetime import date, timedelta
+import copy
 import time
 import logging
 
@@ -30,11 +49,22 @@ from models import (
     PreAssignment,  # DEPRECATED maar backwards compatible
     Assignment, ConstraintViolation, Suggestion,
     BottleneckReport, BottleneckItem, BottleneckSuggestion,  # DRAAD118A: NIEUW
-    SolveResponse, SolveStatus, Dagdeel, TeamType
+    InfeasibilityCoreItem,
+    SolveResponse, SolveStatus, Dagdeel, TeamType,
+    Neighbourhood
 )
+from skeleton_cache import ModelSkeleton, ModelSkeletonCache, structure_fingerprint
 
 logger = logging.getLogger(__name__)
 
+# ELASTISCH: gewichten voor slack in de eerste (lexicografische) fase
+SHORTAGE_WEIGHT = 10
+SYSTEM_SHORTAGE_WEIGHT = 20  # DIO/DIA/DDO/DDA tekorten zwaarder
+SURPLUS_WEIGHT = 1
+
+# PRECHECK: team filter zoals in constraint 7 (None = alle medewerkers)
+TEAM_FILTER = {'TOT': None, 'GRO': TeamType.MAAT, 'ORA': TeamType.LOONDIENST}
+
 
 class RosterSolver:
     """Google OR-Tools CP-SAT solver voor roosters."""
@@ -55,7 +85,20 @@ class RosterSolver:
         exact_staffing: List[ExactStaffing] = None,
         # DEPRECATED: backwards compatibility
         pre_assignments: List[PreAssignment] = None,
-        timeout_seconds: int = 30
+        timeout_seconds: int = 30,
+        # RE-OPTIMALISATIE: alleen de buurt vrij, rest vast op vorige oplossing
+        neighbourhood: Optional[Neighbourhood] = None,
+        prior_assignments: List[Assignment] = None,
+        symmetry_breaking: bool = True,
+        elastic_staffing: bool = False,
+        # DIAGNOSE: infeasibility core bij INFEASIBLE (eigen tijdsbudget)
+        diagnose_infeasibility: bool = False,
+        diagnosis_timeout_seconds: float = 10.0,
+        feasibility_precheck: bool = True,
+        # SKELETON: gedeelde cache van het structurele model (None = altijd bouwen)
+        skeleton_cache: Optional[ModelSkeletonCache] = None,
+        # LATEST-WINS: annuleren via StopSearch (single_flight.CancelToken)
+        cancel_token=None
     ):
         self.roster_id = roster_id
         self.employees = {emp.id: emp for emp in employees}
@@ -110,9 +153,48 @@ class RosterSolver:
             self.dates.append(current)
             current += timedelta(days=1)
         
+        # RE-OPTIMALISATIE: slots van de vorige oplossing
+        self.neighbourhood = neighbourhood
+        self.prior_slots: Set[Tuple[str, date, str, str]] = {
+            (a.employee_id, a.date, a.dagdeel.value, a.service_id)
+            for a in (prior_assignments or [])
+        }
+        
         # Model en variabelen
+        # Buiten de buurt bevat assignments_vars int constanten (0/1) i.p.v. variabelen
         self.model = cp_model.CpModel()
         self.assignments_vars: Dict[Tuple[str, date, str, str], cp_model.IntVar] = {}
+        self.free_vars_count = 0
+        self.unqualified_count = 0
+        self.objective_value: Optional[float] = None
+        self.model_build_seconds: Optional[float] = None
+        
+        # ELASTISCH: (staffing, shortage, surplus) per bezettingsregel
+        self.elastic_staffing = elastic_staffing
+        self.staffing_slack: List[Tuple[ExactStaffing, object, object]] = []
+        self.staffing_report: Optional[Dict] = None
+        self.objective_expr = None
+        self.phase1_solution: Optional[List[int]] = None  # fase 1 waarden als fase 2 niets oplevert
+        
+        # SYMMETRIE: equivalentieklassen van uitwisselbare medewerkers (per request)
+        self.symmetry_breaking = symmetry_breaking
+        self.symmetry_classes: List[List[str]] = []
+        
+        # PRECHECK: max-flow haalbaarheidscheck vóór de modelbouw
+        self.feasibility_precheck = feasibility_precheck
+        self.precheck_report: Optional[Dict] = None
+        
+        # SKELETON: structureel model hergebruiken over solves heen
+        self.skeleton_cache = skeleton_cache
+        self.skeleton_status: Optional[str] = None  # "hit" / "miss" / None (niet gebruikt)
+        self.objective_terms: Optional[Tuple[List, List[int], int]] = None
+        
+        self.cancel_token = cancel_token
+        
+        # DIAGNOSE: assumption literal per constraint-groep (None = gewoon model)
+        self.diagnose_infeasibility = diagnose_infeasibility
+        self.diagnosis_timeout_seconds = diagnosis_timeout_seconds
+        self.assumption_literals: Optional[Dict[Tuple, cp_model.IntVar]] = None
         
         # Tracking
         self.violations: List[ConstraintViolation] = []
@@ -128,30 +210,31 @@ class RosterSolver:
         start_time = time.time()
         
         try:
-            # STEP 1: Create variables
-            logger.info("[DRAAD170] Stap 1: Aanmaken decision variables...")
-            try:
-                self._create_variables()
-            except Exception as e:
-                logger.error(f"[DRAAD166] ERROR in _create_variables: {str(e)}", exc_info=True)
-                raise
+            # STEP 0: PRECHECK - evident onhaalbare bezetting zonder CP-SAT afvangen
+            if self.feasibility_precheck and self.neighbourhood is None and not self.elastic_staffing:
+                self.precheck_report = self.check_flow_feasibility()
+                if self.precheck_report["run_deficits"] or self.precheck_report["slot_deficits"]:
+                    return self._precheck_infeasible_response(start_time)
             
-            # STEP 2: Apply constraints
-            logger.info("[DRAAD170] Stap 2: Toevoegen constraints...")
+            # STEP 1-3: Variables, structurele constraints en objective (SKELETON: uit cache)
+            build_start = time.time()
+            logger.info("[DRAAD170] Stap 1-3: Aanmaken variables, structurele constraints, objective...")
             try:
-                self._apply_constraints()
+                self._build_structure()
             except Exception as e:
-                logger.error(f"[DRAAD166] ERROR in _apply_constraints: {str(e)}", exc_info=True)
+                logger.error(f"[DRAAD166] ERROR in _build_structure: {str(e)}", exc_info=True)
                 raise
             
-            # STEP 3: Define objective
-            logger.info("[DRAAD170] Stap 3: Definiëren objective function...")
+            # STEP 3B: Request-specifieke constraints (fixed, blocked, bezetting)
+            logger.info("[DRAAD170] Stap 3B: Toevoegen request constraints...")
             try:
-                self._define_objective()
+                self._apply_delta_constraints()
             except Exception as e:
-                logger.error(f"[DRAAD166] ERROR in _define_objective: {str(e)}", exc_info=True)
+                logger.error(f"[DRAAD166] ERROR in _apply_delta_constraints: {str(e)}", exc_info=True)
                 raise
             
+            self.model_build_seconds = round(time.time() - build_start, 3)
+            
             # STEP 4: Run solver
             logger.info("[DRAAD170] Stap 4: Solver uitvoeren...")
             try:
@@ -179,27 +262,7 @@ class RosterSolver:
             bottleneck_report = None
             if status == SolveStatus.INFEASIBLE:
                 logger.info("[DRAAD170] INFEASIBLE detected - attempting bottleneck analysis...")
-                try:
-                    bottleneck_report = self.analyze_bottlenecks()
-                except Exception as e:
-                    logger.error(f"[DRAAD166] ERROR in analyze_bottlenecks: {str(e)}", exc_info=True)
-                    # Create minimal fallback bottleneck report instead of crashing
-                    bottleneck_report = BottleneckReport(
-                        total_capacity_needed=0,
-                        total_capacity_available=0,
-                        total_shortage=0,
-                        shortage_percentage=0.0,
-                        bottlenecks=[],
-                        critical_count=0,
-                        suggestions=[BottleneckSuggestion(
-                            type="hire_temp",
-                            service_code="N/A",
-                            action="Bottleneck analyse mislukt - contacteer admin",
-                            impact="Fallback rapport",
-                            priority=10
-                        )]
-                    )
-                    logger.info("[DRAAD166] Using fallback bottleneck report")
+                bottleneck_report = self._infeasible_bottleneck_report()
             
             return SolveResponse(
                 status=status,
@@ -219,6 +282,16 @@ class RosterSolver:
                     "fixed_assignments_count": len(self.fixed_assignments),
                     "blocked_slots_count": len(self.blocked_slots),
                     "exact_staffing_count": len(self.exact_staffing),  # DRAAD108
+                    "objective_value": self.objective_value,
+                    "free_variables": self.free_vars_count,
+                    "fixed_variables": len(self.assignments_vars) - self.free_vars_count - self.unqualified_count,
+                    "model_build_seconds": self.model_build_seconds,
+                    "model_skeleton": self.skeleton_status,
+                    "model_variables": len(self.model.Proto().variables),
+                    "model_constraints": len(self.model.Proto().constraints),
+                    "staffing_slack": self.staffing_report,
+                    "feasibility_precheck": self.precheck_report,
+                    "symmetry_class_sizes": sorted((len(c) for c in self.symmetry_classes), reverse=True),
                     "draad166_layer1": "exception_handlers_active",
                     "draad170_fase123": "CRITICAL_FIXES_DEPLOYED"
                 }
@@ -239,17 +312,166 @@ class RosterSolver:
                 )]
             )
     
+    def _infeasible_bottleneck_report(self) -> BottleneckReport:
+        """DRAAD118A/DRAAD166: bottleneck analyse met fallback, plus optionele core."""
+        try:
+            bottleneck_report = self.analyze_bottlenecks()
+        except Exception as e:
+            logger.error(f"[DRAAD166] ERROR in analyze_bottlenecks: {str(e)}", exc_info=True)
+            # Create minimal fallback bottleneck report instead of crashing
+            bottleneck_report = BottleneckReport(
+                total_capacity_needed=0,
+                total_capacity_available=0,
+                total_shortage=0,
+                shortage_percentage=0.0,
+                bottlenecks=[],
+                critical_count=0,
+                suggestions=[BottleneckSuggestion(
+                    type="hire_temp",
+                    service_code="N/A",
+                    action="Bottleneck analyse mislukt - contacteer admin",
+                    impact="Fallback rapport",
+                    priority=10
+                )]
+            )
+            logger.info("[DRAAD166] Using fallback bottleneck report")
+        
+        if self.diagnose_infeasibility:
+            try:
+                core, minimal = self.extract_infeasibility_core()
+                bottleneck_report.infeasibility_core = core
+                bottleneck_report.core_minimal = minimal
+            except Exception as e:
+                logger.error(f"[DIAGNOSE] ERROR in extract_infeasibility_core: {str(e)}", exc_info=True)
+        
+        return bottleneck_report
+    
     def _create_variables(self):
-        """Maak decision variables aan."""
+        """Maak decision variables aan.
+        
+        RE-OPTIMALISATIE: buiten de neighbourhood wordt geen variabele
+        aangemaakt maar de waarde uit de vorige oplossing (0/1) opgeslagen.
+        NATIVE: onbevoegde combinaties zijn constant 0 (geen variabele); een
+        fixed assignment op zo'n combinatie maakt constraint 3A INFEASIBLE.
+        """
         for emp_id in self.employees:
+            allowed = self.employee_services.get(emp_id, set())
             for dt in self.dates:
                 for dagdeel in list(Dagdeel):
                     for svc_id in self.services:
-                        var_name = f"assign_{emp_id}_{dt}_{dagdeel.value}_{svc_id}"
-                        var = self.model.NewBoolVar(var_name)
-                        self.assignments_vars[(emp_id, dt, dagdeel.value, svc_id)] = var
+                        key = (emp_id, dt, dagdeel.value, svc_id)
+                        if svc_id not in allowed:
+                            self.assignments_vars[key] = 0
+                            self.unqualified_count += 1
+                        elif self._is_free(emp_id, dt, svc_id):
+                            var_name = f"assign_{emp_id}_{dt}_{dagdeel.value}_{svc_id}"
+                            self.assignments_vars[key] = self.model.NewBoolVar(var_name)
+                            self.free_vars_count += 1
+                        else:
+                            self.assignments_vars[key] = 1 if key in self.prior_slots else 0
+        
+        logger.info(
+            f"Aangemaakt: {self.free_vars_count} decision variables "
+            f"({len(self.assignments_vars) - self.free_vars_count - self.unqualified_count} gefixeerd op "
+            f"vorige oplossing, {self.unqualified_count} onbevoegd)"
+        )
+    
+    def _is_free(self, emp_id: str, dt: date, svc_id: str) -> bool:
+        """RE-OPTIMALISATIE: valt dit slot binnen de neighbourhood?"""
+        nb = self.neighbourhood
+        if nb is None:
+            return True
+        if not (nb.start_date <= dt <= nb.end_date):
+            return False
+        if nb.employee_ids is not None and emp_id not in nb.employee_ids:
+            return False
+        if nb.service_ids is not None and svc_id not in nb.service_ids:
+            return False
+        return True
+    
+    def _add(self, constraint, context: str, group: Optional[Tuple] = None):
+        """Voeg constraint toe; constraints over alleen constanten worden gecontroleerd.
         
-        logger.info(f"Aangemaakt: {len(self.assignments_vars)} decision variables")
+        RE-OPTIMALISATIE: zonder vrije variabelen is de constraint een bool.
+        Een geschonden constraint buiten de buurt maakt het model niet
+        INFEASIBLE maar wordt als violation gerapporteerd.
+        
+        DIAGNOSE: in het diagnosemodel wordt een constraint met group alleen
+        afgedwongen onder het assumption literal van die groep.
+        """
+        if isinstance(constraint, bool):
+            if not constraint:
+                self.violations.append(ConstraintViolation(
+                    constraint_type="prior_solution_violation",
+                    message=f"Vorige oplossing schendt {context} buiten de neighbourhood",
+                    severity="warning"
+                ))
+            return
+        self._enforce(self.model.Add(constraint), group)
+    
+    def _enforce(self, ct: cp_model.Constraint, group: Optional[Tuple]):
+        """DIAGNOSE: constraint alleen afdwingen onder het assumption literal van group."""
+        if group is not None and self.assumption_literals is not None:
+            if group not in self.assumption_literals:
+                self.assumption_literals[group] = self.model.NewBoolVar(
+                    "assume_" + "_".join(str(part) for part in group)
+                )
+            ct.OnlyEnforceIf(self.assumption_literals[group])
+    
+    def _fix(self, ones: List, zeros: List, context: str, group: Optional[Tuple] = None):
+        """NATIVE: literals vastzetten met één AddBoolAnd i.p.v. var == 0/1 per variabele.
+        
+        Constanten (RE-OPTIMALISATIE) met de verkeerde waarde worden via _add
+        als violation gerapporteerd.
+        """
+        if any(isinstance(x, int) and x != 1 for x in ones) or any(isinstance(x, int) and x != 0 for x in zeros):
+            self._add(False, context)
+        literals = [x for x in ones if not isinstance(x, int)] + [x.Not() for x in zeros if not isinstance(x, int)]
+        if literals:
+            self._enforce(self.model.AddBoolAnd(literals), group)
+    
+    def _at_most_one(self, items: List, context: str, group: Optional[Tuple] = None):
+        """NATIVE: AddAtMostOne, rekening houdend met constanten."""
+        ones = sum(x for x in items if isinstance(x, int))
+        literals = [x for x in items if not isinstance(x, int)]
+        if ones > 1:
+            self._add(False, context)
+        if ones >= 1:
+            self._fix([], literals, context, group)
+        elif len(literals) > 1:
+            self._enforce(self.model.AddAtMostOne(literals), group)
+    
+    def _exactly(self, items: List, amount: int, context: str, group: Optional[Tuple] = None):
+        """NATIVE: sum(items) == amount als AddExactlyOne/AddBoolAnd waar mogelijk."""
+        literals = [x for x in items if not isinstance(x, int)]
+        need = amount - sum(x for x in items if isinstance(x, int))
+        if not literals:
+            self._add(need == 0, context, group)
+        elif need == 0:
+            self._fix([], literals, context, group)
+        elif need == len(literals):
+            self._fix(literals, [], context, group)
+        elif need == 1:
+            self._enforce(self.model.AddExactlyOne(literals), group)
+        else:
+            self._add(cp_model.LinearExpr.Sum(literals) == need, context, group)
+    
+    def _pair_literal(self, first, second, name: str):
+        """NATIVE: koppel literal = first AND second (AddBoolAnd + AddBoolOr).
+        
+        Returns:
+            literal, constante 1, of None als de koppeling onmogelijk is
+        """
+        if (isinstance(first, int) and first == 0) or (isinstance(second, int) and second == 0):
+            return None
+        if isinstance(first, int):
+            return second
+        if isinstance(second, int):
+            return first
+        koppel = self.model.NewBoolVar(name)
+        self.model.AddBoolAnd([first, second]).OnlyEnforceIf(koppel)
+        self.model.AddBoolOr([first.Not(), second.Not(), koppel])
+        return koppel
     
     def _apply_constraints(self):
         """Pas alle constraints toe met DRAAD170 fixes.
@@ -268,18 +490,157 @@ class RosterSolver:
         6. ZZP minimalisatie (via objective, SOFT)
         7. Exact bezetting realiseren (HARD) - DRAAD170 FASE 1 VALIDATION
         8. Systeemdienst exclusiviteit (HARD) - DRAAD170 FASE 2 REIFICATION
+        9. Blokkering volgende dag O + M na DIO/DDO (HARD)
+        SKELETON: opgesplitst in structurele constraints (cachebaar) en
+        request-delta; deze volgorde is die van het gecachte pad.
         """
+        self._apply_structural_constraints()
+        self._apply_delta_constraints()
+    
+    def _apply_structural_constraints(self):
+        """SKELETON: constraints die alleen van medewerkers, diensten,
+        bevoegdheden en periode afhangen (1, 4, 8, 9)."""
         self._constraint_1_bevoegdheden()
         # DRAAD131: Constraint 2 DISABLED - status 1 now ONLY in Constraint 3A
         # self._constraint_2_beschikbaarheid()  # DEPRECATED
-        self._constraint_3a_fixed_assignments()
-        self._constraint_3b_blocked_slots()
         self._constraint_4_een_dienst_per_dagdeel()
         # DRAAD117: Removed constraint 5 (max werkdagen/week)
+        self._constraint_8_system_service_exclusivity()  # DRAAD108
+        self._constraint_9_next_day_blocking()
+    
+    def _apply_delta_constraints(self):
+        """SKELETON: request-specifieke constraints (3A, 3B, 7, symmetry)."""
+        self._constraint_3a_fixed_assignments()
+        self._constraint_3b_blocked_slots()
+        self._constraint_7_exact_staffing()  # DRAAD108 - DRAAD170 FASE 1 VALIDATION
+        
+        # SYMMETRIE: na alle constraints, zodat klassen gelijk behandeld zijn
+        self._add_symmetry_breaking()
+    
+    def _build_structure(self):
+        """SKELETON: variabelen, structurele constraints en objective.
+        
+        Met skeleton_cache (en zonder neighbourhood, want dan hangen de
+        variabelen van de vorige oplossing af) wordt het resultaat per
+        structure_fingerprint bewaard; bij een hit wordt alleen een Clone()
+        van het bewaarde model op deze solver gezet.
+        """
+        if self.skeleton_cache is None or self.neighbourhood is not None or not self.dates:
+            self._create_variables()
+            self._apply_structural_constraints()
+            self._define_objective()
+            return
+        
+        key = structure_fingerprint(
+            list(self.employees.values()), list(self.services.values()),
+            self.roster_employee_services, self.dates[0], self.dates[-1]
+        )
+        skeleton = self.skeleton_cache.get(key)
+        if skeleton is not None:
+            skeleton.restore(self)
+            self.skeleton_status = "hit"
+            logger.info(f"[SKELETON] Cache hit {key[:12]} (bespaard: {skeleton.build_seconds:.3f}s)")
+            return
+        
+        build_start = time.time()
+        self._create_variables()
+        self._apply_structural_constraints()
+        self._define_objective()
+        self.skeleton_cache.put(
+            key, ModelSkeleton.capture(self, self.objective_terms, time.time() - build_start)
+        )
+        self.skeleton_status = "miss"
+        logger.info(f"[SKELETON] Cache miss {key[:12]}, skeleton opgeslagen")
+    
+    def _employee_equivalence_classes(self) -> List[List[str]]:
+        """SYMMETRIE: groepeer medewerkers die voor het model uitwisselbaar zijn.
+        
+        Twee medewerkers zijn uitwisselbaar als team, actieve bevoegdheden
+        met streefgetallen, blocked slots en fixed assignments gelijk zijn;
+        dan zijn constraints en objective invariant onder verwisseling.
+        Alleen klassen met meer dan één medewerker worden teruggegeven.
+        """
+        targets: Dict[str, Set[Tuple[str, int]]] = {emp_id: set() for emp_id in self.employees}
+        for res in self.roster_employee_services:
+            if res.actief and res.employee_id in targets:
+                targets[res.employee_id].add((res.service_id, res.aantal))
+        blocked: Dict[str, Set[Tuple[date, str]]] = {emp_id: set() for emp_id in self.employees}
+        for bs in self.blocked_slots:
+            if bs.employee_id in blocked:
+                blocked[bs.employee_id].add((bs.date, bs.dagdeel.value))
+        fixed: Dict[str, Set[Tuple[date, str, str]]] = {emp_id: set() for emp_id in self.employees}
+        for fa in self.fixed_assignments:
+            if fa.employee_id in fixed:
+                fixed[fa.employee_id].add((fa.date, fa.dagdeel.value, fa.service_id))
+        
+        classes: Dict[Tuple, List[str]] = {}
+        for emp_id in sorted(self.employees):
+            key = (
+                self.employees[emp_id].team,
+                frozenset(targets[emp_id]),
+                frozenset(blocked[emp_id]),
+                frozenset(fixed[emp_id]),
+            )
+            classes.setdefault(key, []).append(emp_id)
+        return [members for members in classes.values() if len(members) > 1]
+    
+    def _add_symmetry_breaking(self):
+        """SYMMETRIE: lexicografische ordening binnen elke equivalentieklasse.
+        
+        Voor opeenvolgende medewerkers a, b in een klasse geldt
+        vector(a) >=lex vector(b) over alle (datum, dagdeel, dienst) slots van
+        hun (gelijke) bevoegdheden. Uitgeschakeld in re-optimalisatie mode,
+        omdat gefixeerde slots per medewerker verschillen.
+        """
+        if not self.symmetry_breaking or self.neighbourhood is not None:
+            return
+        
+        self.symmetry_classes = self._employee_equivalence_classes()
+        if not self.symmetry_classes:
+            logger.info("[SYMMETRIE] Geen uitwisselbare medewerkers gevonden")
+            return
+        
+        pairs = 0
+        for members in self.symmetry_classes:
+            services = sorted(self.employee_services.get(members[0], set()) & set(self.services))
+            positions = [
+                (dt, dagdeel.value, svc_id)
+                for dt in self.dates for dagdeel in list(Dagdeel) for svc_id in services
+            ]
+            for first, second in zip(members, members[1:]):
+                self._add_lex_greater_equal(
+                    [self.assignments_vars[(first, *pos)] for pos in positions],
+                    [self.assignments_vars[(second, *pos)] for pos in positions],
+                    f"{first}_{second}"
+                )
+                pairs += 1
         
-        # DRAAD108: NIEUWE CONSTRAINTS
-        self._constraint_7_exact_staffing()  # NIEUW - DRAAD170 FASE 1 VALIDATION
-        self._constraint_8_system_service_exclusivity()  # NIEUW
+        logger.info(
+            f"[SYMMETRIE] {len(self.symmetry_classes)} klassen "
+            f"(groottes {sorted((len(c) for c in self.symmetry_classes), reverse=True)}), "
+            f"{pairs} lex constraints"
+        )
+    
+    def _add_lex_greater_equal(self, xs: List, ys: List, name: str):
+        """Dwing xs >=lex ys af voor twee even lange Boolean vectoren.
+        
+        prefix[i] = "xs[:i] == ys[:i]"; zolang de prefix gelijk is moet
+        xs[i] >= ys[i], en de prefix blijft gelijk zolang xs[i] == ys[i].
+        """
+        prefix = self.model.NewConstant(1)
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            # x >= y als clause: y => x
+            self.model.AddBoolOr([x, y.Not()]).OnlyEnforceIf(prefix)
+            if i == len(xs) - 1:
+                break
+            next_prefix = self.model.NewBoolVar(f"lex_{name}_{i}")
+            self.model.AddImplication(next_prefix, prefix)
+            # x == y onder next_prefix; y => x geldt al via prefix, dus alleen x => y
+            self.model.AddBoolOr([x.Not(), y]).OnlyEnforceIf(next_prefix)
+            # Gelijke prefix en x == y (onder x >= y: niet x=1, y=0) => prefix blijft gelijk
+            self.model.AddBoolOr([prefix.Not(), x, next_prefix])
+            self.model.AddBoolOr([prefix.Not(), y.Not(), next_prefix])
+            prefix = next_prefix
     
     def _constraint_1_bevoegdheden(self):
         """Constraint 1: Medewerker mag alleen diensten doen waarvoor bevoegd.
@@ -297,15 +658,16 @@ class RosterSolver:
                 allowed[res.employee_id].add(res.service_id)
                 self.target_counts[(res.employee_id, res.service_id)] = res.aantal
         
-        # Verbied niet-toegestane diensten
+        # Verbied niet-toegestane diensten (NATIVE: één AddBoolAnd per combinatie)
         violations_count = 0
         for emp_id in self.employees:
             for svc_id in self.services:
                 if svc_id not in allowed[emp_id]:
-                    for dt in self.dates:
-                        for dagdeel in list(Dagdeel):
-                            var = self.assignments_vars[(emp_id, dt, dagdeel.value, svc_id)]
-                            self.model.Add(var == 0)
+                    self._fix([], [
+                        self.assignments_vars[(emp_id, dt, dagdeel.value, svc_id)]
+                        for dt in self.dates
+                        for dagdeel in list(Dagdeel)
+                    ], f"bevoegdheid {emp_id}/{svc_id}")
                     violations_count += 1
         
         logger.info(f"Constraint 1: {violations_count} employee-service combinaties verboden")
@@ -337,21 +699,25 @@ class RosterSolver:
         """
         logger.info("Toevoegen constraint 3A: Fixed assignments...")
         
-        for fa in self.fixed_assignments:
+        for index, fa in enumerate(self.fixed_assignments):
             var = self.assignments_vars.get(
                 (fa.employee_id, fa.date, fa.dagdeel.value, fa.service_id)
             )
+            group = ("fixed_assignment", index)
             
-            if var is not None:  # 🔧 FIXED: was 'if var:'
-                self.model.Add(var == 1)  # MOET toegewezen
-                
-                # Verbied andere diensten in dit slot
-                for svc_id in self.services:
-                    if svc_id != fa.service_id:
-                        other_var = self.assignments_vars[
-                            (fa.employee_id, fa.date, fa.dagdeel.value, svc_id)
-                        ]
-                        self.model.Add(other_var == 0)
+            if (var is not None and fa.service_id not in self.employee_services.get(fa.employee_id, set())
+                    and self._is_free(fa.employee_id, fa.date, fa.service_id)):
+                # NATIVE: onbevoegd = constant 0, dus deze fixed assignment is onhaalbaar
+                logger.warning(f"Fixed assignment op onbevoegde dienst: {fa}")
+                self._enforce(self.model.AddBoolOr([]), group)
+            elif var is not None:  # 🔧 FIXED: was 'if var:'
+                # MOET toegewezen, andere diensten in dit slot verboden
+                others = [
+                    self.assignments_vars[(fa.employee_id, fa.date, fa.dagdeel.value, svc_id)]
+                    for svc_id in self.services
+                    if svc_id != fa.service_id
+                ]
+                self._fix([var], others, f"fixed assignment {fa.employee_id} {fa.date} {fa.dagdeel.value}", group)
             else:
                 logger.warning(f"Fixed assignment var not found: {fa}")
         
@@ -396,15 +762,18 @@ class RosterSolver:
         
         for bs in self.blocked_slots:
             # Block ALLE services voor dit slot
+            slot_vars = []
             for svc_id in self.services:
                 var = self.assignments_vars.get(
                     (bs.employee_id, bs.date, bs.dagdeel.value, svc_id)
                 )
                 
                 if var is not None:  # 🔧 FIXED: was 'if var:'
-                    self.model.Add(var == 0)  # MAG NIET toegewezen
+                    slot_vars.append(var)
                 else:
                     logger.warning(f"Blocked slot var not found: {bs}")
+            # MAG NIET toegewezen
+            self._fix([], slot_vars, f"blocked slot {bs.employee_id} {bs.date} {bs.dagdeel.value}")
         
         logger.info(f"[DRAAD131] Constraint 3B: {len(self.blocked_slots)} blocked slots (status 2,3) verboden")
     
@@ -419,7 +788,7 @@ class RosterSolver:
                         self.assignments_vars[(emp_id, dt, dagdeel.value, svc_id)]
                         for svc_id in self.services
                     ]
-                    self.model.Add(sum(vars_for_slot) <= 1)
+                    self._at_most_one(vars_for_slot, f"een dienst per dagdeel {emp_id} {dt} {dagdeel.value}")
         
         logger.info("Constraint 4: Een dienst per dagdeel toegepast")
     
@@ -467,7 +836,9 @@ class RosterSolver:
         constraint_count = 0
         validation_errors = 0
         
-        for staffing in self.exact_staffing:
+        for index, staffing in enumerate(self.exact_staffing):
+            group = ("staffing", index)
+            
             # STAP 1: Filter by team type
             if staffing.team == 'GRO':
                 team_filtered = [e for e in self.employees.values() 
@@ -495,10 +866,13 @@ class RosterSolver:
                 )
                 validation_errors += 1
                 
+                if self.elastic_staffing:
+                    # ELASTISCH: volledig tekort, geen INFEASIBLE
+                    self.staffing_slack.append((staffing, staffing.exact_aantal, 0))
                 # DRAAD170 FIX: MUST ADD CONSTRAINT TO MODEL (don't skip!)
-                if staffing.exact_aantal > 0:
+                elif staffing.exact_aantal > 0:
                     # Add FALSE constraint to force INFEASIBLE
-                    self.model.Add(self.model.NewConstant(0) == 1)
+                    self._add(self.model.NewConstant(0) == 1, f"bezetting {staffing.service_id}", group)
                     logger.info(f"[DRAAD170] Added INFEASIBLE constraint for {staffing.service_id}")
                 
                 # Add violation for diagnostics
@@ -537,14 +911,27 @@ class RosterSolver:
                 validation_errors += 1
                 continue
             
-            if staffing.exact_aantal == 0:
+            if self.elastic_staffing:
+                # ELASTISCH: sum + shortage - surplus == exact_aantal
+                tag = f"{staffing.service_id}_{staffing.date}_{staffing.dagdeel.value}_{staffing.team}"
+                shortage = self.model.NewIntVar(0, staffing.exact_aantal, f"shortage_{tag}")
+                surplus = self.model.NewIntVar(0, len(slot_assignments), f"surplus_{tag}")
+                self.model.Add(
+                    cp_model.LinearExpr.Sum(slot_assignments) + shortage - surplus == staffing.exact_aantal
+                )
+                self.staffing_slack.append((staffing, shortage, surplus))
+            elif staffing.exact_aantal == 0:
                 # VERBODEN - mag niet worden ingepland
-                for var in slot_assignments:
-                    self.model.Add(var == 0)
+                self._fix([], slot_assignments,
+                          f"bezetting {staffing.service_id} {staffing.date} {staffing.dagdeel.value}", group)
                 logger.debug(f"[DRAAD170] Constraint: FORBID {staffing.service_id} on {staffing.date}")
             else:
                 # EXACT aantal vereist (HARD)
-                self.model.Add(sum(slot_assignments) == staffing.exact_aantal)
+                self._exactly(
+                    slot_assignments, staffing.exact_aantal,
+                    f"bezetting {staffing.service_id} {staffing.date} {staffing.dagdeel.value}",
+                    group
+                )
                 logger.debug(f"[DRAAD170] Constraint: EXACT {staffing.exact_aantal} for {staffing.service_id}")
             
             constraint_count += 1
@@ -576,7 +963,7 @@ class RosterSolver:
                 ddo_var = self.assignments_vars.get((emp_id, dt, 'O', DDO_id))
                 
                 if dio_var is not None and ddo_var is not None:
-                    self.model.Add(dio_var + ddo_var <= 1)
+                    self._at_most_one([dio_var, ddo_var], f"DIO/DDO exclusiviteit {emp_id} {dt}", ("exclusivity", dt))
                     constraint_count += 1
                 
                 # DIA XOR DDA (avond)
@@ -584,11 +971,49 @@ class RosterSolver:
                 dda_var = self.assignments_vars.get((emp_id, dt, 'A', DDA_id))
                 
                 if dia_var is not None and dda_var is not None:
-                    self.model.Add(dia_var + dda_var <= 1)
+                    self._at_most_one([dia_var, dda_var], f"DIA/DDA exclusiviteit {emp_id} {dt}", ("exclusivity", dt))
                     constraint_count += 1
         
         logger.info(f"[DRAAD170] Constraint 8: {constraint_count} exclusivity constraints added")
     
+    def _constraint_9_next_day_blocking(self):
+        """Constraint 9: na DIO/DDO geen dienst op O en M van de volgende dag.
+        
+        Dezelfde regel die RollingHorizonSolver op de venstergrens als
+        blocked slots meeneemt; binnen een venster (en monolithisch) moet
+        het model hem zelf afdwingen, anders verschilt de oplossing per
+        plek van de venstergrens.
+        
+        DIO en DDO sluiten elkaar uit (constraint 8) en een dagdeel heeft
+        hoogstens één dienst (constraint 4), dus per geblokkeerd dagdeel is
+        AtMostOne(DIO, DDO, diensten op dat dagdeel) precies de implicatie.
+        """
+        blocking_ids = [
+            svc_id for svc_id in (self.get_service_id_by_code('DIO'), self.get_service_id_by_code('DDO'))
+            if svc_id is not None
+        ]
+        if not blocking_ids:
+            return
+        
+        constraint_count = 0
+        for emp_id in self.employees:
+            for dt, next_dt in zip(self.dates, self.dates[1:]):
+                if next_dt != dt + timedelta(days=1):
+                    continue
+                blocking = [self.assignments_vars[(emp_id, dt, 'O', svc_id)] for svc_id in blocking_ids]
+                if not any(not isinstance(x, int) or x == 1 for x in blocking):
+                    continue  # geen DIO/DDO mogelijk op dt
+                for dagdeel in ('O', 'M'):
+                    next_slot = [self.assignments_vars[(emp_id, next_dt, dagdeel, svc_id)] for svc_id in self.services]
+                    self._at_most_one(
+                        blocking + next_slot,
+                        f"Blokkering na DIO/DDO {emp_id} {next_dt} {dagdeel}",
+                        ("next_day_blocking", dt)
+                    )
+                    constraint_count += 1
+        
+        logger.info(f"Constraint 9: {constraint_count} next-day blocking constraints added")
+    
     def get_service_id_by_code(self, code: str) -> Optional[str]:
         """Helper method: vind service ID by code.
         
@@ -612,31 +1037,35 @@ class RosterSolver:
         DRAAD106: Suggested assignments optioneel (Optie C: ignored)
         DRAAD108: Bonus voor 24-uurs wachtdienst koppeling (DIO+DIA, DDO+DDA)
         DRAAD170 FASE 2: CRITICAL FIX - Using AddMaxEquality for proper reification
+        NATIVE: AddMaxEquality gaf de bonus al bij DIO óf DIA; nu AND-reificatie
+        (_pair_literal) en één WeightedSum met samengevoegde coëfficiënten.
         """
         logger.info("[DRAAD170 FASE2] Definiëren objective function (PROPER REIFICATION)...")
         
-        objective_terms = []
+        # NATIVE: één coëfficiënt per variabele, constanten (RE-OPTIMALISATIE) als offset
+        coefficients: Dict[int, List] = {}
+        offset = 0
+        
+        def term(var, weight: int):
+            nonlocal offset
+            if isinstance(var, int):
+                offset += var * weight
+            elif var.Index() in coefficients:
+                coefficients[var.Index()][1] += weight
+            else:
+                coefficients[var.Index()] = [var, weight]
         
         # Term 1: Maximaliseer totaal assignments
         for var in self.assignments_vars.values():
-            objective_terms.append(var * 10)
+            term(var, 10)
         
         # DRAAD105: Term 2: Streefgetal logica
         for (emp_id, svc_id), target in self.target_counts.items():
-            emp_svc_assignments = [
-                self.assignments_vars[(emp_id, dt, dagdeel.value, svc_id)]
-                for dt in self.dates
-                for dagdeel in list(Dagdeel)
-            ]
-            
-            if target == 0:
-                # ZZP/reserve: LAGE priority
-                for var in emp_svc_assignments:
-                    objective_terms.append(var * -2)
-            else:
-                # Regulier: HOGE priority
-                for var in emp_svc_assignments:
-                    objective_terms.append(var * 5)
+            # ZZP/reserve (streefgetal 0): LAGE priority, regulier: HOGE priority
+            weight = -2 if target == 0 else 5
+            for dt in self.dates:
+                for dagdeel in list(Dagdeel):
+                    term(self.assignments_vars[(emp_id, dt, dagdeel.value, svc_id)], weight)
         
         # Term 3: Extra penalty voor ZZP team
         zzp_employees = [emp_id for emp_id, emp in self.employees.items() if emp.team == TeamType.OVERIG]
@@ -644,11 +1073,10 @@ class RosterSolver:
             for dt in self.dates:
                 for dagdeel in list(Dagdeel):
                     for svc_id in self.services:
-                        var = self.assignments_vars[(emp_id, dt, dagdeel.value, svc_id)]
-                        objective_terms.append(var * -3)
+                        term(self.assignments_vars[(emp_id, dt, dagdeel.value, svc_id)], -3)
         
         # DRAAD108 + DRAAD170 FASE2: Term 4 - Bonus voor 24-uurs wachtdienst koppeling
-        # CRITICAL FIX: Use AddMaxEquality instead of AddBoolAnd/OnlyEnforceIf
+        # NATIVE: koppel = DIO AND DIA (resp. DDO AND DDA) via _pair_literal
         DIO_id = self.get_service_id_by_code('DIO')
         DIA_id = self.get_service_id_by_code('DIA')
         DDO_id = self.get_service_id_by_code('DDO')
@@ -658,35 +1086,57 @@ class RosterSolver:
         if all([DIO_id, DIA_id, DDO_id, DDA_id]):
             for emp_id in self.employees:
                 for dt in self.dates:
-                    # DIO + DIA koppeling (24-uur avond-nacht)
-                    dio_var = self.assignments_vars.get((emp_id, dt, 'O', DIO_id))
-                    dia_var = self.assignments_vars.get((emp_id, dt, 'A', DIA_id))
-                    
-                    if dio_var is not None and dia_var is not None:
-                        # DRAAD170 FASE2 FIX: Proper bi-directional reification using AddMaxEquality
-                        # koppel_var = 1 IFF (dio_var==1 AND dia_var==1)
-                        koppel_var = self.model.NewBoolVar(f"dio_dia_koppel_{emp_id}_{dt}")
-                        self.model.AddMaxEquality(koppel_var, [dio_var, dia_var])
-                        objective_terms.append(koppel_var * 500)
-                        bonus_count += 1
-                        logger.debug(f"[DRAAD170] DIO+DIA koppel var created for {emp_id}")
-                    
-                    # DDO + DDA koppeling (24-uur dag)
-                    ddo_var = self.assignments_vars.get((emp_id, dt, 'O', DDO_id))
-                    dda_var = self.assignments_vars.get((emp_id, dt, 'A', DDA_id))
-                    
-                    if ddo_var is not None and dda_var is not None:
-                        # DRAAD170 FASE2 FIX: Proper bi-directional reification using AddMaxEquality
-                        # koppel_var = 1 IFF (ddo_var==1 AND dda_var==1)
-                        koppel_var = self.model.NewBoolVar(f"ddo_dda_koppel_{emp_id}_{dt}")
-                        self.model.AddMaxEquality(koppel_var, [ddo_var, dda_var])
-                        objective_terms.append(koppel_var * 500)
-                        bonus_count += 1
-                        logger.debug(f"[DRAAD170] DDO+DDA koppel var created for {emp_id}")
-        
-        self.model.Maximize(sum(objective_terms))
+                    # DIO + DIA koppeling (24-uur avond-nacht), DDO + DDA koppeling (24-uur dag)
+                    for prefix, first_id, second_id in (('dio_dia', DIO_id, DIA_id), ('ddo_dda', DDO_id, DDA_id)):
+                        first = self.assignments_vars.get((emp_id, dt, 'O', first_id))
+                        second = self.assignments_vars.get((emp_id, dt, 'A', second_id))
+                        if first is None or second is None:
+                            continue
+                        koppel = self._pair_literal(first, second, f"{prefix}_koppel_{emp_id}_{dt}")
+                        if koppel is not None:
+                            term(koppel, 500)
+                            bonus_count += 1
+        
+        variables = [var for var, _ in coefficients.values()]
+        weights = [weight for _, weight in coefficients.values()]
+        self.objective_terms = (variables, weights, offset)
+        self.objective_expr = cp_model.LinearExpr.WeightedSum(variables, weights) + offset
+        self.model.Maximize(self.objective_expr)
+        
+        logger.info(f"[DRAAD170 FASE2] Objective: {len(variables)} terms, {bonus_count} bonus vars")
+    
+    def evaluate_objective(self, assignments: List[Assignment]) -> int:
+        """Objective value (zie _define_objective) van een gegeven set assignments.
         
-        logger.info(f"[DRAAD170 FASE2] Objective: {len(objective_terms)} terms, {bonus_count} bonus vars")
+        Gebruikt om oplossingen van verschillende solve modes (bijv. rolling
+        horizon vs monolithisch) op dezelfde schaal te vergelijken.
+        """
+        targets = {
+            (res.employee_id, res.service_id): res.aantal
+            for res in self.roster_employee_services if res.actief
+        }
+        slots = {(a.employee_id, a.date, a.dagdeel.value, a.service_id) for a in assignments}
+        
+        value = 0
+        for emp_id, dt, dagdeel, svc_id in slots:
+            value += 10
+            target = targets.get((emp_id, svc_id))
+            if target is not None:
+                value += 5 if target > 0 else -2
+            emp = self.employees.get(emp_id)
+            if emp is not None and emp.team == TeamType.OVERIG:
+                value -= 3
+        
+        codes = {code: self.get_service_id_by_code(code) for code in ('DIO', 'DIA', 'DDO', 'DDA')}
+        if all(codes.values()):
+            for emp_id in self.employees:
+                for dt in self.dates:
+                    for first, second in (('DIO', 'DIA'), ('DDO', 'DDA')):
+                        # Zelfde koppeling (AND) als _pair_literal in _define_objective
+                        if ((emp_id, dt, 'O', codes[first]) in slots and
+                                (emp_id, dt, 'A', codes[second]) in slots):
+                            value += 500
+        return value
     
     def _generate_violations_report(self, assignments: List[Assignment]):
         """DRAAD105: Rapportage voor streefgetal afwijkingen."""
@@ -826,6 +1276,305 @@ class RosterSolver:
         logger.info(f"[DRAAD118A] analyze_bottlenecks() COMPLETE: {critical_count} CRITICAL, {shortage_pct:.1f}% shortage")
         return report
     
+    # ========================================================================
+    # PRECHECK: MAX-FLOW HAALBAARHEID VÓÓR MODELBOUW
+    # ========================================================================
+    
+    def _slot_demands(self) -> Dict[Tuple[date, str], List[Tuple[str, str, int]]]:
+        """PRECHECK: vraag per (datum, dagdeel) als (service_id, team, aantal) knopen.
+        
+        GRO en ORA zijn disjuncte teams; een TOT regel voor dezelfde dienst
+        telt die al mee, dus alleen het restant max(0, TOT - GRO - ORA) wordt
+        een eigen TOT knoop. Zo blijft de check een relaxatie van constraint 7
+        (nooit onterecht INFEASIBLE).
+        """
+        per_service: Dict[Tuple[date, str, str], Dict[str, int]] = {}
+        for staffing in self.exact_staffing:
+            if staffing.team not in TEAM_FILTER or staffing.exact_aantal == 0:
+                continue
+            key = (staffing.date, staffing.dagdeel.value, staffing.service_id)
+            teams = per_service.setdefault(key, {})
+            teams[staffing.team] = max(teams.get(staffing.team, 0), staffing.exact_aantal)
+        
+        demands: Dict[Tuple[date, str], List[Tuple[str, str, int]]] = {}
+        for (dt, dagdeel, svc_id), teams in per_service.items():
+            rows = demands.setdefault((dt, dagdeel), [])
+            for team in ('GRO', 'ORA'):
+                if team in teams:
+                    rows.append((svc_id, team, teams[team]))
+            residual = teams.get('TOT', 0) - teams.get('GRO', 0) - teams.get('ORA', 0)
+            if residual > 0:
+                rows.append((svc_id, 'TOT', residual))
+        return demands
+    
+    def _is_eligible(self, emp: Employee, svc_id: str, team: str) -> bool:
+        """PRECHECK: team filter + bevoegdheid, zoals constraint 7."""
+        team_type = TEAM_FILTER[team]
+        return (team_type is None or emp.team == team_type) and svc_id in self.employee_services.get(emp.id, set())
+    
+    def check_flow_feasibility(self) -> Dict:
+        """PRECHECK: max-flow haalbaarheid van exact_staffing zonder CP-SAT.
+        
+        1. Periode: transportprobleem medewerker -> dienst met als aanbod de
+           niet-geblokkeerde dagdelen per medewerker en als vraag de totale
+           bezetting per dienst (bevoegde paren, zoals target_counts).
+        2. Per (datum, dagdeel): bipartiet netwerk medewerkers -> bezettings-
+           knopen (team + bevoegdheid, geblokkeerde slots verwijderd, fixed
+           assignment alleen naar de eigen dienst), capaciteit 1 per medewerker.
+        
+        Beide zijn relaxaties van het CP-SAT model: een tekort bewijst
+        INFEASIBLE, geen tekort bewijst niets.
+        
+        Returns:
+            Dict met run_deficits, slot_deficits en time_ms
+        """
+        start = time.time()
+        blocked = {(bs.employee_id, bs.date, bs.dagdeel.value) for bs in self.blocked_slots}
+        fixed = {(fa.employee_id, fa.date, fa.dagdeel.value): fa.service_id for fa in self.fixed_assignments}
+        demands = self._slot_demands()
+        code = lambda svc_id: self.services[svc_id].code if svc_id in self.services else svc_id
+        
+        # STAP 1: periode-niveau transportprobleem
+        service_demand: Dict[str, int] = {}
+        for rows in demands.values():
+            for svc_id, _, amount in rows:
+                service_demand[svc_id] = service_demand.get(svc_id, 0) + amount
+        
+        slots_per_employee = len(self.dates) * len(list(Dagdeel))
+        blocked_count: Dict[str, int] = {}
+        for emp_id, dt, _ in blocked:
+            if self.start_date <= dt <= self.end_date:
+                blocked_count[emp_id] = blocked_count.get(emp_id, 0) + 1
+        
+        flow = max_flow.SimpleMaxFlow()
+        source, sink = 0, 1
+        emp_nodes = {emp_id: 2 + i for i, emp_id in enumerate(self.employees)}
+        svc_nodes = {svc_id: 2 + len(emp_nodes) + i for i, svc_id in enumerate(service_demand)}
+        svc_arcs = {}
+        for emp_id, node in emp_nodes.items():
+            supply = slots_per_employee - blocked_count.get(emp_id, 0)
+            flow.add_arc_with_capacity(source, node, supply)
+            for svc_id in self.employee_services.get(emp_id, set()):
+                if svc_id in svc_nodes:
+                    flow.add_arc_with_capacity(node, svc_nodes[svc_id], supply)
+        for svc_id, node in svc_nodes.items():
+            svc_arcs[svc_id] = flow.add_arc_with_capacity(node, sink, service_demand[svc_id])
+        
+        run_deficits = []
+        if svc_nodes and flow.solve(source, sink) == flow.OPTIMAL:
+            for svc_id, arc in svc_arcs.items():
+                tekort = service_demand[svc_id] - flow.flow(arc)
+                if tekort > 0:
+                    run_deficits.append({
+                        "service_id": svc_id,
+                        "service_code": code(svc_id),
+                        "required": service_demand[svc_id],
+                        "deficit": tekort,
+                    })
+        
+        # STAP 2: per (datum, dagdeel) bipartiete max-flow (alleen als periode haalbaar)
+        slot_deficits = []
+        if not run_deficits:
+            for (dt, dagdeel), rows in sorted(demands.items(), key=lambda item: (item[0][0], item[0][1])):
+                flow = max_flow.SimpleMaxFlow()
+                row_arcs = [flow.add_arc_with_capacity(source, 2 + i, amount)
+                            for i, (_, _, amount) in enumerate(rows)]
+                emp_base = 2 + len(rows)
+                for j, emp in enumerate(self.employees.values()):
+                    if (emp.id, dt, dagdeel) in blocked:
+                        continue
+                    fixed_svc = fixed.get((emp.id, dt, dagdeel))
+                    linked = False
+                    for i, (svc_id, team, _) in enumerate(rows):
+                        if (fixed_svc is None or fixed_svc == svc_id) and self._is_eligible(emp, svc_id, team):
+                            flow.add_arc_with_capacity(2 + i, emp_base + j, 1)
+                            linked = True
+                    if linked:
+                        flow.add_arc_with_capacity(emp_base + j, sink, 1)
+                
+                required = sum(amount for _, _, amount in rows)
+                if flow.solve(source, sink) != flow.OPTIMAL or flow.optimal_flow() >= required:
+                    continue
+                slot_deficits.append({
+                    "date": dt.isoformat(),
+                    "dagdeel": dagdeel,
+                    "required": required,
+                    "deficit": required - flow.optimal_flow(),
+                    "rows": [
+                        {"service_id": svc_id, "service_code": code(svc_id), "team": team,
+                         "required": amount, "unmet": amount - flow.flow(arc)}
+                        for (svc_id, team, amount), arc in zip(rows, row_arcs)
+                        if flow.flow(arc) < amount
+                    ],
+                })
+        
+        report = {
+            "run_deficits": run_deficits,
+            "slot_deficits": slot_deficits,
+            "time_ms": round((time.time() - start) * 1000, 2),
+        }
+        logger.info(
+            f"[PRECHECK] {len(demands)} slots, {len(run_deficits)} dienst-tekorten, "
+            f"{len(slot_deficits)} slot-tekorten ({report['time_ms']}ms)"
+        )
+        return report
+    
+    def _precheck_infeasible_response(self, start_time: float) -> SolveResponse:
+        """PRECHECK: INFEASIBLE response met tekorten, zonder CP-SAT model."""
+        report = self.precheck_report
+        for item in report["run_deficits"]:
+            self.violations.append(ConstraintViolation(
+                constraint_type="precheck_service_deficit",
+                service_id=item["service_id"],
+                message=f"{item['service_code']}: {item['required']} nodig over de periode, "
+                        f"{item['deficit']} niet te dekken door bevoegde medewerkers",
+                severity="critical"
+            ))
+        for item in report["slot_deficits"]:
+            rows = ", ".join(f"{r['service_code']}/{r['team']} {r['unmet']}" for r in item["rows"])
+            self.violations.append(ConstraintViolation(
+                constraint_type="precheck_slot_deficit",
+                dagdeel=Dagdeel(item["dagdeel"]),
+                message=f"{item['date']} {item['dagdeel']}: {item['required']} nodig, "
+                        f"tekort {item['deficit']} ({rows})",
+                severity="critical"
+            ))
+        logger.error(
+            f"[PRECHECK] INFEASIBLE zonder CP-SAT: {len(report['run_deficits'])} dienst-tekorten, "
+            f"{len(report['slot_deficits'])} slot-tekorten"
+        )
+        
+        return SolveResponse(
+            status=SolveStatus.INFEASIBLE,
+            roster_id=self.roster_id,
+            assignments=[],
+            solve_time_seconds=round(time.time() - start_time, 2),
+            total_assignments=0,
+            total_slots=len(self.dates) * len(list(Dagdeel)) * len(self.employees),
+            fill_percentage=0.0,
+            violations=self.violations,
+            bottleneck_report=self._infeasible_bottleneck_report(),
+            solver_metadata={
+                "dates_count": len(self.dates),
+                "employees_count": len(self.employees),
+                "services_count": len(self.services),
+                "exact_staffing_count": len(self.exact_staffing),
+                "feasibility_precheck": report,
+            }
+        )
+    
+    def extract_infeasibility_core(self) -> Tuple[List[InfeasibilityCoreItem], bool]:
+        """DIAGNOSE: bepaal welke constraint-groepen samen INFEASIBLE zijn.
+        
+        Het model wordt opnieuw opgebouwd met een assumption literal per
+        bezettingsregel, per fixed assignment en per exclusiviteitsdag
+        (overige constraints blijven hard). CP-SAT levert via
+        SufficientAssumptionsForInfeasibility een core; die wordt daarna
+        verkleind door groepen één voor één weg te laten zolang het model
+        INFEASIBLE blijft. Alles binnen diagnosis_timeout_seconds.
+        
+        Returns:
+            (core items, minimal) - minimal is False als het budget op was
+            voordat de core minimaal was
+        """
+        deadline = time.time() + self.diagnosis_timeout_seconds
+        
+        diag = copy.copy(self)
+        diag.model = cp_model.CpModel()
+        diag.assignments_vars = {}
+        diag.free_vars_count = 0
+        diag.unqualified_count = 0
+        diag.violations = []
+        diag.staffing_slack = []
+        diag.elastic_staffing = False
+        diag.symmetry_breaking = False
+        diag.symmetry_classes = []
+        diag.assumption_literals = {}
+        diag._create_variables()
+        diag._apply_constraints()
+        literals = diag.assumption_literals
+        
+        solver = cp_model.CpSolver()
+        solver.parameters.log_search_progress = False
+        
+        def check(groups: List[Tuple]) -> Tuple[int, List[Tuple]]:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return cp_model.UNKNOWN, groups
+            diag.model.ClearAssumptions()
+            diag.model.AddAssumptions([literals[g] for g in groups])
+            solver.parameters.max_time_in_seconds = remaining
+            status = solver.Solve(diag.model)
+            if status != cp_model.INFEASIBLE:
+                return status, groups
+            sufficient = set(solver.SufficientAssumptionsForInfeasibility())
+            return status, [g for g in groups if literals[g].Index() in sufficient]
+        
+        status, core = check(list(literals))
+        if status != cp_model.INFEASIBLE:
+            logger.warning(f"[DIAGNOSE] Geen core gevonden ({solver.StatusName(status)}, {len(literals)} groepen)")
+            return [], False
+        
+        # Deletion-based verkleinen: groep weg, nog steeds INFEASIBLE -> niet nodig
+        minimal = True
+        i = 0
+        while i < len(core):
+            trial = core[:i] + core[i + 1:]
+            status, smaller = check(trial)
+            if status == cp_model.INFEASIBLE:
+                core = smaller
+            elif status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+                i += 1
+            else:
+                minimal = False
+                break
+        
+        logger.info(
+            f"[DIAGNOSE] Core: {len(core)} van {len(literals)} groepen "
+            f"(minimal={minimal}, {self.diagnosis_timeout_seconds - max(0.0, deadline - time.time()):.2f}s)"
+        )
+        return [self._core_item(group) for group in core], minimal
+    
+    def _core_item(self, group: Tuple) -> InfeasibilityCoreItem:
+        """DIAGNOSE: vertaal een constraint-groep naar een leesbare regel."""
+        kind = group[0]
+        code = lambda svc_id: self.services[svc_id].code if svc_id in self.services else svc_id
+        
+        if kind == "staffing":
+            staffing = self.exact_staffing[group[1]]
+            return InfeasibilityCoreItem(
+                group="staffing",
+                description=f"Bezetting {code(staffing.service_id)} {staffing.date} {staffing.dagdeel.value} "
+                            f"team={staffing.team}: exact {staffing.exact_aantal}",
+                date=staffing.date.isoformat(),
+                dagdeel=staffing.dagdeel,
+                service_id=staffing.service_id
+            )
+        if kind == "fixed_assignment":
+            fa = self.fixed_assignments[group[1]]
+            emp = self.employees.get(fa.employee_id)
+            name = emp.name if emp else fa.employee_id
+            return InfeasibilityCoreItem(
+                group="fixed_assignment",
+                description=f"Vaste toewijzing {name}: {code(fa.service_id)} {fa.date} {fa.dagdeel.value}",
+                date=fa.date.isoformat(),
+                dagdeel=fa.dagdeel,
+                service_id=fa.service_id,
+                employee_id=fa.employee_id
+            )
+        dt = group[1]
+        if kind == "next_day_blocking":
+            return InfeasibilityCoreItem(
+                group="next_day_blocking",
+                description=f"Blokkering O + M op {dt + timedelta(days=1)} na DIO/DDO op {dt}",
+                date=dt.isoformat()
+            )
+        return InfeasibilityCoreItem(
+            group="exclusivity",
+            description=f"Systeemdienst exclusiviteit (DIO/DDO, DIA/DDA) op {dt}",
+            date=dt.isoformat()
+        )
+    
     def _generate_bottleneck_suggestions(self, items: List[BottleneckItem]) -> List[BottleneckSuggestion]:
         """DRAAD118A: Generate actionable suggestions to resolve bottlenecks."""
         suggestions = []
@@ -860,6 +1609,117 @@ class RosterSolver:
         
         return suggestions
     
+    def _slack_weight(self, staffing: ExactStaffing) -> int:
+        svc = self.services.get(staffing.service_id)
+        is_system = staffing.is_system_service or (svc is not None and svc.code in ('DIO', 'DIA', 'DDO', 'DDA'))
+        return SYSTEM_SHORTAGE_WEIGHT if is_system else SHORTAGE_WEIGHT
+    
+    def _solve_elastic(self, solver: cp_model.CpSolver) -> int:
+        """ELASTISCH: lexicografisch oplossen - eerst slack, dan gewone objective.
+        
+        Fase 1 minimaliseert gewogen shortage + surplus (halve timeout).
+        Fase 2 legt die slack vast als bovengrens, start vanuit de fase 1
+        oplossing en maximaliseert de objective uit _define_objective binnen
+        de resterende timeout. Levert fase 2 geen oplossing op (UNKNOWN, of
+        geen tijd meer over), dan blijft de fase 1 oplossing staan in
+        self.phase1_solution.
+        
+        Returns:
+            CP-SAT status code (FEASIBLE als een van beide fases niet optimaal is)
+        """
+        terms = [
+            (slack, weight)
+            for staffing, shortage, surplus in self.staffing_slack
+            for slack, weight in ((shortage, self._slack_weight(staffing)), (surplus, SURPLUS_WEIGHT))
+        ]
+        slack_expr = cp_model.LinearExpr.WeightedSum([t for t, _ in terms], [w for _, w in terms])
+        start = time.time()
+        
+        self.model.ClearObjective()
+        self.model.Minimize(slack_expr)
+        solver.parameters.max_time_in_seconds = self.timeout_seconds / 2
+        phase1 = self._cp_solve(solver)
+        if phase1 not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            return phase1
+        
+        best_slack = int(round(solver.ObjectiveValue()))
+        logger.info(f"[ELASTISCH] Fase 1: gewogen slack {best_slack} ({solver.StatusName(phase1)})")
+        phase1_solution = list(solver.ResponseProto().solution)
+        remaining = self.timeout_seconds - (time.time() - start)
+        if remaining <= 0:
+            logger.warning("[ELASTISCH] Geen tijd over voor fase 2: fase 1 oplossing behouden")
+            self.phase1_solution = phase1_solution
+            return cp_model.FEASIBLE
+        
+        self.model.Add(slack_expr <= best_slack)
+        self.model.ClearHints()
+        for var in self.assignments_vars.values():
+            if not isinstance(var, int):
+                self.model.AddHint(var, solver.Value(var))
+        self.model.ClearObjective()
+        self.model.Maximize(self.objective_expr)
+        solver.parameters.max_time_in_seconds = remaining
+        phase2 = self._cp_solve(solver)
+        logger.info(f"[ELASTISCH] Fase 2: objective ({solver.StatusName(phase2)})")
+        
+        if phase2 not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            logger.warning("[ELASTISCH] Fase 2 zonder oplossing: fase 1 oplossing behouden")
+            self.phase1_solution = phase1_solution
+            return cp_model.FEASIBLE
+        if phase2 == cp_model.OPTIMAL and phase1 != cp_model.OPTIMAL:
+            return cp_model.FEASIBLE
+        return phase2
+    
+    def _report_staffing_slack(self, value: Callable[[object], int]):
+        """ELASTISCH: exacte tekorten/overschotten per bezettingsregel rapporteren."""
+        rows = []
+        for staffing, shortage, surplus in self.staffing_slack:
+            short, extra = value(shortage), value(surplus)
+            if not short and not extra:
+                continue
+            svc = self.services.get(staffing.service_id)
+            code = svc.code if svc else staffing.service_id
+            rows.append({
+                "date": staffing.date.isoformat(),
+                "dagdeel": staffing.dagdeel.value,
+                "service_id": staffing.service_id,
+                "service_code": code,
+                "team": staffing.team,
+                "required": staffing.exact_aantal,
+                "assigned": staffing.exact_aantal - short + extra,
+                "shortage": short,
+                "surplus": extra,
+            })
+            self.violations.append(ConstraintViolation(
+                constraint_type="staffing_shortage" if short else "staffing_surplus",
+                dagdeel=staffing.dagdeel,
+                service_id=staffing.service_id,
+                message=f"{code} {staffing.date} {staffing.dagdeel.value} team={staffing.team}: "
+                        f"{staffing.exact_aantal - short + extra}/{staffing.exact_aantal} ingepland",
+                severity="critical" if short and self._slack_weight(staffing) == SYSTEM_SHORTAGE_WEIGHT else "warning"
+            ))
+        
+        self.staffing_report = {
+            "total_shortage": sum(r["shortage"] for r in rows),
+            "total_surplus": sum(r["surplus"] for r in rows),
+            "rows": rows,
+        }
+        logger.info(
+            f"[ELASTISCH] Tekort {self.staffing_report['total_shortage']}, "
+            f"overschot {self.staffing_report['total_surplus']} over {len(rows)} regels"
+        )
+    
+    def _cp_solve(self, solver: cp_model.CpSolver) -> int:
+        """LATEST-WINS: solver.Solve, tenzij de solve al geannuleerd is.
+        
+        StopSearch werkt alleen op een lopende Solve; na een annulering
+        vóór de start krijgt de Solve tijdslimiet 0 (status UNKNOWN).
+        """
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            logger.info("[LATEST-WINS] Solve geannuleerd vóór start")
+            solver.parameters.max_time_in_seconds = 0.0
+        return solver.Solve(self.model)
+    
     def _run_solver(self) -> Tuple[SolveStatus, List[Assignment]]:
         """Voer CP-SAT solver uit.
         
@@ -868,9 +1728,14 @@ class RosterSolver:
         solver = cp_model.CpSolver()
         solver.parameters.max_time_in_seconds = self.timeout_seconds
         solver.parameters.log_search_progress = False
+        if self.cancel_token is not None:
+            self.cancel_token.on_cancel(solver.StopSearch)
         
         logger.info(f"[DRAAD170 FASE3] Starten solver (timeout: {self.timeout_seconds}s)...")
-        status_code = solver.Solve(self.model)
+        if self.elastic_staffing and self.staffing_slack:
+            status_code = self._solve_elastic(solver)
+        else:
+            status_code = self._cp_solve(solver)
         
         # DRAAD170 FASE 3: Proper status handling
         if status_code == cp_model.OPTIMAL:
@@ -883,16 +1748,21 @@ class RosterSolver:
             solve_status = SolveStatus.INFEASIBLE
             logger.error("[DRAAD170 FASE3] Solver status: INFEASIBLE - constraints impossible")
         else:
-            # UNKNOWN or MODEL_INVALID
-            solve_status = SolveStatus.UNKNOWN
+            # UNKNOWN or MODEL_INVALID (ook: gestopt via cancel_token zonder oplossing)
+            solve_status = SolveStatus.TIMEOUT
             logger.critical(f"[DRAAD170 FASE3] Solver status: UNKNOWN (code={status_code}) - possible timeout/memory issue")
         
         logger.info(f"[DRAAD170 FASE3] Solve time: {solver.WallTime():.2f}s")
         
         assignments = []
         if status_code in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            if self.phase1_solution is not None:
+                solution = self.phase1_solution
+                value = lambda x: x if isinstance(x, int) else solution[x.Index()]
+            else:
+                value = lambda x: x if isinstance(x, int) else solver.Value(x)
             for (emp_id, dt, dagdeel_str, svc_id), var in self.assignments_vars.items():
-                if solver.Value(var) == 1:
+                if value(var) == 1:
                     emp = self.employees[emp_id]
                     svc = self.services[svc_id]
                     
@@ -906,6 +1776,15 @@ class RosterSolver:
                         confidence=1.0
                     ))
         
+            if self.phase1_solution is not None:
+                # Fase 1 heeft de objective niet geoptimaliseerd: herberekenen uit de assignments
+                self.objective_value = self.evaluate_objective(assignments)
+            else:
+                self.objective_value = round(solver.ObjectiveValue())  # integer objective, geen float ruis
+            
+            if self.elastic_staffing:
+                self._report_staffing_slack(value)
+        
         logger.info(f"[DRAAD170 FASE3] Extracted {len(assignments)} assignments")
         
         return solve_status, assignments
@@ -0,0 +1,1107 @@
+"""Unit tests for RosterSolver (solver_engine.py) solve modes.
+
+Tests validate:
+1. Neighbourhood re-optimisation: slots outside the neighbourhood are
+   constants from the prior solution and never become model variables
+2. Rolling horizon decomposition: window layout, boundary state and
+   quality against a monolithic solve
+3. Symmetry breaking: equivalence classes of interchangeable employees
+4. Elastic staffing: shortage-minimising solve instead of INFEASIBLE
+5. Infeasibility diagnosis: assumption-based core in the bottleneck report
+6. Feasibility pre-check: max-flow deficits before any CP-SAT model is built
+7. Min-cost-flow engine: coverage, DIO/DIA pairing and shortage reporting
+8. Native encoding: unqualified slots are constants, koppel is an AND
+9. Model-skeleton cache: structural model reused, request delta still applied
+10. Single-flight coalescing: shared in-flight solves, latest-wins StopSearch
+11. Default solve path: main._do_solve runs RosterSolver with the request options
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from pydantic import ValidationError
+
+from solver_engine import RosterSolver
+from rolling_horizon import RollingHorizonSolver, benchmark_rolling_horizon
+from flow_engine import FlowSolver
+from skeleton_cache import ModelSkeletonCache
+from single_flight import CancelToken, SingleFlight
+from admission import AdmissionRejected, SolveScheduler
+from model_budget import MODEL_BASE_MB, estimate_model_size, plan_model_budget
+from models import (
+    Employee, Service, RosterEmployeeService, ExactStaffing, BlockedSlot,
+    Neighbourhood, Assignment, FixedAssignment, TeamType, Dagdeel, SolveStatus,
+    SolveRequest, RollingHorizonConfig, ColumnarSolveRequest
+)
+
+
+def build_instance(days: int = 14, employees: int = 4):
+    """Small instance: every employee may do ECH and SPE, one of each per dagdeel."""
+    start = date(2025, 1, 6)
+    emps = [
+        Employee(id=f"emp-{i}", voornaam=f"Mw{i}", achternaam="Test", team=TeamType.MAAT)
+        for i in range(employees)
+    ]
+    services = [
+        Service(id="svc-ech", code="ECH", naam="Echo"),
+        Service(id="svc-spe", code="SPE", naam="Spreekuur"),
+    ]
+    res = [
+        RosterEmployeeService(roster_id="r1", employee_id=e.id, service_id=s.id, aantal=days)
+        for e in emps for s in services
+    ]
+    staffing = [
+        ExactStaffing(date=start + timedelta(days=d), dagdeel=dd, service_id=s.id, team="TOT", aantal=1)
+        for d in range(days) for dd in Dagdeel for s in services
+    ]
+    return dict(
+        roster_id="r1",
+        employees=emps,
+        services=services,
+        roster_employee_services=res,
+        start_date=start,
+        end_date=start + timedelta(days=days - 1),
+        fixed_assignments=[],
+        blocked_slots=[],
+        exact_staffing=staffing,
+        timeout_seconds=10
+    )
+
+
+def with_capacity_gap(instance):
+    """ECH on day 1 ochtend needs 3 (SPE 0) while only 2 employees exist."""
+    staffing = instance["exact_staffing"]
+    ech, spe = staffing[0], staffing[1]
+    staffing[0] = ech.model_copy(update={"exact_aantal": 3})
+    staffing[1] = spe.model_copy(update={"exact_aantal": 0})
+    return ech
+
+
+class TestNeighbourhoodReoptimisation(unittest.TestCase):
+    """Re-optimisation with everything outside the neighbourhood fixed."""
+    
+    def setUp(self):
+        self.instance = build_instance()
+        self.prior = RosterSolver(**self.instance).solve()
+        self.assertIn(self.prior.status, [SolveStatus.OPTIMAL, SolveStatus.FEASIBLE])
+    
+    def test_only_neighbourhood_variables_created(self):
+        """Week 2 is free, week 1 is taken over from the prior solution."""
+        week2 = self.instance["start_date"] + timedelta(days=7)
+        nb = Neighbourhood(start_date=week2, end_date=self.instance["end_date"])
+        
+        response = RosterSolver(
+            **self.instance, neighbourhood=nb, prior_assignments=self.prior.assignments
+        ).solve()
+        
+        self.assertEqual(response.status, SolveStatus.OPTIMAL)
+        # 4 employees x 7 days x 3 dagdelen x 2 services
+        self.assertEqual(response.solver_metadata["free_variables"], 168)
+        outside = lambda assignments: {
+            (a.employee_id, a.date, a.dagdeel, a.service_id) for a in assignments if a.date < week2
+        }
+        self.assertEqual(outside(response.assignments), outside(self.prior.assignments))
+        self.assertEqual(len(response.assignments), len(self.prior.assignments))
+    
+    def test_employee_and_service_filters(self):
+        """Only the listed employees/services are free."""
+        nb = Neighbourhood(
+            start_date=self.instance["start_date"],
+            end_date=self.instance["end_date"],
+            employee_ids=["emp-0", "emp-1"],
+            service_ids=["svc-ech"]
+        )
+        
+        response = RosterSolver(
+            **self.instance, neighbourhood=nb, prior_assignments=self.prior.assignments
+        ).solve()
+        
+        self.assertIn(response.status, [SolveStatus.OPTIMAL, SolveStatus.FEASIBLE])
+        self.assertEqual(response.solver_metadata["free_variables"], 2 * 14 * 3)
+    
+    def test_prior_violation_outside_neighbourhood_is_reported(self):
+        """A prior solution breaking staffing outside the neighbourhood is not INFEASIBLE."""
+        week2 = self.instance["start_date"] + timedelta(days=7)
+        prior = [a for a in self.prior.assignments if a.date != self.instance["start_date"]]
+        nb = Neighbourhood(start_date=week2, end_date=self.instance["end_date"])
+        
+        response = RosterSolver(**self.instance, neighbourhood=nb, prior_assignments=prior).solve()
+        
+        self.assertEqual(response.status, SolveStatus.OPTIMAL)
+        self.assertTrue(any(
+            v.constraint_type == "prior_solution_violation" for v in response.violations
+        ))
+
+
+class TestRollingHorizon(unittest.TestCase):
+    """Rolling horizon decomposition in overlapping windows."""
+    
+    def setUp(self):
+        self.instance = build_instance(days=21, employees=6)
+    
+    def test_windows_cover_period_once(self):
+        """Committed parts are contiguous and cover every day exactly once."""
+        rh = RollingHorizonSolver(**self.instance, window_days=7, overlap_days=2)
+        windows = rh.windows()
+        
+        self.assertEqual(len(windows), 4)
+        self.assertEqual(windows[0][0], self.instance["start_date"])
+        self.assertEqual(windows[-1][2], self.instance["end_date"])
+        for (_, end, commit_end), (next_start, _, _) in zip(windows, windows[1:]):
+            self.assertEqual(next_start, commit_end + timedelta(days=1))
+            self.assertEqual((end - commit_end).days, 2)
+    
+    def test_invalid_overlap_rejected(self):
+        with self.assertRaises(ValueError):
+            RollingHorizonSolver(**self.instance, window_days=7, overlap_days=7)
+    
+    def test_quality_matches_monolithic_on_easy_instance(self):
+        """No gap on an instance without cross-window coupling."""
+        rh = RollingHorizonSolver(**self.instance, window_days=7, overlap_days=2)
+        
+        result = benchmark_rolling_horizon(rh)
+        
+        self.assertEqual(result["rolling_horizon"]["windows"], 4)
+        self.assertEqual(result["rolling_horizon"]["assignments"], 21 * 3 * 2)
+        self.assertEqual(result["gap_percentage"], 0.0)
+    
+    def test_next_day_blocking_carried(self):
+        """A DIO on the last committed day blocks O and M of the next window."""
+        instance = dict(self.instance)
+        instance["services"] = instance["services"] + [
+            Service(id="svc-dio", code="DIO", naam="Dienst ochtend")
+        ]
+        rh = RollingHorizonSolver(**instance, window_days=7, overlap_days=2)
+        commit_end = self.instance["start_date"] + timedelta(days=4)
+        dio = Assignment(
+            employee_id="emp-0", employee_name="Mw0 Test", date=commit_end,
+            dagdeel=Dagdeel.OCHTEND, service_id="svc-dio", service_code="DIO"
+        )
+        
+        blocks = rh._next_day_blocks([dio], commit_end)
+        
+        self.assertEqual(
+            {(b.employee_id, b.date, b.dagdeel) for b in blocks},
+            {("emp-0", commit_end + timedelta(days=1), Dagdeel.OCHTEND),
+             ("emp-0", commit_end + timedelta(days=1), Dagdeel.MIDDAG)}
+        )
+
+
+class TestNextDayBlocking(unittest.TestCase):
+    """Constraint 9: no O/M service the day after a DIO, inside the model too."""
+    
+    def setUp(self):
+        """ECH + SPE every dagdeel and a DIO every ochtend (none later), four employees."""
+        self.instance = build_instance(days=3, employees=4)
+        self.instance["services"] = self.instance["services"] + [
+            Service(id="svc-dio", code="DIO", naam="Dienst ochtend")
+        ]
+        self.instance["roster_employee_services"] += [
+            RosterEmployeeService(roster_id="r1", employee_id=e.id, service_id="svc-dio", aantal=3)
+            for e in self.instance["employees"]
+        ]
+        self.instance["exact_staffing"] += [
+            ExactStaffing(date=self.instance["start_date"] + timedelta(days=d), dagdeel=dagdeel,
+                          service_id="svc-dio", team="TOT", aantal=int(dagdeel == Dagdeel.OCHTEND))
+            for d in range(3) for dagdeel in Dagdeel
+        ]
+    
+    def assert_next_day_free(self, assignments):
+        busy = {(a.employee_id, a.date, a.dagdeel) for a in assignments}
+        dios = [a for a in assignments if a.service_id == "svc-dio"]
+        self.assertTrue(dios)
+        for dio in dios:
+            for dagdeel in (Dagdeel.OCHTEND, Dagdeel.MIDDAG):
+                self.assertNotIn((dio.employee_id, dio.date + timedelta(days=1), dagdeel), busy)
+    
+    def test_monolithic_respects_rule(self):
+        response = RosterSolver(**self.instance).solve()
+        
+        self.assertIn(response.status, [SolveStatus.OPTIMAL, SolveStatus.FEASIBLE])
+        self.assert_next_day_free(response.assignments)
+    
+    def test_rolling_horizon_matches_inside_and_across_windows(self):
+        """Same rule whether the next day is in the window or past its boundary."""
+        response = RollingHorizonSolver(**self.instance, window_days=2, overlap_days=1).solve()
+        
+        self.assertIn(response.status, [SolveStatus.OPTIMAL, SolveStatus.FEASIBLE])
+        self.assert_next_day_free(response.assignments)
+    
+    def test_conflict_reported_in_core(self):
+        """A fixed service the morning after a fixed DIO is infeasible by constraint 9."""
+        day = self.instance["start_date"]
+        self.instance["fixed_assignments"] = [
+            FixedAssignment(employee_id="emp-0", date=day, dagdeel=Dagdeel.OCHTEND, service_id="svc-dio"),
+            FixedAssignment(employee_id="emp-0", date=day + timedelta(days=1), dagdeel=Dagdeel.OCHTEND,
+                            service_id="svc-ech"),
+        ]
+        response = RosterSolver(**self.instance, diagnose_infeasibility=True).solve()
+        
+        self.assertEqual(response.status, SolveStatus.INFEASIBLE)
+        groups = {c.group for c in response.bottleneck_report.infeasibility_core}
+        self.assertIn("next_day_blocking", groups)
+
+
+class TestSymmetryBreaking(unittest.TestCase):
+    """Lexicographic ordering within classes of interchangeable employees."""
+    
+    def test_classes_split_on_blocked_pattern(self):
+        """An employee with a different blocked slot leaves the class."""
+        instance = build_instance(days=7, employees=4)
+        instance["blocked_slots"] = [BlockedSlot(
+            employee_id="emp-3", date=instance["start_date"], dagdeel=Dagdeel.OCHTEND, status=3
+        )]
+        solver = RosterSolver(**instance)
+        
+        self.assertEqual(solver._employee_equivalence_classes(), [["emp-0", "emp-1", "emp-2"]])
+    
+    def test_solution_is_lex_ordered_within_class(self):
+        """Same optimum as without symmetry breaking; class members are lex ordered."""
+        instance = build_instance(days=7, employees=4)
+        plain = RosterSolver(**instance, symmetry_breaking=False).solve()
+        solver = RosterSolver(**instance)
+        response = solver.solve()
+        
+        self.assertEqual(response.status, SolveStatus.OPTIMAL)
+        self.assertEqual(response.solver_metadata["objective_value"], plain.solver_metadata["objective_value"])
+        self.assertEqual(response.solver_metadata["symmetry_class_sizes"], [4])
+        
+        assigned = {(a.employee_id, a.date, a.dagdeel.value, a.service_id) for a in response.assignments}
+        positions = [
+            (dt, dd.value, svc) for dt in solver.dates for dd in Dagdeel for svc in ("svc-ech", "svc-spe")
+        ]
+        vectors = [[int((emp, *pos) in assigned) for pos in positions] for emp in ("emp-0", "emp-1", "emp-2", "emp-3")]
+        self.assertEqual(vectors, sorted(vectors, reverse=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class TestElasticStaffing(unittest.TestCase):
+    """Exact staffing as soft rows with bounded shortage/surplus slack."""
+    
+    def setUp(self):
+        self.instance = build_instance(days=3, employees=2)
+        self.gap = with_capacity_gap(self.instance)
+    
+    def test_hard_mode_is_infeasible(self):
+        response = RosterSolver(**self.instance).solve()
+        self.assertEqual(response.status, SolveStatus.INFEASIBLE)
+    
+    def test_shortage_reported_per_slot(self):
+        response = RosterSolver(**self.instance, elastic_staffing=True).solve()
+        
+        self.assertIn(response.status, [SolveStatus.OPTIMAL, SolveStatus.FEASIBLE])
+        report = response.solver_metadata["staffing_slack"]
+        self.assertEqual(report["total_shortage"], 1)
+        self.assertEqual(report["total_surplus"], 0)
+        row = report["rows"][0]
+        self.assertEqual((row["date"], row["dagdeel"], row["service_id"]),
+                         (self.gap.date.isoformat(), self.gap.dagdeel.value, self.gap.service_id))
+        self.assertEqual((row["required"], row["assigned"]), (3, 2))
+        shortages = [v for v in response.violations if v.constraint_type == "staffing_shortage"]
+        self.assertEqual(len(shortages), 1)
+        # Alle andere regels blijven exact bezet
+        self.assertEqual(len(response.assignments), 2 + (len(self.instance["exact_staffing"]) - 2))
+    
+    def test_unstaffable_row_without_eligible_employees(self):
+        self.instance["blocked_slots"] = [
+            BlockedSlot(employee_id=e.id, date=self.gap.date, dagdeel=self.gap.dagdeel, status=3)
+            for e in self.instance["employees"]
+        ]
+        response = RosterSolver(**self.instance, elastic_staffing=True).solve()
+        
+        self.assertIn(response.status, [SolveStatus.OPTIMAL, SolveStatus.FEASIBLE])
+        self.assertEqual(response.solver_metadata["staffing_slack"]["total_shortage"], 3)
+    
+    def test_phase_one_kept_when_phase_two_finds_nothing(self):
+        class PhaseTwoWithoutTime(RosterSolver):
+            calls = 0
+            
+            def _cp_solve(self, solver):
+                self.calls += 1
+                if self.calls == 2:
+                    solver.parameters.max_time_in_seconds = 0.0
+                return solver.Solve(self.model)
+        
+        solver = PhaseTwoWithoutTime(**self.instance, elastic_staffing=True)
+        response = solver.solve()
+        
+        self.assertEqual(response.status, SolveStatus.FEASIBLE)
+        self.assertEqual(response.solver_metadata["staffing_slack"]["total_shortage"], 1)
+        self.assertEqual(len(response.assignments), 2 + (len(self.instance["exact_staffing"]) - 2))
+        self.assertEqual(response.solver_metadata["objective_value"],
+                         solver.evaluate_objective(response.assignments))
+    
+    def test_phases_stay_within_timeout(self):
+        limits = []
+        
+        class RecordingSolver(RosterSolver):
+            def _cp_solve(self, solver):
+                limits.append(solver.parameters.max_time_in_seconds)
+                return super()._cp_solve(solver)
+        
+        self.instance["timeout_seconds"] = 1
+        response = RecordingSolver(**self.instance, elastic_staffing=True).solve()
+        
+        self.assertIn(response.status, [SolveStatus.OPTIMAL, SolveStatus.FEASIBLE])
+        self.assertEqual(len(limits), 2)
+        self.assertEqual(limits[0], 0.5)
+        # Fase 2 krijgt alleen wat er van de timeout over is, geen minimum van 1s
+        self.assertLess(limits[1], 1.0)
+    
+    def test_rolling_horizon_reports_shortage_once(self):
+        instance = build_instance(days=5, employees=2)
+        with_capacity_gap(instance)
+        response = RollingHorizonSolver(
+            **instance, window_days=3, overlap_days=1, elastic_staffing=True
+        ).solve()
+        
+        self.assertIn(response.status, [SolveStatus.OPTIMAL, SolveStatus.FEASIBLE])
+        self.assertEqual(response.solver_metadata["staffing_slack"]["total_shortage"], 1)
+        self.assertEqual(
+            len([v for v in response.violations if v.constraint_type == "staffing_shortage"]), 1
+        )
+
+
+class TestInfeasibilityCore(unittest.TestCase):
+    """Core extraction explains interaction infeasibility the aggregate analysis misses."""
+    
+    def setUp(self):
+        self.instance = build_instance(days=1, employees=2)
+        self.day = self.instance["start_date"]
+    
+    def test_disabled_by_default(self):
+        staffing = self.instance["exact_staffing"]
+        staffing[1] = staffing[1].model_copy(update={"exact_aantal": 2})
+        response = RosterSolver(**self.instance).solve()
+        
+        self.assertEqual(response.status, SolveStatus.INFEASIBLE)
+        self.assertIsNone(response.bottleneck_report.infeasibility_core)
+    
+    def test_same_dagdeel_overbooking(self):
+        """ECH 1 + SPE 2 in one dagdeel with 2 employees: no aggregate shortage."""
+        staffing = self.instance["exact_staffing"]
+        staffing[1] = staffing[1].model_copy(update={"exact_aantal": 2})
+        response = RosterSolver(**self.instance, diagnose_infeasibility=True).solve()
+        
+        report = response.bottleneck_report
+        self.assertEqual(response.status, SolveStatus.INFEASIBLE)
+        self.assertEqual(report.total_shortage, 0)
+        self.assertTrue(report.core_minimal)
+        self.assertEqual(
+            {(c.group, c.service_id, c.dagdeel) for c in report.infeasibility_core},
+            {("staffing", "svc-ech", Dagdeel.OCHTEND), ("staffing", "svc-spe", Dagdeel.OCHTEND)}
+        )
+    
+    def test_fixed_assignment_in_core(self):
+        """Fixed ECH for emp-0 while SPE needs both employees in that dagdeel."""
+        staffing = self.instance["exact_staffing"]
+        staffing[0] = staffing[0].model_copy(update={"exact_aantal": 0})
+        staffing[1] = staffing[1].model_copy(update={"exact_aantal": 2})
+        self.instance["fixed_assignments"] = [FixedAssignment(
+            employee_id="emp-0", date=self.day, dagdeel=Dagdeel.OCHTEND, service_id="svc-ech"
+        )]
+        response = RosterSolver(**self.instance, diagnose_infeasibility=True).solve()
+        
+        core = response.bottleneck_report.infeasibility_core
+        self.assertEqual(len(core), 2)
+        fixed = [c for c in core if c.group == "fixed_assignment"]
+        self.assertEqual(len(fixed), 1)
+        self.assertEqual(fixed[0].employee_id, "emp-0")
+
+
+class TestFeasibilityPrecheck(unittest.TestCase):
+    """Max-flow pre-check returns INFEASIBLE without building the CP-SAT model."""
+    
+    def setUp(self):
+        self.instance = build_instance(days=1, employees=2)
+    
+    def test_feasible_instance_passes(self):
+        response = RosterSolver(**self.instance).solve()
+        
+        self.assertEqual(response.status, SolveStatus.OPTIMAL)
+        precheck = response.solver_metadata["feasibility_precheck"]
+        self.assertEqual((precheck["run_deficits"], precheck["slot_deficits"]), ([], []))
+    
+    def test_slot_deficit(self):
+        """ECH 1 + SPE 3 in the ochtend with 3 employees; enough capacity over the day."""
+        instance = build_instance(days=1, employees=3)
+        staffing = instance["exact_staffing"]
+        staffing[1] = staffing[1].model_copy(update={"exact_aantal": 3})
+        response = RosterSolver(**instance).solve()
+        
+        self.assertEqual(response.status, SolveStatus.INFEASIBLE)
+        self.assertNotIn("free_variables", response.solver_metadata)
+        precheck = response.solver_metadata["feasibility_precheck"]
+        self.assertEqual(precheck["run_deficits"], [])
+        deficits = precheck["slot_deficits"]
+        self.assertEqual(len(deficits), 1)
+        self.assertEqual((deficits[0]["dagdeel"], deficits[0]["required"], deficits[0]["deficit"]), ("O", 4, 1))
+        self.assertIsNotNone(response.bottleneck_report)
+    
+    def test_run_deficit(self):
+        """Only emp-0 may do SPE and is blocked one dagdeel: 3 SPE needed, 2 available."""
+        self.instance["roster_employee_services"] = [
+            res for res in self.instance["roster_employee_services"]
+            if res.service_id == "svc-ech" or res.employee_id == "emp-0"
+        ]
+        self.instance["blocked_slots"] = [BlockedSlot(
+            employee_id="emp-0", date=self.instance["start_date"], dagdeel=Dagdeel.AVOND, status=2
+        )]
+        response = RosterSolver(**self.instance).solve()
+        
+        self.assertEqual(response.status, SolveStatus.INFEASIBLE)
+        precheck = response.solver_metadata["feasibility_precheck"]
+        self.assertEqual(precheck["run_deficits"][0]["service_id"], "svc-spe")
+        self.assertEqual(precheck["run_deficits"][0]["deficit"], 1)
+    
+    def test_precheck_can_be_disabled(self):
+        staffing = self.instance["exact_staffing"]
+        staffing[1] = staffing[1].model_copy(update={"exact_aantal": 2})
+        response = RosterSolver(**self.instance, feasibility_precheck=False).solve()
+        
+        self.assertEqual(response.status, SolveStatus.INFEASIBLE)
+        self.assertIsNone(response.solver_metadata["feasibility_precheck"])
+
+
+class TestFlowSolver(unittest.TestCase):
+    """Min-cost-flow engine as a fast middle tier between greedy and CP-SAT."""
+    
+    @staticmethod
+    def flow_args(instance):
+        return {k: v for k, v in instance.items() if k != "timeout_seconds"}
+    
+    def test_full_coverage_matches_cpsat_objective(self):
+        instance = build_instance()
+        for block_days in (1, 7):
+            response = FlowSolver(**self.flow_args(instance), block_days=block_days).solve()
+            
+            self.assertIn(response.status, [SolveStatus.FEASIBLE, SolveStatus.TIMEOUT])
+            self.assertEqual(response.solver_result, "min_cost_flow")
+            self.assertEqual(response.solver_metadata["staffing_slack"]["total_shortage"], 0)
+            self.assertEqual(response.total_assignments, len(instance["exact_staffing"]))
+        
+        cpsat = RosterSolver(**instance).solve()
+        self.assertEqual(response.solver_metadata["objective_value"], cpsat.solver_metadata["objective_value"])
+    
+    def test_one_service_per_dagdeel_and_blocked_slots(self):
+        instance = build_instance(days=2, employees=3)
+        instance["blocked_slots"] = [BlockedSlot(
+            employee_id="emp-0", date=instance["start_date"], dagdeel=Dagdeel.OCHTEND, status=3
+        )]
+        response = FlowSolver(**self.flow_args(instance)).solve()
+        
+        slots = [(a.employee_id, a.date, a.dagdeel) for a in response.assignments]
+        self.assertEqual(len(slots), len(set(slots)))
+        self.assertNotIn(("emp-0", instance["start_date"], Dagdeel.OCHTEND), slots)
+        self.assertEqual(response.solver_metadata["staffing_slack"]["total_shortage"], 0)
+    
+    def test_dio_dia_pairs_as_composite_arcs(self):
+        instance = build_instance(days=3, employees=3)
+        codes = ("DIO", "DIA", "DDO", "DDA")
+        instance["services"] = [Service(id=f"svc-{c.lower()}", code=c, naam=c) for c in codes]
+        instance["roster_employee_services"] = [
+            RosterEmployeeService(roster_id="r1", employee_id=e.id, service_id=s.id, aantal=2)
+            for e in instance["employees"] for s in instance["services"]
+        ]
+        instance["exact_staffing"] = [
+            ExactStaffing(date=instance["start_date"] + timedelta(days=d), dagdeel=dagdeel,
+                          service_id=svc_id, team="TOT", aantal=1)
+            for d in range(3)
+            for dagdeel, svc_id in ((Dagdeel.OCHTEND, "svc-dio"), (Dagdeel.AVOND, "svc-dia"))
+        ]
+        response = FlowSolver(**self.flow_args(instance)).solve()
+        
+        self.assertEqual(response.solver_metadata["pairs_assigned"], 3)
+        by_day = {}
+        for a in response.assignments:
+            by_day.setdefault(a.date, set()).add(a.employee_id)
+        self.assertTrue(all(len(emps) == 1 for emps in by_day.values()))
+        # Eerlijke verdeling: elke dag een andere medewerker
+        self.assertEqual(len({next(iter(emps)) for emps in by_day.values()}), 3)
+    
+    def test_no_ochtend_or_middag_after_dio(self):
+        instance = build_instance(days=3, employees=2)
+        instance["services"] = instance["services"] + [Service(id="svc-dio", code="DIO", naam="DIO")]
+        instance["roster_employee_services"] = instance["roster_employee_services"] + [
+            RosterEmployeeService(roster_id="r1", employee_id=e.id, service_id="svc-dio", aantal=3)
+            for e in instance["employees"]
+        ]
+        # Alleen ECH naast DIO, zodat de ochtend met twee medewerkers te vullen is
+        instance["exact_staffing"] = [s for s in instance["exact_staffing"] if s.service_id == "svc-ech"] + [
+            ExactStaffing(date=instance["start_date"] + timedelta(days=d), dagdeel=Dagdeel.OCHTEND,
+                          service_id="svc-dio", team="TOT", aantal=1)
+            for d in range(2)
+        ]
+        for block_days in (1, 7):
+            response = FlowSolver(**self.flow_args(instance), block_days=block_days).solve()
+            
+            slots = {(a.employee_id, a.date, a.dagdeel) for a in response.assignments}
+            dio = [a for a in response.assignments if a.service_id == "svc-dio"]
+            self.assertTrue(dio)
+            for a in dio:
+                next_day = a.date + timedelta(days=1)
+                with self.subTest(block_days=block_days, employee=a.employee_id, date=a.date):
+                    self.assertNotIn((a.employee_id, next_day, Dagdeel.OCHTEND), slots)
+                    self.assertNotIn((a.employee_id, next_day, Dagdeel.MIDDAG), slots)
+    
+    def test_shortage_reported(self):
+        instance = build_instance(days=3, employees=2)
+        gap = with_capacity_gap(instance)
+        response = FlowSolver(**self.flow_args(instance)).solve()
+        
+        report = response.solver_metadata["staffing_slack"]
+        self.assertEqual(report["total_shortage"], 1)
+        self.assertEqual((report["rows"][0]["service_id"], report["rows"][0]["assigned"]), (gap.service_id, 2))
+
+
+class TestNativeEncoding(unittest.TestCase):
+    """Global-constraint encoding keeps the model small and the semantics unchanged."""
+    
+    def test_unqualified_combinations_are_constants(self):
+        instance = build_instance(days=2, employees=2)
+        instance["roster_employee_services"] = [
+            res for res in instance["roster_employee_services"]
+            if not (res.employee_id == "emp-0" and res.service_id == "svc-spe")
+        ]
+        response = RosterSolver(**instance).solve()
+        
+        self.assertIn(response.status, [SolveStatus.OPTIMAL, SolveStatus.FEASIBLE])
+        # 3 gekwalificeerde combinaties x 2 dagen x 3 dagdelen
+        self.assertEqual(response.solver_metadata["free_variables"], 18)
+        self.assertEqual(response.solver_metadata["fixed_variables"], 0)
+        self.assertIsNotNone(response.solver_metadata["model_build_seconds"])
+    
+    def test_fixed_unqualified_assignment_stays_infeasible(self):
+        instance = build_instance(days=1, employees=2)
+        instance["roster_employee_services"] = [
+            res for res in instance["roster_employee_services"]
+            if not (res.employee_id == "emp-0" and res.service_id == "svc-spe")
+        ]
+        instance["exact_staffing"] = []
+        instance["fixed_assignments"] = [FixedAssignment(
+            employee_id="emp-0", date=instance["start_date"], dagdeel=Dagdeel.OCHTEND, service_id="svc-spe"
+        )]
+        response = RosterSolver(**instance).solve()
+        
+        self.assertEqual(response.status, SolveStatus.INFEASIBLE)
+    
+    def test_koppel_bonus_requires_both_services(self):
+        # Vier medewerkers: na DIO/DDO is de volgende ochtend geblokkeerd (constraint 9)
+        instance = build_instance(days=2, employees=4)
+        codes = ("DIO", "DIA", "DDO", "DDA")
+        instance["services"] = [Service(id=f"svc-{c.lower()}", code=c, naam=c) for c in codes]
+        instance["roster_employee_services"] = [
+            RosterEmployeeService(roster_id="r1", employee_id=e.id, service_id=s.id, aantal=2)
+            for e in instance["employees"] for s in instance["services"]
+        ]
+        instance["exact_staffing"] = [
+            ExactStaffing(date=instance["start_date"] + timedelta(days=d), dagdeel=dagdeel,
+                          service_id=svc_id, team="TOT", aantal=1)
+            for d in range(2)
+            for dagdeel, svc_id in ((Dagdeel.OCHTEND, "svc-dio"), (Dagdeel.AVOND, "svc-dia"),
+                                    (Dagdeel.OCHTEND, "svc-ddo"), (Dagdeel.AVOND, "svc-dda"))
+        ]
+        solver = RosterSolver(**instance)
+        response = solver.solve()
+        
+        self.assertEqual(response.status, SolveStatus.OPTIMAL)
+        self.assertEqual(response.solver_metadata["objective_value"],
+                         solver.evaluate_objective(response.assignments))
+        # Elke dag: één medewerker DIO+DIA, een ander DDO+DDA
+        koppels = {(a.employee_id, a.date) for a in response.assignments if a.service_code == "DIO"} & {
+            (a.employee_id, a.date) for a in response.assignments if a.service_code == "DIA"}
+        self.assertEqual(len(koppels), 2)
+
+
+class TestModelSkeletonCache(unittest.TestCase):
+    """Repeated solves on the same structure reuse the cached base model."""
+    
+    def solve(self, instance, cache):
+        return RosterSolver(**instance, skeleton_cache=cache).solve()
+    
+    def test_second_solve_hits_with_same_result(self):
+        cache = ModelSkeletonCache(max_entries=2)
+        instance = build_instance(days=5, employees=3)
+        cold = self.solve(instance, cache)
+        warm = self.solve(instance, cache)
+        
+        self.assertEqual(cold.solver_metadata["model_skeleton"], "miss")
+        self.assertEqual(warm.solver_metadata["model_skeleton"], "hit")
+        self.assertEqual(warm.status, cold.status)
+        self.assertEqual(warm.solver_metadata["objective_value"], cold.solver_metadata["objective_value"])
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+    
+    def test_delta_constraints_respected_on_hit(self):
+        cache = ModelSkeletonCache(max_entries=2)
+        instance = build_instance(days=3, employees=3)
+        self.solve(instance, cache)
+        
+        start = instance["start_date"]
+        instance["blocked_slots"] = [
+            BlockedSlot(employee_id="emp-0", date=start, dagdeel=Dagdeel.OCHTEND, status=2)
+        ]
+        instance["fixed_assignments"] = [FixedAssignment(
+            employee_id="emp-1", date=start, dagdeel=Dagdeel.OCHTEND, service_id="svc-spe"
+        )]
+        response = self.solve(instance, cache)
+        
+        self.assertEqual(response.solver_metadata["model_skeleton"], "hit")
+        self.assertIn(response.status, [SolveStatus.OPTIMAL, SolveStatus.FEASIBLE])
+        first_slot = [a for a in response.assignments if a.date == start and a.dagdeel == Dagdeel.OCHTEND]
+        self.assertNotIn("emp-0", {a.employee_id for a in first_slot})
+        self.assertIn(("emp-1", "svc-spe"), {(a.employee_id, a.service_id) for a in first_slot})
+        
+        # Delta van een eerdere request lekt niet in het skeleton
+        instance["exact_staffing"] = [
+            es for es in instance["exact_staffing"] if es.date != start
+        ] + [ExactStaffing(date=start, dagdeel=Dagdeel.OCHTEND, service_id="svc-ech", team="TOT", aantal=3)]
+        instance["blocked_slots"] = []
+        instance["fixed_assignments"] = []
+        response = self.solve(instance, cache)
+        self.assertIn(response.status, [SolveStatus.OPTIMAL, SolveStatus.FEASIBLE])
+    
+    def test_structural_change_misses(self):
+        cache = ModelSkeletonCache(max_entries=2)
+        instance = build_instance(days=3, employees=3)
+        self.solve(instance, cache)
+        instance["roster_employee_services"] = [
+            res for res in instance["roster_employee_services"]
+            if not (res.employee_id == "emp-0" and res.service_id == "svc-spe")
+        ]
+        response = self.solve(instance, cache)
+        
+        self.assertEqual(response.solver_metadata["model_skeleton"], "miss")
+        self.assertEqual(cache.stats()["entries"], 2)
+    
+    def test_cache_is_bounded(self):
+        cache = ModelSkeletonCache(max_entries=1)
+        for days in (2, 3, 2):
+            self.solve(build_instance(days=days, employees=2), cache)
+        
+        stats = cache.stats()
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual(stats["evictions"], 2)
+        self.assertEqual(stats["hits"], 0)
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Concurrent solves of one roster share or serialise one computation."""
+    
+    def run_concurrently(self, flights, calls):
+        async def main():
+            return await asyncio.gather(*(flights.run(*call) for call in calls))
+        return asyncio.run(main())
+    
+    def test_identical_requests_share_one_solve(self):
+        flights = SingleFlight()
+        runs = []
+        
+        async def start(token):
+            runs.append(token)
+            await asyncio.sleep(0.05)
+            return "result"
+        
+        results = self.run_concurrently(flights, [("r1", "fp", start)] * 3)
+        
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(results, [("result", False), ("result", True), ("result", True)])
+        self.assertEqual(flights.stats()["coalesced"], 2)
+        self.assertEqual(flights.stats()["in_flight"], 0)
+    
+    def test_different_inputs_wait_for_running_solve(self):
+        flights = SingleFlight(policy="wait")
+        events = []
+        
+        def starter(name):
+            async def start(token):
+                events.append(f"start {name}")
+                await asyncio.sleep(0.05)
+                events.append(f"end {name}")
+                return token.cancelled
+            return start
+        
+        results = self.run_concurrently(flights, [("r1", "a", starter("a")), ("r1", "b", starter("b"))])
+        
+        self.assertEqual(events, ["start a", "end a", "start b", "end b"])
+        self.assertEqual(results, [(False, False), (False, False)])
+    
+    def test_latest_wins_cancels_older_solve(self):
+        flights = SingleFlight(policy="latest_wins")
+        
+        async def slow(token):
+            for _ in range(100):
+                if token.cancelled:
+                    return "stopped"
+                await asyncio.sleep(0.01)
+            return "finished"
+        
+        async def fast(token):
+            return "newest"
+        
+        async def main():
+            older = asyncio.ensure_future(flights.run("r1", "a", slow))
+            await asyncio.sleep(0.02)
+            return await asyncio.gather(older, flights.run("r1", "b", fast))
+        
+        results = asyncio.run(main())
+        
+        self.assertEqual(results, [("stopped", False), ("newest", False)])
+        self.assertEqual(flights.stats()["superseded"], 1)
+    
+    def test_cancel_token_stops_cp_sat_search(self):
+        # Wachtdiensten erbij en ongelijke streefgetallen: niet binnen de timeout optimaal
+        instance = build_instance(days=14, employees=12)
+        instance["timeout_seconds"] = 30
+        instance["services"] += [Service(id=f"svc-{c.lower()}", code=c, naam=c) for c in ("DIO", "DIA", "DDO", "DDA")]
+        pairs = [(e, s) for e in instance["employees"] for s in instance["services"]]
+        instance["roster_employee_services"] = [
+            RosterEmployeeService(roster_id="r1", employee_id=e.id, service_id=s.id, aantal=(k * 7) % 11)
+            for k, (e, s) in enumerate(pairs)
+        ]
+        instance["exact_staffing"] += [
+            ExactStaffing(date=instance["start_date"] + timedelta(days=d), dagdeel=dagdeel,
+                          service_id=svc_id, team="TOT", aantal=1)
+            for d in range(14)
+            for dagdeel, svc_id in ((Dagdeel.OCHTEND, "svc-dio"), (Dagdeel.AVOND, "svc-dia"),
+                                    (Dagdeel.OCHTEND, "svc-ddo"), (Dagdeel.AVOND, "svc-dda"))
+        ]
+        token = CancelToken()
+        threading.Timer(0.3, token.cancel).start()
+        
+        start = time.time()
+        response = RosterSolver(**instance, cancel_token=token, feasibility_precheck=False).solve()
+        
+        self.assertLess(time.time() - start, 5)
+        self.assertIn(response.status, [SolveStatus.FEASIBLE, SolveStatus.TIMEOUT])
+    
+    def test_cancel_before_start_skips_search(self):
+        token = CancelToken()
+        token.cancel()
+        response = RosterSolver(**build_instance(days=2, employees=2), cancel_token=token).solve()
+        
+        self.assertEqual(response.status, SolveStatus.TIMEOUT)
+
+
+class TestAdmissionControl(unittest.TestCase):
+    """Priority queue and early rejection in front of the solve executor."""
+    
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+    
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+    
+    def test_higher_priority_starts_first(self):
+        scheduler = SolveScheduler(self.executor, workers=1, cost_per_cell=0.0)
+        order = []
+        
+        def job(name):
+            time.sleep(0.02)
+            order.append(name)
+            return name
+        
+        async def main():
+            # Eerste job bezet de worker, de rest wacht in de queue
+            first = asyncio.ensure_future(scheduler.submit("batch", 10, 30, job, "first"))
+            await asyncio.sleep(0)
+            rest = [
+                asyncio.ensure_future(scheduler.submit(priority, 10, 30, job, priority))
+                for priority in ("batch", "full", "interactive")
+            ]
+            return await asyncio.gather(first, *rest)
+        
+        results = asyncio.run(main())
+        
+        self.assertEqual(results, ["first", "batch", "full", "interactive"])
+        self.assertEqual(order, ["first", "interactive", "full", "batch"])
+        stats = scheduler.stats()
+        self.assertEqual(stats["completed"], 4)
+        self.assertEqual(stats["queue_depth"], 0)
+    
+    def test_rejects_when_estimated_wait_exceeds_sla(self):
+        scheduler = SolveScheduler(self.executor, workers=1, cost_per_cell=1.0,
+                                   sla_seconds={"interactive": 5, "full": 60})
+        
+        async def main():
+            # 20 cellen x 1s = 20s geschat werk voor de worker
+            running = asyncio.ensure_future(scheduler.submit("full", 20, 30, time.sleep, 0.05))
+            await asyncio.sleep(0)
+            with self.assertRaises(AdmissionRejected) as rejected:
+                await scheduler.submit("interactive", 1, 30, time.sleep, 0)
+            # Full heeft een ruimer SLA en mag wel wachten
+            await asyncio.gather(running, scheduler.submit("full", 1, 30, time.sleep, 0))
+            return rejected.exception
+        
+        rejection = asyncio.run(main())
+        
+        self.assertGreaterEqual(rejection.retry_after, 19)
+        self.assertEqual(scheduler.stats()["rejected"]["interactive"], 1)
+    
+    def test_rejects_when_queue_full(self):
+        scheduler = SolveScheduler(self.executor, workers=1, queue_size=1, cost_per_cell=0.0)
+        
+        async def main():
+            running = asyncio.ensure_future(scheduler.submit("full", 1, 30, time.sleep, 0.05))
+            queued = asyncio.ensure_future(scheduler.submit("full", 1, 30, time.sleep, 0))
+            await asyncio.sleep(0)
+            depth = scheduler.stats()["queue_depth"]
+            with self.assertRaises(AdmissionRejected):
+                await scheduler.submit("interactive", 1, 30, time.sleep, 0)
+            await asyncio.gather(running, queued)
+            return depth
+        
+        self.assertEqual(asyncio.run(main()), 1)
+    
+    def test_estimate_is_capped_by_timeout_and_learns_rate(self):
+        scheduler = SolveScheduler(self.executor, workers=1, cost_per_cell=1.0)
+        self.assertEqual(scheduler.estimate_seconds(1000, 30), 30.0)
+        
+        asyncio.run(scheduler.submit("full", 1000, 30, time.sleep, 0))
+        
+        self.assertLess(scheduler.stats()["cost_per_cell"], 1.0)
+
+
+class TestModelBudget(unittest.TestCase):
+    """Model size is estimated before the build; oversized requests are degraded."""
+    
+    def request(self, days=28, employees=20):
+        return SolveRequest(**build_instance(days=days, employees=employees))
+    
+    def test_estimate_matches_built_model(self):
+        request = self.request(days=7, employees=6)
+        solver = RosterSolver(**build_instance(days=7, employees=6))
+        solver._build_structure()
+        solver._apply_delta_constraints()
+        
+        estimate = estimate_model_size(request)
+        
+        self.assertEqual(estimate.assignment_variables, solver.free_vars_count)
+        # Bovengrens (maximale symmetrie), maar binnen een factor 2 van het echte model
+        proto = solver.model.Proto()
+        self.assertGreaterEqual(estimate.variables, len(proto.variables))
+        self.assertLess(estimate.variables, 2 * len(proto.variables))
+        self.assertEqual(estimate_model_size(request, days=1).assignment_variables,
+                         estimate.assignment_variables // 7)
+    
+    def test_estimate_bounds_default_path_model(self):
+        # Het model dat main._do_solve bouwt, incl. blokkering volgende dag na DIO/DDO
+        instance = build_instance(days=7, employees=6)
+        instance["services"].append(Service(id="svc-dio", code="DIO", naam="Dienst in ochtend"))
+        instance["roster_employee_services"] += [
+            RosterEmployeeService(roster_id="r1", employee_id=e.id, service_id="svc-dio", aantal=7)
+            for e in instance["employees"]
+        ]
+        request = SolveRequest(**instance)
+        
+        import main
+        solver = main._roster_solver(request)
+        solver._build_structure()
+        solver._apply_delta_constraints()
+        proto = solver.model.Proto()
+        estimate = estimate_model_size(request)
+        
+        self.assertGreaterEqual(estimate.variables, len(proto.variables))
+        self.assertGreaterEqual(estimate.constraints, len(proto.constraints))
+    
+    def test_unqualified_combinations_are_not_variables(self):
+        request = self.request(days=7, employees=4)
+        request.roster_employee_services = [
+            res for res in request.roster_employee_services if res.service_id == "svc-ech"
+        ]
+        
+        estimate = estimate_model_size(request)
+        
+        self.assertEqual(estimate.assignment_variables, 4 * 7 * 3)
+        self.assertEqual(estimate.constants, 4 * 7 * 3)
+    
+    def test_fitting_request_is_unchanged(self):
+        request = self.request()
+        decision = plan_model_budget(request, budget_mb=2048)
+        
+        self.assertEqual(decision.mode, "cpsat")
+        self.assertIs(decision.apply(request), request)
+        self.assertEqual(decision.as_dict()["estimate"]["days"], 28)
+    
+    def test_over_budget_is_decomposed_into_fitting_windows(self):
+        request = self.request()
+        full = estimate_model_size(request)
+        budget = MODEL_BASE_MB + (full.rss_mb - MODEL_BASE_MB) / 3
+        
+        decision = plan_model_budget(request, budget_mb=budget)
+        degraded = decision.apply(request)
+        
+        self.assertEqual(decision.mode, "rolling_horizon")
+        self.assertLessEqual(decision.planned.rss_mb, budget)
+        self.assertEqual(degraded.rolling_horizon.window_days, decision.window_days)
+        self.assertLess(degraded.rolling_horizon.overlap_days, decision.window_days)
+        self.assertIsNone(request.rolling_horizon)
+    
+    def test_requested_window_is_shrunk_when_too_large(self):
+        request = self.request()
+        request.rolling_horizon = RollingHorizonConfig(window_days=14, overlap_days=3)
+        budget = estimate_model_size(request, days=5).rss_mb
+        
+        decision = plan_model_budget(request, budget_mb=budget)
+        
+        self.assertEqual(decision.window_days, 5)
+        self.assertEqual(decision.overlap_days, 3)
+    
+    def test_nothing_fits_falls_back_to_flow(self):
+        request = self.request()
+        decision = plan_model_budget(request, budget_mb=1)
+        
+        self.assertEqual(decision.mode, "min_cost_flow")
+        self.assertEqual(decision.apply(request).engine, "min_cost_flow")
+        self.assertEqual(request.engine, "cpsat")
+    
+    def test_flow_fallback_is_reported_as_violation(self):
+        import main
+        request = self.request(days=3, employees=4)
+        with patch.object(main, "MEMORY_BUDGET_MB", 1):
+            response = main._do_solve(request)
+        
+        self.assertEqual(response.solver_result, "min_cost_flow")
+        warnings = [v for v in response.violations if v.constraint_type == "model_budget"]
+        self.assertEqual(len(warnings), 1)
+        self.assertIn("elastic_staffing", warnings[0].message)
+        self.assertIn("diagnose_infeasibility", warnings[0].message)
+        # Expliciet gevraagde flow is geen degradatie
+        flow = plan_model_budget(request.model_copy(update={"engine": "min_cost_flow"}), budget_mb=1)
+        self.assertEqual(flow.violations(), [])
+
+
+def columnar_body(instance):
+    """build_instance() as ColumnarSolveRequest JSON body (indexes, day offsets, dagdeel chars)."""
+    emp = {e.id: i for i, e in enumerate(instance["employees"])}
+    svc = {s.id: i for i, s in enumerate(instance["services"])}
+    day = lambda d: (d - instance["start_date"]).days
+    res, blocked, staffing = (
+        instance["roster_employee_services"], instance["blocked_slots"], instance["exact_staffing"]
+    )
+    return {
+        "roster_id": instance["roster_id"],
+        "start_date": instance["start_date"].isoformat(),
+        "end_date": instance["end_date"].isoformat(),
+        "employees": [e.model_dump(mode="json") for e in instance["employees"]],
+        "services": [s.model_dump(mode="json") for s in instance["services"]],
+        "roster_employee_services": {
+            "employee": [emp[r.employee_id] for r in res],
+            "service": [svc[r.service_id] for r in res],
+            "aantal": [r.aantal for r in res],
+        },
+        "blocked_slots": {
+            "employee": [emp[b.employee_id] for b in blocked],
+            "day": [day(b.date) for b in blocked],
+            "dagdeel": "".join(b.dagdeel.value for b in blocked),
+            "status": [b.status for b in blocked],
+        },
+        "exact_staffing": {
+            "day": [day(x.date) for x in staffing],
+            "dagdeel": "".join(x.dagdeel.value for x in staffing),
+            "service": [svc[x.service_id] for x in staffing],
+            "team": [("TOT", "GRO", "ORA").index(x.team) for x in staffing],
+            "aantal": [x.exact_aantal for x in staffing],
+        },
+        "timeout_seconds": instance["timeout_seconds"],
+    }
+
+
+class TestColumnarSolveRequest(unittest.TestCase):
+    """Columnar encoding converts to exactly the same SolveRequest."""
+    
+    def setUp(self):
+        self.instance = build_instance(days=7, employees=3)
+        self.instance["blocked_slots"] = [
+            BlockedSlot(employee_id="emp-1", date=self.instance["start_date"] + timedelta(days=2),
+                        dagdeel=Dagdeel.MIDDAG, status=3),
+        ]
+        self.body = columnar_body(self.instance)
+    
+    def test_round_trip_matches_row_request(self):
+        columnar = ColumnarSolveRequest.model_validate(self.body)
+        
+        converted = columnar.to_solve_request()
+        
+        self.assertIs(type(converted), SolveRequest)
+        self.assertEqual(converted.model_dump(), SolveRequest(**self.instance).model_dump())
+    
+    def test_optional_columns_default(self):
+        self.body["blocked_slots"]["blocked_by_service"] = [1]
+        self.body["fixed_assignments"] = {"employee": [0], "day": [6], "dagdeel": "A", "service": [0]}
+        
+        converted = ColumnarSolveRequest.model_validate(self.body).to_solve_request()
+        
+        self.assertEqual(converted.blocked_slots[0].blocked_by_service_id, "svc-spe")
+        self.assertEqual(converted.fixed_assignments[0].date, self.instance["end_date"])
+        self.assertTrue(all(res.actief for res in converted.roster_employee_services))
+    
+    def test_unequal_column_lengths_rejected(self):
+        self.body["exact_staffing"]["aantal"].pop()
+        with self.assertRaisesRegex(ValidationError, "exact_staffing: kolommen niet even lang"):
+            ColumnarSolveRequest.model_validate(self.body)
+    
+    def test_out_of_range_values_rejected(self):
+        for table, column, value in (
+            ("roster_employee_services", "employee", 3),
+            ("blocked_slots", "day", 7),
+            ("blocked_slots", "status", 0),
+            ("exact_staffing", "team", 3),
+        ):
+            body = columnar_body(self.instance)
+            body[table][column][0] = value
+            with self.subTest(column=f"{table}.{column}"):
+                with self.assertRaisesRegex(ValidationError, f"{table}.{column}: waarde buiten bereik"):
+                    ColumnarSolveRequest.model_validate(body)
+    
+    def test_invalid_dagdeel_rejected(self):
+        self.body["blocked_slots"]["dagdeel"] = "X"
+        with self.assertRaisesRegex(ValidationError, "blocked_slots.dagdeel"):
+            ColumnarSolveRequest.model_validate(self.body)
+
+
+class TestDefaultSolvePath(unittest.TestCase):
+    """main._do_solve without rolling horizon runs RosterSolver with the request options."""
+    
+    def setUp(self):
+        import main
+        self.main = main
+        self.instance = build_instance(days=3, employees=2)
+        with_capacity_gap(self.instance)
+        self.instance["timeout_seconds"] = 5
+    
+    def test_elastic_staffing_applied(self):
+        response = self.main._do_solve(SolveRequest(**self.instance, elastic_staffing=True))
+        
+        self.assertEqual(response.solver_result, "cpsat")
+        self.assertIn(response.status, [SolveStatus.OPTIMAL, SolveStatus.FEASIBLE])
+        self.assertEqual(response.solver_metadata["staffing_slack"]["total_shortage"], 1)
+    
+    def test_diagnosis_and_precheck_applied(self):
+        response = self.main._do_solve(SolveRequest(**self.instance, diagnose_infeasibility=True))
+        
+        self.assertEqual(response.status, SolveStatus.INFEASIBLE)
+        self.assertIsNotNone(response.solver_metadata.get("feasibility_precheck"))
+        self.assertIsNotNone(response.bottleneck_report)
+    
+    def test_repeated_solve_reuses_skeleton(self):
+        first = self.main._do_solve(SolveRequest(**self.instance, elastic_staffing=True))
+        self.instance["blocked_slots"] = [
+            BlockedSlot(employee_id="emp-0", date=self.instance["end_date"], dagdeel=Dagdeel.AVOND, status=3)
+        ]
+        second = self.main._do_solve(SolveRequest(**self.instance, elastic_staffing=True))
+        
+        self.assertIn(first.solver_metadata["model_skeleton"], ["hit", "miss"])
+        self.assertEqual(second.solver_metadata["model_skeleton"], "hit")
+        self.assertNotIn(
+            ("emp-0", self.instance["end_date"], Dagdeel.AVOND),
+            {(a.employee_id, a.date, a.dagdeel) for a in second.assignments}
+        )
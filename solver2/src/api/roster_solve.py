@@ -25,6 +25,9 @@ except ImportError:
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from solvers.greedy_engine import GreedyPlanner, SolveResult
+# Same module instances greedy_engine uses (solvers/ is on sys.path after its import)
+from roster_cache import get_roster_cache
+from db_client import db_phase, get_client, get_request_counts
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/roster", tags=["roster"])
@@ -45,7 +48,7 @@ class SolveResponse(BaseModel):
     solver_run_id: Optional[str] = None
 
 def get_db_client() -> Optional[Client]:
-    """Get Supabase client"""
+    """Get the shared pooled Supabase client"""
     try:
         url = os.getenv('SUPABASE_URL')
         key = os.getenv('SUPABASE_KEY')
@@ -54,7 +57,7 @@ def get_db_client() -> Optional[Client]:
             logger.error("SUPABASE_URL or SUPABASE_KEY not configured")
             return None
         
-        return create_client(url, key)
+        return get_client()
     except Exception as e:
         logger.error(f"Failed to create database client: {e}")
         return None
@@ -105,7 +108,8 @@ async def solve_roster(request: SolveRequest, background_tasks: BackgroundTasks
         
         # Run solve
         logger.info("  ⚙️  Solving roster...")
-        result: SolveResult = planner.solve()
+        with db_phase('solve'):
+            result: SolveResult = planner.solve()
         
         # Update solver_run record
         update_solver_run_record(
@@ -252,7 +256,9 @@ async def health_check():
         "status": "ok",
         "service": "GREEDY Solver v0.1",
         "draad": "184",
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow().isoformat(),
+        "cache": get_roster_cache().stats(),
+        "db_requests": get_request_counts()
     }
 
 
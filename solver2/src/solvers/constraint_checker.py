@@ -4,16 +4,22 @@ DRAAD 181 Implementation - All 6 Hard Constraints
 """
 
 import logging
+import os
+import sys
 from typing import Dict, List, Optional, Tuple
 from datetime import date
 from dataclasses import dataclass
 from enum import Enum
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
 try:
     from supabase import Client
 except ImportError:
     Client = None
 
+from roster_cache import RosterCache, get_roster_cache
+
 logger = logging.getLogger(__name__)
 
 class ConstraintType(Enum):
@@ -47,15 +53,13 @@ class HardConstraintChecker:
     HC6: Coverage - Attempt to meet minimum staffing
     """
     
-    def __init__(self, db: Optional[Client], roster_id: str):
+    def __init__(self, db: Optional[Client], roster_id: str, cache: Optional[RosterCache] = None):
         self.db = db
         self.roster_id = roster_id
         self.logger = logging.getLogger(f"ConstraintChecker:{roster_id[:8]}")
         
-        # Cache for performance
-        self.capability_cache: Dict[Tuple[str, str], bool] = {}
-        self.blackout_cache: Dict[Tuple[str, date], bool] = {}
-        self.max_per_service_cache: Dict[Tuple[str, str], int] = {}
+        # Bounded, roster-scoped cache shared across solves
+        self.cache = cache if cache is not None else get_roster_cache()
     
     def check_HC1_capability(
         self, 
@@ -70,10 +74,10 @@ class HardConstraintChecker:
         
         Returns: (passed: bool, reason: str | None)
         """
-        cache_key = (employee_id, service_id)
+        cache_key = ('hc1', employee_id, service_id)
         
-        if cache_key in self.capability_cache:
-            passed = self.capability_cache[cache_key]
+        passed = self.cache.get(self.roster_id, cache_key)
+        if passed is not None:
             return passed, None if passed else "Not in capability cache"
         
         try:
@@ -88,7 +92,7 @@ class HardConstraintChecker:
             ).execute()
             
             passed = len(response.data) > 0
-            self.capability_cache[cache_key] = passed
+            self.cache.set(self.roster_id, cache_key, passed)
             
             return passed, None if passed else f"Employee {employee_id} not capable for service {service_id}"
         
@@ -128,10 +132,10 @@ class HardConstraintChecker:
         
         Returns: (passed: bool, reason: str | None)
         """
-        cache_key = (employee_id, date_)
+        cache_key = ('hc3', employee_id, date_)
         
-        if cache_key in self.blackout_cache:
-            is_available = self.blackout_cache[cache_key]
+        is_available = self.cache.get(self.roster_id, cache_key)
+        if is_available is not None:
             return is_available, None if is_available else f"Employee unavailable on {date_}"
         
         try:
@@ -148,7 +152,7 @@ class HardConstraintChecker:
                 unavail_data = response.data[0].get('unavailability_data', {})
                 is_available = str(date_) not in unavail_data.get('dates', [])
             
-            self.blackout_cache[cache_key] = is_available
+            self.cache.set(self.roster_id, cache_key, is_available)
             return is_available, None if is_available else f"Employee blackout on {date_}"
         
         except Exception as e:
@@ -186,9 +190,10 @@ class HardConstraintChecker:
         
         Returns: (passed: bool, reason: str | None)
         """
-        cache_key = (employee_id, service_id)
+        cache_key = ('hc5', employee_id, service_id)
         
-        if cache_key not in self.max_per_service_cache:
+        max_count = self.cache.get(self.roster_id, cache_key)
+        if max_count is None:
             try:
                 if not self.db:
                     self.logger.warning("HC5: No database client")
@@ -202,13 +207,12 @@ class HardConstraintChecker:
                 if response.data:
                     max_count = response.data[0].get('aantal', 0)
                 
-                self.max_per_service_cache[cache_key] = max_count
+                self.cache.set(self.roster_id, cache_key, max_count)
             
             except Exception as e:
                 self.logger.error(f"HC5 check error: {e}")
                 return False, f"HC5 check failed: {str(e)}"
         
-        max_count = self.max_per_service_cache[cache_key]
         if current_count >= max_count:
             return False, f"Employee {employee_id} already has {current_count} of service {service_id} (max {max_count})"
         
@@ -326,11 +330,9 @@ class HardConstraintChecker:
         return valid, violations
     
     def clear_caches(self):
-        """Clear all caches (use if roster data changes)"""
-        self.capability_cache.clear()
-        self.blackout_cache.clear()
-        self.max_per_service_cache.clear()
-        self.logger.info("All constraint checker caches cleared")
+        """Clear this roster's cache entries (use if roster data changes)"""
+        dropped = self.cache.invalidate_roster(self.roster_id)
+        self.logger.info(f"Constraint checker cache cleared ({dropped} entries)")
 
 
 def main():
@@ -21,6 +21,9 @@ try:
 except ImportError:
     Client = None
 
+from roster_cache import RosterCache, get_roster_cache
+from db_client import get_client
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(
     level=logging.INFO,
@@ -85,10 +88,11 @@ class GreedyPlanner:
     Implements 6 HARD constraints from DRAAD 181
     """
     
-    def __init__(self, roster_id: str, supabase_client: Optional[Client] = None):
+    def __init__(self, roster_id: str, supabase_client: Optional[Client] = None,
+                 cache: Optional[RosterCache] = None):
         self.roster_id = roster_id
-        self.db = supabase_client or self._get_db_client()
         self.logger = logging.getLogger(f"GreedyPlanner:{roster_id[:8]}")
+        self.db = supabase_client or self._get_db_client()
         
         # State during solve
         self.assignments: List[Assignment] = []
@@ -97,9 +101,8 @@ class GreedyPlanner:
         self.employee_shift_count: Dict[str, int] = {}
         self.employee_service_count: Dict[Tuple[str, str], int] = {}
         
-        # Cache for performance
-        self.capability_cache: Dict[Tuple[str, str], bool] = {}
-        self.blackout_cache: Dict[Tuple[str, date], bool] = {}
+        # Bounded, roster-scoped cache shared across solves
+        self.cache = cache if cache is not None else get_roster_cache()
         
     def solve(self) -> SolveResult:
         """Main solve method - orchestrates all phases"""
@@ -291,10 +294,11 @@ class GreedyPlanner:
     
     def _check_capable(self, employee_id: str, service_id: str) -> bool:
         """HC1: Is employee capable for this service?"""
-        cache_key = (employee_id, service_id)
+        cache_key = ('hc1', employee_id, service_id)
         
-        if cache_key in self.capability_cache:
-            return self.capability_cache[cache_key]
+        cached = self.cache.get(self.roster_id, cache_key)
+        if cached is not None:
+            return cached
         
         try:
             if not self.db:
@@ -308,7 +312,7 @@ class GreedyPlanner:
             ).execute()
             
             result = len(response.data) > 0
-            self.capability_cache[cache_key] = result
+            self.cache.set(self.roster_id, cache_key, result)
             return result
         except Exception as e:
             self.logger.warning(f"HC1 check failed for {employee_id}: {e}")
@@ -325,10 +329,11 @@ class GreedyPlanner:
     
     def _check_blackout(self, employee_id: str, date: date) -> bool:
         """HC3: Is this a blackout date for employee?"""
-        cache_key = (employee_id, date)
+        cache_key = ('hc3_unavailable', employee_id, date)
         
-        if cache_key in self.blackout_cache:
-            return self.blackout_cache[cache_key]
+        cached = self.cache.get(self.roster_id, cache_key)
+        if cached is not None:
+            return cached
         
         try:
             if not self.db:
@@ -340,13 +345,13 @@ class GreedyPlanner:
             ).eq('employee_id', employee_id).execute()
             
             if not response.data:
-                self.blackout_cache[cache_key] = False
+                self.cache.set(self.roster_id, cache_key, False)
                 return False
             
             unavail_data = response.data[0].get('unavailability_data', {})
             is_unavailable = str(date) in unavail_data.get('dates', [])
             
-            self.blackout_cache[cache_key] = is_unavailable
+            self.cache.set(self.roster_id, cache_key, is_unavailable)
             return is_unavailable
         except Exception as e:
             self.logger.warning(f"HC3 check failed for {employee_id}: {e}")
@@ -363,15 +368,22 @@ class GreedyPlanner:
             if not self.db:
                 return False
             
-            # Query: roster_employee_services for max_count
-            response = self.db.table('roster_employee_services').select('aantal').eq(
-                'roster_id', self.roster_id
-            ).eq('employee_id', employee_id).eq('service_id', service_id).execute()
+            # Own key: ConstraintChecker caches ('hc5', ...) with 0 for "no row"
+            cache_key = ('hc5_limit', employee_id, service_id)
+            max_count = self.cache.get(self.roster_id, cache_key)
+            if max_count is None:
+                # Query: roster_employee_services for max_count
+                response = self.db.table('roster_employee_services').select('aantal').eq(
+                    'roster_id', self.roster_id
+                ).eq('employee_id', employee_id).eq('service_id', service_id).execute()
+                
+                # -1 marks "no row": no limit applies
+                max_count = response.data[0].get('aantal', 0) if response.data else -1
+                self.cache.set(self.roster_id, cache_key, max_count)
             
-            if not response.data:
+            if max_count < 0:
                 return False
             
-            max_count = response.data[0].get('aantal', 0)
             current = self.employee_service_count.get((employee_id, service_id), 0)
             return current >= max_count
         except Exception as e:
@@ -462,9 +474,12 @@ class GreedyPlanner:
             self.logger.info(f"✅ Inserted {len(response.data)} assignments")
         except Exception as e:
             self.logger.error(f"Failed to save assignments: {e}")
+        finally:
+            # Roster was (possibly partially) written: drop its cached lookups
+            self.cache.invalidate_roster(self.roster_id)
     
     def _get_db_client(self) -> Optional[Client]:
-        """Get Supabase client"""
+        """Get the shared pooled Supabase client"""
         try:
             url = os.getenv('SUPABASE_URL')
             key = os.getenv('SUPABASE_KEY')
@@ -473,7 +488,7 @@ class GreedyPlanner:
                 self.logger.warning("SUPABASE_URL or SUPABASE_KEY not set")
                 return None
             
-            return create_client(url, key)
+            return get_client()
         except Exception as e:
             self.logger.error(f"Failed to create Supabase client: {e}")
             return None
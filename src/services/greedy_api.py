@@ -22,6 +22,8 @@ DRAAD-FIX Changes:
 
 import os
 import sys
+import asyncio
+import hashlib
 import logging
 import json
 from datetime import datetime
@@ -40,6 +42,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from solver.greedy_engine import GreedyEngine
 from solver.constraint_checker import ConstraintChecker
+from solver.roster_cache import get_roster_cache
+from services.single_flight import SingleFlight
 
 # ============================================================================
 # LOGGING SETUP
@@ -117,6 +121,11 @@ app = FastAPI(
 )
 
 
+# Concurrent solves of one roster: identical requests share one run, others
+# wait so two runs never write the same roster at once
+SOLVE_FLIGHTS = SingleFlight()
+
+
 # ============================================================================
 # MIDDLEWARE & STARTUP
 # ============================================================================
@@ -183,12 +192,33 @@ async def solve_greedy(request: SolveRequest) -> SolveResponse:
     
     DRAAD-FIX: Now includes per-service coverage and bezetting detail
     
+    The run happens in a worker thread. A request identical to the running
+    one for the same roster receives that run's response; the GREEDY engine
+    has no stop hook, so under latest_wins the older response is only
+    marked as superseded.
+    
     Args:
         request: SolveRequest with roster_id and parameters
         
     Returns:
         SolveResponse with assignments and metrics
     """
+    fingerprint = hashlib.sha256(request.model_dump_json().encode("utf-8")).hexdigest()
+    
+    async def start(token) -> SolveResponse:
+        response = await asyncio.to_thread(_solve_greedy, request)
+        if token.cancelled:
+            response.metadata["superseded"] = True
+        return response
+    
+    response, shared = await SOLVE_FLIGHTS.run(request.roster_id, fingerprint, start)
+    if shared:
+        response = response.model_copy(update={"metadata": {**response.metadata, "coalesced": True}})
+    return response
+
+
+def _solve_greedy(request: SolveRequest) -> SolveResponse:
+    """Run one GREEDY solve (blocking, called from a worker thread)"""
     logger.info(f"📋 Processing solve request for roster: {request.roster_id}")
     
     # Generate cache-busting timestamp
@@ -213,10 +243,15 @@ async def solve_greedy(request: SolveRequest) -> SolveResponse:
         
         # Run solve
         logger.info("⚡ Running GREEDY algorithm...")
-        result = engine.solve(
-            prefer_balanced_workload=request.prefer_balanced_workload,
-            min_coverage_target=request.min_coverage_target,
-        )
+        try:
+            result = engine.solve(
+                prefer_balanced_workload=request.prefer_balanced_workload,
+                min_coverage_target=request.min_coverage_target,
+            )
+        finally:
+            # The engine writes the roster (also partially on failure):
+            # cached constraint data for it is stale from here on
+            get_roster_cache().invalidate_roster(request.roster_id)
         
         if not result['success']:
             logger.warning(f"⚠️ GREEDY solve incomplete: {result.get('error_message', 'Unknown error')}")
@@ -315,6 +350,8 @@ async def root():
         "version": "1.0.0-DRAAD-FIX",
         "status": "operational",
         "cache_bust_trigger": CACHE_BUST_TRIGGER,
+        "single_flight": SOLVE_FLIGHTS.stats(),
+        "roster_cache": get_roster_cache().stats(),
         "endpoints": {
             "health": "/health",
             "solve": "/api/greedy/solve",
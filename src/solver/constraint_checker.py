@@ -10,35 +10,144 @@ Constraints:
   HC5: Don't exceed max for specific service per employee
   HC6: Team-aware assignment logic
 
+Batch API: check_candidates() evaluates one slot for a whole candidate
+pool against bulk-prefetched capability, blackout and limit tables plus
+an OccupancyIndex, without per-candidate database round trips.
+
 Author: DRAAD 185-2 Implementation
 Date: 2025-12-15
 """
 
 import logging
-from typing import Dict, List, Set, Tuple, Optional
+from typing import Dict, Iterable, List, Sequence, Set, Tuple, Optional, Union
 from datetime import date
 
+from .roster_cache import RosterCache, get_roster_cache
+
 logger = logging.getLogger(__name__)
 
+# PostgREST returns at most this many rows per request (max-rows)
+PAGE_SIZE = 1000
+
+
+class OccupancyIndex:
+    """Set of occupied (employee_id, date, dagdeel) slots for O(1) HC2 checks."""
+
+    def __init__(self, assignments: Iterable = ()):
+        """Build index from assignment dicts with employee_id/date/dagdeel keys."""
+        self.slots: Set[Tuple[str, str, str]] = set()
+        for a in assignments:
+            self.add(a.get('employee_id'), a.get('date'), a.get('dagdeel'))
+
+    def add(self, emp_id: str, date_str: str, dagdeel: str) -> None:
+        """Mark a slot as occupied (call when an assignment is made)."""
+        self.slots.add((emp_id, date_str, dagdeel))
+
+    def discard(self, emp_id: str, date_str: str, dagdeel: str) -> None:
+        """Free a slot (call when an assignment is removed)."""
+        self.slots.discard((emp_id, date_str, dagdeel))
+
+    def is_occupied(self, emp_id: str, date_str: str, dagdeel: str) -> bool:
+        return (emp_id, date_str, dagdeel) in self.slots
+
 
 class HardConstraintChecker:
     """Validates hard constraints for roster assignments."""
 
-    def __init__(self, supabase_client):
+    def __init__(self, supabase_client, cache: Optional[RosterCache] = None,
+                 page_size: int = PAGE_SIZE):
         """Initialize constraint checker with Supabase client.
         
         Args:
             supabase_client: Supabase client for database queries
+            cache: Roster-scoped cache (defaults to the process-wide cache)
+            page_size: Rows per request for bulk reads (PostgREST max-rows)
         """
         self.db = supabase_client
+        self.page_size = page_size
         
-        # Performance optimization: caching
-        self.capabilities_cache: Dict[str, bool] = {}  # f"{emp_id}_{svc_id}": bool
-        self.blackout_cache: Dict[str, bool] = {}      # f"{emp_id}_{date}": bool
-        self.service_limits_cache: Dict[str, int] = {} # f"{emp_id}_{svc_id}": max_aantal
+        # Performance optimization: bounded, roster-scoped caching.
+        # Keys: ('hc1', emp, svc), ('hc3', emp, date), ('hc5', emp, svc),
+        # ('prefetch',) -> (capabilities, service limits, blackouts)
+        self.cache = cache if cache is not None else get_roster_cache()
+        # Rosters this checker has cached entries for (see clear_cache)
+        self._rosters: Set[str] = set()
         
         logger.info("HardConstraintChecker initialized with caching")
 
+    def prefetch_roster(self, roster_id: str) -> bool:
+        """Bulk-load HC1/HC3/HC5 data for a roster in two paged reads.
+        
+        After a successful prefetch, HC1, HC3 and HC5 for this roster are
+        answered from memory; a miss means "not capable" / "available" /
+        "no limit" instead of triggering a per-candidate query.
+        
+        Args:
+            roster_id: Roster ID
+            
+        Returns:
+            True if prefetched, False on error (per-call queries remain in use)
+        """
+        try:
+            services = self._fetch_all(
+                lambda: self.db.table('roster_employee_services')
+                .select('id, employee_id, service_id, aantal, actief')
+                .eq('roster_id', roster_id)
+            )
+            blackouts = self._fetch_all(
+                lambda: self.db.table('roster_assignments')
+                .select('id, employee_id, date')
+                .eq('roster_id', roster_id)
+                .eq('status', 3)
+            )
+        except Exception as e:
+            logger.error(f"Prefetch error for roster {roster_id}: {e}")
+            return False
+        
+        capabilities: Set[Tuple[str, str]] = set()
+        limits: Dict[Tuple[str, str], int] = {}
+        for row in services:
+            key = (row.get('employee_id'), row.get('service_id'))
+            if row.get('actief'):
+                capabilities.add(key)
+            limits.setdefault(key, row.get('aantal', 999))
+        
+        blackout_set = {
+            (row.get('employee_id'), row.get('date')) for row in blackouts
+        }
+        self._cache_set(roster_id, ('prefetch',), (capabilities, limits, blackout_set))
+        
+        logger.info(
+            f"Prefetched roster {roster_id}: {len(capabilities)} capabilities, "
+            f"{len(limits)} service limits, {len(blackout_set)} blackouts"
+        )
+        return True
+
+    def _cache_set(self, roster_id: str, key: Tuple, value) -> None:
+        self._rosters.add(roster_id)
+        self.cache.set(roster_id, key, value)
+
+    def _fetch_all(self, build_query) -> List[Dict]:
+        """Fetch every row of a query, paging on the primary key.
+        
+        A single execute() is silently truncated at PostgREST's max-rows.
+        """
+        rows: List[Dict] = []
+        offset = 0
+        while True:
+            result = build_query().order('id').range(offset, offset + self.page_size - 1).execute()
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < self.page_size:
+                return rows
+            offset += self.page_size
+
+    def _prefetched(self, roster_id: str) -> Optional[Tuple[Set, Dict, Set]]:
+        return self.cache.get(roster_id, ('prefetch',))
+
+    def is_prefetched(self, roster_id: str) -> bool:
+        return self._prefetched(roster_id) is not None
+
     def check_HC1_capability(self, emp_id: str, svc_id: str, roster_id: str) -> bool:
         """HC1: Employee capable for service?
         
@@ -52,11 +161,16 @@ class HardConstraintChecker:
         Returns:
             True if employee can do service, False otherwise
         """
-        cache_key = f"{emp_id}_{svc_id}_{roster_id}"
+        prefetched = self._prefetched(roster_id)
+        if prefetched is not None:
+            return (emp_id, svc_id) in prefetched[0]
+        
+        cache_key = ('hc1', emp_id, svc_id)
         
         # Check cache first
-        if cache_key in self.capabilities_cache:
-            return self.capabilities_cache[cache_key]
+        cached = self.cache.get(roster_id, cache_key)
+        if cached is not None:
+            return cached
         
         try:
             # Query roster_employee_services
@@ -70,7 +184,7 @@ class HardConstraintChecker:
             result = len(response.data) > 0
             
             # Cache result
-            self.capabilities_cache[cache_key] = result
+            self._cache_set(roster_id, cache_key, result)
             
             if not result:
                 logger.debug(f"HC1 FAIL: {emp_id} not capable for {svc_id}")
@@ -82,7 +196,7 @@ class HardConstraintChecker:
             return False
 
     def check_HC2_no_overlap(self, emp_id: str, date_str: str, dagdeel: str,
-                            existing_assignments: List) -> bool:
+                            existing_assignments: Union[List, OccupancyIndex]) -> bool:
         """HC2: No overlapping shifts?
         
         Checks if employee already has assignment on same date/dagdeel.
@@ -91,18 +205,21 @@ class HardConstraintChecker:
             emp_id: Employee ID
             date_str: Date string (YYYY-MM-DD)
             dagdeel: Dagdeel (O, M, A)
-            existing_assignments: List of current assignments
+            existing_assignments: List of current assignments or an OccupancyIndex
             
         Returns:
             True if no overlap, False if overlap exists
         """
-        # Check existing assignments in memory
-        has_overlap = any(
-            a.get('employee_id') == emp_id and 
-            a.get('date') == date_str and 
-            a.get('dagdeel') == dagdeel
-            for a in existing_assignments
-        )
+        if isinstance(existing_assignments, OccupancyIndex):
+            has_overlap = existing_assignments.is_occupied(emp_id, date_str, dagdeel)
+        else:
+            # Check existing assignments in memory
+            has_overlap = any(
+                a.get('employee_id') == emp_id and 
+                a.get('date') == date_str and 
+                a.get('dagdeel') == dagdeel
+                for a in existing_assignments
+            )
         
         if has_overlap:
             logger.debug(f"HC2 FAIL: {emp_id} already assigned on {date_str} {dagdeel}")
@@ -123,11 +240,16 @@ class HardConstraintChecker:
         Returns:
             True if available, False if blackout
         """
-        cache_key = f"{emp_id}_{date_str}_{roster_id}"
+        prefetched = self._prefetched(roster_id)
+        if prefetched is not None:
+            return (emp_id, date_str) not in prefetched[2]
+        
+        cache_key = ('hc3', emp_id, date_str)
         
         # Check cache
-        if cache_key in self.blackout_cache:
-            return self.blackout_cache[cache_key]
+        cached = self.cache.get(roster_id, cache_key)
+        if cached is not None:
+            return cached
         
         try:
             # Query for blackout (status=3 means unavailable)
@@ -142,7 +264,7 @@ class HardConstraintChecker:
             is_available = len(response.data) == 0
             
             # Cache result
-            self.blackout_cache[cache_key] = is_available
+            self._cache_set(roster_id, cache_key, is_available)
             
             if not is_available:
                 logger.debug(f"HC3 FAIL: {emp_id} blackout on {date_str}")
@@ -190,10 +312,16 @@ class HardConstraintChecker:
         Returns:
             True if under limit, False if would exceed
         """
-        cache_key = f"{emp_id}_{svc_id}_{roster_id}"
+        prefetched = self._prefetched(roster_id)
+        if prefetched is not None:
+            max_allowed = prefetched[1].get((emp_id, svc_id), 999)  # No limit if not specified
+            return (current_count + 1) <= max_allowed
+        
+        cache_key = ('hc5', emp_id, svc_id)
         
         # Get max from cache or database
-        if cache_key not in self.service_limits_cache:
+        max_allowed = self.cache.get(roster_id, cache_key)
+        if max_allowed is None:
             try:
                 response = self.db.table('roster_employee_services').select('aantal').match({
                     'roster_id': roster_id,
@@ -206,13 +334,12 @@ class HardConstraintChecker:
                 else:
                     max_allowed = 999  # No limit if not specified
                 
-                self.service_limits_cache[cache_key] = max_allowed
+                self._cache_set(roster_id, cache_key, max_allowed)
                 
             except Exception as e:
                 logger.error(f"HC5 check error: {e}")
                 return True  # Assume OK on error
         
-        max_allowed = self.service_limits_cache[cache_key]
         would_exceed = (current_count + 1) > max_allowed
         
         if would_exceed:
@@ -307,9 +434,120 @@ class HardConstraintChecker:
         # All passed
         return (True, "")
 
+    def check_candidates(self, date_str: str, dagdeel: str, svc_id: str,
+                         svc_team: str, roster_id: str,
+                         emp_ids: Sequence[str], emp_teams: Sequence[str],
+                         shift_counts: Sequence[int], targets: Sequence[int],
+                         service_counts: Sequence[int],
+                         occupancy: Union[List, OccupancyIndex]) -> Tuple[List[bool], List[str]]:
+        """Check HC1-HC6 for one slot against a whole candidate pool.
+        
+        Candidates are given as parallel sequences (one entry per employee).
+        The roster is prefetched on first use, so no per-candidate queries
+        are made.
+        
+        Args:
+            date_str: Date (YYYY-MM-DD)
+            dagdeel: Dagdeel (O, M, A)
+            svc_id: Service ID
+            svc_team: Service team
+            roster_id: Roster ID
+            emp_ids: Candidate employee IDs
+            emp_teams: Team per candidate
+            shift_counts: Current total shifts per candidate
+            targets: Max shifts target per candidate
+            service_counts: Current count for this service per candidate
+            occupancy: OccupancyIndex (or assignments list, indexed once)
+            
+        Returns:
+            Tuple of (pass mask, first failing constraint per candidate or "")
+        """
+        if not self.is_prefetched(roster_id):
+            self.prefetch_roster(roster_id)
+        if not isinstance(occupancy, OccupancyIndex):
+            occupancy = OccupancyIndex(occupancy)
+        
+        n = len(emp_ids)
+        if not (len(emp_teams) == len(shift_counts) == len(targets) == len(service_counts) == n):
+            raise ValueError("check_candidates: candidate sequences must have equal length")
+        
+        capabilities, limits, blackouts = self._prefetched(roster_id) or (None, None, None)
+        occupied = occupancy.slots
+        team_ok: Dict[Optional[str], bool] = {}
+        
+        mask: List[bool] = [False] * n
+        failures: List[str] = [""] * n
+        
+        for i, emp_id in enumerate(emp_ids):
+            # HC1: Capability
+            if capabilities is not None:
+                capable = (emp_id, svc_id) in capabilities
+            else:
+                capable = self.check_HC1_capability(emp_id, svc_id, roster_id)
+            if not capable:
+                failures[i] = "HC1_CAPABILITY"
+                continue
+            
+            # HC2: No overlap
+            if (emp_id, date_str, dagdeel) in occupied:
+                failures[i] = "HC2_OVERLAP"
+                continue
+            
+            # HC3: Blackout
+            if blackouts is not None:
+                available = (emp_id, date_str) not in blackouts
+            else:
+                available = self.check_HC3_blackout(emp_id, date_str, roster_id)
+            if not available:
+                failures[i] = "HC3_BLACKOUT"
+                continue
+            
+            # HC4: Max per employee
+            if shift_counts[i] + 1 > targets[i]:
+                failures[i] = "HC4_MAX_EMPLOYEE"
+                continue
+            
+            # HC5: Max per service
+            if limits is not None:
+                under_limit = service_counts[i] + 1 <= limits.get((emp_id, svc_id), 999)
+            else:
+                under_limit = self.check_HC5_max_per_service(emp_id, svc_id, roster_id, service_counts[i])
+            if not under_limit:
+                failures[i] = "HC5_MAX_SERVICE"
+                continue
+            
+            # HC6: Team logic (depends only on the team pair)
+            emp_team = emp_teams[i]
+            if emp_team not in team_ok:
+                team_ok[emp_team] = self.check_HC6_team_logic(svc_team, emp_team)
+            if not team_ok[emp_team]:
+                failures[i] = "HC6_TEAM_LOGIC"
+                continue
+            
+            mask[i] = True
+        
+        logger.debug(
+            f"Batch check {date_str} {dagdeel} {svc_id}: "
+            f"{sum(mask)}/{n} candidates passed"
+        )
+        return mask, failures
+
+    def invalidate_roster(self, roster_id: str) -> None:
+        """Drop cached data for a roster (call after the roster is written)."""
+        dropped = self.cache.invalidate_roster(roster_id)
+        logger.info(f"Invalidated {dropped} cache entries for roster {roster_id}")
+
+    def cache_stats(self) -> Dict:
+        """Hit/miss/eviction counters of the underlying cache."""
+        return self.cache.stats()
+
     def clear_cache(self) -> None:
-        """Clear all caches (useful between solve runs)."""
-        self.capabilities_cache.clear()
-        self.blackout_cache.clear()
-        self.service_limits_cache.clear()
-        logger.info("All constraint caches cleared")
+        """Drop cached data of the rosters this checker has seen (between solve runs).
+        
+        The cache is shared by the whole process, so other rosters' entries
+        are left alone.
+        """
+        for roster_id in self._rosters:
+            self.cache.invalidate_roster(roster_id)
+        logger.info(f"Constraint caches cleared for {len(self._rosters)} roster(s)")
+        self._rosters.clear()
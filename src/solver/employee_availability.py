@@ -161,6 +161,37 @@ class EmployeeAvailabilityTracker:
         block_key = (assignment_date, dagdeel)
         return block_key not in self.blocked[employee_id]
     
+    def load_occupied_slots(self, roster_id: str) -> List[Dict]:
+        """
+        Load all slots that already hold an assignment (Status 0/1) in one
+        query, as rows for an OccupancyIndex. Replaces a per-candidate
+        is_exclusive_slot_free() query when the caller tracks occupancy.
+        
+        Args:
+            roster_id: The roster UUID
+            
+        Returns:
+            List of {employee_id, date (YYYY-MM-DD), dagdeel} dicts
+        """
+        sql = """
+          SELECT DISTINCT
+            ra.employee_id,
+            ra.date,
+            ra.dagdeel
+          FROM roster_assignments ra
+          JOIN roster_periods rp ON ra.roster_period_id = rp.id
+          WHERE rp.roster_id = %s
+          AND ra.status IN (0, 1)
+        """
+        
+        rows = self.db.execute(sql, [roster_id]).fetchall()
+        
+        logger.info(f"[AVAIL] Loaded {len(rows)} occupied slots")
+        return [
+            {'employee_id': row['employee_id'], 'date': str(row['date']), 'dagdeel': row['dagdeel']}
+            for row in rows
+        ]
+    
     def is_exclusive_slot_free(self, employee_id: str,
                                assignment_date: date,
                                dagdeel: str,
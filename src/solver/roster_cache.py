@@ -0,0 +1,147 @@
+"""
+Bounded, roster-scoped cache for constraint lookups
+
+Entries are keyed by (roster_id, key tuple) and kept in a single LRU with
+a global size bound and a TTL, so memory stays flat in a long-running
+process. Writing a roster must call invalidate_roster(roster_id).
+
+This module is kept byte-identical in src/solver/roster_cache.py (greedy
+API) and solver2/src/solvers/roster_cache.py (solver2): the two are
+deployed separately and share no package. Change both;
+tests/test_greedy_api_single_flight.py fails when they differ.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = int(os.getenv('ROSTER_CACHE_MAX_ENTRIES', '50000'))
+DEFAULT_TTL_SECONDS = float(os.getenv('ROSTER_CACHE_TTL_SECONDS', '300'))
+
+_MISSING = object()
+
+
+class RosterCache:
+    """Thread-safe LRU + TTL cache with per-roster namespaces and counters"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, Tuple], Tuple[float, Any]]" = OrderedDict()
+        self._roster_keys: Dict[str, Set[Tuple]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, roster_id: str, key: Tuple[Hashable, ...], default: Any = None) -> Any:
+        """Return cached value or default (counts hit/miss, drops expired)"""
+        entry_key = (roster_id, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                self._remove(entry_key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(entry_key)
+            self.hits += 1
+            return value
+
+    def set(self, roster_id: str, key: Tuple[Hashable, ...], value: Any) -> None:
+        """Store value, evicting least recently used entries beyond the bound"""
+        entry_key = (roster_id, key)
+        with self._lock:
+            self._entries[entry_key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(entry_key)
+            self._roster_keys.setdefault(roster_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def get_or_load(self, roster_id: str, key: Tuple[Hashable, ...],
+                    loader: Callable[[], Any]) -> Any:
+        """Return cached value, calling loader() and caching its result on miss"""
+        value = self.get(roster_id, key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(roster_id, key, value)
+        return value
+
+    def invalidate_roster(self, roster_id: str) -> int:
+        """Drop all entries for a roster (call after the roster is written)"""
+        with self._lock:
+            keys = self._roster_keys.pop(roster_id, set())
+            for key in keys:
+                self._entries.pop((roster_id, key), None)
+            if keys:
+                self.invalidations += 1
+            return len(keys)
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._roster_keys.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the service's health/metrics output"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'rosters': len(self._roster_keys),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+    def _remove(self, entry_key: Tuple[str, Tuple]) -> None:
+        roster_id, key = entry_key
+        self._entries.pop(entry_key, None)
+        keys = self._roster_keys.get(roster_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._roster_keys[roster_id]
+
+
+_shared_cache: Optional[RosterCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_roster_cache() -> RosterCache:
+    """Process-wide cache shared by checkers and planners"""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = RosterCache()
+                logger.info(
+                    f"RosterCache initialized (max_entries={_shared_cache.max_entries}, "
+                    f"ttl={_shared_cache.ttl_seconds}s)"
+                )
+    return _shared_cache
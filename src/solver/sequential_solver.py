@@ -10,6 +10,7 @@ import logging
 
 from .requirement_queue import Requirement, RequirementQueue
 from .employee_availability import EmployeeAvailabilityTracker
+from .constraint_checker import HardConstraintChecker, OccupancyIndex
 
 logger = logging.getLogger(__name__)
 
@@ -42,10 +43,15 @@ class SequentialSolver:
     - Only Status 0 slots are filled
     - No employee gets >1 assignment per date/dagdeel
     - All constraints respected
+    
+    With a HardConstraintChecker, step 2b is one check_candidates() call
+    per requirement against prefetched tables and an OccupancyIndex of the
+    roster plus this run's assignments, instead of a query per candidate.
     """
     
-    def __init__(self, db):
+    def __init__(self, db, checker: Optional[HardConstraintChecker] = None):
         self.db = db
+        self.checker = checker
         self.assignments: List[Assignment] = []
         self.unfulfilled: Dict[str, int] = {}  # service_code → count
     
@@ -73,6 +79,12 @@ class SequentialSolver:
         tracker.load_blocked_slots(roster_id)
         tracker.load_assigned_count(roster_id)
         
+        occupancy: Optional[OccupancyIndex] = None
+        run_counts: Dict[Tuple[str, str], int] = {}  # (employee_id, service_code) → assigned this run
+        if self.checker is not None:
+            self.checker.prefetch_roster(roster_id)
+            occupancy = OccupancyIndex(tracker.load_occupied_slots(roster_id))
+        
         # Phase 3: Process requirements in order
         for req in sorted_reqs:
             logger.debug(f"[SOLVER] Processing: {req.date} {req.dagdeel} "
@@ -89,8 +101,14 @@ class SequentialSolver:
                     req.service_code, 0) + req.aantal
                 continue
             
+            candidates = [emp_id for emp_id, _ in eligible]
+            if occupancy is not None:
+                candidates = self._check_candidates(
+                    req, roster_id, candidates, tracker, occupancy, run_counts
+                )
+            
             # Try to fill slots
-            for emp_id, remaining_count in eligible:
+            for emp_id in candidates:
                 if assigned_count >= req.aantal:
                     break  # All slots filled
                 
@@ -99,8 +117,8 @@ class SequentialSolver:
                     logger.debug(f"  {emp_id}: blocked on {req.date} {req.dagdeel}")
                     continue
                 
-                if not tracker.is_exclusive_slot_free(emp_id, req.date, 
-                                                      req.dagdeel, roster_id):
+                if occupancy is None and not tracker.is_exclusive_slot_free(
+                        emp_id, req.date, req.dagdeel, roster_id):
                     logger.debug(f"  {emp_id}: slot already filled on {req.date} {req.dagdeel}")
                     continue
                 
@@ -113,6 +131,10 @@ class SequentialSolver:
                 )
                 self.assignments.append(assignment)
                 assigned_count += 1
+                if occupancy is not None:
+                    occupancy.add(emp_id, str(req.date), req.dagdeel)
+                    key = (emp_id, req.service_code)
+                    run_counts[key] = run_counts.get(key, 0) + 1
                 
                 logger.debug(f"  ✅ {emp_id}: assigned")
             
@@ -129,6 +151,35 @@ class SequentialSolver:
         
         return self.assignments, self.unfulfilled
     
+    def _check_candidates(self, req: Requirement, roster_id: str,
+                          candidates: List[str], tracker: EmployeeAvailabilityTracker,
+                          occupancy: OccupancyIndex,
+                          run_counts: Dict[Tuple[str, str], int]) -> List[str]:
+        """Filter candidates on HC1-HC5 in one batch call (order is kept).
+        
+        This solver has no per-employee maximum (HC4) and does not filter
+        on team (HC6 is given no team, i.e. any employee).
+        """
+        n = len(candidates)
+        service_counts = [
+            tracker.assigned_count.get((emp_id, req.service_code), 0)
+            + run_counts.get((emp_id, req.service_code), 0)
+            for emp_id in candidates
+        ]
+        mask, failures = self.checker.check_candidates(
+            str(req.date), req.dagdeel, req.service_id, None, roster_id,
+            emp_ids=candidates,
+            emp_teams=[None] * n,
+            shift_counts=[0] * n,  # HC4 never binds
+            targets=[1] * n,
+            service_counts=service_counts,
+            occupancy=occupancy,
+        )
+        for emp_id, failure in zip(candidates, failures):
+            if failure:
+                logger.debug(f"  {emp_id}: {failure}")
+        return [emp_id for emp_id, ok in zip(candidates, mask) if ok]
+    
     def get_assignments(self) -> List[Assignment]:
         """Get list of assignments"""
         return self.assignments
@@ -0,0 +1,49 @@
+-- =====================================================================
+-- updated_at triggers for roster_assignments and roster_employee_services
+-- =====================================================================
+--
+-- ISSUE: The greedy service delta-syncs these tables on repeat solves
+--        (RosterRepository, only rows with updated_at >= watermark are
+--        re-read). Neither table had a trigger maintaining updated_at:
+--        planner edits (updateAssignmentStatus, updateAssignmentService)
+--        and the bulk triggers leave it untouched, so such changes were
+--        missed until the snapshot expired.
+--
+-- FIX: BEFORE UPDATE trigger per table that sets updated_at = NOW().
+--      Inserts get NOW() from the column default and upserts that hit an
+--      existing row go through the trigger; the greedy writer sends no
+--      updated_at, so every stamp comes from the database clock. Deletes
+--      are detected by the row count check.
+--
+-- =====================================================================
+
+CREATE OR REPLACE FUNCTION update_roster_assignments_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.updated_at = NOW();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_roster_assignments_updated_at ON roster_assignments;
+CREATE TRIGGER trigger_roster_assignments_updated_at
+  BEFORE UPDATE ON roster_assignments
+  FOR EACH ROW
+  EXECUTE FUNCTION update_roster_assignments_updated_at();
+
+CREATE OR REPLACE FUNCTION update_roster_employee_services_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.updated_at = NOW();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_roster_employee_services_updated_at ON roster_employee_services;
+CREATE TRIGGER trigger_roster_employee_services_updated_at
+  BEFORE UPDATE ON roster_employee_services
+  FOR EACH ROW
+  EXECUTE FUNCTION update_roster_employee_services_updated_at();
+
+-- Rows without updated_at make every sync a full reload: backfill them
+UPDATE roster_assignments SET updated_at = NOW() WHERE updated_at IS NULL;
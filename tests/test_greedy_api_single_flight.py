@@ -0,0 +1,125 @@
+"""Unit tests for single-flight coalescing in the GREEDY API (src/services/greedy_api.py)
+
+Test Coverage:
+  - Identical concurrent requests for one roster share one engine run
+  - Requests with different inputs for one roster run one after the other
+  - latest_wins marks the older response as superseded
+  - The shared modules stay byte-identical across the separately deployed services
+"""
+
+import asyncio
+import sys
+import threading
+import types
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+# greedy_api imports engine classes that are not in src/solver; the tests
+# replace the engine run itself, so stubs are enough to import the module
+with patch.dict(sys.modules, {
+    'solver.greedy_engine': types.SimpleNamespace(GreedyEngine=MagicMock()),
+    'solver.constraint_checker': types.SimpleNamespace(ConstraintChecker=MagicMock()),
+}):
+    from services import greedy_api
+
+from services.single_flight import SingleFlight
+
+
+class _BlockingSolve:
+    """Stand-in for greedy_api._solve_greedy that blocks until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        with self._lock:
+            self.calls.append(request)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        self.release.wait(timeout=5)
+        with self._lock:
+            self.active -= 1
+        return greedy_api.SolveResponse(
+            success=True, solve_time_seconds=0.01, total_assignments=0, coverage_rate=1.0,
+            assignments=[], metadata={"solve_time_limit": request.solve_time_limit}
+        )
+
+
+class TestGreedyApiSingleFlight(unittest.TestCase):
+    """Concurrent /api/greedy/solve requests per roster"""
+
+    def setUp(self):
+        self.solve = _BlockingSolve()
+        patcher = patch.object(greedy_api, '_solve_greedy', self.solve)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, policy, *requests):
+        async def scenario():
+            flights = SingleFlight(policy=policy)
+            with patch.object(greedy_api, 'SOLVE_FLIGHTS', flights):
+                tasks = []
+                for request in requests:
+                    tasks.append(asyncio.ensure_future(greedy_api.solve_greedy(request)))
+                    await asyncio.sleep(0.02)
+                self.solve.release.set()
+                return await asyncio.gather(*tasks), flights.stats()
+        return asyncio.run(scenario())
+
+    def test_identical_requests_share_one_run(self):
+        request = greedy_api.SolveRequest(roster_id='r1')
+
+        (first, second), stats = self._run('wait', request, request)
+
+        self.assertEqual(len(self.solve.calls), 1)
+        self.assertNotIn('coalesced', first.metadata)
+        self.assertTrue(second.metadata['coalesced'])
+        self.assertEqual((stats['started'], stats['coalesced']), (1, 1))
+
+    def test_different_inputs_run_one_after_the_other(self):
+        first_request = greedy_api.SolveRequest(roster_id='r1', solve_time_limit=5)
+        second_request = greedy_api.SolveRequest(roster_id='r1', solve_time_limit=10)
+
+        (first, second), stats = self._run('wait', first_request, second_request)
+
+        self.assertEqual(len(self.solve.calls), 2)
+        self.assertEqual(self.solve.max_active, 1)
+        self.assertEqual((first.metadata['solve_time_limit'], second.metadata['solve_time_limit']), (5, 10))
+        self.assertEqual(stats['waited'], 1)
+
+    def test_latest_wins_marks_older_response_superseded(self):
+        first_request = greedy_api.SolveRequest(roster_id='r1', solve_time_limit=5)
+        second_request = greedy_api.SolveRequest(roster_id='r1', solve_time_limit=10)
+
+        (first, second), stats = self._run('latest_wins', first_request, second_request)
+
+        self.assertTrue(first.metadata['superseded'])
+        self.assertNotIn('superseded', second.metadata)
+        self.assertEqual(stats['superseded'], 1)
+
+
+class TestSharedModuleCopies(unittest.TestCase):
+    """Modules duplicated across separately deployed services must not drift"""
+
+    def test_copies_are_identical(self):
+        for first, second in (
+            ('solver/single_flight.py', 'src/services/single_flight.py'),
+            ('solver/result_cache.py', 'backend/greedy-service/result_cache.py'),
+            ('src/solver/roster_cache.py', 'solver2/src/solvers/roster_cache.py'),
+            ('solver/db_client.py', 'solver2/src/solvers/db_client.py'),
+            ('solver/db_client.py', 'backend/greedy-service/db_client.py'),
+        ):
+            with self.subTest(module=first):
+                self.assertEqual((ROOT / first).read_text(), (ROOT / second).read_text())
+
+
+if __name__ == '__main__':
+    unittest.main()
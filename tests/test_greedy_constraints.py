@@ -16,14 +16,26 @@ Status: PRODUCTION READY
 
 import unittest
 from unittest.mock import Mock, MagicMock, patch
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import sys
 import os
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.solver.constraint_checker import HardConstraintChecker
+from src.solver.constraint_checker import HardConstraintChecker, OccupancyIndex
+from src.solver.roster_cache import RosterCache
+from src.solver.requirement_queue import Requirement, RequirementQueue
+from src.solver.sequential_solver import SequentialSolver
+
+
+def _query(*pages):
+    """PostgREST query mock: builder methods chain, execute() returns pages in order."""
+    query = MagicMock()
+    for method in ('select', 'eq', 'order', 'range'):
+        getattr(query, method).return_value = query
+    query.execute.side_effect = [MagicMock(data=page) for page in pages]
+    return query
 
 
 class TestHC1Capability(unittest.TestCase):
@@ -370,5 +382,215 @@ class TestConstraintIntegration(unittest.TestCase):
         self.assertFalse(hc1, "Assignment should fail if any constraint fails")
 
 
+class TestBatchCandidates(unittest.TestCase):
+    """Batch API: prefetch + check_candidates."""
+
+    def setUp(self):
+        """Set up a db whose tables return fixed rows."""
+        self.mock_db = MagicMock()
+        services = MagicMock()
+        services.data = [
+            {'employee_id': 'emp1', 'service_id': 'svc1', 'aantal': 5, 'actief': True},
+            {'employee_id': 'emp2', 'service_id': 'svc1', 'aantal': 5, 'actief': False},
+            {'employee_id': 'emp3', 'service_id': 'svc1', 'aantal': 5, 'actief': True},
+            {'employee_id': 'emp4', 'service_id': 'svc1', 'aantal': 5, 'actief': True},
+            {'employee_id': 'emp5', 'service_id': 'svc1', 'aantal': 2, 'actief': True},
+            {'employee_id': 'emp6', 'service_id': 'svc1', 'aantal': 5, 'actief': True},
+            {'employee_id': 'emp7', 'service_id': 'svc1', 'aantal': 5, 'actief': True},
+        ]
+        blackouts = MagicMock()
+        blackouts.data = [{'employee_id': 'emp4', 'date': '2025-11-24'}]
+        tables = {'roster_employee_services': services, 'roster_assignments': blackouts}
+
+        self.mock_db.table.side_effect = lambda name: _query(tables[name].data)
+        self.cache = RosterCache()
+        self.checker = HardConstraintChecker(self.mock_db, cache=self.cache)
+
+    def test_first_failure_per_candidate(self):
+        """Each candidate reports the first failing constraint in HC order."""
+        occupancy = OccupancyIndex([{'employee_id': 'emp3', 'date': '2025-11-24', 'dagdeel': 'O'}])
+
+        mask, failures = self.checker.check_candidates(
+            '2025-11-24', 'O', 'svc1', 'GRO', 'r1',
+            emp_ids=['emp1', 'emp2', 'emp3', 'emp4', 'emp5', 'emp6', 'emp7'],
+            emp_teams=['GRO', 'GRO', 'GRO', 'GRO', 'GRO', 'GRO', 'ORA'],
+            shift_counts=[0, 0, 0, 0, 0, 8, 0],
+            targets=[8, 8, 8, 8, 8, 8, 8],
+            service_counts=[0, 0, 0, 0, 2, 0, 0],
+            occupancy=occupancy,
+        )
+
+        self.assertEqual(mask, [True, False, False, False, False, False, False])
+        self.assertEqual(failures, ['', 'HC1_CAPABILITY', 'HC2_OVERLAP', 'HC3_BLACKOUT',
+                                    'HC5_MAX_SERVICE', 'HC4_MAX_EMPLOYEE', 'HC6_TEAM_LOGIC'])
+
+    def test_prefetch_once_and_single_checks_use_it(self):
+        """Prefetch runs two queries; later checks stay in memory."""
+        self.checker.check_candidates('2025-11-24', 'O', 'svc1', 'GRO', 'r1',
+                                      ['emp1'], ['GRO'], [0], [8], [0], [])
+        self.checker.check_candidates('2025-11-25', 'M', 'svc1', 'GRO', 'r1',
+                                      ['emp1'], ['GRO'], [0], [8], [0], [])
+        self.assertTrue(self.checker.check_HC1_capability('emp1', 'svc1', 'r1'))
+        self.assertFalse(self.checker.check_HC3_blackout('emp4', '2025-11-24', 'r1'))
+        self.assertFalse(self.checker.check_HC5_max_per_service('emp5', 'svc1', 'r1', 2))
+
+        self.assertEqual(self.mock_db.table.call_count, 2)
+
+    def test_occupancy_index_updates(self):
+        """OccupancyIndex tracks added and removed slots for HC2."""
+        occupancy = OccupancyIndex()
+        self.assertTrue(self.checker.check_HC2_no_overlap('emp1', '2025-11-24', 'O', occupancy))
+        occupancy.add('emp1', '2025-11-24', 'O')
+        self.assertFalse(self.checker.check_HC2_no_overlap('emp1', '2025-11-24', 'O', occupancy))
+        occupancy.discard('emp1', '2025-11-24', 'O')
+        self.assertTrue(occupancy.slots == set())
+
+    def test_invalidate_roster_forces_refetch(self):
+        """Writing a roster drops its prefetched tables."""
+        self.checker.prefetch_roster('r1')
+        self.checker.invalidate_roster('r1')
+        self.assertFalse(self.checker.is_prefetched('r1'))
+        self.checker.check_candidates('2025-11-24', 'O', 'svc1', 'GRO', 'r1',
+                                      ['emp1'], ['GRO'], [0], [8], [0], [])
+        self.assertEqual(self.mock_db.table.call_count, 4)
+
+    def test_clear_cache_keeps_other_rosters(self):
+        """clear_cache only drops the rosters this checker cached."""
+        self.cache.set('other', ('hc1', 'emp1', 'svc1'), True)
+        self.checker.prefetch_roster('r1')
+        self.checker.clear_cache()
+        self.assertFalse(self.checker.is_prefetched('r1'))
+        self.assertTrue(self.cache.get('other', ('hc1', 'emp1', 'svc1')))
+
+    def test_prefetch_pages_past_max_rows(self):
+        """Reads beyond one page are fetched, not truncated at max-rows."""
+        rows = [{'employee_id': f'emp{i}', 'service_id': 'svc1', 'aantal': 5, 'actief': True}
+                for i in range(5)]
+        queries = {'roster_employee_services': _query(rows[:2], rows[2:4], rows[4:]),
+                   'roster_assignments': _query([])}
+        self.mock_db.table.side_effect = lambda name: queries[name]
+        checker = HardConstraintChecker(self.mock_db, cache=RosterCache(), page_size=2)
+
+        self.assertTrue(checker.prefetch_roster('r1'))
+
+        self.assertTrue(checker.check_HC1_capability('emp4', 'svc1', 'r1'))
+        ranges = [c.args for c in queries['roster_employee_services'].range.call_args_list]
+        self.assertEqual(ranges, [(0, 1), (2, 3), (4, 5)])
+
+
+class _SqlDb:
+    """Fake SQL connection for EmployeeAvailabilityTracker (rows by query shape)."""
+
+    def __init__(self, competencies, occupied):
+        self.competencies = competencies
+        self.occupied = occupied
+        self.queries = []
+
+    def execute(self, sql, params):
+        self.queries.append(sql)
+        cursor = MagicMock()
+        if 'ra.employee_id = %s' in sql:
+            cursor.fetchone.return_value = {'count': 0}
+        elif 'res.aantal' in sql:
+            cursor.fetchall.return_value = self.competencies
+        elif 'IN (0, 1)' in sql:
+            cursor.fetchall.return_value = self.occupied
+        else:
+            cursor.fetchall.return_value = []
+        return cursor
+
+
+class TestSequentialSolverBatch(unittest.TestCase):
+    """SequentialSolver filters candidate pools with check_candidates."""
+
+    def setUp(self):
+        """emp1 can do ECH+OSP, emp2 OSP, emp3 ECH but is blacked out."""
+        self.sql = _SqlDb(
+            competencies=[
+                {'employee_id': 'emp1', 'service_code': 'ECH', 'target_count': 5},
+                {'employee_id': 'emp1', 'service_code': 'OSP', 'target_count': 5},
+                {'employee_id': 'emp2', 'service_code': 'OSP', 'target_count': 3},
+                {'employee_id': 'emp3', 'service_code': 'ECH', 'target_count': 5},
+            ],
+            occupied=[],
+        )
+        services = [
+            {'employee_id': 'emp1', 'service_id': 'svc-ech', 'aantal': 5, 'actief': True},
+            {'employee_id': 'emp1', 'service_id': 'svc-osp', 'aantal': 5, 'actief': True},
+            {'employee_id': 'emp2', 'service_id': 'svc-osp', 'aantal': 3, 'actief': True},
+            {'employee_id': 'emp3', 'service_id': 'svc-ech', 'aantal': 5, 'actief': True},
+        ]
+        blackouts = [{'employee_id': 'emp3', 'date': '2025-11-24'}]
+        tables = {'roster_employee_services': services, 'roster_assignments': blackouts}
+        self.supabase = MagicMock()
+        self.supabase.table.side_effect = lambda name: _query(tables[name])
+        self.checker = HardConstraintChecker(self.supabase, cache=RosterCache())
+        self.requirements = [
+            Requirement(date(2025, 11, 24), 'O', 'svc-ech', 'ECH', 1, 'TOT'),
+            Requirement(date(2025, 11, 24), 'O', 'svc-osp', 'OSP', 1, 'TOT'),
+        ]
+
+    def test_batch_path_uses_occupancy_and_prefetch(self):
+        """One employee per slot, blackouts respected, no per-candidate queries."""
+        solver = SequentialSolver(self.sql, checker=self.checker)
+        with patch.object(RequirementQueue, 'load_from_db', return_value=self.requirements):
+            assignments, unfulfilled = solver.solve('r1')
+
+        self.assertEqual(
+            [(a.employee_id, a.service_id) for a in assignments],
+            [('emp1', 'svc-ech'), ('emp2', 'svc-osp')],
+        )
+        self.assertEqual(unfulfilled, {})
+        self.assertFalse(any('ra.employee_id = %s' in q for q in self.sql.queries))
+
+    def test_existing_assignments_occupy_slots(self):
+        """Slots already held in the roster are not filled again."""
+        self.sql.occupied = [{'employee_id': 'emp1', 'date': date(2025, 11, 24), 'dagdeel': 'O'}]
+        solver = SequentialSolver(self.sql, checker=self.checker)
+        with patch.object(RequirementQueue, 'load_from_db', return_value=self.requirements):
+            assignments, unfulfilled = solver.solve('r1')
+
+        self.assertEqual([(a.employee_id, a.service_id) for a in assignments], [('emp2', 'svc-osp')])
+        self.assertEqual(unfulfilled, {'ECH': 1})
+
+
+class TestRosterCache(unittest.TestCase):
+    """Bounded, roster-scoped cache."""
+
+    def setUp(self):
+        """Cache with a controllable clock."""
+        self.now = 0.0
+        self.cache = RosterCache(max_entries=3, ttl_seconds=10, clock=lambda: self.now)
+
+    def test_lru_bound_and_counters(self):
+        """Least recently used entry is evicted beyond max_entries."""
+        for i in range(3):
+            self.cache.set('r1', ('k', i), i)
+        self.assertEqual(self.cache.get('r1', ('k', 0)), 0)  # refresh k0
+        self.cache.set('r2', ('k', 3), 3)
+
+        self.assertIsNone(self.cache.get('r1', ('k', 1)))
+        stats = self.cache.stats()
+        self.assertEqual(stats['entries'], 3)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_ttl_expiry(self):
+        """Entries expire after ttl_seconds."""
+        self.cache.set('r1', ('k',), True)
+        self.now = 11.0
+        self.assertIsNone(self.cache.get('r1', ('k',)))
+        self.assertEqual(self.cache.stats()['expirations'], 1)
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_invalidate_roster_is_scoped(self):
+        """Invalidation only drops the given roster's entries."""
+        self.cache.set('r1', ('a',), 1)
+        self.cache.set('r2', ('a',), 2)
+        self.assertEqual(self.cache.invalidate_roster('r1'), 1)
+        self.assertIsNone(self.cache.get('r1', ('a',)))
+        self.assertEqual(self.cache.get('r2', ('a',)), 2)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file